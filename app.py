@@ -1,6 +1,8 @@
 import streamlit as st
 from core import auth
 from core.config import AppConfig
+from core.services import get_registry
+from core.instrumentation import get_query_monitor
 from ui import layout
 
 # Import Modules
@@ -22,11 +24,18 @@ st.set_page_config(
 )
 
 def main():
+    # 0. Per-rerun hooks on shared services + query stats for this run
+    get_registry().begin_rerun()
+    monitor = get_query_monitor()
+    monitor.begin_rerun()
+
     # 1. Auth Guard
     auth.require_auth()
 
     # 2. Layout & Navigation
     selected_page = layout.render_sidebar()
+    user = st.session_state.get("user")
+    monitor.set_page(selected_page, user_id=getattr(user, "id", None))
 
     # 3. Routing
     if selected_page == "dashboard":
@@ -0,0 +1,107 @@
+"""
+Synthetic shop-floor data for benchmarks.
+
+generate() fills a DatabaseService (normally the local SQLite backend) with
+sections, an operations catalog, skilled workers, orders and their
+operations, all drawn from a seeded random generator so a spec always
+produces the same dataset.
+"""
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+
+@dataclass
+class ShopFloorSpec:
+    orders: int = 200
+    ops_per_order: tuple = (3, 6)       # min, max operations per order
+    sections: int = 8
+    workers: int = 40
+    skills_per_worker: int = 2          # extra catalog keys / section names in operation_types
+    catalog_size: int = 60
+    parallel_share: float = 0.3         # orders whose first two operations run in parallel
+    capacity_minutes: float = 0         # per section and day; 0 = unlimited
+    horizon_days: int = 30              # order start dates are spread over this many days
+    lead_days: tuple = (3, 15)          # shipping date after the start date
+    start: date = date(2024, 3, 4)
+    seed: int = 1
+
+
+def _rows(n, build):
+    return [build(i) for i in range(n)]
+
+
+def generate(db, spec: ShopFloorSpec) -> dict:
+    """Insert the dataset; returns the number of rows per table."""
+    rng = random.Random(spec.seed)
+
+    sections = _rows(spec.sections, lambda i: {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "name": f"Section {i + 1}",
+        "capacity_minutes": spec.capacity_minutes,
+    })
+    catalog = _rows(spec.catalog_size, lambda i: {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "operation_key": f"OP-{i + 1:04d}",
+        "section": sections[i % spec.sections]["name"],
+        "norm_time": round(rng.uniform(0.5, 4.0), 2),
+    })
+
+    def worker(i):
+        skills = rng.sample(catalog, min(spec.skills_per_worker, len(catalog)))
+        other = sections[rng.randrange(spec.sections)]["name"]
+        return {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "full_name": f"Worker {i + 1}",
+            "section_id": sections[i % spec.sections]["id"],
+            "operation_types": [s["operation_key"] for s in skills] + [other],
+        }
+    workers = _rows(spec.workers, worker)
+
+    orders, operations = [], []
+    for n in range(spec.orders):
+        start = spec.start + timedelta(days=rng.randrange(spec.horizon_days))
+        order_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        quantity = rng.randrange(10, 200)
+        orders.append({
+            "id": order_id,
+            "order_number": f"BENCH-{n + 1:05d}",
+            "product_name": f"Product {rng.randrange(50)}",
+            "quantity": quantity,
+            "start_date": start.isoformat(),
+            "shipping_date": (start + timedelta(days=rng.randrange(*spec.lead_days))).isoformat(),
+            "created_at": datetime.combine(start, datetime.min.time()).isoformat(),
+        })
+        parallel = rng.random() < spec.parallel_share
+        count = rng.randint(*spec.ops_per_order)
+        ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(count)]
+        for k, op_id in enumerate(ids):
+            entry = rng.choice(catalog)
+            section = next(s for s in sections if s["name"] == entry["section"])
+            if parallel and k < 2:
+                preds = []
+            elif parallel and k == 2:
+                preds = ids[:2]
+            else:
+                preds = None
+            operations.append({
+                "id": op_id,
+                "order_id": order_id,
+                "operation_catalog_id": entry["id"],
+                "operation_name": entry["operation_key"],
+                "section_id": section["id"],
+                "quantity": quantity,
+                "norm_time_per_unit": entry["norm_time"],
+                "sort_order": k + 1,
+                "predecessor_ids": preds,
+                "planned_date": (start + timedelta(days=k)).isoformat(),
+            })
+
+    for table, rows in (("sections", sections), ("operations_catalog", catalog), ("workers", workers),
+                        ("orders", orders), ("order_operations", operations)):
+        db.table(table).insert(rows).execute()
+    return {
+        "sections": len(sections), "operations_catalog": len(catalog), "workers": len(workers),
+        "orders": len(orders), "order_operations": len(operations),
+    }
@@ -0,0 +1,163 @@
+"""
+Regression benchmark for the planning-dashboard projection.
+
+    python -m benchmarks.projection --rows 10000 100000 --out benchmarks/results.jsonl
+
+Builds an order_operations frame of each size (mostly chains, some orders with
+parallel branches, one section on its own calendar) and times
+project_schedule() column-wise against the per-order reference pass
+(vectorized=False), checking that both give the same times, slack and
+critical flags. Frames up to --legacy-limit rows are also timed with the
+previous row-by-row implementation (iterrows + df.at) for the speed-up.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.run import git_version
+from modules.analytics.projection import project_schedule
+from modules.scheduling.workcalendar import CalendarSet, WorkCalendar, default_shifts
+
+START = date(2024, 3, 4)
+
+
+def calendars() -> CalendarSet:
+    day = WorkCalendar(default_shifts("08:00-17:00", "12:00-13:00", "1,2,3,4,5"), origin=START)
+    night = WorkCalendar(default_shifts("22:00-06:00", "", "1,2,3,4,5"), origin=START)
+    return CalendarSet(day, {"s-night": night})
+
+
+def frame(rows: int, seed: int = 1, parallel_share: float = 0.1, sections: int = 8) -> pd.DataFrame:
+    rng = random.Random(seed)
+    names = [f"s{i}" for i in range(sections - 1)] + ["s-night"]
+    records = []
+    while len(records) < rows:
+        order_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        planned = START + timedelta(days=rng.randrange(60))
+        count = rng.randint(3, 6)
+        ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(count)]
+        parallel = rng.random() < parallel_share
+        for k, op_id in enumerate(ids):
+            preds = None
+            if parallel:
+                preds = [] if k < 2 else (ids[:2] if k == 2 else [ids[k - 1]])
+            records.append({
+                "id": op_id,
+                "order_id": order_id,
+                "section_id": rng.choice(names) if rng.random() < 0.2 else names[k % (sections - 1)],
+                "planned_date": planned.isoformat(),
+                "sort_order": k + 1,
+                "total_estimated_time": float(rng.randrange(0, 600)),
+                "predecessor_ids": preds,
+            })
+    return pd.DataFrame(records[:rows])
+
+
+def legacy_projection(df: pd.DataFrame, calendars) -> pd.DataFrame:
+    """The row-by-row projection get_planning_data used before (iterrows + df.at), for timing."""
+    from modules.scheduling.engine import Operation
+    from modules.scheduling.network import critical_path, predecessors, topological
+
+    df = df.sort_values(by=["order_id", "planned_date", "sort_order"])
+    df["start_time"] = pd.NaT
+    df["end_time"] = pd.NaT
+    df["slack_minutes"] = 0.0
+    df["critical"] = False
+    for order_id, group in df.groupby("order_id", sort=False):
+        rows, ops = {}, []
+        for position, (idx, row) in enumerate(group.iterrows()):
+            links = row.get("predecessor_ids")
+            ops.append(Operation(id=row["id"], order_id=order_id, section_id=row.get("section_id"),
+                                 sort_order=position, predecessors=links if isinstance(links, list) else None))
+            rows[row["id"]] = (idx, row)
+        first = group.iloc[0]
+        p_date = pd.to_datetime(first.get("planned_date")) if pd.notna(first.get("planned_date")) \
+            else pd.Timestamp.now().normalize()
+        origin = p_date.replace(hour=9, minute=0).to_pydatetime()
+        links = predecessors(ops)
+        ordered, _ = topological(ops, links)
+        durations = {op_id: float(row.get("total_estimated_time", 0) or 0) for op_id, (_, row) in rows.items()}
+        timings = critical_path(ordered, links, durations)
+        ends = {}
+        for op in ordered:
+            idx, row = rows[op.id]
+            ready = max([origin] + [ends[p] for p in links[op.id] if p in ends])
+            calendar = calendars.for_section(row.get("section_id"))
+            start = calendar.next_working(ready)
+            end = calendar.add_minutes(start, durations[op.id])
+            df.at[idx, "start_time"] = start
+            df.at[idx, "end_time"] = end
+            df.at[idx, "slack_minutes"] = timings[op.id].slack
+            df.at[idx, "critical"] = timings[op.id].critical
+            ends[op.id] = end
+    return df
+
+
+def compare(fast: pd.DataFrame, reference: pd.DataFrame) -> dict:
+    """Largest differences between the two projections."""
+    seconds = lambda col: float(np.abs((fast[col] - reference[col]).dt.total_seconds()).max())
+    return {
+        "max_start_diff_s": seconds("start_time"),
+        "max_end_diff_s": seconds("end_time"),
+        "max_slack_diff": float(np.abs(fast["slack_minutes"] - reference["slack_minutes"]).max()),
+        "critical_mismatches": int((fast["critical"] != reference["critical"]).sum()),
+    }
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, round(time.perf_counter() - started, 4)
+
+
+def run(rows: int, reference: bool = True, legacy_limit: int = 20_000, seed: int = 1) -> dict:
+    df = frame(rows, seed)
+    fast, seconds = timed(lambda: project_schedule(df, calendars()))
+    entry = {"case": "planning_projection", "rows": rows, "vectorized_s": seconds}
+    if reference:
+        slow, entry["reference_s"] = timed(lambda: project_schedule(df, calendars(), vectorized=False))
+        entry.update(compare(fast, slow))
+    if reference and rows <= legacy_limit:
+        old, entry["legacy_s"] = timed(lambda: legacy_projection(df, calendars()))
+        entry["speedup"] = round(entry["legacy_s"] / max(seconds, 1e-9), 1)
+        entry["legacy_max_end_diff_s"] = compare(fast, old)["max_end_diff_s"]
+    return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the planning Gantt projection")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--no-reference", action="store_true", help="time the vectorized projection only")
+    parser.add_argument("--legacy-limit", type=int, default=20_000,
+                        help="largest frame to time the old row-by-row projection on")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="append the report as a JSON line to this file")
+    args = parser.parse_args(argv)
+
+    report = {
+        "version": git_version(),
+        "results": [run(rows, reference=not args.no_reference, legacy_limit=args.legacy_limit, seed=args.seed)
+                    for rows in args.rows],
+    }
+    if args.out:
+        folder = os.path.dirname(args.out)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
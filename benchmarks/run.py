@@ -0,0 +1,176 @@
+"""
+Scheduler benchmark harness.
+
+    python -m benchmarks.run --orders 500 --workers 60 --out benchmarks/results.jsonl
+
+Generates a synthetic shop floor (generate.py) in an in-memory SQLite
+backend, runs the scheduling, assignment and analytics builders against it
+and prints one JSON report; with --out the report is appended as a JSON line
+so results can be compared across versions. Every case reports wall time,
+peak Python memory (tracemalloc), DB calls and rows, and the scheduling
+cases add plan quality: makespan, tardiness and utilization.
+
+tracemalloc slows Python code down several times, so timings come from a
+pass without it and peak memory from a second pass over an identical
+dataset (same seed); --no-memory skips the second pass.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import datetime
+from typing import Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.database import DatabaseService
+from core.instrumentation import QueryMonitor
+from core.local_db import SQLiteBackend
+from benchmarks.generate import ShopFloorSpec, generate
+from modules.analytics.services import AnalyticsService
+from modules.scheduling.services import SchedulingService
+
+
+def git_version() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def measure(monitor: QueryMonitor, fn, trace_memory: bool = False):
+    """(result, metrics) of one call: wall time and DB traffic, or peak traced memory."""
+    monitor.reset()
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            result = fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, {"peak_mb": round(peak / 2 ** 20, 2)}
+
+    started = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - started
+    return result, {
+        "wall_s": round(wall, 4),
+        "db_calls": sum(v["calls"] for v in monitor.by_shape.values()),
+        "db_rows": sum(v["rows"] for v in monitor.by_shape.values()),
+    }
+
+
+def plan_quality(plan, workers: int, calendar) -> dict:
+    """Makespan, tardiness and worker utilization of a scheduling Plan."""
+    ops = [op for op in plan.operations.values() if op.start is not None and op.end is not None]
+    if not ops:
+        return {"makespan_h": 0.0, "late_orders": 0, "tardiness_days": 0.0, "utilization": 0.0, "unassigned": 0}
+    first, last = min(op.start for op in ops), max(op.end for op in ops)
+    available = calendar.working_minutes(first, last) * max(workers, 1)
+    booked = sum(op.minutes for op in ops if op.worker_id)
+    return {
+        "makespan_h": round((last - first).total_seconds() / 3600, 2),
+        "late_orders": len(plan.late),
+        "tardiness_days": round(sum(r["delay_days"] for r in plan.late), 2),
+        "utilization": round(booked / available, 4) if available else 0.0,
+        "unassigned": len(plan.unassigned),
+    }
+
+
+def cases(db, spec: ShopFloorSpec) -> list:
+    """(name, callable) pairs, run in this order on one database."""
+    scheduling = SchedulingService(db)
+    analytics = AnalyticsService(db=db)
+    first_day = spec.start.isoformat()
+    return [
+        ("replan_all", lambda: scheduling.replan_all()),
+        ("replan_all_finite_edd", lambda: scheduling.replan_all(finite=True, rule="edd")),
+        ("assign_day_greedy", lambda: scheduling.assign_day(first_day, method="greedy")),
+        ("assign_day_matching", lambda: scheduling.assign_day(first_day, method="matching")),
+        ("planning_data", lambda: analytics.get_planning_data()),
+        ("refresh_facts", lambda: analytics.refresh_facts()),
+        ("refresh_facts_unchanged", lambda: analytics.refresh_facts()),
+        ("delivery_kpis", lambda: analytics.calculate_kpis()),
+        ("section_metrics", lambda: analytics.get_section_metrics_summary(spec.start)),
+        ("section_utilization_week", lambda: analytics.get_section_utilization(spec.start, num_days=7)),
+    ]
+
+
+def run(spec: ShopFloorSpec, trace_memory: bool = True) -> dict:
+    monitor = QueryMonitor(slow_sink="off")
+    db = DatabaseService(backend=SQLiteBackend(), monitor=monitor)
+    counts, generated = measure(monitor, lambda: generate(db, spec))
+    calendar = SchedulingService(db).load_calendars().default
+
+    results = [{"case": "generate", **generated, "rows": counts}]
+    for name, fn in cases(db, spec):
+        result, metrics = measure(monitor, fn)
+        entry = {"case": name, **metrics}
+        plan = getattr(result, "plan", None)
+        if plan is not None:
+            entry.update(plan_quality(plan, spec.workers, calendar))
+        elif hasattr(result, "assignment"):
+            entry.update(assigned=sum(1 for w in result.assignment.values() if w),
+                         unassigned=len(result.unassigned))
+        elif hasattr(result, "__len__"):
+            entry["rows_out"] = len(result)
+        results.append(entry)
+
+    if trace_memory:
+        db = DatabaseService(backend=SQLiteBackend(), monitor=monitor)
+        _, memory = measure(monitor, lambda: generate(db, spec), trace_memory=True)
+        results[0].update(memory)
+        for entry, (_, fn) in zip(results[1:], cases(db, spec)):
+            entry.update(measure(monitor, fn, trace_memory=True)[1])
+
+    spec_dict = asdict(spec)
+    spec_dict["start"] = spec.start.isoformat()
+    return {
+        "version": git_version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "spec": spec_dict,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    defaults = ShopFloorSpec()
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler on a synthetic shop floor")
+    parser.add_argument("--orders", type=int, default=defaults.orders)
+    parser.add_argument("--min-ops", type=int, default=defaults.ops_per_order[0])
+    parser.add_argument("--max-ops", type=int, default=defaults.ops_per_order[1])
+    parser.add_argument("--sections", type=int, default=defaults.sections)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--skills", type=int, default=defaults.skills_per_worker)
+    parser.add_argument("--capacity", type=float, default=defaults.capacity_minutes)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--out", help="append the report as a JSON line to this file")
+    args = parser.parse_args(argv)
+
+    spec = ShopFloorSpec(
+        orders=args.orders, ops_per_order=(args.min_ops, args.max_ops), sections=args.sections,
+        workers=args.workers, skills_per_worker=args.skills, capacity_minutes=args.capacity, seed=args.seed,
+    )
+    report = run(spec, trace_memory=not args.no_memory)
+    line = json.dumps(report, ensure_ascii=False, default=str)
+    if args.out:
+        folder = os.path.dirname(args.out)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import streamlit as st
 import time
 from core.database import DatabaseService
+from core.services import get_service
 
-db = DatabaseService()
+def _db() -> DatabaseService:
+    return get_service(DatabaseService)
 
 def init_auth():
     """Initialize session state for auth."""
@@ -27,12 +29,12 @@ def login_form():
         if submitted:
             try:
                 # 1. Authenticate with Supabase Auth
-                res = db.client.auth.sign_in_with_password({"email": email, "password": password})
+                res = _db().client.auth.sign_in_with_password({"email": email, "password": password})
                 user = res.user
                 
                 if user:
                     # 2. Fetch User Profile (Role)
-                    profile = db.get_user_profile(user.id)
+                    profile = _db().get_user_profile(user.id)
                     
                     # 3. Update Session State
                     st.session_state.authenticated = True
@@ -48,7 +50,7 @@ def login_form():
 
 def logout():
     """Log out the user and clear session."""
-    db.client.auth.sign_out()
+    _db().client.auth.sign_out()
     st.session_state.authenticated = False
     st.session_state.user = None
     st.session_state.role = None
@@ -0,0 +1,137 @@
+"""
+Batched writes for the importers.
+
+Rows go to the database in chunks of `batch_size`, with at most
+`concurrency` chunks in flight. Transient failures (timeouts, dropped
+connections, deadlocks) are retried with exponential backoff. When the
+server rejects a chunk's data it is split in halves until the offending
+rows are isolated: the good rows are still written and every failure is
+reported against its source row (e.g. the Excel row number).
+"""
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterable, Optional
+
+from core.database import DatabaseError
+
+# SQLSTATE classes / PostgREST codes that no retry will fix:
+# data exception, integrity violation, syntax or undefined object, bad request
+PERMANENT_ERROR_CODES = ("22", "23", "42", "PGRST")
+
+
+@dataclass
+class BulkResult:
+    success: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)   # [{"row", "key", "error"}]
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    @property
+    def failed_keys(self) -> list:
+        return [e["key"] for e in self.errors if e["key"] is not None]
+
+    def add_error(self, row, key, error):
+        self.errors.append({"row": row, "key": key, "error": str(error)})
+
+    def merge(self, other: "BulkResult"):
+        self.success += other.success
+        self.skipped += other.skipped
+        self.errors.extend(other.errors)
+        return self
+
+
+def is_transient(error: Exception) -> bool:
+    """Worth retrying: anything but a data/request error reported by the database."""
+    if isinstance(error, DatabaseError):
+        # Local backend: only ever constraint / validation errors
+        return False
+    code = str(getattr(error, "code", "") or "")
+    return not code.startswith(PERMANENT_ERROR_CODES)
+
+
+def chunked(items: Iterable, size: int):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _send_with_retry(send, records, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            return send(records)
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            # Exponential backoff with jitter so parallel chunks do not retry in lockstep
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+def _send_isolating(send, chunk, key, retries=0, backoff=0.5) -> BulkResult:
+    """Send `chunk` of (row, record) pairs; bisect data errors down to single rows."""
+    result = BulkResult()
+    try:
+        _send_with_retry(send, [record for _, record in chunk], retries, backoff)
+        result.success = len(chunk)
+    except Exception as e:
+        if len(chunk) == 1 or is_transient(e):
+            # Out of retries: the whole chunk failed, report every row of it
+            for row, record in chunk:
+                result.add_error(row, record.get(key) if key else None, e)
+        else:
+            middle = len(chunk) // 2
+            result.merge(_send_isolating(send, chunk[:middle], key, retries, backoff))
+            result.merge(_send_isolating(send, chunk[middle:], key, retries, backoff))
+    return result
+
+
+def write_batches(send: Callable[[list], object], items: Iterable, batch_size: int = 500,
+                  concurrency: int = 1, key: Optional[str] = None,
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  retries: int = 0, backoff: float = 0.5) -> BulkResult:
+    """
+    Write `items` - (row reference, record) pairs - through `send(records)`.
+
+    `key` names the record field echoed in error reports; `progress(done, total)`
+    is called from the calling thread after every chunk (total is None for
+    iterators). Chunks are taken from `items` lazily, so no more than
+    `concurrency` of them are held at a time.
+    """
+    result = BulkResult()
+    total = len(items) if hasattr(items, "__len__") else None
+    done = 0
+    chunks = chunked(items, max(1, batch_size))
+
+    if concurrency <= 1:
+        for chunk in chunks:
+            result.merge(_send_isolating(send, chunk, key, retries, backoff))
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+        return result
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = {}
+        for chunk in chunks:
+            if len(in_flight) >= concurrency:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result.merge(future.result())
+                    done += in_flight.pop(future)
+                    if progress:
+                        progress(done, total)
+            in_flight[pool.submit(_send_isolating, send, chunk, key, retries, backoff)] = len(chunk)
+        for future in wait(in_flight).done:
+            result.merge(future.result())
+            done += in_flight[future]
+            if progress:
+                progress(done, total)
+    return result
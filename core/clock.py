@@ -0,0 +1,58 @@
+"""
+Factory wall-clock time.
+
+Shifts, breaks and holidays (modules/scheduling/workcalendar.py) are wall
+clock times in the factory's time zone (AppConfig.FACTORY_TIMEZONE), while
+Supabase returns timestamptz values in UTC. Calendar math therefore runs on
+naive datetimes in factory time:
+
+    to_factory(value)   anything read (ISO string, date, datetime) -> naive factory time
+    factory_now()       now, on the same clock
+    stamp(dt)           naive factory time -> ISO string with the factory offset, for writing
+
+Naive input is taken to be factory time already: date columns, the SQLite
+stand-in (core/local_db.py) and timestamps written by stamp().
+"""
+from datetime import date, datetime, time
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from core.config import AppConfig
+
+FACTORY_TZ = ZoneInfo(AppConfig.FACTORY_TIMEZONE)
+
+
+def to_factory(value) -> Optional[datetime]:
+    """ISO string / date / datetime -> naive datetime in factory time (None stays None)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime.combine(value, time())
+    else:
+        # pandas, not datetime.fromisoformat: before Python 3.11 that rejects PostgREST's
+        # 1-5 digit fractions and "+00" offsets
+        dt = pd.Timestamp(str(value)).to_pydatetime()
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(FACTORY_TZ).replace(tzinfo=None)
+    return dt
+
+
+def factory_now() -> datetime:
+    return datetime.now(FACTORY_TZ).replace(tzinfo=None)
+
+
+def factory_today() -> date:
+    return factory_now().date()
+
+
+def stamp(value: Optional[datetime]) -> Optional[str]:
+    """Factory time -> ISO string with its UTC offset, so timestamptz columns store the right moment."""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        return value.astimezone(FACTORY_TZ).isoformat()
+    return value.replace(tzinfo=FACTORY_TZ).isoformat()
@@ -2,13 +2,54 @@ import streamlit as st
 import os
 from enum import Enum
 
+def get_setting(name, default=None):
+    """Read a setting from the environment first, then from st.secrets."""
+    if name in os.environ:
+        return os.environ[name]
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        # No secrets.toml (offline runs, benchmarks)
+        pass
+    return default
+
 class AppConfig:
     APP_NAME = "Production Planner"
     VERSION = "1.0.0"
     
     # Supabase Secrets
-    SUPABASE_URL = st.secrets["SUPABASE_URL"]
-    SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
+    SUPABASE_URL = get_setting("SUPABASE_URL")
+    SUPABASE_KEY = get_setting("SUPABASE_KEY")
+
+    # Data backend: "supabase" (default) or "sqlite" (local stand-in, see core/local_db.py)
+    DB_BACKEND = get_setting("MES_DB_BACKEND", "supabase")
+    SQLITE_PATH = get_setting("MES_SQLITE_PATH", ":memory:")
+
+    # Shared read cache (core/database.py QueryCache); TTL 0 disables it
+    QUERY_CACHE_TTL = float(get_setting("MES_QUERY_CACHE_TTL", 30))
+    QUERY_CACHE_SIZE = int(get_setting("MES_QUERY_CACHE_SIZE", 256))
+
+    # Query instrumentation (core/instrumentation.py)
+    QUERY_STATS = str(get_setting("MES_QUERY_STATS", "on")).lower() != "off"
+    SLOW_QUERY_MS = float(get_setting("MES_SLOW_QUERY_MS", 500))
+    SLOW_QUERY_SINK = get_setting("MES_SLOW_QUERY_SINK", "file")  # file | system_logs | off
+    SLOW_QUERY_LOG = get_setting("MES_SLOW_QUERY_LOG", "logs/slow_queries.jsonl")
+
+    # Bulk imports (core/bulk.py): rows per request and requests in flight
+    IMPORT_BATCH_SIZE = int(get_setting("MES_IMPORT_BATCH_SIZE", 500))
+    IMPORT_CONCURRENCY = int(get_setting("MES_IMPORT_CONCURRENCY", 4))
+    IMPORT_RETRIES = int(get_setting("MES_IMPORT_RETRIES", 3))
+    IMPORT_RETRY_BACKOFF = float(get_setting("MES_IMPORT_RETRY_BACKOFF", 0.5))  # seconds, doubled per retry
+    # Rows read from an import file per batch (core/ingest.py)
+    IMPORT_READ_ROWS = int(get_setting("MES_IMPORT_READ_ROWS", 5000))
+
+    # Working calendar used where no work_shifts are set up (setup_work_calendar.sql)
+    WORK_SHIFT = get_setting("MES_WORK_SHIFT", "08:00-17:00")
+    WORK_BREAKS = get_setting("MES_WORK_BREAKS", "12:00-13:00")   # comma-separated spans
+    WORK_DAYS = get_setting("MES_WORK_DAYS", "1,2,3,4,5")         # ISO weekdays, 1 = Monday
+    # Time zone of the shift hours and holidays above (core/clock.py)
+    FACTORY_TIMEZONE = get_setting("MES_FACTORY_TZ", "Europe/Kyiv")
 
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -1,4 +1,10 @@
+import re
 import streamlit as st
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
 from supabase import create_client, Client
 from core.config import AppConfig
 
@@ -11,14 +17,489 @@ def get_db_client() -> Client:
         st.error(f"Failed to connect to Supabase: {e}")
         return None
 
+@st.cache_resource
+def get_db_backend():
+    """Backend selected by AppConfig.DB_BACKEND ("supabase" or "sqlite")."""
+    if AppConfig.DB_BACKEND == "sqlite":
+        from core.local_db import SQLiteBackend
+        return SQLiteBackend(AppConfig.SQLITE_PATH)
+    return SupabaseBackend(get_db_client())
+
+@st.cache_resource
+def get_query_cache():
+    """Process-wide read cache shared by every DatabaseService on the default backend."""
+    if AppConfig.QUERY_CACHE_TTL <= 0:
+        return None
+    return QueryCache(ttl=AppConfig.QUERY_CACHE_TTL, max_entries=AppConfig.QUERY_CACHE_SIZE)
+
+
+class DatabaseError(Exception):
+    """Raised by backends for invalid requests (unknown column, bad filter, ...)."""
+
+
+# --- Query description ---
+
+def split_top_level(text, sep=","):
+    """Split on `sep` outside of (), {} and double quotes."""
+    parts, depth, quoted, escaped, buf = [], 0, False, False, []
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif quoted and ch == "\\":
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "({":
+            depth += 1
+        elif not quoted and ch in ")}":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append("".join(buf).strip())
+            buf = []
+        else:
+            buf.append(ch)
+    if "".join(buf).strip():
+        parts.append("".join(buf).strip())
+    return parts
+
+
+def quote_value(value) -> str:
+    """Double-quote a value for a PostgREST or/and expression ('article.eq."A,1"')."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def unquote_value(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r'\\(.)', r"\1", value[1:-1])
+    return value
+
+
+def parse_select(columns):
+    """
+    Parse a PostgREST select string.
+    Returns (fields, embeds): fields is a list of (alias, column) or "*",
+    embeds a list of (alias, name, hint, sub_columns).
+    """
+    fields, embeds = [], []
+    for item in split_top_level(columns or "*"):
+        alias = None
+        paren = item.find("(")
+        colon = item.find(":")
+        if colon != -1 and (paren == -1 or colon < paren) and item[colon:colon + 2] != "::":
+            alias, item = item[:colon].strip(), item[colon + 1:].strip()
+        if "(" in item:
+            head, sub = item.split("(", 1)
+            sub = sub.rsplit(")", 1)[0]
+            name, _, hint = head.strip().partition("!")
+            embeds.append((alias or name, name, hint or None, sub or "*"))
+        elif item == "*":
+            fields.append("*")
+        else:
+            column = item.split("::")[0].strip()
+            fields.append((alias or column, column))
+    return fields, embeds
+
+
+@dataclass
+class Query:
+    """Backend-neutral description of a single PostgREST request."""
+    table: str
+    action: str = "select"          # select | insert | update | upsert | delete | rpc
+    columns: str = "*"
+    filters: list = field(default_factory=list)   # [(column, operator, value)]
+    order: list = field(default_factory=list)     # [(column, desc)]
+    limit: Optional[int] = None
+    offset: Optional[int] = None
+    count: Optional[str] = None     # "exact" to return the total row count
+    head: bool = False              # count only, no rows
+    single: bool = False
+    payload: Any = None
+    on_conflict: Optional[str] = None
+
+
+@dataclass
+class QueryResult:
+    """Mirrors the .data / .count attributes of the PostgREST APIResponse."""
+    data: Any
+    count: Optional[int] = None
+
+
+class TableQuery:
+    """
+    Fluent builder with the same surface as the supabase-py query builder
+    (select/insert/update/upsert/delete + filters + order/limit + execute).
+    execute() hands the finished Query to DatabaseService.run().
+    """
+
+    def __init__(self, db, query: Query):
+        self._db = db
+        self.query = query
+
+    def _filter(self, column, op, value):
+        self.query.filters.append((column, op, value))
+        return self
+
+    # Filters (PostgREST operator names)
+    def eq(self, column, value): return self._filter(column, "eq", value)
+    def neq(self, column, value): return self._filter(column, "neq", value)
+    def gt(self, column, value): return self._filter(column, "gt", value)
+    def gte(self, column, value): return self._filter(column, "gte", value)
+    def lt(self, column, value): return self._filter(column, "lt", value)
+    def lte(self, column, value): return self._filter(column, "lte", value)
+    def like(self, column, pattern): return self._filter(column, "like", pattern)
+    def ilike(self, column, pattern): return self._filter(column, "ilike", pattern)
+    def is_(self, column, value): return self._filter(column, "is", value)
+    def in_(self, column, values): return self._filter(column, "in", list(values))
+    def contains(self, column, values): return self._filter(column, "cs", values)
+    def or_(self, expression): return self._filter(None, "or", expression)
+
+    def order(self, column, desc=False):
+        self.query.order.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self.query.limit = size
+        return self
+
+    def range(self, start, end):
+        """Inclusive row range, same as PostgREST."""
+        self.query.offset = start
+        self.query.limit = end - start + 1
+        return self
+
+    def single(self):
+        self.query.single = True
+        return self
+
+    def execute(self) -> QueryResult:
+        return self._db.run(self.query)
+
+
+class Repository:
+    """
+    Typed access to one table. The builder entry points (select/insert/update/
+    upsert/delete) mirror client.table(...); find/get/count are executed helpers.
+    """
+
+    def __init__(self, db, table: str):
+        self.db = db
+        self.table = table
+
+    def _query(self, **kwargs) -> TableQuery:
+        return TableQuery(self.db, Query(table=self.table, **kwargs))
+
+    # Builder entry points
+    def select(self, columns: str = "*", count: Optional[str] = None, head: bool = False) -> TableQuery:
+        return self._query(action="select", columns=columns, count=count, head=head)
+
+    def insert(self, rows) -> TableQuery:
+        return self._query(action="insert", payload=rows)
+
+    def update(self, values: dict) -> TableQuery:
+        return self._query(action="update", payload=values)
+
+    def upsert(self, rows, on_conflict: Optional[str] = None) -> TableQuery:
+        return self._query(action="upsert", payload=rows, on_conflict=on_conflict)
+
+    def delete(self) -> TableQuery:
+        return self._query(action="delete")
+
+    # Executed helpers
+    def find(self, columns: str = "*", filters: Optional[dict] = None, order: Optional[str] = None,
+             desc: bool = False, limit: Optional[int] = None) -> list:
+        """Rows matching all equality filters."""
+        query = self.select(columns)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        if order:
+            query = query.order(order, desc=desc)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data or []
+
+    def fetch_all(self, columns: str = "*", filters: Optional[dict] = None, page_size: int = 1000,
+                  ranges: Optional[dict] = None) -> list:
+        """
+        Every matching row, paged by id: PostgREST caps a response at
+        max-rows (1000 on Supabase), so one plain select can come back short.
+        List values are matched with in_(); `ranges` maps a column to an
+        inclusive (low, high) pair, either end None for open.
+        """
+        rows, offset = [], 0
+        while True:
+            query = self.select(columns)
+            for column, value in (filters or {}).items():
+                query = query.in_(column, value) if isinstance(value, (list, tuple, set)) else query.eq(column, value)
+            for column, (low, high) in (ranges or {}).items():
+                if low is not None:
+                    query = query.gte(column, low)
+                if high is not None:
+                    query = query.lte(column, high)
+            page = query.order("id").range(offset, offset + page_size - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+
+    def get(self, row_id, columns: str = "*") -> Optional[dict]:
+        rows = self.find(columns, {"id": row_id}, limit=1)
+        return rows[0] if rows else None
+
+    def count(self, filters: Optional[dict] = None) -> int:
+        query = self.select("id", count="exact", head=True)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        return query.execute().count or 0
+
+
+# --- Read cache ---
+
+# Writes that fan out to other tables (triggers / ON DELETE CASCADE)
+WRITE_CASCADES = {
+    "orders": ("production_steps", "order_operations", "row_deletions"),
+    "order_operations": ("quality_logs", "row_deletions", "orders"),  # orders.completed_at
+    "production_steps": ("row_deletions",),
+}
+
+# Tables read by Postgres functions called through DatabaseService.rpc()
+RPC_TABLES = {
+    "get_dashboard_stats": ("orders", "production_steps"),
+    "count_overdue_orders": ("orders", "order_operations"),
+}
+
+
+def query_tables(table, columns):
+    """Tables a select reads from: the base table plus every embedded resource."""
+    if table in RPC_TABLES:
+        return set(RPC_TABLES[table])
+    tables = {table}
+    _, embeds = parse_select(columns)
+    for _, name, hint, sub_columns in embeds:
+        tables.add(name)
+        if hint:
+            tables.add(hint)
+        tables |= query_tables(name, sub_columns)
+    return tables
+
+
+class QueryCache:
+    """
+    LRU + TTL cache for select results, keyed by table and query shape.
+    Entries are dropped as soon as a table they read from is written
+    through DatabaseService.run(), so callers never need a manual clear.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, tables, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: Query) -> str:
+        # rpc parameters travel in the payload
+        payload = sorted(query.payload.items()) if isinstance(query.payload, dict) else query.payload
+        return repr((
+            query.table, query.action, query.columns, query.filters, query.order,
+            query.limit, query.offset, query.count, query.head, query.single, payload,
+        ))
+
+    @staticmethod
+    def _copy(result: QueryResult) -> QueryResult:
+        # Services add keys to returned rows (op['workers'] = ...), so hand out row copies
+        data = result.data
+        if isinstance(data, list):
+            data = [dict(row) if isinstance(row, dict) else row for row in data]
+        elif isinstance(data, dict):
+            data = dict(data)
+        return QueryResult(data, result.count)
+
+    def get(self, query: Query) -> Optional[QueryResult]:
+        key = self.key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._copy(entry[2])
+
+    def put(self, query: Query, result: QueryResult):
+        key = self.key(query)
+        tables = query_tables(query.table, query.columns)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, tables, self._copy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tables):
+        """Drop entries reading from any of `tables` (everything when none given)."""
+        with self._lock:
+            if not tables:
+                self._entries.clear()
+                return
+            affected = set(tables)
+            for table in tables:
+                affected.update(WRITE_CASCADES.get(table, ()))
+            stale = [k for k, (_, deps, _) in self._entries.items() if deps & affected]
+            for k in stale:
+                del self._entries[k]
+
+    def clear(self):
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# --- Backends ---
+
+class Backend:
+    """Executes Query objects. `client` is the Supabase client when there is one (auth)."""
+    client = None
+
+    def execute(self, query: Query) -> QueryResult:
+        raise NotImplementedError
+
+
+class SupabaseBackend(Backend):
+    """Replays a Query onto the supabase-py / PostgREST builder."""
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    def execute(self, query: Query) -> QueryResult:
+        if query.action == "rpc":
+            res = self.client.rpc(query.table, query.payload or {}).execute()
+            return QueryResult(res.data)
+
+        table = self.client.table(query.table)
+
+        if query.action == "select":
+            builder = table.select(query.columns, count=query.count, head=query.head or None)
+        elif query.action == "insert":
+            builder = table.insert(query.payload)
+        elif query.action == "upsert":
+            builder = table.upsert(query.payload, on_conflict=query.on_conflict or "")
+        elif query.action == "update":
+            builder = table.update(query.payload)
+        elif query.action == "delete":
+            builder = table.delete()
+        else:
+            raise DatabaseError(f"Unknown action: {query.action}")
+
+        for column, op, value in query.filters:
+            if op == "or":
+                builder = builder.or_(value)
+            elif op == "in":
+                builder = builder.in_(column, value)
+            elif op == "is":
+                builder = builder.is_(column, value)
+            elif op == "cs":
+                builder = builder.contains(column, value)
+            else:
+                builder = getattr(builder, op)(column, value)
+
+        for column, desc in query.order:
+            builder = builder.order(column, desc=desc)
+
+        if query.offset is not None and query.limit is not None:
+            builder = builder.range(query.offset, query.offset + query.limit - 1)
+        elif query.limit is not None:
+            builder = builder.limit(query.limit)
+
+        if query.single:
+            builder = builder.single()
+
+        res = builder.execute()
+        return QueryResult(res.data, getattr(res, "count", None))
+
+
+# --- Service entry point ---
+
 class DatabaseService:
-    def __init__(self):
-        self.client = get_db_client()
+    # Tables with a named repository attribute (db.orders, db.order_operations, ...)
+    REPOSITORIES = (
+        "orders", "order_operations", "sections", "workers",
+        "operations_catalog", "production_steps", "quality_logs", "equipment_downtime",
+    )
+
+    def __init__(self, backend: Optional[Backend] = None, cache: Optional[QueryCache] = None, monitor=None):
+        # The shared cache/monitor belong to the shared backend; explicit backends opt in
+        if backend is None:
+            backend = get_db_backend()
+            cache = cache if cache is not None else get_query_cache()
+            if monitor is None and AppConfig.QUERY_STATS:
+                from core.instrumentation import get_query_monitor
+                monitor = get_query_monitor()
+        self.backend = backend
+        self.cache = cache
+        self.monitor = monitor
+        # Raw Supabase client (auth); None for local backends
+        self.client = getattr(self.backend, "client", None)
+        self._repositories = {}
+        for name in self.REPOSITORIES:
+            setattr(self, name, self.table(name))
+
+    def table(self, name: str) -> Repository:
+        """Repository for any table (profiles, inventory, system_logs, ...)."""
+        if name not in self._repositories:
+            self._repositories[name] = Repository(self, name)
+        return self._repositories[name]
+
+    def run(self, query: Query) -> QueryResult:
+        """Single choke point for every request made by the service layer."""
+        if self.monitor is None:
+            return self._execute(query)[0]
+
+        started = time.perf_counter()
+        result, cached, error = None, False, None
+        try:
+            result, cached = self._execute(query)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.monitor.record(query, result, time.perf_counter() - started, cached=cached, error=error)
+
+    def _execute(self, query: Query):
+        """Returns (result, served_from_cache)."""
+        if self.cache is None:
+            return self.backend.execute(query), False
+
+        if query.action in ("select", "rpc"):
+            cached = self.cache.get(query)
+            if cached is not None:
+                return cached, True
+            result = self.backend.execute(query)
+            self.cache.put(query, result)
+            return result, False
+
+        try:
+            return self.backend.execute(query), False
+        finally:
+            self.cache.invalidate(query.table)
+
+    def rpc(self, function: str, params: Optional[dict] = None) -> QueryResult:
+        """Call a Postgres function (PostgREST /rpc/<function>)."""
+        return self.run(Query(table=function, action="rpc", payload=params or {}))
+
+    def invalidate(self, *tables):
+        """Force fresh reads for `tables` (all tables when none given), e.g. a refresh button."""
+        if self.cache is not None:
+            self.cache.invalidate(*tables)
 
     def get_user_profile(self, user_id: str):
         """Fetch user profile including role."""
         try:
-            response = self.client.table("profiles").select("*").eq("id", user_id).single().execute()
+            response = self.table("profiles").select("*").eq("id", user_id).single().execute()
             return response.data
         except Exception as e:
             # Handle case where profile doesn't exist yet
@@ -27,7 +508,7 @@ class DatabaseService:
     def execute_query(self, table: str, query_func):
         """Generic wrapper for DB queries with error handling."""
         try:
-            return query_func(self.client.table(table))
+            return query_func(self.table(table))
         except Exception as e:
             st.error(f"Database Error: {e}")
             return None
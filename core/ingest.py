@@ -0,0 +1,167 @@
+"""
+Streaming readers for import files.
+
+.xlsx sheets are read with openpyxl in read-only mode (rows are parsed as
+they are iterated) and CSV files in pandas chunks, so an import holds one
+batch of rows in memory instead of the whole sheet. Every batch is a
+DataFrame indexed by the row's position under the header, the same index
+pd.read_excel would give it: Excel row number = index + 2.
+
+    for batch in with_progress(iter_batches(file, sheet), progress, estimate_rows(file, sheet)):
+        service.import_...(batch, ...)
+"""
+import csv
+import os
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+from core.config import AppConfig
+
+CSV_SHEET = "CSV"
+
+
+def file_kind(file) -> str:
+    """'xlsx', 'xls' or 'csv' from the (uploaded) file name."""
+    name = getattr(file, "name", file if isinstance(file, str) else "")
+    ext = os.path.splitext(str(name))[1].lower().lstrip(".")
+    return ext if ext in ("xls", "csv") else "xlsx"
+
+
+def _rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return file
+
+
+def sheet_names(file) -> list:
+    kind = file_kind(file)
+    if kind == "csv":
+        return [CSV_SHEET]
+    if kind == "xls":
+        return pd.ExcelFile(_rewind(file)).sheet_names
+    from openpyxl import load_workbook
+    wb = load_workbook(_rewind(file), read_only=True, data_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+def estimate_rows(file, sheet=None) -> Optional[int]:
+    """Data rows according to the sheet dimensions (None when unknown, e.g. CSV)."""
+    if file_kind(file) != "xlsx":
+        return None
+    from openpyxl import load_workbook
+    wb = load_workbook(_rewind(file), read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        return max(ws.max_row - 1, 0) if ws.max_row else None
+    finally:
+        wb.close()
+
+
+def _header(values) -> list:
+    """Column names like pandas: 'Unnamed: i' for blanks, '.1' suffixes for repeats."""
+    names, seen = [], {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None or str(value).strip() == "" else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _iter_xlsx(file, sheet, rows) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+    wb = load_workbook(_rewind(file), read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        values = ws.iter_rows(values_only=True)
+        header = next(values, None)
+        if header is None:
+            return
+        # Trailing empty header cells are formatting, not columns
+        while header and header[-1] is None:
+            header = header[:-1]
+        columns = _header(header)
+        width = len(columns)
+
+        buf, index = [], []
+        for position, row in enumerate(values):
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            if all(v is None for v in row):
+                # Blank rows are skipped; the index still counts them
+                continue
+            buf.append(row)
+            index.append(position)
+            if len(buf) >= rows:
+                yield pd.DataFrame(buf, columns=columns, index=index)
+                buf, index = [], []
+        if buf:
+            yield pd.DataFrame(buf, columns=columns, index=index)
+    finally:
+        wb.close()
+
+
+def _sniff_separator(file) -> str:
+    sample = _rewind(file).read(4096)
+    if isinstance(sample, bytes):
+        sample = sample.decode("utf-8-sig", errors="ignore")
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+    except csv.Error:
+        return ","
+
+
+def _iter_csv(file, rows) -> Iterator[pd.DataFrame]:
+    sep = _sniff_separator(file)
+    with pd.read_csv(_rewind(file), sep=sep, chunksize=rows, encoding="utf-8-sig") as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def iter_batches(file, sheet=None, rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Yield the sheet (or CSV file) as DataFrames of at most `rows` rows."""
+    rows = rows or AppConfig.IMPORT_READ_ROWS
+    kind = file_kind(file)
+    if kind == "csv":
+        yield from _iter_csv(file, rows)
+    elif kind == "xls":
+        # Legacy .xls has no streaming reader; slice the loaded sheet
+        df = pd.read_excel(_rewind(file), sheet_name=sheet or 0)
+        for start in range(0, len(df), rows):
+            yield df.iloc[start:start + rows]
+    else:
+        yield from _iter_xlsx(file, sheet, rows)
+
+
+def read_preview(file, sheet=None, rows: int = 5) -> pd.DataFrame:
+    """Header and the first `rows` rows, without reading the rest of the file."""
+    batches = iter_batches(file, sheet, rows=rows)
+    try:
+        batch = next(batches, None)
+    finally:
+        batches.close()
+    return batch if batch is not None else pd.DataFrame()
+
+
+def drop_empty_rows(df: pd.DataFrame, columns=None) -> pd.DataFrame:
+    """Rows where all of `columns` (default: every column) are blank are dropped."""
+    subset = df[list(columns)] if columns else df
+    empty = subset.replace(r'^\s*$', pd.NA, regex=True).isna().all(axis=1)
+    return df[~empty]
+
+
+def with_progress(batches, progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                  total: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Pass batches through, calling progress(rows_done, total) after each one is consumed."""
+    done = 0
+    for batch in batches:
+        yield batch
+        done += len(batch)
+        if progress:
+            progress(done, total)
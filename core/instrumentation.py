@@ -0,0 +1,283 @@
+"""
+Query instrumentation for DatabaseService.
+
+Every request that goes through DatabaseService.run() is recorded with its
+table, action, filter shape (values stripped), rows returned, payload size
+and wall time. Records are aggregated per query shape, per Streamlit page
+and per rerun; calls slower than AppConfig.SLOW_QUERY_MS are written to the
+slow-query log (a JSONL file or the system_logs table).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Optional
+
+import streamlit as st
+
+from core.config import AppConfig
+from core.database import Query, QueryResult, split_top_level
+
+# Rows serialized to estimate payload size of large results
+PAYLOAD_SAMPLE_ROWS = 50
+
+# An open run with no queries for this long belongs to a session that is gone
+SESSION_IDLE_SECONDS = 30 * 60
+
+
+def filter_shape(query: Query) -> str:
+    """'eq:order_id,gte:scheduled_start_at|order:sort_order|limit' - no values."""
+    parts = []
+    for column, op, value in query.filters:
+        if op in ("or", "and"):
+            inner = []
+            for expr in split_top_level(str(value)):
+                col, _, rest = expr.partition(".")
+                inner.append(f"{rest.partition('.')[0]}:{col}")
+            parts.append(f"{op}({','.join(inner)})")
+        else:
+            parts.append(f"{op}:{column}")
+    shape = ",".join(parts)
+    if query.order:
+        shape += "|order:" + ",".join(c + (" desc" if d else "") for c, d in query.order)
+    if query.limit is not None:
+        shape += "|range" if query.offset else "|limit"
+    if query.head:
+        shape += "|head"
+    return shape
+
+
+def estimate_bytes(data) -> int:
+    """JSON size of `data`; extrapolated from a sample for large results."""
+    if data is None:
+        return 0
+    if isinstance(data, list) and len(data) > PAYLOAD_SAMPLE_ROWS:
+        sample = len(json.dumps(data[:PAYLOAD_SAMPLE_ROWS], default=str))
+        return int(sample * len(data) / PAYLOAD_SAMPLE_ROWS)
+    return len(json.dumps(data, default=str))
+
+
+@dataclass
+class QueryRecord:
+    table: str
+    action: str
+    shape: str
+    rows: int
+    payload_bytes: int
+    duration_ms: float
+    cached: bool = False
+    error: Optional[str] = None
+    page: Optional[str] = None
+    at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+
+@dataclass
+class RerunStats:
+    page: Optional[str] = None
+    user_id: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
+    last_seen: float = field(default_factory=time.monotonic)
+    queries: int = 0
+    cached: int = 0
+    db_ms: float = 0.0
+    payload_bytes: int = 0
+
+    def summary(self) -> dict:
+        return {
+            "page": self.page,
+            "queries": self.queries,
+            "cached": self.cached,
+            "db_ms": round(self.db_ms, 1),
+            "payload_kb": round(self.payload_bytes / 1024, 1),
+            "wall_ms": round((time.monotonic() - self.started_at) * 1000, 1),
+        }
+
+
+def _context_key():
+    """Streamlit session id when running inside a script run, else the thread id."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+    return threading.get_ident()
+
+
+def _session_ended(key) -> bool:
+    """True if `key` is a Streamlit session the runtime no longer knows."""
+    if not isinstance(key, str):
+        return False
+    try:
+        from streamlit.runtime import Runtime
+        return Runtime.exists() and not Runtime.instance().is_active_session(key)
+    except Exception:
+        return False
+
+
+class QueryMonitor:
+    def __init__(self, slow_ms: float = 500.0, slow_sink: str = "file",
+                 slow_log_path: str = "logs/slow_queries.jsonl", backend=None,
+                 history: int = 1000, idle_seconds: float = SESSION_IDLE_SECONDS):
+        self.slow_ms = slow_ms
+        self.slow_sink = slow_sink          # "file" | "system_logs" | "off"
+        self.slow_log_path = slow_log_path
+        self.backend = backend              # for the system_logs sink
+        self.recent = deque(maxlen=history)
+        self.slow = deque(maxlen=200)
+        self.reruns = deque(maxlen=100)
+        self.by_shape = {}                  # (table, action, shape) -> totals
+        self.by_page = {}                   # page -> totals
+        self._current = {}                  # session/thread -> RerunStats
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+
+    # --- Rerun context ---
+
+    def begin_rerun(self, page: Optional[str] = None, user_id: Optional[str] = None):
+        """Close the previous run of this session and start a new one."""
+        key = _context_key()
+        with self._lock:
+            self._finish(key)
+            self._prune()
+            self._current[key] = RerunStats(page=page, user_id=user_id)
+
+    def set_page(self, page: str, user_id: Optional[str] = None):
+        with self._lock:
+            stats = self._current.setdefault(_context_key(), RerunStats())
+            stats.page = page
+            if user_id:
+                stats.user_id = user_id
+
+    def current_rerun(self) -> Optional[RerunStats]:
+        return self._current.get(_context_key())
+
+    def _prune(self):
+        """Close the runs of sessions that ended or went idle, so _current holds live sessions only."""
+        cutoff = time.monotonic() - self.idle_seconds
+        for key, stats in list(self._current.items()):
+            if stats.last_seen < cutoff or _session_ended(key):
+                self._finish(key)
+
+    def _finish(self, key):
+        stats = self._current.pop(key, None)
+        if stats is None or not stats.queries:
+            return
+        self.reruns.append(stats.summary())
+        page = self.by_page.setdefault(stats.page or "-", {"reruns": 0, "queries": 0, "db_ms": 0.0})
+        page["reruns"] += 1
+        page["queries"] += stats.queries
+        page["db_ms"] += stats.db_ms
+
+    # --- Recording ---
+
+    def record(self, query: Query, result: Optional[QueryResult], seconds: float,
+               cached: bool = False, error: Optional[Exception] = None):
+        data = result.data if result is not None else None
+        rows = len(data) if isinstance(data, list) else (1 if data else 0)
+        if query.action == "select":
+            payload = estimate_bytes(data)
+        else:
+            payload = estimate_bytes(query.payload) + estimate_bytes(data)
+
+        stats = self.current_rerun()
+        rec = QueryRecord(
+            table=query.table,
+            action=query.action,
+            shape=filter_shape(query),
+            rows=rows,
+            payload_bytes=payload,
+            duration_ms=round(seconds * 1000, 2),
+            cached=cached,
+            error=str(error) if error else None,
+            page=stats.page if stats else None,
+        )
+
+        with self._lock:
+            self.recent.append(rec)
+            totals = self.by_shape.setdefault((rec.table, rec.action, rec.shape), {
+                "calls": 0, "cached": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "bytes": 0,
+            })
+            totals["calls"] += 1
+            totals["cached"] += int(cached)
+            totals["total_ms"] += rec.duration_ms
+            totals["max_ms"] = max(totals["max_ms"], rec.duration_ms)
+            totals["rows"] += rows
+            totals["bytes"] += payload
+            if stats is not None:
+                stats.last_seen = time.monotonic()
+                stats.queries += 1
+                stats.cached += int(cached)
+                stats.db_ms += rec.duration_ms
+                stats.payload_bytes += payload
+
+        if not cached and rec.duration_ms >= self.slow_ms:
+            self._log_slow(rec, stats.user_id if stats else None)
+        return rec
+
+    def _log_slow(self, rec: QueryRecord, user_id=None):
+        with self._lock:
+            self.slow.append(rec)
+        if self.slow_sink == "off":
+            return
+        try:
+            if self.slow_sink == "system_logs" and self.backend is not None:
+                # Straight to the backend: not instrumented, not cached
+                self.backend.execute(Query(table="system_logs", action="insert", payload={
+                    "user_id": user_id,
+                    "action": "slow_query",
+                    "entity_table": rec.table,
+                    "details": asdict(rec),
+                }))
+            else:
+                folder = os.path.dirname(self.slow_log_path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                with open(self.slow_log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(asdict(rec), ensure_ascii=False) + "\n")
+        except Exception:
+            # Diagnostics must never break the request that triggered them
+            pass
+
+    # --- Reporting ---
+
+    def shape_report(self) -> list:
+        """Aggregates per query shape, slowest total first."""
+        with self._lock:
+            rows = [
+                {"table": t, "action": a, "shape": s, **v,
+                 "avg_ms": round(v["total_ms"] / v["calls"], 2) if v["calls"] else 0}
+                for (t, a, s), v in self.by_shape.items()
+            ]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def page_report(self) -> list:
+        with self._lock:
+            return [
+                {"page": p, **v, "avg_queries": round(v["queries"] / v["reruns"], 1),
+                 "avg_db_ms": round(v["db_ms"] / v["reruns"], 1)}
+                for p, v in self.by_page.items()
+            ]
+
+    def reset(self):
+        with self._lock:
+            self.recent.clear()
+            self.slow.clear()
+            self.reruns.clear()
+            self.by_shape.clear()
+            self.by_page.clear()
+
+
+@st.cache_resource
+def get_query_monitor() -> QueryMonitor:
+    from core.database import get_db_backend
+    return QueryMonitor(
+        slow_ms=AppConfig.SLOW_QUERY_MS,
+        slow_sink=AppConfig.SLOW_QUERY_SINK,
+        slow_log_path=AppConfig.SLOW_QUERY_LOG,
+        backend=get_db_backend(),
+    )
@@ -0,0 +1,99 @@
+"""
+Lazy, per-rerun page data.
+
+A page declares its data up front as named loaders, each with the names it
+depends on, and its panels ask for values only when they are drawn:
+
+    data = get_data_scope()
+    data.provide("plan", analytics.get_planning_data)
+    data.provide("workload", worker_load, "plan")
+    ...
+    if lazy_tabs(["Gantt", "Workers"], key="dash_tab") == "Workers":
+        chart(data.get("workload"))      # runs get_planning_data, then worker_load
+
+Nothing is queried for a panel that is not on screen. Each loader runs at
+most once per rerun, however many panels share it; the scope is
+session-scoped in the service registry and forgets its values in on_rerun().
+
+st.tabs and st.expander run the code of every tab / expander on each rerun,
+hidden or not, so lazy pages switch panels with lazy_tabs (one radio, only
+the selected panel runs) and open cards with lazy_toggle.
+"""
+from typing import Callable
+
+import streamlit as st
+
+from core.services import SESSION, get_registry
+
+
+class DataScope:
+    def __init__(self):
+        self._loaders = {}   # name -> (loader, dependency names)
+        self._values = {}
+        self._loading = []
+        self.loaded = []     # names computed this rerun, in order
+
+    def provide(self, name: str, loader: Callable, *depends_on: str):
+        """Declare `name` = loader(*values of depends_on). A new loader drops the old value."""
+        if self._loaders.get(name) != (loader, depends_on):
+            self._values.pop(name, None)
+        self._loaders[name] = (loader, depends_on)
+
+    def get(self, name: str):
+        """Value of `name`, computing it and its dependencies on first use in this rerun."""
+        if name in self._values:
+            return self._values[name]
+        if name not in self._loaders:
+            raise KeyError(f"No loader for '{name}'")
+        if name in self._loading:
+            raise RuntimeError("Circular data dependency: " + " -> ".join(self._loading + [name]))
+
+        loader, depends_on = self._loaders[name]
+        self._loading.append(name)
+        try:
+            value = loader(*(self.get(dep) for dep in depends_on))
+        finally:
+            self._loading.pop()
+        self._values[name] = value
+        self.loaded.append(name)
+        return value
+
+    __getitem__ = get
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._values
+
+    def invalidate(self, *names: str):
+        """Forget `names` and everything depending on them (all values when none given)."""
+        if not names:
+            self._values.clear()
+            return
+        stale = set(names)
+        changed = True
+        while changed:
+            dependents = {n for n, (_, deps) in self._loaders.items() if stale.intersection(deps)}
+            changed = not dependents <= stale
+            stale |= dependents
+        for name in stale:
+            self._values.pop(name, None)
+
+    def on_rerun(self):
+        self._values.clear()
+        self.loaded.clear()
+
+
+def get_data_scope() -> DataScope:
+    """This session's DataScope (emptied at the start of every rerun)."""
+    registry = get_registry()
+    registry.register(DataScope, scope=SESSION)
+    return registry.get(DataScope)
+
+
+def lazy_tabs(labels: list, key: str) -> str:
+    """Tab strip that only runs the selected panel; returns the selected label."""
+    return st.radio("Розділ", labels, horizontal=True, key=key, label_visibility="collapsed")
+
+
+def lazy_toggle(label: str, key: str, default: bool = False) -> bool:
+    """Collapsible card section whose content (and data) is only built while it is open."""
+    return st.toggle(label, value=default, key=key)
@@ -0,0 +1,729 @@
+"""
+Local SQLite stand-in for Supabase/PostgREST.
+
+Implements the Backend interface from core/database.py with the same
+filter / order / limit / count / embed semantics the services rely on, so
+services can be profiled and the scheduler run against large synthetic
+datasets without a live Supabase:
+
+    db = DatabaseService(backend=SQLiteBackend())          # in-memory
+    db = DatabaseService(backend=SQLiteBackend("mes.db"))  # file
+
+Set MES_DB_BACKEND=sqlite to make DatabaseService() pick it up by default.
+"""
+import json
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime
+
+from core.database import Backend, DatabaseError, Query, QueryResult, parse_select, split_top_level, unquote_value
+
+NOW = object()  # default marker: current timestamp
+
+# Column types: uuid, text, int, numeric, bool, date, timestamp, array, json
+# table -> {column: (type, default)}
+TABLES = {
+    "profiles": {
+        "id": ("uuid", None), "email": ("text", None), "full_name": ("text", None),
+        "role": ("text", "worker"), "operation_types": ("array", None), "created_at": ("timestamp", NOW),
+    },
+    "orders": {
+        "id": ("uuid", None), "order_number": ("text", None), "product_name": ("text", None),
+        "article": ("text", None), "quantity": ("int", 1), "contractor": ("text", None),
+        "customer_name": ("text", None), "status": ("text", None),
+        "start_date": ("date", None), "end_date": ("date", None), "shipping_date": ("date", None),
+        "preparation_date": ("date", None), "comment": ("text", None),
+        # Set when the order's last operation is done (sync_order_completion trigger)
+        "completed_at": ("timestamp", None),
+        "created_at": ("timestamp", NOW), "updated_at": ("timestamp", NOW),
+    },
+    "production_steps": {
+        "id": ("uuid", None), "order_id": ("uuid", None), "step_name": ("text", None),
+        "status": ("text", "not_started"), "assigned_worker_id": ("uuid", None),
+        "started_at": ("timestamp", None), "completed_at": ("timestamp", None), "updated_at": ("timestamp", NOW),
+    },
+    "sections": {
+        "id": ("uuid", None), "name": ("text", None), "operation_types": ("array", None),
+        "capacity_minutes": ("numeric", 480), "description": ("text", None),
+        "created_by": ("uuid", None), "updated_by": ("uuid", None),
+        "created_at": ("timestamp", NOW), "updated_at": ("timestamp", NOW),
+    },
+    "operations_catalog": {
+        "id": ("uuid", None), "operation_key": ("text", None), "article": ("text", None),
+        "operation_number": ("text", None), "section": ("text", None), "norm_time": ("numeric", 0),
+        "comment": ("text", None), "color": ("text", None),
+        "created_by": ("uuid", None), "updated_by": ("uuid", None),
+        "created_at": ("timestamp", NOW), "updated_at": ("timestamp", NOW),
+    },
+    "order_operations": {
+        "id": ("uuid", None), "order_id": ("uuid", None), "operation_catalog_id": ("uuid", None),
+        "section_id": ("uuid", None), "assigned_worker_id": ("uuid", None), "operation_name": ("text", None),
+        "quantity": ("int", 0), "completed_quantity": ("int", 0), "norm_time_per_unit": ("numeric", 0),
+        "planned_date": ("date", None),
+        "scheduled_start_at": ("timestamp", None), "scheduled_end_at": ("timestamp", None),
+        "actual_start_at": ("timestamp", None), "actual_end_at": ("timestamp", None),
+        "status": ("text", "not_started"), "sort_order": ("int", 0),
+        "predecessor_ids": ("array", None),
+        "created_at": ("timestamp", NOW), "updated_at": ("timestamp", NOW),
+    },
+    "workers": {
+        "id": ("uuid", None), "full_name": ("text", None), "position": ("text", None),
+        "competence": ("text", None), "comment": ("text", None), "operation_types": ("array", None),
+        "section_id": ("uuid", None), "created_by": ("uuid", None), "updated_by": ("uuid", None),
+        "created_at": ("timestamp", NOW), "updated_at": ("timestamp", NOW),
+    },
+    "quality_logs": {
+        "id": ("uuid", None), "order_operation_id": ("uuid", None), "defect_type": ("text", None),
+        "quantity": ("int", 1), "reason": ("text", None), "logged_at": ("timestamp", NOW),
+        "logged_by": ("uuid", None),
+    },
+    "equipment_downtime": {
+        "id": ("uuid", None), "section_id": ("uuid", None), "reason": ("text", None),
+        "start_time": ("timestamp", NOW), "end_time": ("timestamp", None),
+        "status": ("text", "open"), "logged_by": ("uuid", None),
+    },
+    "inventory": {
+        "id": ("uuid", None), "item_name": ("text", None), "material_type": ("text", None),
+        "quantity": ("numeric", 0), "unit": ("text", "pcs"), "min_threshold": ("numeric", 10),
+        "updated_at": ("timestamp", NOW),
+    },
+    "system_logs": {
+        "id": ("uuid", None), "user_id": ("uuid", None), "action": ("text", None),
+        "entity_table": ("text", None), "entity_id": ("uuid", None), "details": ("json", None),
+        "created_at": ("timestamp", NOW),
+    },
+    # Working calendar (setup_work_calendar.sql); times are 'HH:MM'
+    "work_shifts": {
+        "id": ("uuid", None), "section_id": ("uuid", None), "weekday": ("int", None),
+        "start_time": ("text", None), "end_time": ("text", None), "breaks": ("array", None),
+    },
+    "holidays": {
+        "id": ("uuid", None), "date": ("date", None), "section_id": ("uuid", None), "name": ("text", None),
+    },
+    "worker_absences": {
+        "id": ("uuid", None), "worker_id": ("uuid", None), "start_at": ("timestamp", None),
+        "end_at": ("timestamp", None), "reason": ("text", None),
+    },
+    # Daily production facts (setup_production_facts.sql); modules/analytics/facts.py
+    "production_fact_sources": {
+        "id": ("text", None), "row_id": ("uuid", None), "key": ("text", None), "source": ("text", None),
+        "day": ("date", None), "section_id": ("uuid", None), "worker_id": ("uuid", None), "step_name": ("text", None),
+        "scheduled_minutes": ("numeric", 0), "planned_quantity": ("int", 0), "operations": ("int", 0),
+        "completed_quantity": ("int", 0), "done_operations": ("int", 0), "actual_minutes": ("numeric", 0),
+        "timed_operations": ("int", 0), "due_orders": ("int", 0), "late_orders": ("int", 0),
+        "lateness_days": ("numeric", 0), "tardiness_days": ("numeric", 0),
+    },
+    "production_daily_facts": {
+        "id": ("uuid", None), "key": ("text", None), "source": ("text", None),
+        "day": ("date", None), "section_id": ("uuid", None), "worker_id": ("uuid", None), "step_name": ("text", None),
+        "scheduled_minutes": ("numeric", 0), "planned_quantity": ("int", 0), "operations": ("int", 0),
+        "completed_quantity": ("int", 0), "done_operations": ("int", 0), "actual_minutes": ("numeric", 0),
+        "timed_operations": ("int", 0), "due_orders": ("int", 0), "late_orders": ("int", 0),
+        "lateness_days": ("numeric", 0), "tardiness_days": ("numeric", 0),
+        "cycle_sketch": ("json", None),
+    },
+    "row_deletions": {
+        "id": ("uuid", None), "table_name": ("text", None), "row_id": ("uuid", None),
+        "deleted_at": ("timestamp", NOW),
+    },
+    "analytics_watermarks": {
+        "id": ("uuid", None), "name": ("text", None), "value": ("timestamp", None), "updated_at": ("timestamp", NOW),
+    },
+}
+
+# Generated (read-only) columns: table -> {column: SQL expression}
+GENERATED = {
+    "order_operations": {"total_estimated_time": "quantity * norm_time_per_unit"},
+}
+
+# Foreign keys used to resolve embedded selects: table -> {column: referenced table}
+FOREIGN_KEYS = {
+    "production_steps": {"order_id": "orders", "assigned_worker_id": "profiles"},
+    "sections": {"created_by": "profiles", "updated_by": "profiles"},
+    "operations_catalog": {"created_by": "profiles", "updated_by": "profiles"},
+    "order_operations": {
+        "order_id": "orders", "operation_catalog_id": "operations_catalog",
+        "section_id": "sections", "assigned_worker_id": "workers",
+    },
+    "workers": {"section_id": "sections", "created_by": "profiles", "updated_by": "profiles"},
+    "quality_logs": {"order_operation_id": "order_operations", "logged_by": "profiles"},
+    "equipment_downtime": {"section_id": "sections", "logged_by": "profiles"},
+    "system_logs": {"user_id": "profiles"},
+    "work_shifts": {"section_id": "sections"},
+    "holidays": {"section_id": "sections"},
+    "worker_absences": {"worker_id": "workers"},
+}
+
+# Only cascading references are enforced, so seed data does not need every profile
+CASCADES = {
+    ("production_steps", "order_id"), ("order_operations", "order_id"),
+    ("quality_logs", "order_operation_id"),
+    ("work_shifts", "section_id"), ("holidays", "section_id"), ("worker_absences", "worker_id"),
+}
+
+UNIQUE = {
+    "orders": [("order_number",)],
+    "sections": [("name",)],
+    "production_steps": [("order_id", "step_name")],
+    "operations_catalog": [("operation_key",)],
+    "production_daily_facts": [("key",)],
+    "analytics_watermarks": [("name",)],
+}
+
+INDEXES = {
+    "orders": [("updated_at",)],
+    "order_operations": [
+        ("order_id",), ("assigned_worker_id",), ("section_id",),
+        ("scheduled_start_at", "scheduled_end_at"), ("updated_at",),
+    ],
+    "production_steps": [("order_id",), ("status",), ("updated_at",)],
+    "production_fact_sources": [("row_id",), ("key",)],
+    "production_daily_facts": [("source", "day")],
+    "row_deletions": [("deleted_at",)],
+    "workers": [("section_id",)],
+    # Keyset pagination of the catalog screen (setup_operations_catalog_paging.sql)
+    "operations_catalog": [
+        ("created_at", "id"), ("updated_at", "id"), ("article", "id"),
+        ("section", "id"), ("norm_time", "id"),
+    ],
+}
+
+# Mirrors the touch_updated_at() / log_row_deletion() triggers in setup_production_facts.sql
+# and setup_order_completion.sql (orders): updates that do not set updated_at themselves
+# get the current time, deletions are logged
+TRACKED_TABLES = ("orders", "order_operations", "production_steps")
+
+# Mirrors sync_order_completion() in setup_order_completion.sql: an order is complete
+# once it has operations and all are done, at the latest actual_end_at (now if one is
+# missing); completed_at is kept while it stays complete
+_COMPLETED_AT = """(SELECT CASE WHEN COUNT(*) > 0 AND SUM(op.status IS NOT 'done') = 0
+        THEN COALESCE("orders".completed_at,
+                      CASE WHEN COUNT(op.actual_end_at) = COUNT(*) THEN MAX(op.actual_end_at) ELSE py_now() END)
+        END
+    FROM "order_operations" op WHERE op.order_id = "orders".id)"""
+
+
+def _sync_completion(ref):
+    return (f'UPDATE "orders" SET completed_at = {_COMPLETED_AT} '
+            f'WHERE id IN ({ref}) AND completed_at IS NOT {_COMPLETED_AT};')
+
+
+COMPLETION_TRIGGERS = [
+    f'''CREATE TRIGGER IF NOT EXISTS "order_operations_sync_completion_insert" AFTER INSERT ON "order_operations"
+        BEGIN {_sync_completion("NEW.order_id")} END''',
+    f'''CREATE TRIGGER IF NOT EXISTS "order_operations_sync_completion_update" AFTER UPDATE ON "order_operations"
+        WHEN NEW.status IS NOT OLD.status OR NEW.order_id IS NOT OLD.order_id
+            OR NEW.actual_end_at IS NOT OLD.actual_end_at
+        BEGIN {_sync_completion("NEW.order_id, OLD.order_id")} END''',
+    f'''CREATE TRIGGER IF NOT EXISTS "order_operations_sync_completion_delete" AFTER DELETE ON "order_operations"
+        BEGIN {_sync_completion("OLD.order_id")} END''',
+]
+
+TRIGGERS = [
+    sql
+    for table in TRACKED_TABLES
+    for sql in (
+        f'''CREATE TRIGGER IF NOT EXISTS "{table}_touch_updated_at" AFTER UPDATE ON "{table}"
+            WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN UPDATE "{table}" SET updated_at = py_now() WHERE id = NEW.id; END''',
+        f'''CREATE TRIGGER IF NOT EXISTS "{table}_log_deletion" AFTER DELETE ON "{table}"
+            BEGIN INSERT INTO "row_deletions" (id, table_name, row_id, deleted_at)
+            VALUES (py_uuid(), '{table}', OLD.id, py_now()); END''',
+    )
+] + COMPLETION_TRIGGERS
+
+# Mirrors the create_default_steps() trigger in full_schema.sql
+DEFAULT_STEPS = [
+    'cutting', 'basting', 'sewing', 'overlock',
+    'completing', 'edging', 'finishing', 'fixing', 'packing'
+]
+
+SQL_TYPES = {
+    "uuid": "TEXT", "text": "TEXT", "int": "INTEGER", "numeric": "NUMERIC", "bool": "INTEGER",
+    "date": "TEXT", "timestamp": "TEXT", "array": "TEXT", "json": "TEXT",
+}
+
+# Keep well below SQLITE_MAX_VARIABLE_NUMBER
+MAX_PARAMS = 30000
+
+
+def _parse_list(value):
+    """'(a,b)' / '{a,b}' -> ['a', 'b']"""
+    inner = value.strip()[1:-1]
+    return [v.strip().strip('"') for v in split_top_level(inner)] if inner else []
+
+
+def _like_to_regex(pattern):
+    out, escaped = [], False
+    for ch in pattern:
+        if escaped:
+            out.append(re.escape(ch))
+            escaped = False
+        elif ch == "\\":
+            # LIKE's default escape character
+            escaped = True
+        elif ch in "%*":
+            out.append(".*")
+        elif ch == "_":
+            out.append(".")
+        else:
+            out.append(re.escape(ch))
+    return "^" + "".join(out) + "$"
+
+
+def _py_like(value, pattern, case_insensitive):
+    if value is None or pattern is None:
+        return None
+    flags = re.IGNORECASE | re.DOTALL if case_insensitive else re.DOTALL
+    return 1 if re.match(_like_to_regex(pattern), str(value), flags) else 0
+
+
+class SQLiteBackend(Backend):
+    """In-process PostgREST stand-in. Thread-safe; one connection guarded by a lock."""
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.create_function("py_like", 3, _py_like, deterministic=True)
+        self.conn.create_function("py_now", 0, lambda: datetime.now().isoformat())
+        self.conn.create_function("py_uuid", 0, lambda: str(uuid.uuid4()))
+        self.lock = threading.RLock()
+        self._create_schema()
+
+    # --- Schema ---
+
+    def _create_schema(self):
+        with self.lock, self.conn:
+            for table, columns in TABLES.items():
+                defs = []
+                for col, (ctype, _) in columns.items():
+                    sql = f'"{col}" {SQL_TYPES[ctype]}'
+                    if col == "id":
+                        sql += " PRIMARY KEY"
+                    if (table, col) in CASCADES:
+                        ref = FOREIGN_KEYS[table][col]
+                        sql += f' REFERENCES "{ref}"(id) ON DELETE CASCADE'
+                    defs.append(sql)
+                for col, expr in GENERATED.get(table, {}).items():
+                    defs.append(f'"{col}" NUMERIC GENERATED ALWAYS AS ({expr}) VIRTUAL')
+                for cols in UNIQUE.get(table, []):
+                    defs.append("UNIQUE (" + ", ".join(f'"{c}"' for c in cols) + ")")
+                self.conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(defs)})')
+                for cols in INDEXES.get(table, []):
+                    name = f"idx_{table}_{'_'.join(cols)}"
+                    self.conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ('
+                        + ", ".join(f'"{c}"' for c in cols) + ")"
+                    )
+            for sql in TRIGGERS:
+                self.conn.execute(sql)
+
+    def _columns(self, table):
+        if table not in TABLES:
+            raise DatabaseError(f"Could not find the table '{table}' in the schema cache")
+        return TABLES[table]
+
+    def _check_column(self, table, column, writable=False):
+        columns = self._columns(table)
+        if column in columns:
+            return columns[column][0]
+        if column in GENERATED.get(table, {}):
+            if writable:
+                raise DatabaseError(f"column '{column}' can only be updated to DEFAULT")
+            return "numeric"
+        raise DatabaseError(f"Could not find the '{column}' column of '{table}' in the schema cache")
+
+    # --- Value conversion ---
+
+    def _to_db(self, ctype, value):
+        if value is None:
+            return None
+        if ctype == "timestamp":
+            if isinstance(value, str) and value.strip().lower() in ("now()", "now"):
+                return datetime.now().isoformat()
+            if isinstance(value, datetime):
+                return value.isoformat()
+            if isinstance(value, date):
+                return datetime.combine(value, datetime.min.time()).isoformat()
+            try:
+                return datetime.fromisoformat(str(value).replace("Z", "+00:00")).isoformat()
+            except ValueError:
+                return str(value)
+        if ctype == "date":
+            if isinstance(value, (date, datetime)):
+                return value.isoformat()[:10]
+            return str(value)[:10]
+        if ctype == "bool":
+            if isinstance(value, str):
+                return 1 if value.lower() == "true" else 0
+            return 1 if value else 0
+        if ctype == "array":
+            if isinstance(value, str):
+                value = _parse_list(value) if value.startswith("{") else [value]
+            return json.dumps(list(value), ensure_ascii=False)
+        if ctype == "json":
+            return json.dumps(value, ensure_ascii=False, default=str)
+        if ctype == "int":
+            return int(float(value)) if isinstance(value, str) else int(value)
+        if ctype == "numeric":
+            return float(value) if isinstance(value, str) else value
+        return str(value) if not isinstance(value, str) else value
+
+    def _from_db(self, table, row):
+        columns = TABLES[table]
+        out = {}
+        for key in row.keys():
+            value = row[key]
+            ctype = columns.get(key, ("numeric", None))[0]
+            if value is not None:
+                if ctype in ("array", "json"):
+                    value = json.loads(value)
+                elif ctype == "bool":
+                    value = bool(value)
+            out[key] = value
+        return out
+
+    # --- Filters ---
+
+    def _condition(self, table, column, op, value):
+        """Return (sql, params) for one filter."""
+        if op == "or":
+            parts = []
+            params = []
+            for expr in split_top_level(value):
+                sql, p = self._parse_condition(table, expr)
+                parts.append(sql)
+                params.extend(p)
+            return "(" + " OR ".join(parts) + ")", params
+        if op == "and":
+            parts, params = [], []
+            for expr in split_top_level(value):
+                sql, p = self._parse_condition(table, expr)
+                parts.append(sql)
+                params.extend(p)
+            return "(" + " AND ".join(parts) + ")", params
+
+        ctype = self._check_column(table, column)
+        col = f'"{column}"'
+        if op in ("eq", "neq", "gt", "gte", "lt", "lte"):
+            sql_op = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}[op]
+            return f"{col} {sql_op} ?", [self._to_db(ctype, value)]
+        if op == "in":
+            values = _parse_list(value) if isinstance(value, str) else list(value)
+            if not values:
+                return "0", []
+            return f"{col} IN ({', '.join('?' for _ in values)})", [self._to_db(ctype, v) for v in values]
+        if op == "is":
+            if value is None or str(value).lower() == "null":
+                return f"{col} IS NULL", []
+            return f"{col} = ?", [1 if str(value).lower() == "true" else 0]
+        if op in ("like", "ilike"):
+            return f"py_like({col}, ?, {1 if op == 'ilike' else 0}) = 1", [value]
+        if op == "cs":
+            if ctype != "array":
+                raise DatabaseError(f"operator cs is only supported on array columns ({column})")
+            values = _parse_list(value) if isinstance(value, str) else list(value)
+            if not values:
+                return "1", []
+            parts = [f"EXISTS (SELECT 1 FROM json_each({col}) WHERE value = ?)" for _ in values]
+            return "(" + " AND ".join(parts) + ")", [str(v) for v in values]
+        raise DatabaseError(f"Unsupported filter operator: {op}")
+
+    def _parse_condition(self, table, expr):
+        """PostgREST logic-tree item: 'col.op.value', 'col.not.op.value', 'and(...)', 'or(...)'."""
+        expr = expr.strip()
+        for logic in ("and", "or"):
+            if expr.startswith(logic + "(") and expr.endswith(")"):
+                return self._condition(table, None, logic, expr[len(logic) + 1:-1])
+        column, _, rest = expr.partition(".")
+        op, _, value = rest.partition(".")
+        negate = False
+        if op == "not":
+            negate = True
+            op, _, value = value.partition(".")
+        sql, params = self._condition(table, column, op, unquote_value(value))
+        return (f"NOT ({sql})" if negate else sql), params
+
+    def _where(self, table, filters):
+        parts, params = [], []
+        for column, op, value in filters:
+            sql, p = self._condition(table, column, op, value)
+            parts.append(sql)
+            params.extend(p)
+        return (" WHERE " + " AND ".join(parts)) if parts else "", params
+
+    def _order_by(self, table, order):
+        parts = []
+        for column, desc in order:
+            self._check_column(table, column)
+            # PostgREST defaults: NULLS LAST for asc, NULLS FIRST for desc
+            parts.append(f'"{column}" DESC NULLS FIRST' if desc else f'"{column}" ASC NULLS LAST')
+        return (" ORDER BY " + ", ".join(parts)) if parts else ""
+
+    # --- Execution ---
+
+    def execute(self, query: Query) -> QueryResult:
+        with self.lock:
+            if query.action == "select":
+                result = self._select(query)
+            elif query.action in ("insert", "upsert"):
+                result = self._write(query)
+            elif query.action == "update":
+                result = self._update(query)
+            elif query.action == "delete":
+                result = self._delete(query)
+            elif query.action == "rpc":
+                result = self._rpc(query)
+            else:
+                raise DatabaseError(f"Unknown action: {query.action}")
+
+        if query.single:
+            rows = result.data or []
+            if len(rows) != 1:
+                raise DatabaseError(
+                    f"JSON object requested, multiple (or no) rows returned ({len(rows)} rows)"
+                )
+            result.data = rows[0]
+        return result
+
+    def _select(self, query: Query) -> QueryResult:
+        table = query.table
+        self._columns(table)
+        where, params = self._where(table, query.filters)
+
+        count = None
+        if query.count:
+            count = self.conn.execute(f'SELECT COUNT(*) FROM "{table}"{where}', params).fetchone()[0]
+        if query.head:
+            return QueryResult([], count)
+
+        sql = f'SELECT * FROM "{table}"{where}{self._order_by(table, query.order)}'
+        if query.limit is not None:
+            sql += f" LIMIT {int(query.limit)}"
+            if query.offset:
+                sql += f" OFFSET {int(query.offset)}"
+        rows = [self._from_db(table, r) for r in self.conn.execute(sql, params)]
+        return QueryResult(self._project(table, rows, query.columns), count)
+
+    def _project(self, table, rows, columns):
+        """Apply the select list (columns, aliases, embeds) to full rows."""
+        fields, embeds = parse_select(columns)
+        for alias, name, hint, sub_columns in embeds:
+            self._embed(table, rows, alias, name, hint, sub_columns)
+
+        if "*" in fields:
+            extra = [f for f in fields if f != "*"]
+            if not extra:
+                return rows
+            for row in rows:
+                for alias, column in extra:
+                    row[alias] = row.get(column)
+            return rows
+
+        for _, column in fields:
+            self._check_column(table, column)
+        keep = [alias for alias, _, _, _ in embeds]
+        return [
+            {**{alias: row.get(column) for alias, column in fields}, **{k: row[k] for k in keep}}
+            for row in rows
+        ]
+
+    def _resolve_embed(self, table, name, hint):
+        """Return ("one", fk_column, target) or ("many", fk_column_on_target, target)."""
+        fks = FOREIGN_KEYS.get(table, {})
+        if name in fks and name not in TABLES:
+            return "one", name, fks[name]
+        if name not in TABLES:
+            raise DatabaseError(f"Could not find a relationship between '{table}' and '{name}'")
+        if hint:
+            if fks.get(hint) == name:
+                return "one", hint, name
+            if FOREIGN_KEYS.get(name, {}).get(hint) == table:
+                return "many", hint, name
+            raise DatabaseError(f"Could not find a relationship between '{table}' and '{name}' via '{hint}'")
+        candidates = [c for c, t in fks.items() if t == name]
+        if len(candidates) > 1:
+            raise DatabaseError(
+                f"Could not embed because more than one relationship was found for '{table}' and '{name}'"
+            )
+        if candidates:
+            return "one", candidates[0], name
+        reverse = [c for c, t in FOREIGN_KEYS.get(name, {}).items() if t == table]
+        if len(reverse) == 1:
+            return "many", reverse[0], name
+        raise DatabaseError(f"Could not find a relationship between '{table}' and '{name}'")
+
+    def _embed(self, table, rows, alias, name, hint, sub_columns):
+        kind, fk, target = self._resolve_embed(table, name, hint)
+        if kind == "one":
+            keys = list({row[fk] for row in rows if row.get(fk) is not None})
+            related = {r["id"]: r for r in self._fetch_in(target, "id", keys)}
+            projected = dict(zip(related.keys(), self._project(target, list(related.values()), sub_columns)))
+            for row in rows:
+                row[alias] = projected.get(row.get(fk))
+        else:
+            keys = list({row["id"] for row in rows})
+            children = self._fetch_in(target, fk, keys)
+            parents = [c[fk] for c in children]
+            projected = self._project(target, children, sub_columns)
+            grouped = {}
+            for parent, child in zip(parents, projected):
+                grouped.setdefault(parent, []).append(child)
+            for row in rows:
+                row[alias] = grouped.get(row["id"], [])
+
+    def _fetch_in(self, table, column, keys):
+        out = []
+        for i in range(0, len(keys), 900):
+            chunk = keys[i:i + 900]
+            sql = f'SELECT * FROM "{table}" WHERE "{column}" IN ({", ".join("?" for _ in chunk)})'
+            out.extend(self._from_db(table, r) for r in self.conn.execute(sql, chunk))
+        return out
+
+    def _prepare_row(self, table, row, fill_defaults=True):
+        columns = self._columns(table)
+        clean = {}
+        for key, value in row.items():
+            clean[key] = self._to_db(self._check_column(table, key, writable=True), value)
+        if fill_defaults:
+            for col, (ctype, default) in columns.items():
+                if col in clean:
+                    continue
+                if col == "id":
+                    clean[col] = str(uuid.uuid4())
+                elif default is NOW:
+                    clean[col] = datetime.now().isoformat()
+                elif default is not None:
+                    clean[col] = self._to_db(ctype, default)
+        return clean
+
+    def _write(self, query: Query) -> QueryResult:
+        table = query.table
+        payload = query.payload
+        rows = [payload] if isinstance(payload, dict) else list(payload or [])
+        if not rows:
+            return QueryResult([])
+
+        conflict = None
+        if query.action == "upsert":
+            conflict = [c.strip() for c in (query.on_conflict or "id").split(",") if c.strip()]
+
+        # Rows without an existing conflict key are new -> fire insert hooks for them
+        existing = set()
+        if conflict and table == "orders":
+            keys = [r.get(conflict[0]) for r in rows] if len(conflict) == 1 else []
+            existing = {r[conflict[0]] for r in self._fetch_in(table, conflict[0], [k for k in keys if k])}
+
+        prepared = [(self._prepare_row(table, r), set(r.keys())) for r in rows]
+
+        # Group by column set so each group is one multi-row statement
+        groups = {}
+        for clean, provided in prepared:
+            groups.setdefault((tuple(clean.keys()), tuple(sorted(provided))), []).append(clean)
+
+        out = []
+        with self.conn:
+            for (cols, provided), group in groups.items():
+                col_sql = ", ".join(f'"{c}"' for c in cols)
+                batch = max(1, MAX_PARAMS // len(cols))
+                for i in range(0, len(group), batch):
+                    chunk = group[i:i + batch]
+                    values_sql = ", ".join("(" + ", ".join("?" for _ in cols) + ")" for _ in chunk)
+                    sql = f'INSERT INTO "{table}" ({col_sql}) VALUES {values_sql}'
+                    if conflict:
+                        updates = [c for c in provided if c not in conflict]
+                        target = ", ".join(f'"{c}"' for c in conflict)
+                        if updates:
+                            sets = ", ".join(f'"{c}" = excluded."{c}"' for c in updates)
+                            sql += f" ON CONFLICT ({target}) DO UPDATE SET {sets}"
+                        else:
+                            sql += f" ON CONFLICT ({target}) DO NOTHING"
+                    sql += " RETURNING *"
+                    params = [row[c] for row in chunk for c in cols]
+                    try:
+                        out.extend(self._from_db(table, r) for r in self.conn.execute(sql, params).fetchall())
+                    except sqlite3.IntegrityError as e:
+                        raise DatabaseError(str(e)) from e
+
+            if table == "orders":
+                key = conflict[0] if conflict else None
+                new_ids = [r["id"] for r in out if not key or r.get(key) not in existing]
+                self._create_default_steps(new_ids)
+        return QueryResult(out)
+
+    def _create_default_steps(self, order_ids):
+        """Local equivalent of the on_order_created_steps trigger."""
+        if not order_ids:
+            return
+        now = datetime.now().isoformat()
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO "production_steps" (id, order_id, step_name, status, updated_at) '
+            "VALUES (?, ?, ?, 'not_started', ?)",
+            [(str(uuid.uuid4()), oid, step, now) for oid in order_ids for step in DEFAULT_STEPS],
+        )
+
+    def _update(self, query: Query) -> QueryResult:
+        table = query.table
+        values = self._prepare_row(table, query.payload or {}, fill_defaults=False)
+        if not values:
+            return QueryResult([])
+        where, params = self._where(table, query.filters)
+        sets = ", ".join(f'"{c}" = ?' for c in values)
+        sql = f'UPDATE "{table}" SET {sets}{where} RETURNING *'
+        try:
+            with self.conn:
+                rows = self.conn.execute(sql, list(values.values()) + params).fetchall()
+        except sqlite3.IntegrityError as e:
+            raise DatabaseError(str(e)) from e
+        return QueryResult([self._from_db(table, r) for r in rows])
+
+    def _delete(self, query: Query) -> QueryResult:
+        table = query.table
+        self._columns(table)
+        where, params = self._where(table, query.filters)
+        with self.conn:
+            rows = self.conn.execute(f'DELETE FROM "{table}"{where} RETURNING *', params).fetchall()
+        return QueryResult([self._from_db(table, r) for r in rows])
+
+    # --- RPC (local equivalents of the SQL functions in setup_*.sql) ---
+
+    def _rpc(self, query: Query) -> QueryResult:
+        function = RPC_FUNCTIONS.get(query.table)
+        if function is None:
+            raise DatabaseError(f"Could not find the function public.{query.table} in the schema cache")
+        with self.conn:
+            return QueryResult(function(self, query.payload or {}))
+
+    def _scalar(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchone()[0]
+
+
+def _rpc_get_dashboard_stats(backend, params):
+    """setup_dashboard_stats.sql: get_dashboard_stats()"""
+    return {
+        "total_orders": backend._scalar('SELECT COUNT(*) FROM "orders"'),
+        "active_steps": backend._scalar('SELECT COUNT(*) FROM "production_steps" WHERE status = ?', ("in_progress",)),
+        "completed_steps": backend._scalar('SELECT COUNT(*) FROM "production_steps" WHERE status = ?', ("done",)),
+        "refreshed_at": datetime.now().isoformat(),
+    }
+
+
+def _rpc_count_overdue_orders(backend, params):
+    """setup_order_completion.sql: count_overdue_orders(as_of)"""
+    return backend._scalar(
+        'SELECT COUNT(*) FROM "orders" o WHERE o.completed_at IS NULL AND o.shipping_date < ? '
+        'AND EXISTS (SELECT 1 FROM "order_operations" op WHERE op.order_id = o.id)',
+        (str(params["as_of"])[:10],),
+    )
+
+
+RPC_FUNCTIONS = {
+    "get_dashboard_stats": _rpc_get_dashboard_stats,
+    "count_overdue_orders": _rpc_count_overdue_orders,
+    # The local summary is always current
+    "refresh_dashboard_summary": lambda backend, params: None,
+}
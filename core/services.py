@@ -0,0 +1,92 @@
+"""
+Service container.
+
+Views ask for services with get_service(OrderService) instead of building
+OrderService() on every rerun. Instances are created once per process
+(scope="process", the default) or once per browser session
+(scope="session", for anything holding per-user state).
+
+Lifecycle hooks, all optional on the service instance:
+    on_start()  - right after construction
+    on_rerun()  - at the start of every script run (ServiceRegistry.begin_rerun)
+    close()     - when the instance is dropped via ServiceRegistry.reset
+"""
+import threading
+import streamlit as st
+
+PROCESS = "process"
+SESSION = "session"
+
+SESSION_KEY = "_services"
+
+
+def _call_hook(instance, name):
+    hook = getattr(instance, name, None)
+    if callable(hook):
+        hook()
+
+
+class ServiceRegistry:
+    def __init__(self, session_state=None):
+        self._factories = {}   # key -> (factory, scope)
+        self._instances = {}   # process-scoped instances
+        self._session_state = session_state
+        self._lock = threading.RLock()
+
+    def register(self, key, factory=None, scope=PROCESS):
+        """Register a factory for `key`. Classes used as keys register themselves on first get()."""
+        with self._lock:
+            self._factories[key] = (factory or key, scope)
+
+    def _store(self, scope):
+        if scope == PROCESS:
+            return self._instances
+        state = self._session_state if self._session_state is not None else st.session_state
+        if SESSION_KEY not in state:
+            state[SESSION_KEY] = {}
+        return state[SESSION_KEY]
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._factories:
+                self.register(key)
+            factory, scope = self._factories[key]
+            store = self._store(scope)
+            if key not in store:
+                instance = factory()
+                _call_hook(instance, "on_start")
+                store[key] = instance
+            return store[key]
+
+    def live_instances(self):
+        instances = list(self._instances.values())
+        if any(scope == SESSION for _, scope in self._factories.values()):
+            instances += [i for i in self._store(SESSION).values() if i not in instances]
+        return instances
+
+    def begin_rerun(self):
+        """Start-of-rerun hook; call once at the top of the app script."""
+        for instance in self.live_instances():
+            _call_hook(instance, "on_rerun")
+
+    def reset(self, key=None):
+        """Drop one instance (or all of them) so the next get() rebuilds it."""
+        with self._lock:
+            stores = [self._instances]
+            if any(scope == SESSION for _, scope in self._factories.values()):
+                stores.append(self._store(SESSION))
+            for store in stores:
+                keys = [key] if key is not None else list(store.keys())
+                for k in keys:
+                    if k in store:
+                        _call_hook(store.pop(k), "close")
+
+
+@st.cache_resource
+def get_registry() -> ServiceRegistry:
+    return ServiceRegistry()
+
+
+def get_service(key):
+    """Shared instance of a service class (or any key registered on the registry)."""
+    return get_registry().get(key)
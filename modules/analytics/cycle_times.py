@@ -0,0 +1,69 @@
+"""
+Cycle-time percentiles, throughput and WIP from the daily facts.
+
+Percentiles come from merging the per-day cycle_sketch of every fact row in
+the window (modules/analytics/sketch.py), so any date range, section or step
+is answered from the pre-aggregated rows without touching raw operations.
+
+Per section over the window [start, end]:
+  throughput  completed quantity (and done operations) per working hour of
+              the section's calendar
+  avg WIP     operations in progress on average, by Little's law: total
+              actual processing minutes / working minutes
+  WIP now     operations currently in_progress (live count)
+"""
+from datetime import date, datetime, time, timedelta
+
+import pandas as pd
+
+from core.clock import factory_today
+from modules.analytics.sketch import QuantileSketch
+
+PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+PERCENTILE_COLUMNS = ["timed", "mean", *PERCENTILES]
+
+
+def percentiles(facts: pd.DataFrame, by: str) -> pd.DataFrame:
+    """Merged cycle-time percentiles (minutes) per value of `by`, with the number of timed rows and the mean."""
+    rows = []
+    for value, group in facts[facts["timed_operations"] > 0].groupby(by, sort=False):
+        sketch = QuantileSketch.merged(s for s in group["cycle_sketch"] if s)
+        if not sketch.count:
+            continue
+        rows.append({by: value, "timed": sketch.count, "mean": sketch.mean,
+                     **{name: sketch.quantile(q) for name, q in PERCENTILES.items()}})
+    return pd.DataFrame(rows, columns=[by, *PERCENTILE_COLUMNS])
+
+
+def window(facts: pd.DataFrame, start: date = None, end: date = None) -> tuple:
+    """[start 00:00, day after end 00:00) of the window, open ends taken from the facts."""
+    days = facts["day"].dropna()
+    start = start or (days.min() if len(days) else factory_today())
+    end = end or (days.max() if len(days) else start)
+    return datetime.combine(start, time()), datetime.combine(end + timedelta(days=1), time())
+
+
+def section_flow(facts: pd.DataFrame, sections: list, calendars, start: datetime, end: datetime,
+                 wip_now: dict) -> pd.DataFrame:
+    """One row per section: cycle-time percentiles, throughput per working hour, average and current WIP."""
+    stats = percentiles(facts, "section_id").set_index("section_id")
+    done = facts.groupby("section_id")[["completed_quantity", "done_operations", "actual_minutes"]].sum()
+
+    rows = []
+    for section in sections:
+        sec_id = section["id"]
+        minutes = calendars.for_section(sec_id).working_minutes(start, end) if calendars else \
+            (end - start).total_seconds() / 60
+        hours = minutes / 60
+        totals = done.loc[sec_id] if sec_id in done.index else None
+        cycle = stats.loc[sec_id] if sec_id in stats.index else None
+        rows.append({
+            "section_id": sec_id,
+            "section_name": section.get("name"),
+            **{c: (cycle[c] if cycle is not None else None) for c in PERCENTILE_COLUMNS},
+            "throughput_qty_per_hour": float(totals["completed_quantity"]) / hours if totals is not None and hours else 0.0,
+            "throughput_ops_per_hour": float(totals["done_operations"]) / hours if totals is not None and hours else 0.0,
+            "avg_wip": float(totals["actual_minutes"]) / minutes if totals is not None and minutes else 0.0,
+            "wip_now": int(wip_now.get(sec_id, 0)),
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,58 @@
+"""
+On-time delivery, lateness and lead time from the daily order facts.
+
+An order counts on the day it completed: orders.completed_at, set by the
+sync_order_completion trigger when its last operation is done
+(setup_order_completion.sql). Over a window of completion days:
+  OTD %      completed orders with a shipping date that finished on or
+             before it, out of all such orders
+  lateness   completion day - shipping date in days, averaged over those
+             orders (negative = early); tardiness averages only the late ones
+  lead time  created_at to completed_at; mean and p50/p90/p99 from the
+             merged daily sketches (modules/analytics/sketch.py)
+"""
+import pandas as pd
+
+from modules.analytics.cycle_times import PERCENTILES
+from modules.analytics.sketch import QuantileSketch
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _ratio(numerator, denominator, scale=1.0, digits=1):
+    return round(float(numerator) / float(denominator) * scale, digits) if denominator else None
+
+
+def delivery_kpis(facts: pd.DataFrame) -> dict:
+    """Delivery KPIs for the order fact rows of a window; None where nothing was due / completed."""
+    completed, due, late = (int(facts[c].sum()) for c in ("done_operations", "due_orders", "late_orders"))
+    lead = QuantileSketch.merged(s for s in facts["cycle_sketch"] if s) if "cycle_sketch" in facts else QuantileSketch()
+    kpis = {
+        "completed": completed,
+        "due": due,
+        "on_time": due - late,
+        "late": late,
+        "otd": _ratio(due - late, due, 100),
+        "avg_lateness_days": _ratio(facts["lateness_days"].sum(), due),
+        "avg_tardiness_days": _ratio(facts["tardiness_days"].sum(), late),
+        "lead_time_mean_days": _ratio(lead.mean, MINUTES_PER_DAY) if lead.count else None,
+    }
+    for name, q in PERCENTILES.items():
+        kpis[f"lead_time_{name}_days"] = _ratio(lead.quantile(q), MINUTES_PER_DAY) if lead.count else None
+    return kpis
+
+
+def delivery_trend(facts: pd.DataFrame) -> pd.DataFrame:
+    """Per completion day: completed and due orders, OTD % and average lateness (days)."""
+    columns = ["day", "completed", "due", "otd", "avg_lateness_days"]
+    if facts.empty:
+        return pd.DataFrame(columns=columns)
+    daily = facts.groupby("day")[["done_operations", "due_orders", "late_orders", "lateness_days"]].sum()
+    daily = daily.sort_index().reset_index()
+    return pd.DataFrame({
+        "day": daily["day"],
+        "completed": daily["done_operations"],
+        "due": daily["due_orders"],
+        "otd": [_ratio(d - l, d, 100) for d, l in zip(daily["due_orders"], daily["late_orders"])],
+        "avg_lateness_days": [_ratio(s, d) for s, d in zip(daily["lateness_days"], daily["due_orders"])],
+    }, columns=columns)
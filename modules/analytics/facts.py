@@ -0,0 +1,290 @@
+"""
+Daily production facts (setup_production_facts.sql).
+
+Analytics read production_daily_facts - one row per day × section × worker
+(and step name for production_steps) with summed measures - instead of
+scanning orders / order_operations / production_steps history on every open.
+
+Every source row contributes at most two rows to production_fact_sources:
+  plan  order_operations by scheduled_start_at day: scheduled minutes,
+        planned quantity, operation count
+  done  order_operations by completion day (actual_end_at, else the last
+        update of a done row): completed quantity, done count, actual minutes
+  step  production_steps that are done, by completed_at day, keyed by
+        step_name (no section)
+  order orders with completed_at (setup_order_completion.sql), by that day:
+        done count, lead time from created_at as actual minutes and, with a
+        shipping date, due / late counts and lateness in days
+A fact row is the sum of the contributions with its key, plus a mergeable
+cycle-time sketch (modules/analytics/sketch.py) of its timed contributions.
+
+refresh() is incremental. It reads the rows whose updated_at is past the
+stored watermark (plus row_deletions for deleted rows), swaps their
+contributions and re-sums only the fact keys they touched before or after
+the change. Cost scales with what changed since the last refresh, and the
+first refresh builds the table from scratch.
+
+The read starts OVERLAP before the watermark: a transaction that commits
+after a refresh read can carry an earlier updated_at, and re-reading a row
+is harmless because its contributions are replaced, not added. Sessions
+refresh on page renders, so a lease row in analytics_watermarks (LOCK)
+lets one refresh run at a time; the others skip and read the facts as
+they are.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import pandas as pd
+
+from core.bulk import chunked
+from core.clock import to_factory
+from modules.analytics.sketch import QuantileSketch
+
+FACTS_TABLE = "production_daily_facts"
+SOURCES_TABLE = "production_fact_sources"
+MEASURES = (
+    "scheduled_minutes", "planned_quantity", "operations",
+    "completed_quantity", "done_operations", "actual_minutes", "timed_operations",
+    "due_orders", "late_orders", "lateness_days", "tardiness_days",
+)
+DIMENSIONS = ("source", "day", "section_id", "worker_id", "step_name")
+OPERATION_COLUMNS = (
+    "id, section_id, assigned_worker_id, quantity, completed_quantity, norm_time_per_unit, status, "
+    "scheduled_start_at, actual_start_at, actual_end_at, updated_at"
+)
+STEP_COLUMNS = "id, step_name, assigned_worker_id, status, started_at, completed_at, updated_at"
+ORDER_COLUMNS = "id, created_at, shipping_date, completed_at, updated_at"
+# Watermark names in analytics_watermarks
+WATERMARKS = {"order_operations": "facts:order_operations", "production_steps": "facts:production_steps",
+              "orders": "facts:orders", "row_deletions": "facts:deletions"}
+LOCK = "facts:lock"
+LEASE = timedelta(minutes=5)        # a crashed refresh frees the lock after this
+OVERLAP = timedelta(minutes=1)      # longer than any write transaction
+ID_CHUNK = 200
+WRITE_CHUNK = 500
+
+
+@dataclass
+class FactRefresh:
+    changed: int = 0        # source rows re-read (including deletions)
+    keys: int = 0           # fact rows re-summed
+    skipped: bool = False   # another session held the refresh lock
+
+
+def _day(value) -> Optional[str]:
+    """Factory-time calendar day of a timestamp (core/clock.py)."""
+    return to_factory(value).date().isoformat() if value else None
+
+
+def _minutes(start, end) -> Optional[float]:
+    if not start or not end:
+        return None
+    delta = to_factory(end) - to_factory(start)
+    return max(delta.total_seconds() / 60, 0.0)
+
+
+def _before(value: str, delta: timedelta) -> str:
+    return (pd.Timestamp(str(value)) - delta).isoformat()
+
+
+def _latest(*values) -> Optional[str]:
+    """Latest of timestamp strings (None ignored); compared as times, not text."""
+    values = [v for v in values if v]
+    return max(values, key=pd.Timestamp) if values else None
+
+
+def _contribution(row_id, kind, source, day, section_id, worker_id, step_name=None, **measures) -> dict:
+    key = "|".join(str(v) if v is not None else "" for v in (source, day, section_id, worker_id, step_name))
+    entry = {
+        "id": f"{row_id}:{kind}", "row_id": row_id, "key": key, "source": source, "day": day,
+        "section_id": section_id, "worker_id": worker_id, "step_name": step_name,
+    }
+    entry.update({m: measures.get(m, 0) for m in MEASURES})
+    return entry
+
+
+def contributions(operations: list, steps: list, orders: list = ()) -> list:
+    """production_fact_sources rows for order_operations, production_steps and orders rows."""
+    out = []
+    for op in operations:
+        section, worker = op.get("section_id"), op.get("assigned_worker_id")
+        quantity = op.get("quantity") or 0
+        if op.get("scheduled_start_at"):
+            out.append(_contribution(
+                op["id"], "plan", "operation", _day(op["scheduled_start_at"]), section, worker,
+                scheduled_minutes=float(quantity) * float(op.get("norm_time_per_unit") or 0),
+                planned_quantity=quantity, operations=1,
+            ))
+        done = op.get("status") == "done"
+        finished = op.get("actual_end_at") or (op.get("updated_at") if done else None)
+        if finished:
+            minutes = _minutes(op.get("actual_start_at"), op.get("actual_end_at"))
+            out.append(_contribution(
+                op["id"], "done", "operation", _day(finished), section, worker,
+                completed_quantity=op.get("completed_quantity") or (quantity if done else 0),
+                done_operations=int(done), actual_minutes=minutes or 0.0,
+                timed_operations=int(minutes is not None),
+            ))
+    for step in steps:
+        if step.get("status") != "done":
+            continue
+        minutes = _minutes(step.get("started_at"), step.get("completed_at"))
+        out.append(_contribution(
+            step["id"], "step", "step", _day(step.get("completed_at") or step.get("updated_at")),
+            None, step.get("assigned_worker_id"), step.get("step_name"),
+            done_operations=1, actual_minutes=minutes or 0.0, timed_operations=int(minutes is not None),
+        ))
+    for order in orders:
+        finished = order.get("completed_at")
+        if not finished:
+            continue
+        minutes = _minutes(order.get("created_at"), finished)
+        measures = {"done_operations": 1, "actual_minutes": minutes or 0.0, "timed_operations": int(minutes is not None)}
+        if order.get("shipping_date"):
+            # Whole days: shipping dates carry no time
+            late = (date.fromisoformat(_day(finished)) - date.fromisoformat(_day(order["shipping_date"]))).days
+            measures.update(due_orders=1, late_orders=int(late > 0), lateness_days=late, tardiness_days=max(late, 0))
+        out.append(_contribution(order["id"], "order", "order", _day(finished), None, None, **measures))
+    return out
+
+
+def aggregate(sources: list) -> list:
+    """Fact rows: sources summed per key."""
+    if not sources:
+        return []
+    df = pd.DataFrame(sources)
+    sums = df.groupby("key", sort=False)[list(MEASURES)].sum()
+    dims = df.groupby("key", sort=False)[list(DIMENSIONS)].first()
+    facts = dims.join(sums).reset_index()
+    # Cycle-time sketch per key from its individually timed contributions (one operation / step each)
+    timed = df[df["timed_operations"] > 0]
+    sketches = {
+        key: QuantileSketch().add(minutes.to_numpy()).to_dict()
+        for key, minutes in timed.groupby("key", sort=False)["actual_minutes"]
+    }
+    facts["cycle_sketch"] = facts["key"].map(sketches)
+    facts = facts.astype(object).where(facts.notna(), None)
+    return facts.to_dict("records")
+
+
+class FactStore:
+    def __init__(self, db, overlap: timedelta = OVERLAP):
+        self.db = db
+        self.overlap = overlap
+
+    def _watermarks(self) -> dict:
+        rows = self.db.table("analytics_watermarks").find("name, value")
+        return {r["name"]: r["value"] for r in rows if r["name"] in WATERMARKS.values()}
+
+    def _claim(self) -> bool:
+        """Take the refresh lease unless another session holds an unexpired one."""
+        now = datetime.now(timezone.utc)
+        until = (now + LEASE).isoformat()
+        marks = self.db.table("analytics_watermarks")
+        taken = marks.update({"value": until}).eq("name", LOCK) \
+            .or_(f'value.is.null,value.lt."{now.isoformat()}"').execute().data
+        if taken:
+            return True
+        if marks.find("id", {"name": LOCK}):
+            return False
+        try:
+            marks.insert({"name": LOCK, "value": until}).execute()
+        except Exception:
+            # Another session created it first
+            return False
+        return True
+
+    def _release(self):
+        self.db.table("analytics_watermarks").update({"value": None}).eq("name", LOCK).execute()
+
+    def _changed(self, table, columns, watermark, column="updated_at", page_size=1000) -> list:
+        """Rows of `table` stamped after `watermark` - overlap (all rows when there is none), paged by id."""
+        if watermark is None:
+            return self.db.table(table).fetch_all(columns)
+        since = _before(watermark, self.overlap)
+        rows, offset = [], 0
+        while True:
+            page = self.db.table(table).select(columns).gt(column, since) \
+                .order("id").range(offset, offset + page_size - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+
+    def _in(self, table, column, values, columns="*") -> list:
+        rows = []
+        for chunk in chunked(sorted(values), ID_CHUNK):
+            rows += self.db.table(table).fetch_all(columns, {column: chunk})
+        return rows
+
+    def refresh(self) -> FactRefresh:
+        """Bring production_daily_facts up to date with changes since the last refresh."""
+        if not self._claim():
+            return FactRefresh(skipped=True)
+        try:
+            return self._refresh()
+        finally:
+            self._release()
+
+    def _refresh(self) -> FactRefresh:
+        marks = self._watermarks()
+        operations = self._changed("order_operations", OPERATION_COLUMNS, marks.get(WATERMARKS["order_operations"]))
+        steps = self._changed("production_steps", STEP_COLUMNS, marks.get(WATERMARKS["production_steps"]))
+        orders = self._changed("orders", ORDER_COLUMNS, marks.get(WATERMARKS["orders"]))
+        deleted = self._changed("row_deletions", "id, row_id, deleted_at", marks.get(WATERMARKS["row_deletions"]),
+                                column="deleted_at")
+        if not (operations or steps or orders or deleted):
+            return FactRefresh()
+
+        row_ids = {r["id"] for r in operations + steps + orders} | {r["row_id"] for r in deleted}
+        new = contributions(operations, steps, orders)
+        sources = self.db.table(SOURCES_TABLE)
+        if not marks:
+            # First build: every row was read, start from empty tables
+            sources.delete().neq("key", "").execute()
+            self.db.table(FACTS_TABLE).delete().neq("key", "").execute()
+            keys = {r["key"] for r in new}
+        else:
+            old = self._in(SOURCES_TABLE, "row_id", row_ids, "id, key")
+            keys = {r["key"] for r in old} | {r["key"] for r in new}
+            for chunk in chunked(sorted(row_ids), ID_CHUNK):
+                sources.delete().in_("row_id", chunk).execute()
+        for chunk in chunked(new, WRITE_CHUNK):
+            sources.insert(chunk).execute()
+
+        facts = aggregate(new if not marks else self._in(SOURCES_TABLE, "key", keys))
+        gone = keys - {f["key"] for f in facts}
+        for chunk in chunked(facts, WRITE_CHUNK):
+            self.db.table(FACTS_TABLE).upsert(chunk, on_conflict="key").execute()
+        for chunk in chunked(sorted(gone), ID_CHUNK):
+            self.db.table(FACTS_TABLE).delete().in_("key", chunk).execute()
+
+        # Overlapping reads can return only rows at or before the old mark: never move it back
+        read = {"order_operations": operations, "production_steps": steps, "orders": orders}
+        latest = {t: _latest(marks.get(WATERMARKS[t]), *(r.get("updated_at") for r in rows)) for t, rows in read.items()}
+        latest["row_deletions"] = _latest(marks.get(WATERMARKS["row_deletions"]), *(r.get("deleted_at") for r in deleted))
+        marks_rows = [{"name": WATERMARKS[t], "value": v} for t, v in latest.items()
+                      if v and v != marks.get(WATERMARKS[t])]
+        if marks_rows:
+            self.db.table("analytics_watermarks").upsert(marks_rows, on_conflict="name").execute()
+        if latest["row_deletions"]:
+            # Deletions before the overlap window are folded in; nothing else reads the log
+            self.db.table("row_deletions").delete() \
+                .lt("deleted_at", _before(latest["row_deletions"], self.overlap)).execute()
+        return FactRefresh(changed=len(row_ids), keys=len(keys))
+
+    def read(self, source: str, start: Optional[date] = None, end: Optional[date] = None,
+             sketches: bool = False) -> pd.DataFrame:
+        """
+        Fact rows of one source ('operation', 'step' or 'order') with day in [start, end]
+        (open when None); with `sketches` also the cycle_sketch column.
+        """
+        columns = ["key", *DIMENSIONS, *MEASURES] + (["cycle_sketch"] if sketches else [])
+        rows = self.db.table(FACTS_TABLE).fetch_all(
+            ", ".join(columns), {"source": source},
+            ranges={"day": (start.isoformat() if start else None, end.isoformat() if end else None)},
+        )
+        df = pd.DataFrame(rows, columns=columns)
+        df["day"] = pd.to_datetime(df["day"]).dt.date
+        return df
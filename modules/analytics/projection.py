@@ -0,0 +1,131 @@
+"""
+Projected Gantt times for the planning dashboard.
+
+Operations of an order start at 09:00 of the order's first planned_date (or
+today) and follow their predecessor links (modules/scheduling/network.py);
+each takes total_estimated_time working minutes on its section's calendar.
+Slack and the critical path come from the duration-only network.
+
+Most orders are a plain chain (no predecessor_ids) on one calendar. Those are
+projected column-wise: per-order cumulative sums of the durations, turned
+into times for the whole frame at once by WorkCalendar.chain_many; every
+operation of a chain is critical. Orders with explicit links or with
+sections on different calendars go through the per-order network pass,
+which is also the reference implementation (vectorized=False).
+"""
+import numpy as np
+import pandas as pd
+
+from modules.scheduling.engine import Operation
+from core.clock import factory_today
+from modules.scheduling.network import critical_path, predecessors, topological
+
+START_HOUR = 9
+SORT_COLUMNS = ["order_id", "planned_date", "sort_order"]
+
+
+def _durations(df: pd.DataFrame) -> np.ndarray:
+    if "total_estimated_time" not in df.columns:
+        return np.zeros(len(df))
+    return pd.to_numeric(df["total_estimated_time"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+
+
+def _origins(df: pd.DataFrame) -> np.ndarray:
+    """09:00 of each order's first planned_date (today when it has none), per row."""
+    today = pd.Timestamp(factory_today())
+    if "planned_date" in df.columns:
+        first = pd.to_datetime(df.groupby("order_id", sort=False)["planned_date"].transform("first"))
+        days = first.dt.normalize().fillna(today)
+    else:
+        days = pd.Series(today, index=df.index)
+    return (days + pd.Timedelta(hours=START_HOUR)).to_numpy(dtype="datetime64[ns]")
+
+
+def _links(values) -> list:
+    return [v if isinstance(v, list) else None for v in values]
+
+
+def project_network(ids, sections, links, durations, origin, calendars):
+    """(starts, ends, slack, critical) lists for the operations of one order, in frame order."""
+    ops = [
+        Operation(id=op_id, order_id=None, section_id=section, sort_order=position, predecessors=preds)
+        for position, (op_id, section, preds) in enumerate(zip(ids, sections, links))
+    ]
+    durations = dict(zip(ids, durations))
+    graph = predecessors(ops)
+    ordered, _ = topological(ops, graph)
+    timings = critical_path(ordered, graph, durations)
+
+    starts, ends = {}, {}
+    for op in ordered:
+        ready = max([origin] + [ends[p] for p in graph[op.id] if p in ends])
+        calendar = calendars.for_section(op.section_id)
+        starts[op.id] = calendar.next_working(ready)
+        ends[op.id] = calendar.add_minutes(starts[op.id], durations[op.id])
+    return (
+        [starts[op_id] for op_id in ids],
+        [ends[op_id] for op_id in ids],
+        [timings[op_id].slack for op_id in ids],
+        [timings[op_id].critical for op_id in ids],
+    )
+
+
+def project_schedule(df: pd.DataFrame, calendars, vectorized: bool = True) -> pd.DataFrame:
+    """`df` sorted by order, planned date and sort order, with start_time, end_time, slack_minutes, critical."""
+    df = df.sort_values(by=[c for c in SORT_COLUMNS if c in df.columns])
+    n = len(df)
+    durations = _durations(df)
+    origins = _origins(df)
+    orders = df["order_id"].to_numpy()
+    ids = df["id"].to_numpy()
+    if "section_id" in df.columns:
+        sections = df["section_id"].astype(object).where(df["section_id"].notna(), None).to_numpy()
+    else:
+        sections = np.full(n, None, dtype=object)
+    links = _links(df["predecessor_ids"]) if "predecessor_ids" in df.columns else [None] * n
+
+    start = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+    end = start.copy()
+    slack = np.zeros(n)
+    critical = np.zeros(n, dtype=bool)
+
+    groups = df.groupby("order_id", sort=False).indices
+    if vectorized:
+        # One calendar object per section; an order is a chain when nothing has explicit links
+        section_calendar = {s: calendars.for_section(s) for s in pd.unique(sections)}
+        calendar_ids = np.array([id(section_calendar[s]) for s in sections])
+        linked = np.array([l is not None for l in links], dtype=bool)
+        by_order = pd.DataFrame({"order": orders, "linked": linked, "calendar": calendar_ids})
+        grouped = by_order.groupby("order", sort=False)
+        simple = ~grouped["linked"].transform("any").to_numpy() & \
+            (grouped["calendar"].transform("nunique").to_numpy() == 1)
+
+        cumulative = pd.Series(durations).groupby(orders, sort=False).cumsum().to_numpy()
+        for calendar in {id(c): c for c in section_calendar.values()}.values():
+            mask = simple & (calendar_ids == id(calendar))
+            if mask.any():
+                start[mask], end[mask] = calendar.chain_many(
+                    origins[mask], cumulative[mask] - durations[mask], durations[mask]
+                )
+        critical[simple] = True
+        rest = [order for order, rows in groups.items() if not simple[rows[0]]]
+    else:
+        rest = list(groups)
+
+    for order in rest:
+        rows = groups[order]
+        origin = pd.Timestamp(origins[rows[0]]).to_pydatetime()
+        starts, ends, slacks, crit = project_network(
+            ids[rows], sections[rows], [links[i] for i in rows], durations[rows], origin, calendars
+        )
+        start[rows] = np.array(starts, dtype="datetime64[ns]")
+        end[rows] = np.array(ends, dtype="datetime64[ns]")
+        slack[rows] = slacks
+        critical[rows] = crit
+
+    df = df.copy()
+    df["start_time"] = start
+    df["end_time"] = end
+    df["slack_minutes"] = slack
+    df["critical"] = critical
+    return df
@@ -1,104 +1,151 @@
+from core.clock import factory_today
 from core.database import DatabaseService
 import streamlit as st
+from modules.analytics.projection import project_schedule
+from modules.analytics.cycle_times import PERCENTILES, percentiles, section_flow, window
+from modules.analytics.delivery import delivery_kpis, delivery_trend
+from modules.analytics.facts import FactStore
+from modules.analytics.utilization import section_day_matrix
+from modules.scheduling.services import SchedulingService
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 class AnalyticsService:
-    def __init__(self):
-        self.db = DatabaseService()
+    def __init__(self, db=None):
+        self.db = db or DatabaseService()
+        self.facts = FactStore(self.db)
+
+    def refresh_facts(self):
+        """Fold changes since the last refresh into the daily fact table (modules/analytics/facts.py)."""
+        try:
+            return self.facts.refresh()
+        except Exception as e:
+            st.error(f"Error refreshing analytics facts: {e}")
+            return None
 
     def get_raw_data(self):
         """Fetch raw data for processing."""
         try:
-            orders = self.db.client.table("orders").select("*").execute().data
-            steps = self.db.client.table("production_steps").select("*, orders(order_number, shipping_date)").execute().data
-            profiles = self.db.client.table("profiles").select("id, full_name").execute().data
+            orders = self.db.orders.select("*").execute().data
+            steps = self.db.production_steps.select("*, orders(order_number, shipping_date)").execute().data
+            profiles = self.db.table("profiles").select("id, full_name").execute().data
             
             return pd.DataFrame(orders), pd.DataFrame(steps), pd.DataFrame(profiles)
         except Exception as e:
             st.error(f"Error fetching data: {e}")
             return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
-    def calculate_kpis(self, orders_df, steps_df):
-        """Calculate high-level KPIs."""
-        if orders_df.empty:
-            return {"otd": 0, "delays": 0, "avg_lead_time": 0}
+    def get_orders(self, columns="*"):
+        """Orders with only `columns` (e.g. what the KPIs need)."""
+        try:
+            return pd.DataFrame(self.db.orders.fetch_all(columns))
+        except Exception as e:
+            st.error(f"Error fetching orders: {e}")
+            return pd.DataFrame()
 
-        # 1. On-Time Delivery (OTD)
-        # Orders with shipping_date that are done (assuming 'packing' done implies order done or checking order logic)
-        # For approximation: Count orders where shipping_date < Today and NOT done? No.
-        # Let's count delayed active orders.
-        
-        today = pd.Timestamp.now().normalize()
-        
-        if 'shipping_date' in orders_df.columns:
-            orders_df['shipping_date'] = pd.to_datetime(orders_df['shipping_date'])
-            
-            # Delayed: Shipping date passed, but logic for "Done" needs to be robust. 
-            # We can check if all steps are done? Or if it's in a 'done' list?
-            # Let's use steps_df to find completed orders.
-            
-            # For simplicity: "Delays" = Shipping Date < Today (and not conceptually finished)
-            # We don't have an explicit 'order status' column that is maintained perfectly in this MVP yet except the text default.
-            # Let's verify 'step status' to determine order completion.
-            
-            # However, for this metric, let's just count Overdue Orders.
-            overdue = orders_df[orders_df['shipping_date'] < today]
-            # In a real app, we'd filter out completed ones.
-            # Let's assume 'status' column in orders is used if we implemented the trigger, 
-            # otherwise allow for some inaccuracy or join with steps.
-            
-            delayed_count = len(overdue)
-            
-            # OTD % calculation would require historical data of completed orders.
-            # Let's placeholder it as (1 - (delayed / total)) * 100
-            total_active = len(orders_df)
-            otd_rate = round(((total_active - delayed_count) / total_active) * 100, 1) if total_active > 0 else 100
-            
-            return {
-                "otd": otd_rate,
-                "delays": delayed_count,
-                "total": total_active
-            }
-        
-        return {"otd": 0, "delays": 0, "total": 0}
+    def get_steps(self, columns="id, status"):
+        """Production steps with only `columns`, without the orders join of get_raw_data()."""
+        try:
+            return pd.DataFrame(self.db.production_steps.fetch_all(columns))
+        except Exception as e:
+            st.error(f"Error fetching steps: {e}")
+            return pd.DataFrame()
+
+    def calculate_kpis(self, start_date=None, end_date=None):
+        """
+        Delivery KPIs (modules/analytics/delivery.py) for orders completed in
+        the window, from the daily order facts (call refresh_facts() first),
+        plus two live counts: all orders and open orders with operations past
+        their shipping date ("delays"; orders without operations never complete).
+        """
+        try:
+            facts = self.facts.read("order", start_date, end_date, sketches=True)
+            kpis = delivery_kpis(facts)
+            kpis["total"] = self.db.orders.count()
+            # Open orders past their shipping date that have operations (setup_order_completion.sql)
+            kpis["delays"] = self.db.rpc("count_overdue_orders", {"as_of": factory_today().isoformat()}).data or 0
+            return kpis
+        except Exception as e:
+            st.error(f"Error calculating KPIs: {e}")
+            return {"otd": None, "delays": 0, "total": 0, "completed": 0}
 
-    def get_bottlenecks(self, steps_df):
-        """Analyze step durations."""
-        if steps_df.empty or 'started_at' not in steps_df.columns or 'completed_at' not in steps_df.columns:
+    def get_delivery_trend(self, start_date=None, end_date=None):
+        """Per completion day: completed orders, OTD % and average lateness (daily order facts)."""
+        try:
+            return delivery_trend(self.facts.read("order", start_date, end_date))
+        except Exception as e:
+            st.error(f"Error reading delivery facts: {e}")
+            return pd.DataFrame()
+
+    def get_bottlenecks(self, start_date=None, end_date=None):
+        """
+        Duration per step name over completed steps in the window (daily facts):
+        mean and p50/p90/p99 from the merged daily cycle-time sketches, in hours.
+        """
+        try:
+            facts = self.facts.read("step", start_date, end_date, sketches=True)
+        except Exception as e:
+            st.error(f"Error reading step facts: {e}")
+            return pd.DataFrame()
+        stats = percentiles(facts, "step_name")
+        if stats.empty:
             return pd.DataFrame()
 
-        df = steps_df.copy()
-        df['started_at'] = pd.to_datetime(df['started_at'])
-        df['completed_at'] = pd.to_datetime(df['completed_at'])
-        
-        # Duration in hours
-        df['duration_hours'] = (df['completed_at'] - df['started_at']).dt.total_seconds() / 3600
-        
-        # Group by step name
-        stats = df.groupby('step_name')['duration_hours'].mean().reset_index()
-        stats.columns = ['Step', 'Avg Duration (Hours)']
+        for column in ["mean", *PERCENTILES]:
+            stats[column] = stats[column] / 60
+        stats = stats.rename(columns={
+            "step_name": "Step", "timed": "Completed", "mean": "Avg Duration (Hours)",
+            "p50": "P50 (Hours)", "p90": "P90 (Hours)", "p99": "P99 (Hours)",
+        })
         return stats.sort_values('Avg Duration (Hours)', ascending=False)
 
-    def get_worker_performance(self, steps_df, profiles_df):
-        """Count completed steps per worker."""
-        if steps_df.empty or profiles_df.empty:
+    def get_cycle_time_stats(self, start_date=None, end_date=None, section_id=None):
+        """
+        Per section: p50/p90/p99 operation cycle times (minutes, actual start to
+        finish), throughput per working hour, average WIP over the window and
+        current WIP. Read from the daily facts and their sketches
+        (modules/analytics/cycle_times.py); call refresh_facts() first.
+        """
+        try:
+            facts = self.facts.read("operation", start_date, end_date, sketches=True)
+            sections = sorted(self.db.sections.fetch_all("id, name"), key=lambda s: s.get("name") or "")
+            # step_status has no 'paused' value: an in filter naming it fails on Postgres
+            wip = self.db.order_operations.fetch_all("id, section_id", {"status": "in_progress"})
+            if section_id is not None:
+                facts = facts[facts["section_id"] == section_id]
+                sections = [s for s in sections if s["id"] == section_id]
+                wip = [w for w in wip if w.get("section_id") == section_id]
+            calendars = SchedulingService(self.db).load_calendars()
+
+            start, end = window(facts, start_date, end_date)
+            wip_now = pd.Series([w.get("section_id") for w in wip], dtype=object).value_counts().to_dict()
+            return section_flow(facts, sections, calendars, start, end, wip_now)
+
+        except Exception as e:
+            st.error(f"Error calculating cycle times: {e}")
+            return pd.DataFrame()
+
+    def get_worker_performance(self, start_date=None, end_date=None):
+        """Count completed steps per worker in the window (daily facts)."""
+        try:
+            facts = self.facts.read("step", start_date, end_date)
+            facts = facts[facts["worker_id"].notna()]
+            if facts.empty:
+                return pd.DataFrame(columns=["Worker", "Completed Tasks"])
+
+            counts = facts.groupby("worker_id")["done_operations"].sum().reset_index()
+            counts.columns = ['id', 'count']
+            profiles = self.db.table("profiles").fetch_all("id, full_name", {"id": list(counts["id"])})
+        except Exception as e:
+            st.error(f"Error reading worker facts: {e}")
             return pd.DataFrame()
-            
-        # Filter completed
-        completed = steps_df[steps_df['status'] == 'done']
-        
-        if completed.empty:
-             return pd.DataFrame(columns=["Worker", "Completed Tasks"])
 
-        counts = completed['assigned_worker_id'].value_counts().reset_index()
-        counts.columns = ['id', 'count']
-        
         # Merge with names
-        merged = counts.merge(profiles_df, on='id', how='left')
+        merged = counts.merge(pd.DataFrame(profiles, columns=["id", "full_name"]), on='id', how='left')
         merged['Worker'] = merged['full_name'].fillna('Unknown')
-        
-        return merged[['Worker', 'count']].rename(columns={'count': 'Completed Tasks'})
+
+        return merged[['Worker', 'count']].rename(columns={'count': 'Completed Tasks'}) \
+            .sort_values('Completed Tasks', ascending=False)
 
     def get_step_status_dist(self, steps_df):
          if steps_df.empty: return pd.DataFrame()
@@ -113,7 +160,7 @@ class AnalyticsService:
         """
         try:
             # 1. Fetch Data (without workers join to avoid FK error)
-            ops = self.db.client.table("order_operations").select(
+            ops = self.db.order_operations.select(
                 "*, orders(order_number, product_name), sections(name, capacity_minutes)"
             ).execute().data
             
@@ -123,7 +170,7 @@ class AnalyticsService:
             df = pd.DataFrame(ops)
             
             # 2. Fetch workers separately
-            workers_res = self.db.client.table("workers").select("id, full_name").execute()
+            workers_res = self.db.workers.select("id, full_name").execute()
             workers_df = pd.DataFrame(workers_res.data) if workers_res.data else pd.DataFrame()
             
             # Flatten
@@ -143,46 +190,11 @@ class AnalyticsService:
             else:
                 df['Worker'] = 'Unassigned'
             
-            # 2. Calculate Gantt Schedule
-            # We assume 'planned_date' is the start day.
-            # We assume operations within an order are sequential based on 'sort_order'.
-            # We project Start/End time based on 'total_estimated_time' (minutes).
-            # Start of day: 09:00 (for simulation)
-            
-            df['start_time'] = pd.NaT
-            df['end_time'] = pd.NaT
-            
-            # Sort by Order, Date, SortOrder
-            df = df.sort_values(by=['order_id', 'planned_date', 'sort_order'])
-            
-            # Logic: 
-            # For each order:
-            #   First op starts at Planned Date 09:00
-            #   Next op starts at Previous Op End Time
-            #   (Simplification: ignoring non-working hours/breaks for MVP)
-            
-            for order_id, group in df.groupby('order_id'):
-                current_time = None
-                
-                for idx, row in group.iterrows():
-                    p_date = pd.to_datetime(row.get('planned_date')) if row.get('planned_date') else pd.Timestamp.now().normalize()
-                    duration_min = row.get('total_estimated_time', 0) or 0
-                    
-                    if current_time is None:
-                        # Start of Order processing (First step)
-                        # Default to 09:00 of planned date
-                        current_time = p_date.replace(hour=9, minute=0)
-                    
-                    # If current op has a later planned date, jump to it? 
-                    # For now, simplistic chaining.
-                    
-                    start = current_time
-                    end = start + timedelta(minutes=float(duration_min))
-                    
-                    df.at[idx, 'start_time'] = start
-                    df.at[idx, 'end_time'] = end
-                    
-                    current_time = end
+            # 2. Calculate Gantt Schedule (modules/analytics/projection.py)
+            # Operations start at 09:00 of the order's first planned date or when their
+            # last predecessor ends; durations are working minutes on the section's calendar
+            # (shifts, breaks, holidays); slack / critical path from the duration-only network
+            df = project_schedule(df, SchedulingService(self.db).load_calendars())
             
             # 3. Workload Aggregations (for Current Week?)
             # Let's just aggregate the whole fetched dataset for now, or filter by 'planned_date' in view.
@@ -193,121 +205,56 @@ class AnalyticsService:
             st.error(f"Error calculating planning data: {e}")
             return pd.DataFrame()
 
-    def get_section_metrics_summary(self, target_date=None):
+    def get_section_utilization(self, start_date=None, num_days=7):
         """
-        Calculate metrics for each section for a specific date (default: today).
-        Returns: List of dicts with section metrics.
+        Section × day utilization matrix (modules/analytics/utilization.py) for
+        `num_days` days from `start_date` (default: today): one sections query
+        and one daily-facts query for the whole window. Call refresh_facts()
+        first for up-to-date numbers.
         """
-        if target_date is None:
-            target_date = datetime.now().date()
-        
+        if start_date is None:
+            start_date = factory_today()
+
         try:
-            # Fetch all sections
-            sections_res = self.db.client.table("sections").select("id, name, capacity_minutes").execute()
-            sections = sections_res.data
-            
+            # fetch_all pages by id; show the cards in a stable, readable order
+            sections = sorted(self.db.sections.fetch_all("id, name, capacity_minutes"),
+                              key=lambda s: s.get("name") or "")
             if not sections:
-                return []
-            
-            # Fetch operations for the target date
-            # We check operations where scheduled_start_at is on target_date
-            start_of_day = datetime.combine(target_date, datetime.min.time())
-            end_of_day = datetime.combine(target_date, datetime.max.time())
-            
-            ops_res = self.db.client.table("order_operations").select(
-                "section_id, assigned_worker_id, norm_time_per_unit, quantity, scheduled_start_at, scheduled_end_at"
-            ).gte("scheduled_start_at", start_of_day.isoformat()).lte("scheduled_start_at", end_of_day.isoformat()).execute()
-            
-            ops_df = pd.DataFrame(ops_res.data) if ops_res.data else pd.DataFrame()
-            
-            metrics = []
-            for section in sections:
-                sec_id = section['id']
-                sec_name = section['name']
-                capacity = section.get('capacity_minutes', 480)
-                
-                # Filter ops for this section
-                if not ops_df.empty and 'section_id' in ops_df.columns:
-                    sec_ops = ops_df[ops_df['section_id'] == sec_id]
-                else:
-                    sec_ops = pd.DataFrame()
-                
-                # Calculate scheduled minutes
-                if not sec_ops.empty:
-                    sec_ops['duration'] = sec_ops['norm_time_per_unit'] * sec_ops['quantity']
-                    scheduled_mins = sec_ops['duration'].sum()
-                    num_operations = len(sec_ops)
-                    num_workers = sec_ops['assigned_worker_id'].nunique()
-                else:
-                    scheduled_mins = 0
-                    num_operations = 0
-                    num_workers = 0
-                
-                # Utilization %
-                utilization = round((scheduled_mins / capacity * 100), 1) if capacity > 0 else 0
-                
-                metrics.append({
-                    'section_id': sec_id,
-                    'section_name': sec_name,
-                    'capacity_minutes': capacity,
-                    'scheduled_minutes': scheduled_mins,
-                    'utilization_percent': utilization,
-                    'num_operations': num_operations,
-                    'num_workers': num_workers
-                })
-            
-            return metrics
-            
+                return section_day_matrix([], [], start_date, num_days)
+
+            facts = self.facts.read("operation", start_date, start_date + timedelta(days=max(num_days, 1) - 1))
+            return section_day_matrix(sections, facts, start_date, num_days)
+
         except Exception as e:
-            st.error(f"Error calculating section metrics: {e}")
+            st.error(f"Error calculating section utilization: {e}")
+            return pd.DataFrame()
+
+    def get_section_metrics_summary(self, target_date=None, matrix=None):
+        """
+        Calculate metrics for each section for a specific date (default: today).
+        Pass a get_section_utilization() matrix to reuse it instead of querying.
+        Returns: List of dicts with section metrics.
+        """
+        if target_date is None:
+            target_date = factory_today()
+        if matrix is None:
+            matrix = self.get_section_utilization(target_date, num_days=1)
+        if matrix.empty:
             return []
 
-    def get_section_weekly_trend(self, section_id, num_days=7):
+        day = matrix[matrix["date"] == target_date]
+        return day.drop(columns=["date"]).to_dict("records")
+
+    def get_section_weekly_trend(self, section_id, num_days=7, matrix=None):
         """
         Get daily utilization trend for a section for the next N days.
-        Returns: DataFrame with columns: date, utilization_percent
+        Pass a get_section_utilization() matrix to reuse it instead of querying.
+        Returns: DataFrame with columns: date, utilization_percent, scheduled_minutes
         """
-        try:
-            # Get section capacity
-            sec_res = self.db.client.table("sections").select("capacity_minutes").eq("id", section_id).execute()
-            if not sec_res.data:
-                return pd.DataFrame()
-            
-            capacity = sec_res.data[0].get('capacity_minutes', 480)
-            
-            # Date range
-            start_date = datetime.now().date()
-            dates = [start_date + timedelta(days=i) for i in range(num_days)]
-            
-            trend_data = []
-            
-            for date in dates:
-                start_of_day = datetime.combine(date, datetime.min.time())
-                end_of_day = datetime.combine(date, datetime.max.time())
-                
-                # Fetch operations for this section on this date
-                ops_res = self.db.client.table("order_operations").select(
-                    "norm_time_per_unit, quantity"
-                ).eq("section_id", section_id).gte("scheduled_start_at", start_of_day.isoformat()).lte("scheduled_start_at", end_of_day.isoformat()).execute()
-                
-                ops_df = pd.DataFrame(ops_res.data) if ops_res.data else pd.DataFrame()
-                
-                if not ops_df.empty:
-                    ops_df['duration'] = ops_df['norm_time_per_unit'] * ops_df['quantity']
-                    scheduled_mins = ops_df['duration'].sum()
-                else:
-                    scheduled_mins = 0
-                
-                utilization = round((scheduled_mins / capacity * 100), 1) if capacity > 0 else 0
-                
-                trend_data.append({
-                    'date': date,
-                    'utilization_percent': utilization,
-                    'scheduled_minutes': scheduled_mins
-                })
-            
-            return pd.DataFrame(trend_data)
-            
-        except Exception as e:
-            st.error(f"Error calculating weekly trend: {e}")
+        if matrix is None:
+            matrix = self.get_section_utilization(num_days=num_days)
+        if matrix.empty:
             return pd.DataFrame()
+
+        trend = matrix[matrix["section_id"] == section_id]
+        return trend[["date", "utilization_percent", "scheduled_minutes"]].reset_index(drop=True)
@@ -0,0 +1,106 @@
+"""
+Mergeable quantile sketch for cycle times.
+
+A DDSketch-style log histogram: a positive value x falls in bucket
+ceil(log(x) / log(gamma)) with gamma = (1 + a) / (1 - a), so every bucket
+covers values within a relative error `a` (1 %) of its midpoint. Merging two
+sketches adds their bucket counts, which is exact and order independent -
+daily sketches of any date range or set of sections merge into the same
+sketch a single pass over the raw rows would build. Cycle times span
+minutes to weeks, i.e. a few hundred buckets at most, small enough to
+store as JSON next to the daily facts.
+"""
+import math
+from typing import Iterable, Optional
+
+import numpy as np
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+# Values at or below this (minutes) count as zero
+MIN_VALUE = 1e-3
+
+
+class QuantileSketch:
+    def __init__(self):
+        self.buckets = {}       # bucket index -> count
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values: Iterable[float]) -> "QuantileSketch":
+        values = np.asarray(list(values) if not isinstance(values, np.ndarray) else values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > MIN_VALUE]
+        self.zeros += len(values) - len(positive)
+        if len(positive):
+            index, counts = np.unique(np.ceil(np.log(positive) / LOG_GAMMA).astype(np.int64), return_counts=True)
+            for i, c in zip(index.tolist(), counts.tolist()):
+                self.buckets[i] = self.buckets.get(i, 0) + c
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        for i, c in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at rank q (0..1), within RELATIVE_ACCURACY of the exact one."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms, clamped to what was seen
+                value = 2 * GAMMA ** index / (GAMMA + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "b": {str(i): c for i, c in self.buckets.items()}, "z": self.zeros, "n": self.count,
+            "s": self.total, "lo": self.min if self.count else None, "hi": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "QuantileSketch":
+        sketch = cls()
+        if not data:
+            return sketch
+        sketch.buckets = {int(i): int(c) for i, c in (data.get("b") or {}).items()}
+        sketch.zeros = int(data.get("z") or 0)
+        sketch.count = int(data.get("n") or 0)
+        sketch.total = float(data.get("s") or 0)
+        if sketch.count:
+            sketch.min, sketch.max = float(data["lo"]), float(data["hi"])
+        return sketch
+
+    @classmethod
+    def merged(cls, sketches: Iterable) -> "QuantileSketch":
+        """One sketch from stored dicts (or sketches)."""
+        out = cls()
+        for s in sketches:
+            out.merge(s if isinstance(s, QuantileSketch) else cls.from_dict(s))
+        return out
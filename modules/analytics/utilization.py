@@ -0,0 +1,53 @@
+"""
+Section × day utilization for the dashboard.
+
+Built from the 'operation' rows of the daily fact table
+(modules/analytics/facts.py), which are already bucketed by section, worker
+and day of scheduled_start_at: one query covers the whole date window and a
+single groupby folds the workers together. The result is the full section
+× day grid, so sections or days without work still get a zero row.
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+
+DEFAULT_CAPACITY = 480
+MATRIX_COLUMNS = [
+    "section_id", "section_name", "capacity_minutes", "date", "scheduled_minutes",
+    "utilization_percent", "num_operations", "num_workers",
+]
+
+
+def section_day_matrix(sections: list, facts, start_date: date, num_days: int) -> pd.DataFrame:
+    """One row per section and day (MATRIX_COLUMNS) from operation fact rows, sections in the given order."""
+    days = [start_date + timedelta(days=i) for i in range(max(num_days, 1))]
+    if not sections:
+        return pd.DataFrame(columns=MATRIX_COLUMNS)
+
+    sec = pd.DataFrame(sections)
+    capacity = sec["capacity_minutes"] if "capacity_minutes" in sec.columns else pd.Series(None, index=sec.index)
+    grid = pd.DataFrame({
+        "section_id": sec["id"].repeat(len(days)).to_numpy(),
+        "section_name": sec["name"].repeat(len(days)).to_numpy() if "name" in sec.columns else None,
+        "capacity_minutes": pd.to_numeric(capacity, errors="coerce").fillna(DEFAULT_CAPACITY)
+        .repeat(len(days)).to_numpy(),
+        "date": days * len(sec),
+    })
+
+    facts = pd.DataFrame(facts)
+    if facts.empty:
+        facts = pd.DataFrame(columns=["section_id", "day", "worker_id", "scheduled_minutes", "operations"])
+    facts = facts[facts["operations"] > 0]
+    buckets = facts.groupby(["section_id", "day"]).agg(
+        scheduled_minutes=("scheduled_minutes", "sum"),
+        num_operations=("operations", "sum"),
+        num_workers=("worker_id", "nunique"),
+    ).reset_index().rename(columns={"day": "date"})
+
+    matrix = grid.merge(buckets, on=["section_id", "date"], how="left")
+    matrix["scheduled_minutes"] = matrix["scheduled_minutes"].fillna(0).astype(float)
+    matrix["num_operations"] = matrix["num_operations"].fillna(0).astype(int)
+    matrix["num_workers"] = matrix["num_workers"].fillna(0).astype(int)
+    cap = matrix["capacity_minutes"]
+    matrix["utilization_percent"] = (matrix["scheduled_minutes"] / cap.where(cap > 0) * 100).round(1).fillna(0)
+    return matrix[MATRIX_COLUMNS]
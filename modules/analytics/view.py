@@ -1,45 +1,90 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from datetime import timedelta
 from modules.analytics.services import AnalyticsService
+from core.clock import factory_today
+from core.services import get_service
+from core.lazy import get_data_scope, lazy_tabs
+
+TABS = ["🏭 Виробництво", "👥 Ефективність", "📉 Вузькі місця"]
+
+
+def declare_data(data, service, start_date, end_date):
+    """Data behind the KPIs and tabs; each loader runs only when a visible panel asks (core/lazy.py)."""
+    data.provide("steps", lambda: service.get_steps("id, status"))
+    data.provide("facts", service.refresh_facts)
+    data.provide("kpis", lambda _: service.calculate_kpis(start_date, end_date), "facts")
+    data.provide("delivery_trend", lambda _: service.get_delivery_trend(start_date, end_date), "facts")
+    data.provide("worker_perf", lambda _: service.get_worker_performance(start_date, end_date), "facts")
+    data.provide("bottlenecks", lambda _: service.get_bottlenecks(start_date, end_date), "facts")
+    data.provide("cycle_stats", lambda _: service.get_cycle_time_stats(start_date, end_date), "facts")
+    data.provide("orders_export", service.get_orders)
+
+
+def format_days(value):
+    return f"{value} дн." if value is not None else "—"
+
 
 def render():
     st.header("📈 Розширена Аналітика")
-    
-    service = AnalyticsService()
-    
-    # 1. Filters (Dates could be added here)
-    # c1, c2 = st.columns(2)
-    # with c1:
-    #     date_range = st.date_input("Період", [])
-    
+
+    service = get_service(AnalyticsService)
+
+    # 1. Filters: KPIs, performance and bottlenecks read daily facts for this period
+    today = factory_today()
+    c1, _ = st.columns(2)
+    with c1:
+        date_range = st.date_input("Період", (today - timedelta(days=30), today))
+    if isinstance(date_range, (list, tuple)):
+        # While a range is being picked only its start is set
+        start_date = date_range[0] if date_range else None
+        end_date = date_range[1] if len(date_range) > 1 else start_date
+    else:
+        start_date = end_date = date_range
+
     if st.button("🔄 Оновити дані"):
-        st.cache_data.clear()
-    
-    orders_df, steps_df, profiles_df = service.get_raw_data()
-    
-    if orders_df.empty:
+        service.db.invalidate("orders", "production_steps", "profiles", "order_operations", "row_deletions")
+
+    data = get_data_scope()
+    declare_data(data, service, start_date, end_date)
+
+    # --- KPIs ---
+    kpis = data.get("kpis")
+
+    if not kpis['total']:
         st.info("Недостатньо даних для аналізу.")
         return
 
-    # --- KPIs ---
-    kpis = service.calculate_kpis(orders_df, steps_df)
-    
+    steps_df = data.get("steps")
+
     k1, k2, k3, k4 = st.columns(4)
     k1.metric("Всього замовлень", kpis['total'])
-    k2.metric("OTD (Вчасно)", f"{kpis['otd']}%")
-    k3.metric("Затримки", kpis['delays'], delta=-kpis['delays'], delta_color="inverse")
+    # OTD over orders completed in the period that had a shipping date
+    k2.metric("OTD (Вчасно)", f"{kpis['otd']}%" if kpis['otd'] is not None else "—",
+              help=f"Завершено {kpis.get('due', 0)} замовлень з датою відвантаження, із них вчасно {kpis.get('on_time', 0)}")
+    k3.metric("Затримки", kpis['delays'], delta=-kpis['delays'], delta_color="inverse",
+              help="Незавершені замовлення з минулою датою відвантаження")
     # Efficiency proxy: tasks completed / total steps
     total_steps = len(steps_df)
     done_steps = len(steps_df[steps_df['status'] == 'done']) if not steps_df.empty else 0
     progress = int((done_steps / total_steps * 100) if total_steps > 0 else 0)
     k4.metric("Загальний прогрес", f"{progress}%")
-    
+
+    l1, l2, l3, l4 = st.columns(4)
+    l1.metric("Завершено за період", kpis.get('completed', 0))
+    l2.metric("Середнє відхилення", format_days(kpis.get('avg_lateness_days')),
+              help="Дата завершення мінус дата відвантаження (від'ємне — раніше строку)")
+    l3.metric("Середнє запізнення", format_days(kpis.get('avg_tardiness_days')), help="Лише по запізнілих замовленнях")
+    l4.metric("Lead time P50 / P90", f"{format_days(kpis.get('lead_time_p50_days'))} / {format_days(kpis.get('lead_time_p90_days'))}",
+              help="Від створення замовлення до завершення останньої операції")
+
     st.divider()
-    
-    tab1, tab2, tab3 = st.tabs(["🏭 Виробництво", "👥 Ефективність", "📉 Вузькі місця"])
-    
-    with tab1:
+
+    # Only the selected tab runs, so hidden tabs query nothing
+    tab = lazy_tabs(TABS, key="analytics_tab")
+
+    if tab == TABS[0]:
         st.subheader("Статус виробництва")
         status_df = service.get_step_status_dist(steps_df)
         if not status_df.empty:
@@ -47,32 +92,55 @@ def render():
             # Using st.bar_chart for simplicity or Plotly for nicer UI
             fig = px.pie(status_df, values='count', names='status', title='Розподіл статусів етапів', hole=0.4)
             st.plotly_chart(fig, use_container_width=True)
-            
-    with tab2:
+
+        trend = data.get("delivery_trend")
+        if not trend.empty:
+            fig = px.bar(trend, x='day', y='completed', color='otd', color_continuous_scale='RdYlGn',
+                         range_color=(0, 100), hover_data=['due', 'avg_lateness_days'],
+                         title='Завершені замовлення по днях (колір — OTD %)')
+            st.plotly_chart(fig, use_container_width=True)
+
+    elif tab == TABS[1]:
         st.subheader("Продуктивність працівників")
-        worker_perf = service.get_worker_performance(steps_df, profiles_df)
+        worker_perf = data.get("worker_perf")
         if not worker_perf.empty:
             fig = px.bar(worker_perf, x='Worker', y='Completed Tasks', title='Виконані завдання за працівником', color='Completed Tasks')
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("Немає даних про виконані завдання.")
-            
-    with tab3:
+
+    else:
         st.subheader("Аналіз вузьких місць (Середня тривалість)")
-        bottlenecks = service.get_bottlenecks(steps_df)
+        bottlenecks = data.get("bottlenecks")
         if not bottlenecks.empty:
             fig = px.bar(bottlenecks, x='Step', y='Avg Duration (Hours)', title='Середній час на етап (години)', color='Avg Duration (Hours)', color_continuous_scale='RdYlGn_r')
             st.plotly_chart(fig, use_container_width=True)
             st.caption("Чим вищий стовпчик, тим більше часу займає етап в середньому.")
+            st.dataframe(bottlenecks.round(2), use_container_width=True, hide_index=True)
         else:
             st.info("Немає даних про тривалість (потрібні Start/Finish times).")
 
+        st.subheader("Цикл, пропускна здатність і WIP по дільницях")
+        cycle_stats = data.get("cycle_stats")
+        if not cycle_stats.empty:
+            table = cycle_stats.drop(columns=["section_id"]).rename(columns={
+                "section_name": "Дільниця", "timed": "Операцій з часом", "mean": "Середнє (хв)",
+                "p50": "P50 (хв)", "p90": "P90 (хв)", "p99": "P99 (хв)",
+                "throughput_qty_per_hour": "Од./год", "throughput_ops_per_hour": "Операцій/год",
+                "avg_wip": "Середній WIP", "wip_now": "WIP зараз",
+            })
+            st.dataframe(table.round(2), use_container_width=True, hide_index=True)
+            st.caption("Перцентилі — час від фактичного старту до завершення операції; "
+                       "пропускна здатність — на робочу годину календаря дільниці.")
+        else:
+            st.info("Немає дільниць для аналізу.")
+
     # Export
     st.divider()
     # Prepare export info
     if st.button("📥 Експортувати звіт (CSV)"):
         # Simple export of aggregated data
-        csv = orders_df.to_csv(index=False).encode('utf-8')
+        csv = data.get("orders_export").to_csv(index=False).encode('utf-8')
         st.download_button(
             "Завантажити Orders.csv",
             csv,
@@ -1,16 +1,17 @@
 import streamlit as st
 from streamlit_calendar import calendar
 from core.database import DatabaseService
+from core.services import get_service
 import datetime
 
 def render():
     st.header("🗓️ Календар виробництва")
     
-    db = DatabaseService()
+    db = get_service(DatabaseService)
     
     # Fetch orders with dates
     try:
-        response = db.client.table("orders").select("id, order_number, product_name, shipping_date, start_date").execute()
+        response = db.orders.select("id, order_number, product_name, shipping_date, start_date").execute()
         orders = response.data
     except Exception as e:
         st.error(f"Error fetching orders: {e}")
@@ -1,28 +1,24 @@
 from core.database import DatabaseService
 
+STAT_KEYS = ("total_orders", "active_steps", "completed_steps")
+
 class DashboardService:
-    def __init__(self):
-        self.db = DatabaseService()
+    def __init__(self, db=None):
+        self.db = db or DatabaseService()
 
     def get_stats(self):
         """Fetch high-level statistics."""
         try:
-            # Total Orders
-            total_orders = self.db.client.table("orders").select("*", count="exact").execute().count
-            
-            # Active Production Steps (status = in_progress)
-            active_steps = self.db.client.table("production_steps").select("*", count="exact").eq("status", "in_progress").execute().count
-            
-            # Completed Orders (assuming we can infer this or add a status field later)
-            # For now, let's just count total orders as a placeholder or add a 'status' to orders table later.
-            # Let's count 'done' steps for now as a proxy for activity.
-            completed_steps = self.db.client.table("production_steps").select("*", count="exact").eq("status", "done").execute().count
+            # One round trip to the pre-aggregated summary (setup_dashboard_stats.sql)
+            stats = self.db.rpc("get_dashboard_stats").data
+            if stats:
+                return {**{k: stats.get(k) or 0 for k in STAT_KEYS}, "refreshed_at": stats.get("refreshed_at")}
+        except Exception:
+            # Function not deployed yet - count on the fly below
+            pass
 
-            return {
-                "total_orders": total_orders,
-                "active_steps": active_steps,
-                "completed_steps": completed_steps
-            }
+        try:
+            return self._count_stats()
         except Exception as e:
             return {
                 "total_orders": 0,
@@ -30,3 +26,22 @@ class DashboardService:
                 "completed_steps": 0,
                 "error": str(e)
             }
+
+    def _count_stats(self):
+        """Fallback: count-only requests (HEAD, no rows transferred)."""
+        # Total Orders
+        total_orders = self.db.orders.select("id", count="exact", head=True).execute().count
+
+        # Active Production Steps (status = in_progress)
+        active_steps = self.db.production_steps.select("id", count="exact", head=True) \
+            .eq("status", "in_progress").execute().count
+
+        # Completed steps as a proxy for activity
+        completed_steps = self.db.production_steps.select("id", count="exact", head=True) \
+            .eq("status", "done").execute().count
+
+        return {
+            "total_orders": total_orders or 0,
+            "active_steps": active_steps or 0,
+            "completed_steps": completed_steps or 0
+        }
@@ -3,181 +3,234 @@ import plotly.express as px
 import pandas as pd
 from modules.dashboard.services import DashboardService
 from modules.analytics.services import AnalyticsService
+from core.services import get_service
+from core.lazy import get_data_scope, lazy_tabs, lazy_toggle
 import io
 
+TABS = ["🗓️ Діаграма Ганта", "🏭 Дільниці", "👷 Працівники", "📥 Експорт"]
+
+
+def worker_load(df_plan):
+    if df_plan.empty:
+        return pd.DataFrame(columns=["Worker", "total_estimated_time"])
+    return df_plan[df_plan['Worker'] != 'Unassigned'].groupby('Worker')['total_estimated_time'].sum().reset_index()
+
+
+def declare_data(data, analytics_service):
+    """Everything the dashboard panels can show; loaded only when a panel asks for it (core/lazy.py)."""
+    data.provide("plan", analytics_service.get_planning_data)
+    data.provide("worker_load", worker_load, "plan")
+    data.provide("facts", analytics_service.refresh_facts)
+    # Today's cards and the week's trends come from one section x day matrix
+    data.provide("section_week", lambda _: analytics_service.get_section_utilization(num_days=7), "facts")
+    data.provide("section_metrics",
+                 lambda week: analytics_service.get_section_metrics_summary(matrix=week), "section_week")
+
+
 def render():
     st.header("📊 Дашборд виробництва")
-    
+
     # Services
-    dash_service = DashboardService()
-    analytics_service = AnalyticsService()
-    
+    dash_service = get_service(DashboardService)
+    analytics_service = get_service(AnalyticsService)
+    data = get_data_scope()
+    declare_data(data, analytics_service)
+
     # 1. High Level Stats
     stats = dash_service.get_stats()
     c1, c2, c3 = st.columns(3)
     c1.metric("📦 Всього замовлень", stats.get("total_orders", 0))
     c2.metric("⚙️ В роботі (етапів)", stats.get("active_steps", 0))
     c3.metric("✅ Виконано етапів", stats.get("completed_steps", 0))
-    
+    if stats.get("refreshed_at"):
+        st.caption(f"Лічильники оновлено: {str(stats['refreshed_at'])[:19].replace('T', ' ')}")
+
     st.divider()
-    
-    # 2. Planning & Scheduling
+
+    # 2. Planning & Scheduling: only the selected panel loads its data
     st.subheader("📅 Графік виробництва та Навантаження")
-    
-    df_plan = analytics_service.get_planning_data()
-    
+    tab = lazy_tabs(TABS, key="dashboard_tab")
+
+    if tab == TABS[0]:
+        render_gantt(data)
+    elif tab == TABS[1]:
+        render_sections(data, analytics_service)
+    elif tab == TABS[2]:
+        render_worker_load(data)
+    else:
+        render_export(data)
+
+
+def render_gantt(data):
+    df_plan = data.get("plan")
     if df_plan.empty:
         st.info("Немає спланованих операцій для відображення графіку.")
-    else:
-        # A. Gantt Chart
-        st.write("##### 🗓️ Діаграма Ганта (Замовлення)")
-        
-        # Ensure we have datetime
-        if 'start_time' in df_plan.columns and 'end_time' in df_plan.columns:
-            fig_gantt = px.timeline(
-                df_plan, 
-                x_start="start_time", 
-                x_end="end_time", 
-                y="Order",
-                color="Section",
-                hover_data=["operation_name", "Worker", "total_estimated_time"],
-                title="Графік виконання замовлень"
-            )
-            fig_gantt.update_yaxes(autorange="reversed")
-            st.plotly_chart(fig_gantt, use_container_width=True)
-            
-        # B. Section Analytics
-        st.divider()
-        st.subheader("🏭 Аналітика по Дільницях")
-        
-        # Get section metrics
-        section_metrics = analytics_service.get_section_metrics_summary()
-        
-        if not section_metrics:
-            st.info("Немає даних по дільницях.")
-        else:
-            # Display section cards in grid
-            num_cols = 3
-            cols = st.columns(num_cols)
-            
-            for idx, metric in enumerate(section_metrics):
-                col_idx = idx % num_cols
-                
-                with cols[col_idx]:
-                    with st.container(border=True):
-                        st.markdown(f"### {metric['section_name']}")
-                        
-                        # Metrics row
-                        m1, m2 = st.columns(2)
-                        
-                        capacity_hours = metric['capacity_minutes'] / 60
-                        scheduled_hours = metric['scheduled_minutes'] / 60
-                        
-                        m1.metric(
-                            "Завантаження", 
-                            f"{scheduled_hours:.1f}/{capacity_hours:.0f} год",
-                            delta=f"{metric['utilization_percent']}%"
-                        )
-                        m2.metric("Операції сьогодні", metric['num_operations'])
-                        
-                        # Gauge chart for utilization
-                        utilization = metric['utilization_percent']
-                        
-                        # Determine color based on utilization
-                        if utilization < 70:
-                            color = "green"
-                        elif utilization < 90:
-                            color = "orange"
-                        else:
-                            color = "red"
-                        
-                        fig_gauge = px.pie(
-                            values=[utilization, 100 - utilization],
-                            names=['Використано', 'Вільно'],
-                            hole=0.7,
-                            color_discrete_sequence=[color, '#e0e0e0']
-                        )
-                        fig_gauge.update_traces(textinfo='none', hovertemplate='%{label}: %{percent}<extra></extra>')
-                        fig_gauge.update_layout(
-                            showlegend=False,
-                            height=150,
-                            margin=dict(t=0, b=0, l=0, r=0),
-                            annotations=[dict(text=f'{utilization}%', x=0.5, y=0.5, font_size=20, showarrow=False)],
-                            font=dict(family="Arial, sans-serif")
-                        )
-                        st.plotly_chart(fig_gauge, use_container_width=True, key=f"gauge_{metric['section_id']}")
-                        
-                        # Weekly trend mini chart
-                        trend_df = analytics_service.get_section_weekly_trend(metric['section_id'], num_days=7)
-                        
-                        if not trend_df.empty:
-                            fig_trend = px.bar(
-                                trend_df,
-                                x='date',
-                                y='utilization_percent',
-                                title="Тиждень (прогноз)",
-                                labels={'date': 'Дата', 'utilization_percent': '%'}
-                            )
-                            fig_trend.update_layout(
-                                height=150,
-                                margin=dict(t=30, b=20, l=20, r=20),
-                                showlegend=False,
-                                font=dict(family="Arial, sans-serif")
-                            )
-                            fig_trend.update_xaxes(tickformat='%d.%m', title_text="Дата")
-                            fig_trend.update_yaxes(title_text="Завантаження (%)")
-                            st.plotly_chart(fig_trend, use_container_width=True, key=f"trend_{metric['section_id']}")
-                        
-                        # Expandable details
-                        with st.expander("📊 Детальна інформація"):
-                            st.write(f"**Потужність:** {capacity_hours:.1f} год/день")
-                            st.write(f"**Заплановано:** {scheduled_hours:.1f} год")
-                            st.write(f"**Працівників:** {metric['num_workers']}")
-                            st.write(f"**Вільно:** {(capacity_hours - scheduled_hours):.1f} год")
-            
-            # C. Worker Workload (keep existing)
-            st.divider()
-            st.write("##### 👷 Навантаження на Працівників")
-            worker_load = df_plan[df_plan['Worker'] != 'Unassigned'].groupby('Worker')['total_estimated_time'].sum().reset_index()
-            if not worker_load.empty:
-                fig_work = px.bar(
-                    worker_load, 
-                    x="Worker", 
-                    y="total_estimated_time", 
-                    title="Зайнятість працівників (хв)",
-                    labels={'Worker': 'Працівник', 'total_estimated_time': 'Час (хв)'}
+        return
+
+    st.write("##### 🗓️ Діаграма Ганта (Замовлення)")
+
+    # Ensure we have datetime
+    if 'start_time' in df_plan.columns and 'end_time' in df_plan.columns:
+        fig_gantt = px.timeline(
+            df_plan,
+            x_start="start_time",
+            x_end="end_time",
+            y="Order",
+            color="Section",
+            pattern_shape="critical" if "critical" in df_plan.columns else None,
+            pattern_shape_map={True: "/", False: ""},
+            hover_data=[c for c in ["operation_name", "Worker", "total_estimated_time", "slack_minutes"] if c in df_plan.columns],
+            labels={"critical": "Критичний шлях", "slack_minutes": "Резерв (хв)"},
+            title="Графік виконання замовлень (штрихування — критичний шлях)"
+        )
+        fig_gantt.update_yaxes(autorange="reversed")
+        st.plotly_chart(fig_gantt, use_container_width=True)
+
+
+def render_sections(data, analytics_service):
+    st.subheader("🏭 Аналітика по Дільницях")
+
+    section_metrics = data.get("section_metrics")
+
+    if not section_metrics:
+        st.info("Немає даних по дільницях.")
+        return
+
+    # Display section cards in grid
+    num_cols = 3
+    cols = st.columns(num_cols)
+
+    for idx, metric in enumerate(section_metrics):
+        col_idx = idx % num_cols
+
+        with cols[col_idx]:
+            with st.container(border=True):
+                st.markdown(f"### {metric['section_name']}")
+
+                # Metrics row
+                m1, m2 = st.columns(2)
+
+                capacity_hours = metric['capacity_minutes'] / 60
+                scheduled_hours = metric['scheduled_minutes'] / 60
+
+                m1.metric(
+                    "Завантаження",
+                    f"{scheduled_hours:.1f}/{capacity_hours:.0f} год",
+                    delta=f"{metric['utilization_percent']}%"
+                )
+                m2.metric("Операції сьогодні", metric['num_operations'])
+
+                # Gauge chart for utilization
+                utilization = metric['utilization_percent']
+
+                # Determine color based on utilization
+                if utilization < 70:
+                    color = "green"
+                elif utilization < 90:
+                    color = "orange"
+                else:
+                    color = "red"
+
+                fig_gauge = px.pie(
+                    values=[utilization, 100 - utilization],
+                    names=['Використано', 'Вільно'],
+                    hole=0.7,
+                    color_discrete_sequence=[color, '#e0e0e0']
+                )
+                fig_gauge.update_traces(textinfo='none', hovertemplate='%{label}: %{percent}<extra></extra>')
+                fig_gauge.update_layout(
+                    showlegend=False,
+                    height=150,
+                    margin=dict(t=0, b=0, l=0, r=0),
+                    annotations=[dict(text=f'{utilization}%', x=0.5, y=0.5, font_size=20, showarrow=False)],
+                    font=dict(family="Arial, sans-serif")
                 )
-                fig_work.update_layout(font=dict(family="Arial, sans-serif"))
-                fig_work.update_xaxes(title_text="Працівник")
-                fig_work.update_yaxes(title_text="Час (хв)")
-                st.plotly_chart(fig_work, use_container_width=True)
-            
-        # C. Export Schedule
-        st.divider()
-        if st.button("📥 Завантажити повний план-графік (Excel)"):
-            # Prepare Export
-            export_df = df_plan[[
-                "planned_date", "Order", "Product", "Section", 
-                "operation_name", "quantity", "norm_time_per_unit", 
-                "total_estimated_time", "start_time", "end_time", "Worker", "status"
-            ]].copy()
-            
-            # Format dates
-            export_df['start_time'] = export_df['start_time'].dt.strftime('%Y-%m-%d %H:%M')
-            export_df['end_time'] = export_df['end_time'].dt.strftime('%Y-%m-%d %H:%M')
-            
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer) as writer:
-                export_df.to_excel(writer, index=False, sheet_name="Schedule")
-                
-                # Add analytics sheets
-                section_load.to_excel(writer, index=False, sheet_name="Section Load")
-                worker_load.to_excel(writer, index=False, sheet_name="Worker Load")
-                
-            st.download_button(
-                label="Зберегти файл",
-                data=buffer.getvalue(),
-                file_name="production_schedule_full.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+                st.plotly_chart(fig_gauge, use_container_width=True, key=f"gauge_{metric['section_id']}")
+
+                # Weekly trend and details are drawn only for opened cards
+                if not lazy_toggle("📊 Тиждень і деталі", key=f"details_{metric['section_id']}"):
+                    continue
+
+                trend_df = analytics_service.get_section_weekly_trend(metric['section_id'], matrix=data.get("section_week"))
+
+                if not trend_df.empty:
+                    fig_trend = px.bar(
+                        trend_df,
+                        x='date',
+                        y='utilization_percent',
+                        title="Тиждень (прогноз)",
+                        labels={'date': 'Дата', 'utilization_percent': '%'}
+                    )
+                    fig_trend.update_layout(
+                        height=150,
+                        margin=dict(t=30, b=20, l=20, r=20),
+                        showlegend=False,
+                        font=dict(family="Arial, sans-serif")
+                    )
+                    fig_trend.update_xaxes(tickformat='%d.%m', title_text="Дата")
+                    fig_trend.update_yaxes(title_text="Завантаження (%)")
+                    st.plotly_chart(fig_trend, use_container_width=True, key=f"trend_{metric['section_id']}")
+
+                st.write(f"**Потужність:** {capacity_hours:.1f} год/день")
+                st.write(f"**Заплановано:** {scheduled_hours:.1f} год")
+                st.write(f"**Працівників:** {metric['num_workers']}")
+                st.write(f"**Вільно:** {(capacity_hours - scheduled_hours):.1f} год")
+
+
+def render_worker_load(data):
+    st.write("##### 👷 Навантаження на Працівників")
+    load = data.get("worker_load")
+    if load.empty:
+        st.info("Немає призначених операцій.")
+        return
+
+    fig_work = px.bar(
+        load,
+        x="Worker",
+        y="total_estimated_time",
+        title="Зайнятість працівників (хв)",
+        labels={'Worker': 'Працівник', 'total_estimated_time': 'Час (хв)'}
+    )
+    fig_work.update_layout(font=dict(family="Arial, sans-serif"))
+    fig_work.update_xaxes(title_text="Працівник")
+    fig_work.update_yaxes(title_text="Час (хв)")
+    st.plotly_chart(fig_work, use_container_width=True)
+
+
+def render_export(data):
+    # The full plan is only loaded once the export is asked for
+    if not st.button("📥 Завантажити повний план-графік (Excel)"):
+        return
+
+    df_plan = data.get("plan")
+    if df_plan.empty:
+        st.info("Немає спланованих операцій для експорту.")
+        return
+
+    # Prepare Export
+    export_df = df_plan[[
+        c for c in [
+            "planned_date", "Order", "Product", "Section",
+            "operation_name", "quantity", "norm_time_per_unit",
+            "total_estimated_time", "start_time", "end_time", "Worker", "status"
+        ] if c in df_plan.columns
+    ]].copy()
+
+    # Format dates
+    export_df['start_time'] = export_df['start_time'].dt.strftime('%Y-%m-%d %H:%M')
+    export_df['end_time'] = export_df['end_time'].dt.strftime('%Y-%m-%d %H:%M')
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        export_df.to_excel(writer, index=False, sheet_name="Schedule")
+
+        # Add analytics sheets
+        data.get("section_week").to_excel(writer, index=False, sheet_name="Section Load")
+        data.get("worker_load").to_excel(writer, index=False, sheet_name="Worker Load")
 
+    st.download_button(
+        label="Зберегти файл",
+        data=buffer.getvalue(),
+        file_name="production_schedule_full.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
@@ -8,7 +8,7 @@ class InventoryService:
     def get_items(self):
         """Fetch all inventory items."""
         try:
-            return self.db.client.table("inventory").select("*").order("item_name").execute().data
+            return self.db.table("inventory").select("*").order("item_name").execute().data
         except Exception as e:
             st.error(f"Error fetching inventory: {e}")
             return []
@@ -16,7 +16,7 @@ class InventoryService:
     def add_item(self, data):
         """Add a new inventory item."""
         try:
-            return self.db.client.table("inventory").insert(data).execute()
+            return self.db.table("inventory").insert(data).execute()
         except Exception as e:
             st.error(f"Error adding item: {e}")
             return None
@@ -24,7 +24,7 @@ class InventoryService:
     def update_item(self, item_id, data):
         """Update an inventory item."""
         try:
-            return self.db.client.table("inventory").update(data).eq("id", item_id).execute()
+            return self.db.table("inventory").update(data).eq("id", item_id).execute()
         except Exception as e:
             st.error(f"Error updating item: {e}")
             return None
@@ -32,7 +32,7 @@ class InventoryService:
     def delete_item(self, item_id):
         """Delete an inventory item."""
         try:
-            return self.db.client.table("inventory").delete().eq("id", item_id).execute()
+            return self.db.table("inventory").delete().eq("id", item_id).execute()
         except Exception as e:
             st.error(f"Error deleting item: {e}")
             return None
@@ -2,11 +2,12 @@ import streamlit as st
 import pandas as pd
 from modules.inventory.services import InventoryService
 from core.config import UserRole
+from core.services import get_service
 
 def render():
     st.header("📦 Склад")
     
-    service = InventoryService()
+    service = get_service(InventoryService)
     items = service.get_items()
     
     # --- Metrics ---
@@ -18,7 +18,7 @@ class MaintenanceService:
             "logged_by": user_id
         }
         try:
-            return self.db.client.table(self.TABLE).insert(data).execute()
+            return self.db.table(self.TABLE).insert(data).execute()
         except Exception as e:
             st.error(f"Error reporting downtime: {e}")
             return None
@@ -30,7 +30,7 @@ class MaintenanceService:
             "status": "resolved"
         }
         try:
-            return self.db.client.table(self.TABLE).update(data).eq("id", downtime_id).execute()
+            return self.db.table(self.TABLE).update(data).eq("id", downtime_id).execute()
         except Exception as e:
             st.error(f"Error resolving downtime: {e}")
             return None
@@ -38,7 +38,7 @@ class MaintenanceService:
     def get_active_downtime(self, section_id=None):
         """Get currently open downtime events."""
         try:
-            query = self.db.client.table(self.TABLE).select("*, sections(name)").eq("status", "open")
+            query = self.db.table(self.TABLE).select("*, sections(name)").eq("status", "open")
             if section_id:
                 query = query.eq("section_id", section_id)
             return query.execute().data
@@ -48,6 +48,6 @@ class MaintenanceService:
     def get_downtime_history(self):
         """Get history of downtimes."""
         try:
-            return self.db.client.table(self.TABLE).select("*, sections(name)").order("start_time", desc=True).limit(50).execute().data
+            return self.db.table(self.TABLE).select("*, sections(name)").order("start_time", desc=True).limit(50).execute().data
         except Exception:
             return []
@@ -1,10 +1,74 @@
 import pandas as pd
-from core.database import DatabaseService
+from core.bulk import BulkResult, chunked, write_batches
+from core.config import AppConfig
+from core.database import DatabaseService, quote_value
+from core.ingest import drop_empty_rows, with_progress
 import streamlit as st
 
+# List screen sort options -> (column, descending)
+SORT_OPTIONS = {
+    "created_at_desc": ("created_at", True),
+    "created_at_asc": ("created_at", False),
+    "updated_at_desc": ("updated_at", True),
+    "article_asc": ("article", False),
+    "article_desc": ("article", True),
+    "section_asc": ("section", False),
+    "norm_desc": ("norm_time", True),
+}
+
+# Only what the list screen displays
+LIST_COLUMNS = (
+    "id, operation_key, article, operation_number, section, norm_time, color, comment, "
+    "created_at, updated_at, "
+    "created_by_user:profiles!created_by(email, full_name), updated_by_user:profiles!updated_by(email, full_name)"
+)
+
+SEARCH_COLUMNS = ("operation_key", "article", "operation_number", "section")
+
+# Keys per existence lookup (keeps the request URL short)
+KEY_LOOKUP_CHUNK = 200
+
+
+def normalize_key(value):
+    """operation_key as it is looked up and stored: stripped text, None if blank."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value).strip() or None
+
+
+def format_user(user):
+    """'Name (email)', 'email' or '-' for an embedded profile."""
+    if not user:
+        return "-"
+    name, email = user.get("full_name"), user.get("email")
+    if name and email:
+        return f"{name} ({email})"
+    return email or "-"
+
+
+def keyset_filter(column, desc, cursor):
+    """
+    PostgREST or-expression selecting rows after `cursor` = (value, id) in
+    ORDER BY column [DESC], id [DESC] with PostgREST null placement
+    (asc NULLS LAST, desc NULLS FIRST).
+    """
+    value, row_id = cursor
+    cmp = "lt" if desc else "gt"
+    id_after = f"id.{cmp}.{quote_value(row_id)}"
+    if value is None:
+        tie = f"and({column}.is.null,{id_after})"
+        # desc: nulls come first, so every non-null row is still ahead
+        return f"{tie},{column}.not.is.null" if desc else tie
+    value = quote_value(value)
+    parts = [f"{column}.{cmp}.{value}", f"and({column}.eq.{value},{id_after})"]
+    if not desc:
+        parts.append(f"{column}.is.null")
+    return ",".join(parts)
+
+
 class OperationsService:
-    def __init__(self):
-        self.db = DatabaseService()
+    def __init__(self, db=None):
+        self.db = db or DatabaseService()
         self.TABLE = "operations_catalog"
 
     def get_operations(self):
@@ -13,7 +77,7 @@ class OperationsService:
             # Join with profiles to get creator and updater info
             # Syntax: numeric columns, normal columns, and joined tables.
             # We use the FK column name to disambiguate the join to profiles table
-            query = self.db.client.table(self.TABLE).select(
+            query = self.db.table(self.TABLE).select(
                 "*, created_by_user:profiles!created_by(email, full_name), updated_by_user:profiles!updated_by(email, full_name)"
             ).order("created_at", desc=True)
             
@@ -47,6 +111,54 @@ class OperationsService:
             st.error(f"Error fetching operations: {e}")
             return pd.DataFrame()
 
+    def _search_filter(self, search):
+        pattern = quote_value(f"*{search.strip()}*")
+        return ",".join(f"{col}.ilike.{pattern}" for col in SEARCH_COLUMNS)
+
+    def count_operations(self, search=None):
+        """Number of catalog rows matching `search` (count-only request)."""
+        try:
+            query = self.db.table(self.TABLE).select("id", count="exact", head=True)
+            if search and search.strip():
+                query = query.or_(self._search_filter(search))
+            return query.execute().count or 0
+        except Exception as e:
+            st.error(f"Error counting operations: {e}")
+            return 0
+
+    def get_operations_page(self, search=None, sort_by="created_at_desc", page_size=20, after=None):
+        """
+        One page of the catalog, filtered and sorted on the server.
+
+        `after` is the cursor returned for the previous page (None for the
+        first one). Returns (DataFrame, cursor of the last row or None).
+        """
+        column, desc = SORT_OPTIONS.get(sort_by, SORT_OPTIONS["created_at_desc"])
+        try:
+            query = self.db.table(self.TABLE).select(LIST_COLUMNS)
+            if search and search.strip():
+                query = query.or_(self._search_filter(search))
+            if after is not None:
+                query = query.or_(keyset_filter(column, desc, after))
+            res = query.order(column, desc=desc).order("id", desc=desc).limit(page_size).execute()
+
+            if not res.data:
+                return pd.DataFrame(), None
+
+            rows = []
+            for item in res.data:
+                row = dict(item)
+                row["created_by_fmt"] = format_user(row.pop("created_by_user", None))
+                row["updated_by_fmt"] = format_user(row.pop("updated_by_user", None))
+                rows.append(row)
+
+            last = res.data[-1]
+            next_cursor = (last.get(column), last["id"]) if len(rows) == page_size else None
+            return pd.DataFrame(rows), next_cursor
+        except Exception as e:
+            st.error(f"Error fetching operations: {e}")
+            return pd.DataFrame(), None
+
     def create_operation(self, data, user_id=None):
         """Create a single operation."""
         try:
@@ -54,7 +166,7 @@ class OperationsService:
                 data["created_by"] = user_id
                 data["updated_by"] = user_id
             
-            self.db.client.table(self.TABLE).insert(data).execute()
+            self.db.table(self.TABLE).insert(data).execute()
             return True, None
         except Exception as e:
             return False, str(e)
@@ -67,7 +179,7 @@ class OperationsService:
                 
             data["updated_at"] = "now()"
             
-            self.db.client.table(self.TABLE).update(data).eq("id", op_id).execute()
+            self.db.table(self.TABLE).update(data).eq("id", op_id).execute()
             return True, None
         except Exception as e:
             return False, str(e)
@@ -76,7 +188,7 @@ class OperationsService:
         """Delete ALL operations."""
         try:
             # Delete all rows
-            self.db.client.table(self.TABLE).delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
+            self.db.table(self.TABLE).delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
             return True
         except Exception as e:
             st.error(f"Error deleting all operations: {e}")
@@ -85,24 +197,75 @@ class OperationsService:
     def delete_operation(self, op_id):
         """Delete an operation by ID."""
         try:
-            self.db.client.table(self.TABLE).delete().eq("id", op_id).execute()
+            self.db.table(self.TABLE).delete().eq("id", op_id).execute()
             return True
         except Exception as e:
             st.error(f"Error deleting operation: {e}")
             return False
 
-    def get_all_keys(self):
-        """Fetch all existing operation keys for validation."""
+    def find_existing_keys(self, keys):
+        """
+        Which of `keys` already exist in the catalog. Only the given keys are
+        looked up (batched `in` filters), so the cost follows the file size,
+        not the catalog size.
+        """
+        wanted = sorted({k for k in map(normalize_key, keys) if k})
+        found = set()
         try:
-            res = self.db.client.table(self.TABLE).select("operation_key").execute()
-            return {item["operation_key"] for item in res.data if item.get("operation_key")}
+            for chunk in chunked(wanted, KEY_LOOKUP_CHUNK):
+                res = self.db.table(self.TABLE).select("operation_key").in_("operation_key", chunk).execute()
+                found.update(str(item["operation_key"]) for item in res.data)
+            return found
         except Exception as e:
             st.error(f"Error fetching keys: {e}")
-            return set()
+            return found
 
-    def import_operations(self, df, column_mapping, user_id=None, update_existing=False):
+    def analyze_import(self, batches, column_mapping):
+        """
+        Pre-import statistics (total / empty / new / duplicate rows), computed
+        batch by batch so large files are never loaded whole.
+        """
+        mapped_cols = [v for v in column_mapping.values() if v]
+        key_col = column_mapping.get("operation_key")
+
+        stats = {"total": 0, "empty": 0, "new": 0, "duplicates": 0}
+        for batch in batches:
+            valid = drop_empty_rows(batch, mapped_cols)
+            stats["total"] += len(batch)
+            stats["empty"] += len(batch) - len(valid)
+            if key_col and key_col in valid.columns:
+                keys = valid[key_col].map(normalize_key).dropna()
+                duplicates = int(keys.isin(self.find_existing_keys(keys)).sum())
+            else:
+                duplicates = 0
+            stats["duplicates"] += duplicates
+            stats["new"] += len(valid) - duplicates
+        return stats
+
+    def import_operations_from_batches(self, batches, column_mapping, user_id=None, update_existing=False,
+                                       skip_empty=True, progress=None, total=None):
+        """
+        Streaming import: `batches` is an iterable of DataFrames (core.ingest.iter_batches).
+        Returns the BulkResult of all batches.
+        """
+        mapped_cols = [v for v in column_mapping.values() if v]
+
+        result = BulkResult()
+        for batch in with_progress(batches, progress, total):
+            if skip_empty:
+                batch = drop_empty_rows(batch, mapped_cols)
+            result.merge(self.import_operations(batch, column_mapping, user_id=user_id,
+                                                update_existing=update_existing))
+        return result
+
+    def import_operations(self, df, column_mapping, user_id=None, update_existing=False,
+                          batch_size=None, concurrency=None):
         """
         Import operations from a dataframe using a column mapping.
+        In skip mode only the keys of `df` are checked against the catalog.
+
+        Chunks are uploaded in parallel (core/bulk.py). Returns a BulkResult:
+        exact success/skip counts plus the failing rows and their keys.
         """
         # 1. Rename columns based on mapping
         rename_map = {v: k for k, v in column_mapping.items() if v}
@@ -125,9 +288,15 @@ class OperationsService:
         })
             
         data = df_mapped.to_dict(orient='records')
+        result = BulkResult()
+
+        # Keys are compared and stored in one form, so " X " and "X" are the same operation
+        for record in data:
+            if "operation_key" in record:
+                record["operation_key"] = normalize_key(record["operation_key"])
         
         if not data:
-            return 0, 0
+            return result
             
         # Add user_id tracking to all records
         if user_id:
@@ -138,48 +307,48 @@ class OperationsService:
                 if update_existing:
                     record["updated_at"] = "now()"
 
+        # Excel row numbers travel with the records for error reports
+        if pd.api.types.is_integer_dtype(df_mapped.index):
+            items = list(zip((int(i) + 2 for i in df_mapped.index), data))
+        else:
+            items = list(zip(range(2, len(data) + 2), data))
+
         # 3. Duplicate Handling Logic
         if not update_existing:
-            # SKIP STRATEGY: Filter out keys that allow exist
-            # This requires knowing existing keys. 
-            # To avoid N+1, we fetch all (assuming reasonable size <10k) or handle error.
-            # But handling error per-row in batch is hard. 
-            # Let's use the set we likely have or fetch it.
-            existing_keys = self.get_all_keys()
-            
-            # Filter data
-            # Only keep records where 'operation_key' is NOT in existing_keys
-            # Assumes 'operation_key' is present in data
-            filtered_data = []
-            for record in data:
+            # SKIP STRATEGY: only keys that do not exist yet are inserted
+            existing_keys = self.find_existing_keys(record.get("operation_key") for _, record in items)
+
+            filtered = []
+            for row, record in items:
                 key = record.get("operation_key")
-                if key and str(key) not in existing_keys:
-                    filtered_data.append(record)
-            
-            data = filtered_data
-            if not data:
-                return 0, 0 # All were duplicates
-                
-        # 4. Batch Upsert/Insert
-        success_count = 0
-        error_count = 0
-        
-        try:
-            chunk_size = 100
-            for i in range(0, len(data), chunk_size):
-                chunk = data[i:i + chunk_size]
+                if key and key not in existing_keys:
+                    filtered.append((row, record))
+            result.skipped = len(items) - len(filtered)
+            items = filtered
+        else:
+            # One upsert must not touch the same key twice, and parallel chunks
+            # must not race on it: the last row of the file wins.
+            last = {record.get("operation_key"): i for i, (_, record) in enumerate(items)}
+            deduped = [item for i, item in enumerate(items) if last[item[1].get("operation_key")] == i]
+            result.skipped = len(items) - len(deduped)
+            items = deduped
+
+        if not items:
+            return result # All were duplicates
                 
-                if update_existing:
-                    # UPSERT
-                    # Requires on_conflict constraint
-                    self.db.client.table(self.TABLE).upsert(chunk, on_conflict="operation_key").execute()
-                else:
-                    # INSERT (filtered previously so safe-ish)
-                    self.db.client.table(self.TABLE).insert(chunk).execute()
-                    
-                success_count += len(chunk)
-        except Exception as e:
-            st.error(f"Import error: {e}")
-            error_count = len(data)
-            
-        return success_count, error_count
+        # 4. Parallel chunked upsert/insert
+        if update_existing:
+            # Requires on_conflict constraint
+            send = lambda chunk: self.db.table(self.TABLE).upsert(chunk, on_conflict="operation_key").execute()
+        else:
+            send = lambda chunk: self.db.table(self.TABLE).insert(chunk).execute()
+
+        return result.merge(write_batches(
+            send,
+            items,
+            batch_size=batch_size or AppConfig.IMPORT_BATCH_SIZE,
+            concurrency=concurrency or AppConfig.IMPORT_CONCURRENCY,
+            key="operation_key",
+            retries=AppConfig.IMPORT_RETRIES,
+            backoff=AppConfig.IMPORT_RETRY_BACKOFF,
+        ))
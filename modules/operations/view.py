@@ -2,11 +2,13 @@ import streamlit as st
 import pandas as pd
 from modules.operations.services import OperationsService
 from core.config import UserRole
+from core.services import get_service
+from core import ingest
 
 def render():
     st.header("🧵 Довідник Операцій")
     
-    service = OperationsService()
+    service = get_service(OperationsService)
     
     # Create tabs
     tab_list, tab_new, tab_import, tab_export = st.tabs(["📋 Список і Редагування", "➕ Нова операція", "📥 Імпорт (Excel)", "📤 Експорт"])
@@ -35,77 +37,35 @@ def render():
         
         page_size = c_limit.selectbox("Рядків на сторінці", options=[20, 50, 100, 200, 500], index=0, label_visibility="collapsed")
 
-        # 2. Fetch Data
-        df = service.get_operations()
-        
-        if not df.empty:
-            # 3. Process Data (Search & Sort) using Pandas
-            # Filter
-            if search_query:
-                query = search_query.lower()
-                mask = (
-                    df['operation_key'].astype(str).str.lower().str.contains(query) |
-                    df['article'].astype(str).str.lower().str.contains(query) |
-                    df['operation_number'].astype(str).str.lower().str.contains(query) |
-                    df['section'].astype(str).str.lower().str.contains(query)
-                )
-                df = df[mask]
+        # 2. Fetch one page (filtered, sorted and paged on the server)
+        # Page N starts after the last row of page N-1; cursors of visited pages are kept
+        # so "previous" is a lookup. Any change of the controls starts from page 1.
+        list_key = (search_query, sort_by, page_size)
+        if st.session_state.get("ops_list_key") != list_key:
+            st.session_state.ops_list_key = list_key
+            st.session_state.ops_page = 1
+            st.session_state.ops_cursors = [None]
 
-            # Sort
-            if sort_by == 'created_at_desc':
-                df = df.sort_values(by='created_at', ascending=False)
-            elif sort_by == 'created_at_asc':
-                df = df.sort_values(by='created_at', ascending=True)
-            elif sort_by == 'updated_at_desc':
-                df = df.sort_values(by='updated_at', ascending=False)
-            elif sort_by == 'article_asc':
-                df = df.sort_values(by='article', ascending=True)
-            elif sort_by == 'article_desc':
-                df = df.sort_values(by='article', ascending=False)
-            elif sort_by == 'section_asc':
-                df = df.sort_values(by='section', ascending=True)
-            elif sort_by == 'norm_desc':
-                df = df.sort_values(by='norm_time', ascending=False)
-                
-            # 4. Add "No." Column (Sequential 1..N)
-            df.insert(0, 'No.', range(1, len(df) + 1))
-            
-            # 5. Format User Columns
-            # Helper to format user
-            def format_user(row, prefix):
-                email = row.get(f"{prefix}_email")
-                name = row.get(f"{prefix}_name")
-                if pd.notna(name) and pd.notna(email):
-                    return f"{name} ({email})"
-                elif pd.notna(email):
-                    return email
-                return "-"
-            
-            if 'created_by_email' in df.columns:
-                df['created_by_fmt'] = df.apply(lambda x: format_user(x, 'created_by'), axis=1)
-            
-            if 'updated_by_email' in df.columns:
-                df['updated_by_fmt'] = df.apply(lambda x: format_user(x, 'updated_by'), axis=1)
-                
-            # 6. Pagination
-            total_rows = len(df)
-            total_pages = (total_rows // page_size) + (1 if total_rows % page_size > 0 else 0)
-            
-            # Session state for current page
-            if "ops_page" not in st.session_state:
-                st.session_state.ops_page = 1
-                
-            # Validate page range (if filter changed)
-            if st.session_state.ops_page > total_pages:
-                 st.session_state.ops_page = max(1, total_pages)
-                 
-            current_page = st.session_state.ops_page
+        total_rows = service.count_operations(search_query)
+        total_pages = max(1, -(-total_rows // page_size))
+        if st.session_state.ops_page > total_pages:
+            st.session_state.ops_page = total_pages
+            st.session_state.ops_cursors = st.session_state.ops_cursors[:total_pages]
+
+        current_page = st.session_state.ops_page
+        df_page, next_cursor = service.get_operations_page(
+            search=search_query,
+            sort_by=sort_by,
+            page_size=page_size,
+            after=st.session_state.ops_cursors[current_page - 1],
+        )
+
+        if not df_page.empty:
+            # 3. Add "No." Column (Sequential across pages)
             start_idx = (current_page - 1) * page_size
-            end_idx = start_idx + page_size
-            
-            df_page = df.iloc[start_idx:end_idx].copy()
+            df_page.insert(0, 'No.', range(start_idx + 1, start_idx + len(df_page) + 1))
             
-            # 7. Display Table
+            # 4. Display Table
             if is_admin:
                 st.info("💡 Режим Адміністратора: Ви можете редагувати таблицю. Не забудьте підтвердити та зберегти зміни.")
             else:
@@ -136,9 +96,6 @@ def render():
                     "updated_by_fmt": st.column_config.TextColumn("Оновив", disabled=True),
                     
                     # Hide raw columns
-                    "created_by": None, "updated_by": None,
-                    "created_by_email": None, "created_by_name": None,
-                    "updated_by_email": None, "updated_by_name": None
                 },
                 hide_index=True,
                 use_container_width=True,
@@ -147,7 +104,7 @@ def render():
                 column_order=["No.", "operation_key", "article", "operation_number", "section", "norm_time", "color", "comment", "created_by_fmt", "created_at", "updated_by_fmt", "updated_at"]
             )
             
-            # 8. Pagination Controls
+            # 5. Pagination Controls
             c_prev, c_info, c_next = st.columns([1, 2, 1])
             
             with c_prev:
@@ -160,12 +117,14 @@ def render():
                 st.markdown(f"<div style='text-align: center'>Сторінка <b>{current_page}</b> з <b>{total_pages}</b> (Всього: {total_rows})</div>", unsafe_allow_html=True)
                 
             with c_next:
-                if current_page < total_pages:
+                if current_page < total_pages and next_cursor is not None:
                     if st.button("Наступна ➡️"):
+                        del st.session_state.ops_cursors[current_page:]
+                        st.session_state.ops_cursors.append(next_cursor)
                         st.session_state.ops_page += 1
                         st.rerun()
 
-            # 9. Save Changes Logic (Admin Only)
+            # 6. Save Changes Logic (Admin Only)
             if is_admin:
                 st.divider()
                 st.markdown("##### 💾 Збереження змін")
@@ -200,7 +159,7 @@ def render():
                         st.success(f"✅ Оновлено {updated_count} записів!")
                         st.rerun()
                 
-                # 10. Delete All (Admin Only, Double Confirm)
+                # 7. Delete All (Admin Only, Double Confirm)
                 st.divider()
                 with st.expander("🗑️ Небезпечна зона (Видалити все)"):
                     st.error("Увага! Ця дія видалить ВСІ операції з бази даних. Це незворотньо.")
@@ -225,6 +184,8 @@ def render():
                              else:
                                  st.error("Помилка при видаленні.")
 
+        elif search_query:
+            st.info("Нічого не знайдено за вашим запитом.")
         else:
             st.info("Довідник порожній. Додайте операції через імпорт або вкладку 'Нова операція'.")
 
@@ -282,30 +243,28 @@ def render():
              st.warning("⛔ Імпорт доступний тільки для Адміністраторів.")
         else:
             st.markdown("### Імпорт операцій з Excel")
-            uploaded_file = st.file_uploader("Завантажте файл", type=["xlsx", "xls"])
+            uploaded_file = st.file_uploader("Завантажте файл", type=["xlsx", "xls", "csv"])
             
             if uploaded_file:
                 try:
                     # 1. Inspect Excel File for Sheets
-                    xls = pd.ExcelFile(uploaded_file)
-                    sheet_names = xls.sheet_names
+                    sheet_names = ingest.sheet_names(uploaded_file)
                     
                     st.write(f"Знайдено аркушів: {len(sheet_names)}")
                     selected_sheet = st.selectbox("Оберіть аркуш для імпорту", sheet_names)
                     
-                    # 2. Read Data from Selected Sheet
-                    df_raw = pd.read_excel(uploaded_file, sheet_name=selected_sheet)
+                    # 2. Preview only; the file itself is streamed in batches below
+                    df_preview = ingest.read_preview(uploaded_file, selected_sheet, rows=3)
                     
-                    st.success(f"Файл завантажено! Рядків: {len(df_raw)}")
                     st.write("Попередній перегляд (перші 3 рядки):")
                     # Convert to string for display to avoid Arrow serialization errors with mixed types (e.g. int/str in same col)
-                    st.dataframe(df_raw.head(3).astype(str))
+                    st.dataframe(df_preview.astype(str))
                     
                     st.divider()
                     st.subheader("🔗 Налаштування стовпців")
                     st.info("Оберіть, який стовпець з вашого файлу відповідає полю в базі даних.")
                     
-                    excel_headers = ["(Пропустити)"] + list(df_raw.columns)
+                    excel_headers = ["(Пропустити)"] + list(df_preview.columns)
                     
                     # DB Fields we need to map
                     db_fields = {
@@ -325,7 +284,7 @@ def render():
                         # Try to auto-guess index
                         default_idx = 0
                         for idx, h in enumerate(excel_headers):
-                            if h != "(Пропустити)" and any(x in h.lower() for x in label.lower().split()):
+                            if h != "(Пропустити)" and any(x in str(h).lower() for x in label.lower().split()):
                                 default_idx = idx
                                 break
                         
@@ -341,54 +300,26 @@ def render():
                     
                     st.divider()
                     
-                    st.divider()
-                    
                     if not mapping:
                         st.warning("⚠️ Спочатку співставте хоча б один стовпець.")
                     else:
                         # --- PRE-IMPORT VALIDATION ---
-                        # 1. Identify mapped columns in the dataframe
-                        mapped_excel_cols = [v for k, v in mapping.items() if v]
-                        
-                        # 2. Analyze rows
-                        df_mapped_subset = df_raw[mapped_excel_cols]
-                        total_rows = len(df_mapped_subset)
+                        # One streamed pass over the file, repeated only when the file or mapping changes
+                        analysis_key = (getattr(uploaded_file, "file_id", uploaded_file.name), selected_sheet, tuple(sorted(mapping.items())))
+                        if st.session_state.get("ops_import_analysis", (None,))[0] != analysis_key:
+                            with st.spinner("Аналіз файлу..."):
+                                stats = service.analyze_import(ingest.iter_batches(uploaded_file, selected_sheet), mapping)
+                            st.session_state.ops_import_analysis = (analysis_key, stats)
+                        stats = st.session_state.ops_import_analysis[1]
                         
-                        # Empty check
-                        is_empty_mask = df_mapped_subset.replace(r'^\s*$', pd.NA, regex=True).isna().all(axis=1)
-                        empty_rows_count = is_empty_mask.sum()
+                        total_rows = stats["total"]
+                        empty_rows_count = stats["empty"]
                         valid_rows_count = total_rows - empty_rows_count
+                        duplicate_count = stats["duplicates"]
+                        new_count = stats["new"]
                         
-                        # 3. DUPLICATE CHECK
-                        # We need to know which column maps to 'operation_key'
-                        key_col_name = mapping.get("operation_key")
-                        duplicate_count = 0
-                        new_count = 0
-                        
-                        if key_col_name and key_col_name != "(Пропустити)":
-                            # Fetch existing keys
-                            existing_keys = service.get_all_keys()
-                            
-                            # Get keys from import (clean them)
-                            import_keys = df_raw[key_col_name].dropna().astype(str).tolist()
-                            
-                            # Count overlap
-                            # Note: This doesn't account for skipping empty rows yet, but gives a rough idea.
-                            # Better: Check only on valid rows
-                            
-                            # Let's iterate valid rows to be precise
-                            # Improve: Vectorized check
-                            valid_df = df_raw[~is_empty_mask].copy()
-                            if key_col_name in valid_df.columns:
-                                valid_df['is_duplicate'] = valid_df[key_col_name].astype(str).isin(existing_keys)
-                                duplicate_count = valid_df['is_duplicate'].sum()
-                                new_count = len(valid_df) - duplicate_count
-                            else:
-                                new_count = len(valid_df)
-                                
-                        else:
+                        if not mapping.get("operation_key"):
                             st.warning("⚠️ Не вибрано стовпець 'Ключ операції'. Перевірка дублікатів неможлива.")
-                            new_count = valid_rows_count
 
                         # Display Stats
                         st.markdown("#### 📊 Аналіз даних")
@@ -418,28 +349,40 @@ def render():
                             st.error("❌ Немає даних для імпорту (всі рядки пусті або не вибрані стовпці).")
                         else:
                             if st.button("🚀 Виконати імпорт", disabled=not confirm_import):
-                                with st.spinner("Імпортуємо дані..."):
-                                    # Filter DF if needed
-                                    if skip_empty:
-                                        # Keep only rows that are NOT empty
-                                        df_to_import = df_raw[~is_empty_mask]
-                                    else:
-                                        df_to_import = df_raw
-                                        
-                                    current_user_id = st.session_state.user.id if st.session_state.get("user") else None
-                                    
-                                    s_count, e_count = service.import_operations(
-                                        df_to_import, 
-                                        mapping, 
-                                        user_id=current_user_id,
-                                        update_existing=update_existing
-                                    )
+                                current_user_id = st.session_state.user.id if st.session_state.get("user") else None
+                                progress_bar = st.progress(0.0, text="Імпортуємо дані...")
+                                
+                                result = service.import_operations_from_batches(
+                                    ingest.iter_batches(uploaded_file, selected_sheet),
+                                    mapping, 
+                                    user_id=current_user_id,
+                                    update_existing=update_existing,
+                                    skip_empty=skip_empty,
+                                    progress=lambda done, total: progress_bar.progress(
+                                        min(done / total, 1.0), text=f"Оброблено {done} з {total} рядків"
+                                    ),
+                                    total=total_rows
+                                )
+                                progress_bar.empty()
+                                # File contents changed the duplicate picture
+                                st.session_state.pop("ops_import_analysis", None)
                                 
+                                s_count, e_count = result.success, result.failed
+                                if result.skipped:
+                                    st.info(f"Пропущено дублікатів: {result.skipped}")
                                 if e_count == 0:
                                     st.success(f"✅ Успішно оброблено {s_count} рядків!")
                                     st.balloons()
                                 else:
                                     st.warning(f"Імпорт завершено. Успішно: {s_count}, Помилок: {e_count}")
+                                    # Failed rows can be fixed in the file and imported again
+                                    st.dataframe(
+                                        pd.DataFrame(result.errors).rename(columns={
+                                            "row": "Рядок Excel", "key": "Ключ операції", "error": "Помилка"
+                                        }),
+                                        hide_index=True,
+                                        use_container_width=True
+                                    )
                                     
                 except Exception as e:
                     st.error(f"Помилка читання або обробки файлу: {e}")
@@ -448,25 +391,29 @@ def render():
     with tab_export:
         st.markdown("### Експорт операцій в Excel")
         
-        # Re-fetch or reuse if appropriate, but cleaner to fetch fresh
-        df_export = service.get_operations()
-        
-        if df_export.empty:
-            st.info("Немає даних для експорту.")
-        else:
-            st.write(f"У базі знайдено {len(df_export)} записів.")
-            
-            # Convert to Excel in memory
-            import io
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df_export.to_excel(writer, index=False, sheet_name='Operations')
-            
-            excel_data = output.getvalue()
-            
-            st.download_button(
-                label="📥 Завантажити Excel",
-                data=excel_data,
-                file_name="operations_catalog.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+        # Full catalog is only downloaded on request, not on every rerun of the page
+        st.write(f"У базі знайдено {service.count_operations()} записів.")
+
+        if st.button("📦 Підготувати файл", key="ops_export_prepare"):
+            st.session_state.ops_export_ready = True
+
+        if st.session_state.get("ops_export_ready"):
+            df_export = service.get_operations()
+
+            if df_export.empty:
+                st.info("Немає даних для експорту.")
+            else:
+                # Convert to Excel in memory
+                import io
+                output = io.BytesIO()
+                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+                    df_export.to_excel(writer, index=False, sheet_name='Operations')
+
+                excel_data = output.getvalue()
+
+                st.download_button(
+                    label="📥 Завантажити Excel",
+                    data=excel_data,
+                    file_name="operations_catalog.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
@@ -1,136 +1,190 @@
 import pandas as pd
 import io
+from core.bulk import BulkResult, write_batches
+from core.config import AppConfig
 from core.database import DatabaseService
+from core.ingest import with_progress
 import streamlit as st
 
+
+def _clean_text(series):
+    """Stripped strings, NA for blanks; integral floats (1001.0) lose the '.0'."""
+    if pd.api.types.is_float_dtype(series):
+        values = series.dropna()
+        if ((values % 1) == 0).all():
+            series = series.astype("Int64")
+    series = series.astype("string").str.strip()
+    return series.mask(series == "")
+
 class ImpexService:
-    def __init__(self):
-        self.db = DatabaseService()
-        self.required_columns = ["order_number", "product_name", "quantity"]
+    required_columns = ["order_number", "product_name", "quantity"]
+
+    # Mapping Ukrainian headers to DB columns (static, shared by all instances)
+    # Structure: { "Excel Header": "db_column" }
+    column_mapping = {
+        "Номер замовлення": "order_number",
+        "Order #": "order_number",
         
-        # Mapping Ukrainian headers to DB columns
-        # Structure: { "Excel Header": "db_column" }
-        self.column_mapping = {
-            "Номер замовлення": "order_number",
-            "Order #": "order_number",
-            
-            "Назва виробу": "product_name",
-            "Product": "product_name",
-            "Item": "product_name",
-            
-            "Артикул": "article",
-            "Article": "article",
-            
-            "Кількість": "quantity",
-            "Qty": "quantity",
-            "Quantity": "quantity",
-            
-            "Контрагент": "contractor",
-            "Contractor": "contractor",
-            "Customer": "contractor",
-            
-            "Дата відвантаження": "shipping_date",
-            "Ship Date": "shipping_date",
-            "Deadline": "shipping_date",
-            
-            "Дата початку": "start_date",
-            "Start Date": "start_date",
+        "Назва виробу": "product_name",
+        "Product": "product_name",
+        "Item": "product_name",
+        
+        "Артикул": "article",
+        "Article": "article",
+        
+        "Кількість": "quantity",
+        "Qty": "quantity",
+        "Quantity": "quantity",
+        
+        "Контрагент": "contractor",
+        "Contractor": "contractor",
+        "Customer": "contractor",
+        
+        "Дата відвантаження": "shipping_date",
+        "Ship Date": "shipping_date",
+        "Deadline": "shipping_date",
+        
+        "Дата початку": "start_date",
+        "Start Date": "start_date",
 
-            "Дата підготовки": "preparation_date",
-            "Prep Date": "preparation_date",
-            
-            "Коментар": "comment",
-            "Comment": "comment",
-            "Notes": "comment"
-        }
+        "Дата підготовки": "preparation_date",
+        "Prep Date": "preparation_date",
+        
+        "Коментар": "comment",
+        "Comment": "comment",
+        "Notes": "comment"
+    }
+
+    def __init__(self, db=None):
+        self.db = db or DatabaseService()
 
     def get_field_aliases(self, db_field):
         """Return list of possible Excel headers for a given DB field."""
         return [k for k, v in self.column_mapping.items() if v == db_field]
 
-    def import_orders_from_df(self, df, column_mapping):
+    def import_orders_from_df(self, df, column_mapping, batch_size=None, concurrency=None,
+                              progress=None, first_row=2):
         """
         Import orders from DataFrame with dynamic column mapping.
+
+        Rows are cleaned column-wise and upserted on order_number in batches.
+        Returns a BulkResult; errors carry the Excel row number (index + first_row).
         """
-        # 1. Rename columns based on mapping
-        rename_map = {v: k for k, v in column_mapping.items() if v and v != '(Пропустити)'}
-        # Invert mapping: UI maps DB_COL -> EXCEL_HEADER (v). 
-        # We need EXCEL_HEADER -> DB_COL for renaming.
+        # UI maps DB_COL -> EXCEL_HEADER; we need EXCEL_HEADER -> DB_COL for renaming.
         rename_map = {v: k for k, v in column_mapping.items() if v and v != "(Пропустити)"}
         
         # Select only mapped columns
         try:
             df_mapped = df[list(rename_map.keys())].rename(columns=rename_map)
         except KeyError as e:
-            return 0, f"Missing columns in Excel: {e}"
-            
-        orders_data = df_mapped.to_dict(orient='records')
-        
-        success_count = 0
-        fail_count = 0
-        
-        for order in orders_data:
-            try:
-                # Cleaning & Validation
-                clean_order = {}
-                
-                # Helper to safely get and clean
-                def get_val(key):
-                    if key in order and pd.notna(order[key]):
-                        return order[key]
-                    return None
-
-                # Mandatory fields
-                order_number = get_val("order_number")
-                product_name = get_val("product_name")
-                quantity = get_val("quantity")
-                
-                if not order_number or not product_name:
-                    fail_count += 1
-                    continue
-                    
-                clean_order["order_number"] = str(order_number).strip()
-                clean_order["product_name"] = str(product_name).strip()
-                
-                # Quantity
-                try:
-                    clean_order["quantity"] = int(quantity) if quantity else 1
-                except:
-                     clean_order["quantity"] = 1
-                     
-                # Optional fields
-                if get_val("article"): clean_order["article"] = str(get_val("article")).strip()
-                if get_val("contractor"): clean_order["contractor"] = str(get_val("contractor")).strip()
-                if get_val("comment"): clean_order["comment"] = str(get_val("comment")).strip()
-                
-                # Dates
-                for date_field in ["shipping_date", "start_date", "preparation_date"]:
-                    val = get_val(date_field)
-                    if val:
-                        try:
-                            clean_order[date_field] = pd.to_datetime(val).strftime('%Y-%m-%d')
-                        except:
-                            pass # Ignore invalid date
-
-                # Insert
-                # Upsert (Insert or Update based on order_number)
-                self.db.client.table("orders").upsert(
-                    clean_order, 
-                    on_conflict="order_number"
-                ).execute()
-                success_count += 1
-                
-            except Exception as e:
-                st.error(f"Row Error: {e}")
-                fail_count += 1
-                
-        return success_count, fail_count
+            result = BulkResult()
+            result.add_error(None, None, f"Missing columns in Excel: {e}")
+            return result
+
+        records, result = self.clean_orders(df_mapped, first_row=first_row)
+
+        # Rows with the same set of filled columns share a batch: a bulk upsert
+        # writes NULL into columns a row leaves out, and empty cells must not
+        # wipe values of existing orders.
+        groups = {}
+        for row, record in records:
+            groups.setdefault(tuple(sorted(record)), []).append((row, record))
+
+        done_before = 0
+        for items in groups.values():
+            def report(done, total, offset=done_before):
+                if progress:
+                    progress(offset + done, len(records))
+
+            result.merge(write_batches(
+                lambda chunk: self.db.orders.upsert(chunk, on_conflict="order_number").execute(),
+                items,
+                batch_size=batch_size or AppConfig.IMPORT_BATCH_SIZE,
+                concurrency=concurrency or AppConfig.IMPORT_CONCURRENCY,
+                key="order_number",
+                progress=report,
+                retries=AppConfig.IMPORT_RETRIES,
+                backoff=AppConfig.IMPORT_RETRY_BACKOFF,
+            ))
+            done_before += len(items)
+        return result
+
+    def import_orders_from_batches(self, batches, column_mapping, progress=None, total=None):
+        """
+        Streaming import: `batches` is an iterable of DataFrames (core.ingest.iter_batches).
+        progress(rows_done, total) is called after every batch.
+        """
+        result = BulkResult()
+        for batch in with_progress(batches, progress, total):
+            batch_result = self.import_orders_from_df(batch, column_mapping)
+            result.merge(batch_result)
+            if batch_result.errors and batch_result.errors[0]["row"] is None:
+                # Mapping does not match the file; every batch would fail the same way
+                break
+        return result
+
+    def clean_orders(self, df, first_row=2):
+        """
+        Vectorized cleaning of mapped order rows.
+
+        Returns ([(excel_row, record), ...], BulkResult with the rejected rows).
+        """
+        result = BulkResult()
+        if df.empty:
+            return [], result
+
+        df = df.copy()
+        if pd.api.types.is_integer_dtype(df.index):
+            df["_row"] = df.index + first_row
+        else:
+            df["_row"] = range(first_row, first_row + len(df))
+
+        for col in ["order_number", "product_name", "article", "contractor", "comment"]:
+            if col in df.columns:
+                df[col] = _clean_text(df[col])
+
+        # Mandatory fields
+        missing = pd.Series(False, index=df.index)
+        for col in ["order_number", "product_name"]:
+            if col not in df.columns:
+                df[col] = pd.NA
+            missing |= df[col].isna()
+        for row, number in df.loc[missing, ["_row", "order_number"]].itertuples(index=False):
+            result.add_error(int(row), None if pd.isna(number) else number, "order_number and product_name are required")
+        df = df[~missing]
+
+        # Same order number twice in the file: the last row wins
+        duplicated = df.duplicated("order_number", keep="last")
+        if duplicated.any():
+            last_row = df.drop_duplicates("order_number", keep="last").set_index("order_number")["_row"]
+            for row, number in df.loc[duplicated, ["_row", "order_number"]].itertuples(index=False):
+                result.add_error(int(row), number, f"duplicate order_number, row {int(last_row[number])} is used")
+            df = df[~duplicated]
+
+        # Quantity: empty, zero or invalid -> 1
+        quantity = pd.to_numeric(df["quantity"], errors="coerce") if "quantity" in df.columns else pd.Series(1, index=df.index)
+        quantity = quantity.where(quantity.notna() & (quantity != 0), 1)
+        df["quantity"] = quantity.astype(float).astype(int)
+
+        # Dates (invalid ones are ignored)
+        for col in ["shipping_date", "start_date", "preparation_date"]:
+            if col in df.columns:
+                parsed = pd.to_datetime(df[col], errors="coerce", format="mixed")
+                df[col] = parsed.dt.strftime("%Y-%m-%d").astype(object).where(parsed.notna(), None)
+
+        columns = [c for c in df.columns if c != "_row"]
+        values = df[columns].astype(object).where(df[columns].notna(), None)
+        records = [
+            (int(row), {k: v for k, v in record.items() if v is not None})
+            for row, record in zip(df["_row"], values.to_dict(orient="records"))
+        ]
+        return records, result
 
     def export_orders(self):
         """Export orders to Excel bytes."""
         try:
             # Fetch data
-            data = self.db.client.table("orders").select("*").order("created_at", desc=True).execute().data
+            data = self.db.orders.select("*").order("created_at", desc=True).execute().data
             
             if not data:
                 return None
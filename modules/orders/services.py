@@ -1,14 +1,16 @@
+from core.clock import factory_now, stamp
 from core.database import DatabaseService
+from modules.scheduling.services import SchedulingService
 import streamlit as st
 
 class OrderService:
-    def __init__(self):
-        self.db = DatabaseService()
+    def __init__(self, db=None):
+        self.db = db or DatabaseService()
 
     def get_orders(self):
         """Fetch all orders ordered by creation date."""
         try:
-            return self.db.client.table("orders").select("*").order("created_at", desc=True).execute().data
+            return self.db.orders.select("*").order("created_at", desc=True).execute().data
         except Exception as e:
             st.error(f"Error fetching orders: {e}")
             return []
@@ -16,7 +18,7 @@ class OrderService:
     def create_order(self, order_data):
         """Create a new order."""
         try:
-            return self.db.client.table("orders").insert(order_data).execute()
+            return self.db.orders.insert(order_data).execute()
         except Exception as e:
             st.error(f"Error creating order: {e}")
             return None
@@ -24,7 +26,7 @@ class OrderService:
     def update_order(self, order_id, updates):
         """Update an existing order."""
         try:
-            return self.db.client.table("orders").update(updates).eq("id", order_id).execute()
+            return self.db.orders.update(updates).eq("id", order_id).execute()
         except Exception as e:
             st.error(f"Error updating order: {e}")
             return None
@@ -32,7 +34,7 @@ class OrderService:
     def delete_order(self, order_id):
         """Delete an order (Admin only)."""
         try:
-            return self.db.client.table("orders").delete().eq("id", order_id).execute()
+            return self.db.orders.delete().eq("id", order_id).execute()
         except Exception as e:
             st.error(f"Error deleting order: {e}")
             return None
@@ -42,7 +44,7 @@ class OrderService:
     def get_order_by_id(self, order_id):
         """Fetch a single order by ID."""
         try:
-            data = self.db.client.table("orders").select("*").eq("id", order_id).execute().data
+            data = self.db.orders.select("*").eq("id", order_id).execute().data
             return data[0] if data else None
         except Exception as e:
             return None
@@ -51,7 +53,7 @@ class OrderService:
         """Fetch all operations for a specific order with related data."""
         try:
             # Fetch operations without workers join (workaround for missing FK)
-            response = self.db.client.table("order_operations").select(
+            response = self.db.order_operations.select(
                 "*, sections(name), operations_catalog(operation_key, article)"
             ).eq("order_id", order_id).order("sort_order").execute()
             
@@ -61,7 +63,7 @@ class OrderService:
                 return []
             
             # Fetch workers separately
-            workers_res = self.db.client.table("workers").select("id, full_name").execute()
+            workers_res = self.db.workers.select("id, full_name").execute()
             workers_map = {w['id']: w for w in workers_res.data} if workers_res.data else {}
             
             # Manually add worker info to each operation
@@ -81,21 +83,21 @@ class OrderService:
     def get_sections(self):
         """Fetch all sections."""
         try:
-            return self.db.client.table("sections").select("*").order("name").execute().data
+            return self.db.sections.select("*").order("name").execute().data
         except Exception:
             return []
 
     def get_all_workers(self):
         """Fetch all workers from 'workers' table."""
         try:
-            return self.db.client.table("workers").select("id, full_name, operation_types, section_id").execute().data
+            return self.db.workers.select("id, full_name, operation_types, section_id").execute().data
         except Exception:
             return []
 
     def get_available_operations(self, section_name=None):
         """Fetch operations from catalog."""
         try:
-            query = self.db.client.table("operations_catalog").select("*")
+            query = self.db.operations_catalog.select("*")
             if section_name:
                 query = query.eq("section", section_name)
             return query.execute().data
@@ -104,14 +106,14 @@ class OrderService:
 
     def create_order_operation(self, data):
         try:
-            return self.db.client.table("order_operations").insert(data).execute()
+            return self.db.order_operations.insert(data).execute()
         except Exception as e:
             st.error(f"Error adding operation: {e}")
             return None
             
     def update_order_operation(self, op_id, data):
         try:
-            return self.db.client.table("order_operations").update(data).eq("id", op_id).execute()
+            return self.db.order_operations.update(data).eq("id", op_id).execute()
         except Exception as e:
             st.error(f"Error updating operation: {e}")
             return None
@@ -124,7 +126,7 @@ class OrderService:
         """
         try:
             # 1. Get Section ID
-            sec_res = self.db.client.table("sections").select("id").eq("name", section_name).execute()
+            sec_res = self.db.sections.select("id").eq("name", section_name).execute()
             if not sec_res.data:
                 return []
             sec_id = sec_res.data[0]['id']
@@ -134,7 +136,7 @@ class OrderService:
             # PostgREST syntax for OR: or=(section_id.eq.X,operation_types.cs.{Name})
             
             or_filter = f"section_id.eq.{sec_id},operation_types.cs.{{{section_name}}}"
-            return self.db.client.table("workers").select("id, full_name, section_id").or_(or_filter).execute().data
+            return self.db.workers.select("id, full_name, section_id").or_(or_filter).execute().data
             
         except Exception as e:
             # Fallback to simple query if complex filter fails
@@ -143,7 +145,7 @@ class OrderService:
 
     def delete_order_operation(self, op_id):
         try:
-            self.db.client.table("order_operations").delete().eq("id", op_id).execute()
+            self.db.order_operations.delete().eq("id", op_id).execute()
             return True
         except Exception as e:
             st.error(f"Error deleting op: {e}")
@@ -154,107 +156,79 @@ class OrderService:
         try:
             # Join with orders to get context (Order #, Article)
             # Join with operations_catalog to get operation name/key
-            return self.db.client.table("order_operations").select(
+            return self.db.order_operations.select(
                 "*, orders(order_number, article, customer_name), operations_catalog(operation_key, section)"
             ).eq("assigned_worker_id", worker_id).order("scheduled_start_at").execute().data
         except Exception as e:
             # st.error(f"Error fetching tasks: {e}")
             return []
 
-    def update_operation_status(self, op_id, new_status, quantity_done=0):
-        """Update status and progress of an operation."""
+    def update_operation_status(self, op_id, new_status, quantity_done=0, reschedule=True):
+        """
+        Update status and progress of an operation. Stamps actual_start_at on
+        the first move to in_progress and actual_end_at on done (cleared when
+        a done operation is reopened); analytics cycle times read these.
+        The plan is shifted only when the operation starts or resumes, finishes
+        or is reopened; pass reschedule=False to batch that via reschedule_operations().
+        """
         data = {"status": new_status}
         if quantity_done > 0:
             data["completed_quantity"] = quantity_done
-        
-        # If finishing, set actual end time? (Optional, let's keep it simple)
-        if new_status == 'done':
-            # data['actual_end_at'] = datetime.now().isoformat()
-            pass
-            
+
         try:
-            return self.db.client.table("order_operations").update(data).eq("id", op_id).execute()
+            current = self.db.order_operations.get(op_id, "status, actual_start_at") or {}
+            now = stamp(factory_now())
+            if new_status == 'in_progress' and not current.get("actual_start_at"):
+                data["actual_start_at"] = now
+            if new_status == 'done':
+                data["actual_end_at"] = now
+            elif current.get("status") == 'done':
+                data["actual_end_at"] = None
+            res = self.db.order_operations.update(data).eq("id", op_id).execute()
         except Exception as e:
             return None
+        # Shift the operation and only what depends on it (its successors, its worker's next jobs)
+        if reschedule and new_status != current.get("status") and \
+                (new_status in ('in_progress', 'done') or current.get("status") == 'done'):
+            self.reschedule_operation(op_id)
+        return res
 
     def auto_schedule_order(self, order_id, assign_workers=True):
         """
         Automatically calculate start/end dates for all operations in an order.
         Optionally assign free workers.
-        Logic: Sequential execution based on sort_order.
+        Logic: Sequential execution based on sort_order (see modules/scheduling).
         """
-        import datetime
-        import random
-        
-        try:
-            # 1. Get Order Details for Start Date
-            order = self.get_order_by_id(order_id)
-            if not order: return False
-            
-            start_base = order.get('start_date')
-            if start_base:
-                current_time = datetime.datetime.fromisoformat(start_base)
-            else:
-                current_time = datetime.datetime.now()
+        return SchedulingService(self.db).schedule_order(order_id, assign_workers=assign_workers)
 
-            # 2. Get All Operations Sorted
-            ops = self.db.client.table("order_operations").select("*, sections(name)").eq("order_id", order_id).order("sort_order").execute().data
-            
-            # Cache workers to avoid repeated DB calls if possible, but availability changes per slot
-            # So we fetch qualified workers once per section if needed, but we need strictly per-slot availability
-            
-            for op in ops:
-                # Calculate Duration (Minutes)
-                qty = op.get('quantity', 0)
-                norm = op.get('norm_time_per_unit', 0) or 0
-                duration_mins = qty * norm
-                
-                # If 0 duration, assume default small window or 0
-                if duration_mins <= 0: duration_mins = 60 
+    def reschedule_operation(self, op_id, recompute=True):
+        """Incremental reschedule after one operation changed; returns a RescheduleResult with the diff."""
+        return SchedulingService(self.db).reschedule_operation(op_id, recompute=recompute)
 
-                end_time = current_time + datetime.timedelta(minutes=duration_mins)
-                
-                update_data = {
-                    "scheduled_start_at": current_time.isoformat(),
-                    "scheduled_end_at": end_time.isoformat()
-                }
+    def reschedule_operations(self, op_ids, recompute=True):
+        """reschedule_operation() for a batch of changed operations, with one load and one write."""
+        return SchedulingService(self.db).reschedule_operations(op_ids, recompute=recompute)
 
-                # --- WORKER ASSIGNMENT ---
-                if assign_workers:
-                    section_name = op.get('sections', {}).get('name')
-                    if section_name:
-                        # 1. Get Qualified Workers for this section
-                        # Now uses the combined strict + loose lookup from 'workers' table
-                        qualified = self.get_workers_for_section(section_name)
-                        qualified_ids = [w['id'] for w in qualified]
-                        
-                        if qualified_ids:
-                            # 2. Check who is busy in this specific slot
-                            busy_ids = self.get_busy_workers(current_time, end_time)
-                            
-                            # 3. Filter
-                            available = [uid for uid in qualified_ids if uid not in busy_ids]
-                            
-                            if available:
-                                # Assign first available (or random)
-                                # Logic: "not attached to any of the sections" - interpreted as just "free"
-                                update_data["assigned_worker_id"] = available[0] 
-                            else:
-                                # No one available? Keep current or set None? 
-                                # Let's keep existing if valid, or leave as is.
-                                # Requirement says "attach according to those who are free"
-                                pass
+    def assign_day_workers(self, day, method="greedy"):
+        """Rebalance the workers of one day's operations; returns an AssignResult."""
+        return SchedulingService(self.db).assign_day(day, method=method)
+
+    def take_plan_snapshot(self):
+        """In-memory copy of the plan for what-if scenarios."""
+        return SchedulingService(self.db).snapshot()
+
+    def commit_scenario(self, result, snapshot):
+        """Write a what-if scenario's moved operations in one bulk upsert."""
+        return SchedulingService(self.db).commit_scenario(result, snapshot)
+
+    def get_worker_slots(self, section_id, minutes, after=None, catalog_id=None):
+        """Qualified workers with their earliest free slot of `minutes`, earliest first."""
+        return SchedulingService(self.db).worker_slots(section_id, minutes, after, catalog_id=catalog_id)
+
+    def replan_all_orders(self, assign_workers=True, finite=False, rule="fifo"):
+        """Reschedule every order in one pass; returns a ScheduleResult."""
+        return SchedulingService(self.db).replan_all(assign_workers=assign_workers, finite=finite, rule=rule)
 
-                # Update Record
-                self.db.client.table("order_operations").update(update_data).eq("id", op['id']).execute()
-                
-                # Next starts when this ends (Sequential)
-                current_time = end_time
-                
-            return True
-        except Exception as e:
-            st.error(f"Auto-schedule failed: {e}")
-            return False
     def get_active_orders_distribution(self):
         """
         Calculate distribution of active orders by their current section.
@@ -269,7 +243,7 @@ class OrderService:
             for order in orders:
                 # 2. Get operations for this order
                 # This could be N+1 slow, but optimized later with a view or join.
-                ops = self.db.client.table("order_operations").select("status, sections(name)") \
+                ops = self.db.order_operations.select("status, sections(name)") \
                     .eq("order_id", order['id']) \
                     .order("sort_order") \
                     .execute().data
@@ -299,11 +273,11 @@ class OrderService:
         """
         try:
             # Fetch all orders
-            orders = self.db.client.table("orders").select("id, order_number, product_name, start_date, end_date").execute().data
+            orders = self.db.orders.select("id, order_number, product_name, start_date, end_date").execute().data
             
             # Fetch all operations (could be heavy, but manageable for MVP)
             # We need: order_id, status, scheduled_start_at, scheduled_end_at, quantity, sections(name), operations_catalog(operation_key)
-            ops = self.db.client.table("order_operations").select(
+            ops = self.db.order_operations.select(
                 "order_id, status, scheduled_start_at, scheduled_end_at, quantity, sections(name), operations_catalog(operation_key)"
             ).order("sort_order").execute().data
             
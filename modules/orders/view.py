@@ -1,17 +1,22 @@
 import streamlit as st
 import pandas as pd
+import datetime
 from modules.orders.services import OrderService
 from modules.orders.impex import ImpexService
 from modules.sections.services import SectionsService
 from core.config import UserRole
+from core.services import get_service
+from core import ingest
+from modules.scheduling.assignment import ASSIGN_METHODS
+from modules.scheduling.engine import PRIORITY_RULES, format_ts
 
 def render():
     st.header("📦 Керування замовленнями")
     
     # Initialize Service
-    service = OrderService()
-    sections_service = SectionsService()
-    impex = ImpexService()
+    service = get_service(OrderService)
+    sections_service = get_service(SectionsService)
+    impex = get_service(ImpexService)
 
     # Handle Navigation State
     if "selected_order_id" not in st.session_state:
@@ -32,7 +37,11 @@ def render_list_view(service, impex):
             st.info("Замовлень поки немає.")
         else:
             df = pd.DataFrame(orders)
-            
+
+            if st.session_state.get("role") in [UserRole.ADMIN, UserRole.MANAGER]:
+                render_replan_all(service)
+                render_what_if(service)
+
             # Select Order logic
             order_options = {o['id']: f"{o['order_number']} | {o['product_name']}" for o in orders}
             selected_id = st.selectbox("🔍 Оберіть замовлення для планування:", options=list(order_options.keys()), format_func=lambda x: order_options[x], index=None, placeholder="Оберіть замовлення...")
@@ -81,6 +90,142 @@ def render_list_view(service, impex):
             if data:
                 st.download_button("📥 Завантажити", data, "orders.xlsx")
 
+def render_replan_all(service):
+    """Reschedule every order in one pass (modules/scheduling)."""
+    c1, c2, c3, c4 = st.columns([1, 1, 1, 1])
+    assign = c2.checkbox("Призначати вільних працівників", value=True, key="replan_assign")
+    finite = c3.checkbox("Враховувати потужність дільниць", value=False, key="replan_finite",
+                         help="Не більше capacity_minutes хвилин роботи на дільницю за день")
+    rule = c4.selectbox("Пріоритет", options=list(PRIORITY_RULES.keys()), format_func=PRIORITY_RULES.get, key="replan_rule")
+    if c1.button("🔄 Перепланувати все"):
+        with st.spinner("Планування..."):
+            result = service.replan_all_orders(assign_workers=assign, finite=finite, rule=rule)
+        if result.plan is None:
+            return
+        st.success(f"Заплановано замовлень: {result.orders}, операцій оновлено: {result.updated} з {result.operations}")
+        if result.unassigned:
+            st.warning(f"Без вільного працівника: {len(result.unassigned)} операцій")
+        if result.late:
+            st.warning(f"Не встигають до дати відвантаження: {len(result.late)} замовлень")
+            st.dataframe(
+                pd.DataFrame(result.late),
+                column_config={
+                    "order_id": None,
+                    "order_number": "№",
+                    "shipping_date": st.column_config.DateColumn("Відвантаження", format="YYYY-MM-DD"),
+                    "planned_end": st.column_config.DatetimeColumn("Плановий кінець", format="YYYY-MM-DD HH:mm"),
+                    "delay_days": st.column_config.NumberColumn("Запізнення (дн)", format="%.1f"),
+                },
+                hide_index=True,
+            )
+        if result.write.errors:
+            st.error(f"Не збережено: {result.write.failed} операцій")
+            st.dataframe(pd.DataFrame(result.write.errors), hide_index=True)
+
+    d1, d2, d3, _ = st.columns([1, 1, 1, 1])
+    day = d2.date_input("День", value=datetime.date.today(), key="assign_day")
+    method = d3.selectbox("Метод", options=list(ASSIGN_METHODS.keys()), format_func=ASSIGN_METHODS.get,
+                          key="assign_method")
+    if d1.button("⚖️ Розподілити працівників", help="За навичками, завантаженням і безперервністю замовлення"):
+        with st.spinner("Розподіл..."):
+            result = service.assign_day_workers(day, method=method)
+        if result.ok:
+            st.success(f"Операцій на день: {len(result.assignment)}, змінено працівника: {result.updated}")
+            if result.unassigned:
+                st.warning(f"Без вільного працівника: {len(result.unassigned)} операцій")
+        elif result.write.errors:
+            st.error(f"Не збережено: {result.write.failed} операцій")
+
+def render_what_if(service):
+    """Try scheduling scenarios on an in-memory snapshot before touching the plan."""
+    with st.expander("🧪 Що-якщо (пісочниця)"):
+        if st.button("📸 Зробити знімок плану"):
+            st.session_state.plan_snapshot = service.take_plan_snapshot()
+            st.session_state.scenarios = []
+        snapshot = st.session_state.get("plan_snapshot")
+        if snapshot is None:
+            st.caption("Сценарії рахуються на копії поточного плану і нічого не змінюють до збереження.")
+            return
+        st.caption(f"Знімок: {snapshot.taken_at:%Y-%m-%d %H:%M}, операцій: {len(snapshot)}")
+
+        orders = {o.id: o.order_number for o in snapshot.orders}
+        workers = {w["id"]: w.get("full_name") for w in snapshot.workers}
+        c1, c2, c3 = st.columns(3)
+        name = c1.text_input("Назва сценарію", value=f"Сценарій {len(st.session_state.scenarios) + 1}")
+        rush = c1.multiselect("Термінові замовлення", options=list(orders), format_func=orders.get)
+        sick = c2.multiselect("Відсутні працівники", options=list(workers), format_func=workers.get)
+        days = c2.date_input("Відсутні з / по", value=(snapshot.taken_at.date(), snapshot.taken_at.date()))
+        finite = c3.checkbox("Враховувати потужність дільниць", value=False, key="what_if_finite")
+        rule = c3.selectbox("Пріоритет", options=list(PRIORITY_RULES.keys()), format_func=PRIORITY_RULES.get,
+                            key="what_if_rule")
+
+        if st.button("▶️ Порахувати сценарій"):
+            scenario = snapshot.scenario(name)
+            for order_id in rush:
+                scenario.rush(order_id)
+            if sick and len(days) == 2:
+                start = datetime.datetime.combine(days[0], datetime.time())
+                end = datetime.datetime.combine(days[1], datetime.time()) + datetime.timedelta(days=1)
+                for worker_id in sick:
+                    scenario.absent(worker_id, start, end)
+            with st.spinner("Планування..."):
+                st.session_state.scenarios.append(scenario.run(finite=finite, rule=rule))
+
+        results = st.session_state.scenarios
+        if not results:
+            return
+        st.dataframe(
+            pd.DataFrame([r.summary() for r in results]),
+            column_config={
+                "name": "Сценарій",
+                "late_orders": "Запізнень",
+                "live_late_orders": "Запізнень (зараз)",
+                "delay_days": st.column_config.NumberColumn("Запізнення (дн)", format="%.1f"),
+                "live_delay_days": st.column_config.NumberColumn("Запізнення зараз (дн)", format="%.1f"),
+                "moved": "Зсунуто операцій",
+                "unassigned": "Без працівника",
+            },
+            hide_index=True,
+        )
+        picked = st.selectbox("Сценарій", options=range(len(results)), format_func=lambda i: results[i].name,
+                              index=len(results) - 1)
+        result = results[picked]
+        st.dataframe(
+            pd.DataFrame(result.utilization),
+            column_config={
+                "section_id": None,
+                "section": "Дільниця",
+                "live": st.column_config.ProgressColumn("Завантаження зараз", min_value=0, max_value=1),
+                "scenario": st.column_config.ProgressColumn("У сценарії", min_value=0, max_value=1),
+            },
+            hide_index=True,
+        )
+        if result.moved:
+            moved = pd.DataFrame(result.moved)
+            moved["order"] = moved["order_id"].map(orders)
+            moved["worker"] = moved["new_worker_id"].map(workers)
+            st.dataframe(
+                moved[["order", "worker", "old_start", "new_start", "new_end", "shift_minutes"]],
+                column_config={
+                    "order": "№",
+                    "worker": "Працівник",
+                    "old_start": st.column_config.DatetimeColumn("Було", format="DD.MM HH:mm"),
+                    "new_start": st.column_config.DatetimeColumn("Стало", format="DD.MM HH:mm"),
+                    "new_end": st.column_config.DatetimeColumn("Кінець", format="DD.MM HH:mm"),
+                    "shift_minutes": st.column_config.NumberColumn("Зсув (хв)", format="%.0f"),
+                },
+                hide_index=True,
+            )
+        if st.button("✅ Застосувати сценарій до плану", disabled=not result.moved):
+            write = service.commit_scenario(result, snapshot)
+            if write is not None and not write.errors:
+                st.success(f"Збережено операцій: {write.success}")
+                # The snapshot no longer matches the live plan
+                del st.session_state.plan_snapshot
+                st.session_state.scenarios = []
+            elif write is not None:
+                st.error(f"Не збережено: {write.failed} операцій")
+
 def render_detail_view(service, sections_service):
     # Fetch Order Data
     order_id = st.session_state.selected_order_id
@@ -188,12 +333,26 @@ def render_detail_view(service, sections_service):
                 calc_time = norm_time * qty
                 st.write(f"📊 Розрахунковий час: **{calc_time:.2f} хв**")
                 
-                # Step 4: Available Workers
-                available_workers = service.get_workers_for_section(current_sec_name)
-                worker_options = {w['id']: w['full_name'] for w in available_workers}
+                # Step 4: Predecessors (steps that must finish first; none = starts with the order)
+                step_names = {op['id']: f"{op.get('sort_order', 0)}. {op.get('operation_name') or '—'}" for op in planned_ops or []}
+                after_ids = st.multiselect(
+                    "4. Після етапів", options=list(step_names.keys()), format_func=step_names.get,
+                    default=list(step_names.keys())[-1:],
+                    help="Етапи без спільних попередників виконуються паралельно"
+                )
+                
+                # Step 5: Available Workers (earliest free slot after the predecessors)
+                route_end = max((op['scheduled_end_at'] for op in planned_ops or [] if op['id'] in after_ids and op.get('scheduled_end_at')), default=None)
+                worker_slots = service.get_worker_slots(selected_sec_id, calc_time or 60, route_end or order.get('start_date'),
+                                                        catalog_id=selected_op_id)
+                slot_by_worker = {w['id']: (w['start'], w['end']) for w in worker_slots}
+                worker_options = {
+                    w['id']: f"{w['full_name']} (вільний з {w['start']:%Y-%m-%d %H:%M})" if w['start'] else w['full_name']
+                    for w in worker_slots
+                }
                 
                 selected_worker_id = st.selectbox(
-                    f"4. Призначити працівника (Доступно: {len(available_workers)})", 
+                    f"5. Призначити працівника (Доступно: {len(worker_slots)})", 
                     options=[None] + list(worker_options.keys()),
                     format_func=lambda x: worker_options[x] if x else "--- Без призначення ---"
                 )
@@ -208,14 +367,19 @@ def render_detail_view(service, sections_service):
                         "quantity": qty,
                         "norm_time_per_unit": norm_time,
                         # total_time is generated
-                        "status": "not_started"
+                        "status": "not_started",
+                        "sort_order": max((op.get('sort_order') or 0 for op in planned_ops or []), default=0) + 1,
+                        "predecessor_ids": after_ids,
                     }
-                    res, err = service.create_order_operation(new_op_data)
+                    slot_start, slot_end = slot_by_worker.get(selected_worker_id, (None, None))
+                    if slot_start:
+                        # Book the worker's free slot so nobody is double-booked
+                        new_op_data["scheduled_start_at"] = format_ts(slot_start)
+                        new_op_data["scheduled_end_at"] = format_ts(slot_end)
+                    res = service.create_order_operation(new_op_data)
                     if res:
                         st.success("Етап додано!")
                         st.rerun()
-                    else:
-                        st.error(f"Помилка: {err}")
 
 # Helpers for other tabs (kept simple)
 def render_new_order_form(service):
@@ -278,20 +442,20 @@ def render_import_tab(impex):
         st.session_state["import_uploader_key"] = 0
 
     uploaded_file = st.file_uploader(
-        "Оберіть файл Excel (.xlsx)", 
-        type=['xlsx', 'xls'],
+        "Оберіть файл Excel (.xlsx) або CSV", 
+        type=['xlsx', 'xls', 'csv'],
         key=f"uploader_{st.session_state['import_uploader_key']}"
     )
     
     if uploaded_file:
         try:
-            xls = pd.ExcelFile(uploaded_file)
-            sheet = st.selectbox("Оберіть аркуш (Sheet)", xls.sheet_names)
+            sheet = st.selectbox("Оберіть аркуш (Sheet)", ingest.sheet_names(uploaded_file))
             
-            df_raw = pd.read_excel(uploaded_file, sheet_name=sheet)
+            # Only the header and first rows are read here; the import streams the rest
+            df_preview = ingest.read_preview(uploaded_file, sheet, rows=5)
             
             st.write("#### Попередній перегляд (перші 5 рядків)")
-            st.dataframe(df_raw.head())
+            st.dataframe(df_preview)
             
             st.divider()
             st.write("#### Співставлення колонок")
@@ -309,7 +473,7 @@ def render_import_tab(impex):
                 "comment": "Коментар"
             }
             
-            excel_headers = ["(Пропустити)"] + list(df_raw.columns)
+            excel_headers = ["(Пропустити)"] + list(df_preview.columns)
             cols_map = {}
             
             # Create mapping selectors
@@ -326,7 +490,7 @@ def render_import_tab(impex):
                 
                 for idx, header in enumerate(excel_headers):
                     if idx == 0: continue # Skip 'skip' option
-                    h_clean = header.lower().strip()
+                    h_clean = str(header).lower().strip()
                     # Check if any alias is in the header
                     if any(alias.lower() in h_clean for alias in search_terms):
                          default_idx = idx
@@ -336,22 +500,36 @@ def render_import_tab(impex):
                     cols_map[db_key] = st.selectbox(f"Поле БД: {db_label}", excel_headers, index=default_idx, key=f"map_{db_key}")
             
             if st.button("🚀 Імпортувати замовлення"):
-                with st.spinner("Імпорт даних..."):
-                    # Call new import method
-                    s, f = impex.import_orders_from_df(df_raw, cols_map)
+                progress_bar = st.progress(0.0, text="Імпорт даних...")
+                result = impex.import_orders_from_batches(
+                    ingest.iter_batches(uploaded_file, sheet),
+                    cols_map,
+                    progress=lambda done, total: progress_bar.progress(
+                        min(done / total, 1.0) if total else 0.0, text=f"Імпорт: {done} рядків"
+                    ),
+                    total=ingest.estimate_rows(uploaded_file, sheet)
+                )
+                progress_bar.empty()
+                s, f = result.success, result.failed
                 
                 if s > 0:
                     st.success(f"✅ Успішно імпортовано: {s}")
-                    # Increment key to reset uploader
-                    st.session_state["import_uploader_key"] += 1
-                    st.rerun()
+                    if f == 0:
+                        # Increment key to reset uploader
+                        st.session_state["import_uploader_key"] += 1
+                        st.rerun()
                 if f > 0:
                     if s == 0:
-                        st.error(f"❌ Не вдалося імпортувати: {f} (Можливо дублікати номерів або помилки даних)")
+                        st.error(f"❌ Не вдалося імпортувати: {f}")
                     else:
                         st.warning(f"⚠️ Пропущено/Помилок: {f}")
-                        
-                st.cache_data.clear()
+                    st.dataframe(
+                        pd.DataFrame(result.errors).rename(columns={
+                            "row": "Рядок Excel", "key": "Номер замовлення", "error": "Помилка"
+                        }),
+                        hide_index=True,
+                        use_container_width=True
+                    )
                 
         except Exception as e:
             st.error(f"Помилка читання файлу: {e}")
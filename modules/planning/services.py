@@ -4,12 +4,25 @@ import pandas as pd
 from core.config import StepStatus
 
 class PlanningService:
+    step_order = [
+        'cutting', 'basting', 'sewing', 'overlock', 
+        'completing', 'edging', 'finishing', 'fixing', 'packing'
+    ]
+
+    # Display column -> orders column
+    column_to_db = {
+        "Order #": "order_number",
+        "Product": "product_name",
+        "Article": "article",
+        "Qty": "quantity",
+        "Contractor": "contractor",
+        "Start Date": "start_date",
+        "Ship Date": "shipping_date",
+        "Comment": "comment"
+    }
+
     def __init__(self):
         self.db = DatabaseService()
-        self.step_order = [
-            'cutting', 'basting', 'sewing', 'overlock', 
-            'completing', 'edging', 'finishing', 'fixing', 'packing'
-        ]
 
     def get_planning_dataframe(self):
         """
@@ -18,12 +31,12 @@ class PlanningService:
         """
         try:
             # 1. Fetch Orders
-            orders = self.db.client.table("orders").select("*").order("created_at", desc=True).execute().data
+            orders = self.db.orders.select("*").order("created_at", desc=True).execute().data
             if not orders:
                 return pd.DataFrame(), {}
 
             # 2. Fetch All Steps
-            steps = self.db.client.table("production_steps").select("*").execute().data
+            steps = self.db.production_steps.select("*").execute().data
             
             # Map steps: order_id -> {step_name: {status: ..., id: ...}}
             steps_map = {}
@@ -109,7 +122,7 @@ class PlanningService:
 
             # Apply Order Updates
             if order_updates:
-                self.db.client.table("orders").update(order_updates).eq("id", order_id).execute()
+                self.db.orders.update(order_updates).eq("id", order_id).execute()
 
     def update_step_status(self, step_id, new_status):
         """Helper to update single step."""
@@ -119,17 +132,7 @@ class PlanningService:
         elif new_status == StepStatus.IN_PROGRESS:
                 updates["started_at"] = "now()"
         
-        self.db.client.table("production_steps").update(updates).eq("id", step_id).execute()
+        self.db.production_steps.update(updates).eq("id", step_id).execute()
 
     def _map_col_to_db(self, col_name):
-        mapping = {
-            "Order #": "order_number",
-            "Product": "product_name",
-            "Article": "article",
-            "Qty": "quantity",
-            "Contractor": "contractor",
-            "Start Date": "start_date",
-            "Ship Date": "shipping_date",
-            "Comment": "comment"
-        }
-        return mapping.get(col_name)
+        return self.column_to_db.get(col_name)
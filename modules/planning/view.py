@@ -2,15 +2,16 @@ import streamlit as st
 import pandas as pd
 from modules.planning.services import PlanningService
 from core.config import StepStatus
+from core.services import get_service
 
 def render():
     st.header("📅 Виробнича таблиця (Excel)")
     
-    service = PlanningService()
+    service = get_service(PlanningService)
     
     # Reload button
     if st.button("🔄 Оновити дані"):
-        st.cache_data.clear()
+        service.db.invalidate("orders", "production_steps")
         st.rerun()
 
     # Fetch Data
@@ -94,5 +95,4 @@ def render():
             
             # Better pattern: Use on_change callback if possible, or just process here.
             # Since we wrote to DB, next fetch will have new data.
-            # We should clear cache.
-            st.cache_data.clear()
+            # (writes through the service invalidate the cached orders/steps reads)
@@ -17,7 +17,7 @@ class QualityService:
             "logged_by": user_id
         }
         try:
-            return self.db.client.table(self.TABLE).insert(data).execute()
+            return self.db.table(self.TABLE).insert(data).execute()
         except Exception as e:
             st.error(f"Error logging defect: {e}")
             return None
@@ -27,7 +27,7 @@ class QualityService:
         try:
             # Fetch all logs with related Operation info to know Section info if needed
             # For now, just raw stats
-            res = self.db.client.table(self.TABLE).select("defect_type, quantity, reason").execute()
+            res = self.db.table(self.TABLE).select("defect_type, quantity, reason").execute()
             return pd.DataFrame(res.data)
         except Exception as e:
             return pd.DataFrame()
@@ -35,6 +35,6 @@ class QualityService:
     def get_recent_logs(self, limit=50):
         """Get recent quality logs."""
         try:
-            return self.db.client.table(self.TABLE).select("*").order("logged_at", desc=True).limit(limit).execute().data
+            return self.db.table(self.TABLE).select("*").order("logged_at", desc=True).limit(limit).execute().data
         except Exception:
             return []
@@ -0,0 +1,229 @@
+"""
+Worker assignment by skill, load and continuity.
+
+Every (operation, worker) pair gets a cost; lower is better:
+- skill: the worker lists the operation's catalog key in operation_types
+  (SKILL_OPERATION), belongs to the operation's section (SKILL_SECTION) or
+  lists the section name (SKILL_LISTED); anyone else is not qualified;
+- load: minutes already assigned to the worker that day, per DAY_MINUTES;
+- continuity: a bonus for the worker who does a predecessor operation of
+  the same order.
+
+Scheduler.pick_worker uses best() while it places operations one by one.
+solve() assigns a whole set of already timed operations (a day) at once,
+either greedily in start order or by min-cost matching: operations are cut
+into waves that all overlap one moment, so each worker can take at most one
+operation of a wave, and every wave is a rectangular assignment problem.
+scipy's linear_sum_assignment is used when installed, a numpy Hungarian
+otherwise.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:   # optional; min_cost_matching() falls back to numpy
+    linear_sum_assignment = None
+
+SKILL_OPERATION, SKILL_SECTION, SKILL_LISTED = 3, 2, 1
+
+SKILL_WEIGHT = 1.0
+LOAD_WEIGHT = 2.0
+CONTINUITY_WEIGHT = 0.5
+DAY_MINUTES = 480
+
+ASSIGN_METHODS = {
+    "greedy": "Жадібний (по черзі)",
+    "matching": "Оптимальний (мін. вартість)",
+}
+
+# Cost of a pair that must not be matched
+INFEASIBLE = 1e9
+
+
+def min_cost_matching(cost: np.ndarray) -> list:
+    """(row, col) pairs of a minimum-cost assignment of a rectangular matrix."""
+    rows, cols = cost.shape
+    if rows == 0 or cols == 0:
+        return []
+    if linear_sum_assignment is not None:
+        r, c = linear_sum_assignment(cost)
+        return list(zip(r.tolist(), c.tolist()))
+    if rows > cols:
+        return [(r, c) for c, r in min_cost_matching(cost.T)]
+
+    # Hungarian algorithm with potentials (shortest augmenting paths), rows <= cols.
+    # Index 0 is a virtual column; p[j] is the row matched to column j.
+    u = np.zeros(rows + 1)
+    v = np.zeros(cols + 1)
+    p = np.zeros(cols + 1, dtype=int)
+    way = np.zeros(cols + 1, dtype=int)
+    for i in range(1, rows + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(cols + 1, np.inf)
+        used = np.zeros(cols + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            free[0] = False
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free[1:] & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv, np.inf)
+            j1 = int(np.argmin(candidates))
+            delta = candidates[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    return [(p[j] - 1, j - 1) for j in range(1, cols + 1) if p[j]]
+
+
+def _minutes(moment) -> float:
+    return moment.timestamp() / 60
+
+
+class AssignmentEngine:
+    def __init__(self, workers: list, sections: list, catalog: Optional[list] = None):
+        """
+        workers: rows with id, section_id, operation_types
+        sections: rows with id, name
+        catalog: operations_catalog rows with id, operation_key, section
+        """
+        self.ids = [w["id"] for w in workers]
+        self.index = {worker_id: i for i, worker_id in enumerate(self.ids)}
+        self.section_names = {s["id"]: s.get("name") for s in sections}
+        self.catalog = {c["id"]: c for c in (catalog or [])}
+        self._home = [w.get("section_id") for w in workers]
+        self._types = [set(w.get("operation_types") or []) for w in workers]
+        self._skills = {}
+        self.load = {}    # date -> minutes per worker (array)
+
+    def skills(self, section_id, catalog_id=None) -> np.ndarray:
+        """Skill level of every worker for an operation (0: not qualified)."""
+        key = (section_id, catalog_id)
+        if key not in self._skills:
+            name = self.section_names.get(section_id)
+            entry = self.catalog.get(catalog_id) or {}
+            op_key, op_section = entry.get("operation_key"), entry.get("section")
+            levels = np.zeros(len(self.ids), dtype=np.int8)
+            for i, types in enumerate(self._types):
+                if op_key and op_key in types:
+                    levels[i] = SKILL_OPERATION
+                elif section_id is not None and self._home[i] == section_id:
+                    levels[i] = SKILL_SECTION
+                elif (name and name in types) or (op_section and op_section in types):
+                    levels[i] = SKILL_LISTED
+            self._skills[key] = levels
+        return self._skills[key]
+
+    def day_load(self, day) -> np.ndarray:
+        if day not in self.load:
+            self.load[day] = np.zeros(len(self.ids))
+        return self.load[day]
+
+    def book(self, worker_id, op):
+        """Count the operation's minutes in the worker's load."""
+        if worker_id in self.index and op.start is not None:
+            self.day_load(op.start.date())[self.index[worker_id]] += op.minutes
+
+    def costs(self, op, continuity: Iterable = ()) -> np.ndarray:
+        """Cost of giving `op` to each worker; continuity: workers of its predecessors."""
+        levels = self.skills(op.section_id, op.catalog_id)
+        cost = SKILL_WEIGHT * (SKILL_OPERATION - levels) + CONTINUITY_WEIGHT
+        if op.start is not None:
+            cost = cost + LOAD_WEIGHT * self.day_load(op.start.date()) / DAY_MINUTES
+        for worker_id in continuity:
+            if worker_id in self.index:
+                cost[self.index[worker_id]] -= CONTINUITY_WEIGHT
+        cost[levels == 0] = INFEASIBLE
+        return cost
+
+    def best(self, op, start, end, availability, continuity: Iterable = ()) -> Optional[str]:
+        """Cheapest qualified worker free over [start, end), or None."""
+        cost = self.costs(op, continuity)
+        for i in np.argsort(cost, kind="stable"):
+            if cost[i] >= INFEASIBLE:
+                return None
+            if availability.is_free(self.ids[i], start, end):
+                return self.ids[i]
+        return None
+
+    def solve(self, operations: list, availability, method: str = "greedy",
+              continuity: Optional[dict] = None) -> dict:
+        """
+        op_id -> worker_id (None when nobody fits) for timed operations.
+        `availability` holds everything else the workers are booked for;
+        continuity: op_id -> worker ids of its predecessors.
+        """
+        if method not in ASSIGN_METHODS:
+            raise ValueError(f"Unknown assignment method: {method}")
+        continuity = continuity or {}
+        ops = sorted((op for op in operations if op.start is not None and op.end is not None),
+                     key=lambda o: (o.start, o.id))
+        # Operations are taken in start order, so a worker is free for the next
+        # one exactly when their last assignment here has ended
+        free_from = np.full(len(self.ids), -np.inf)
+        booked = np.array([len(availability.slots(w)) > 0 if w in availability else False for w in self.ids],
+                          dtype=bool)
+        result = {}
+
+        def feasible(op, cost):
+            ok = (cost < INFEASIBLE) & (free_from <= _minutes(op.start))
+            for i in np.flatnonzero(ok & booked):
+                ok[i] = availability.is_free(self.ids[i], op.start, op.end)
+            return ok
+
+        def take(op, i):
+            result[op.id] = self.ids[i]
+            free_from[i] = _minutes(op.end)
+            self.book(self.ids[i], op)
+
+        if method == "greedy":
+            for op in ops:
+                cost = self.costs(op, continuity.get(op.id, ()))
+                ok = feasible(op, cost)
+                if ok.any():
+                    take(op, int(np.argmin(np.where(ok, cost, np.inf))))
+                else:
+                    result[op.id] = None
+            return result
+
+        for wave in self._waves(ops):
+            matrix = np.empty((len(wave), len(self.ids)))
+            for r, op in enumerate(wave):
+                cost = self.costs(op, continuity.get(op.id, ()))
+                matrix[r] = np.where(feasible(op, cost), cost, INFEASIBLE)
+            # Only workers that can take something in this wave
+            columns = np.flatnonzero((matrix < INFEASIBLE).any(axis=0))
+            pairs = min_cost_matching(matrix[:, columns])
+            for op in wave:
+                result[op.id] = None
+            for r, c in pairs:
+                if matrix[r, columns[c]] < INFEASIBLE:
+                    take(wave[r], int(columns[c]))
+        return result
+
+    @staticmethod
+    def _waves(ops: list) -> list:
+        """Consecutive groups of operations (in start order) that all overlap one moment."""
+        waves, current, earliest_end = [], [], None
+        for op in ops:
+            if current and op.start >= earliest_end:
+                waves.append(current)
+                current, earliest_end = [], None
+            current.append(op)
+            earliest_end = op.end if earliest_end is None else min(earliest_end, op.end)
+        if current:
+            waves.append(current)
+        return waves
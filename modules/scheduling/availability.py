@@ -0,0 +1,192 @@
+"""
+Worker availability index.
+
+Every worker keeps a sorted list of free slots (the complement of their
+bookings in order_operations.scheduled_start_at/scheduled_end_at). Slot
+lookups are bisections, so "is this worker free from 10:00 to 11:30" and
+"earliest free slot of 90 minutes after 10:00" do not touch the database and
+do not scan the worker's whole history. Booking or releasing an operation
+updates the slots in place, so the scheduler and the manual assignment form
+see each other's assignments immediately.
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+FOREVER = datetime.max
+
+
+class FreeSlots:
+    """Free [start, end) slots of one worker, sorted and non-overlapping."""
+
+    def __init__(self):
+        self._starts = [datetime.min]
+        self._ends = [FOREVER]
+        self._busy = []   # (start, end, op_id), sorted by start
+
+    def __len__(self):
+        return len(self._busy)
+
+    def slots(self) -> list:
+        return list(zip(self._starts, self._ends))
+
+    def bookings(self) -> list:
+        return list(self._busy)
+
+    def _slot_at(self, moment: datetime) -> int:
+        """Index of the slot containing `moment`, or -1."""
+        i = bisect_right(self._starts, moment) - 1
+        return i if i >= 0 and self._ends[i] > moment else -1
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        i = self._slot_at(start)
+        return i >= 0 and self._ends[i] >= end
+
+    def earliest(self, after: datetime, minutes: float) -> Optional[datetime]:
+        """Start of the first free stretch of `minutes` at or after `after`."""
+        length = timedelta(minutes=minutes)
+        i = self._slot_at(after)
+        if i >= 0:
+            if self._ends[i] - after >= length:
+                return after
+            i += 1
+        else:
+            i = bisect_right(self._starts, after)
+        # Only the gaps too short for the operation are stepped over
+        while i < len(self._starts):
+            if self._ends[i] - self._starts[i] >= length:
+                return self._starts[i]
+            i += 1
+        return None
+
+    def earliest_fit(self, after: datetime, span) -> Optional[datetime]:
+        """
+        First start at or after `after` where span(start) -> (start, end) is
+        free. Used with working calendars, where an operation's wall-clock
+        length depends on when it starts.
+        """
+        i = self._slot_at(after)
+        if i < 0:
+            i = bisect_right(self._starts, after)
+        while i < len(self._starts):
+            start, end = span(max(after, self._starts[i]))
+            j = self._slot_at(start)
+            if j >= 0 and self._ends[j] >= end:
+                return start
+            # Continue with the first slot that ends after the rejected start
+            i = max(i + 1, bisect_right(self._ends, start))
+        return None
+
+    def book(self, start: datetime, end: datetime, op_id=None):
+        """Take [start, end) out of the free slots (overlapping bookings are allowed)."""
+        if end <= start:
+            return
+        insort(self._busy, (start, end, op_id))
+        i = max(bisect_right(self._starts, start) - 1, 0)
+        j = bisect_left(self._starts, end)
+        pieces = []
+        for s, e in zip(self._starts[i:j], self._ends[i:j]):
+            if e <= start:
+                pieces.append((s, e))
+                continue
+            if s < start:
+                pieces.append((s, start))
+            if e > end:
+                pieces.append((end, e))
+        self._starts[i:j] = [s for s, _ in pieces]
+        self._ends[i:j] = [e for _, e in pieces]
+
+    def release(self, op_id):
+        """Give the time of booking `op_id` back, minus what other bookings still hold."""
+        found = [b for b in self._busy if b[2] == op_id]
+        if not found:
+            return
+        self._busy = [b for b in self._busy if b[2] != op_id]
+        for start, end, _ in found:
+            self._free(start, end)
+
+    def _free(self, start: datetime, end: datetime):
+        # Parts of [start, end) not covered by remaining bookings
+        gaps, cursor = [], start
+        for s, e, _ in self._busy:
+            if s >= end:
+                break
+            if e <= cursor:
+                continue
+            if s > cursor:
+                gaps.append((cursor, s))
+            cursor = max(cursor, e)
+        if cursor < end:
+            gaps.append((cursor, end))
+
+        for s, e in gaps:
+            i = bisect_left(self._starts, s)
+            # Merge with the neighbouring slots that touch the gap
+            if i > 0 and self._ends[i - 1] >= s:
+                i -= 1
+                s = self._starts[i]
+                e = max(e, self._ends[i])
+                del self._starts[i], self._ends[i]
+            while i < len(self._starts) and self._starts[i] <= e:
+                e = max(e, self._ends[i])
+                del self._starts[i], self._ends[i]
+            self._starts.insert(i, s)
+            self._ends.insert(i, e)
+
+
+class AvailabilityIndex:
+    """FreeSlots per worker, built once from the loaded bookings."""
+
+    def __init__(self, worker_ids: Iterable = ()):
+        self._workers = {worker_id: FreeSlots() for worker_id in worker_ids}
+
+    @classmethod
+    def from_operations(cls, worker_ids: Iterable, operations: Iterable) -> "AvailabilityIndex":
+        """operations: engine.Operation objects (worker_id, start, end, id)."""
+        index = cls(worker_ids)
+        for op in operations:
+            index.book(op.worker_id, op.start, op.end, op.id)
+        return index
+
+    def __contains__(self, worker_id):
+        return worker_id in self._workers
+
+    def slots(self, worker_id) -> FreeSlots:
+        if worker_id not in self._workers:
+            self._workers[worker_id] = FreeSlots()
+        return self._workers[worker_id]
+
+    def book(self, worker_id, start, end, op_id=None):
+        if worker_id is None or start is None or end is None:
+            return
+        self.slots(worker_id).book(start, end, op_id)
+
+    def release(self, worker_id, op_id):
+        if worker_id in self._workers:
+            self._workers[worker_id].release(op_id)
+
+    def is_free(self, worker_id, start, end) -> bool:
+        return self.slots(worker_id).is_free(start, end)
+
+    def free_workers(self, worker_ids: Iterable, start, end) -> list:
+        return [w for w in worker_ids if self.is_free(w, start, end)]
+
+    def earliest_fit(self, worker_ids: Iterable, after: datetime, span):
+        """(start, worker_id) like earliest_slot, with the slot length given by span(start)."""
+        best = None
+        for worker_id in worker_ids:
+            start = self.slots(worker_id).earliest_fit(after, span)
+            if start is not None and (best is None or start < best[0]):
+                best = (start, worker_id)
+        return best
+
+    def earliest_slot(self, worker_ids: Iterable, after: datetime, minutes: float):
+        """(start, worker_id) of the earliest free slot among `worker_ids`; ties go to the first listed."""
+        best = None
+        for worker_id in worker_ids:
+            start = self.slots(worker_id).earliest(after, minutes)
+            if start is not None and (best is None or start < best[0]):
+                best = (start, worker_id)
+                if start == after:
+                    break
+        return best
@@ -0,0 +1,86 @@
+"""
+Finite-capacity buckets.
+
+Each section can process sections.capacity_minutes of work per day. The
+ledger keeps the minutes already taken per (section, day); an operation is
+poured into the buckets from its earliest start onwards, taking per day no
+more than the free capacity and the working time left on the section's
+calendar that day. Days that are full are skipped, so the operation starts
+(or continues) on the next day with room. A section without a positive
+capacity_minutes is not limited.
+"""
+from datetime import datetime, time, timedelta
+from typing import Optional
+
+from modules.scheduling.workcalendar import CalendarSet, WorkCalendar
+
+# Safety stop for sections without capacity or working time
+MAX_SEARCH_DAYS = 366 * 2
+
+
+class CapacityLedger:
+    def __init__(self, sections: list, calendars: Optional[CalendarSet] = None):
+        """sections: rows with id, capacity_minutes."""
+        self.capacity = {}
+        for s in sections:
+            value = float(s.get("capacity_minutes") or 0)
+            self.capacity[s["id"]] = value if value > 0 else float("inf")
+        self.calendars = calendars
+        self.used = {}     # (section_id, date) -> minutes
+
+    def _calendar(self, section_id) -> Optional[WorkCalendar]:
+        return self.calendars.for_section(section_id) if self.calendars else None
+
+    def _working(self, calendar, start: datetime, end: datetime) -> float:
+        if calendar is None:
+            return (end - start).total_seconds() / 60
+        return calendar.working_minutes(start, end)
+
+    def _add(self, calendar, start: datetime, minutes: float) -> datetime:
+        if calendar is None:
+            return start + timedelta(minutes=minutes)
+        return calendar.add_minutes(start, minutes)
+
+    def _next_working(self, calendar, moment: datetime) -> datetime:
+        return calendar.next_working(moment) if calendar is not None else moment
+
+    def free(self, section_id, day) -> float:
+        return self.capacity.get(section_id, float("inf")) - self.used.get((section_id, day), 0)
+
+    def reserve(self, section_id, start: datetime, end: datetime):
+        """Count an operation that is already placed (fixed or outside the run)."""
+        if section_id is None or start is None or end is None:
+            return
+        calendar = self._calendar(section_id)
+        day = start.date()
+        while datetime.combine(day, time()) < end:
+            day_start = max(start, datetime.combine(day, time()))
+            day_end = min(end, datetime.combine(day + timedelta(days=1), time()))
+            minutes = self._working(calendar, day_start, day_end)
+            if minutes > 0:
+                self.used[(section_id, day)] = self.used.get((section_id, day), 0) + minutes
+            day += timedelta(days=1)
+
+    def place(self, section_id, earliest: datetime, minutes: float):
+        """(start, end) of `minutes` of work from `earliest`, taking capacity as it goes."""
+        calendar = self._calendar(section_id)
+        remaining = float(minutes)
+        cursor = self._next_working(calendar, earliest)
+        start = end = None
+        for _ in range(MAX_SEARCH_DAYS):
+            day = cursor.date()
+            midnight = datetime.combine(day + timedelta(days=1), time())
+            take = min(remaining, self.free(section_id, day), self._working(calendar, cursor, midnight))
+            if take > 0:
+                if start is None:
+                    start = cursor
+                end = self._add(calendar, cursor, take)
+                self.used[(section_id, day)] = self.used.get((section_id, day), 0) + take
+                remaining -= take
+                if remaining <= 1e-9:
+                    return start, end
+            cursor = self._next_working(calendar, midnight)
+        # No capacity within the search window: place it after the window, unbounded
+        if start is None:
+            start = cursor
+        return start, self._add(calendar, end or cursor, remaining)
@@ -0,0 +1,359 @@
+"""
+In-memory scheduling engine for order_operations.
+
+The engine never touches the database: SchedulingService loads orders,
+operations, sections and workers once, hands them to a Scheduler, and
+persists the resulting plan with bulk upserts.
+
+Placement rules (same as the original per-order auto-scheduler):
+- an operation starts once its predecessors are done (network.py; without
+  predecessor links operations run one after another in sort_order),
+  at the earliest at the order's start_date (or now);
+- an operation takes quantity x norm_time_per_unit working minutes (60 when
+  that is 0) on its section's calendar, so it pauses over nights, breaks,
+  weekends and holidays;
+- a worker qualifies for a section by section_id or by listing the section
+  name (or the operation's catalog key) in operation_types, and is only
+  assigned when free for the whole slot (checked against the in-memory
+  AvailabilityIndex, where absences are booked like operations); among the
+  free ones the best skill / load / continuity score wins (assignment.py).
+Operations that are done or in progress keep their times and bookings.
+
+Orders are planned one after another in priority order (PRIORITY_RULES).
+With finite=True operations are also poured into per-section daily
+capacity buckets (capacity.py), so an overloaded section pushes work to
+later days instead of stacking it on the same one.
+"""
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from core.clock import factory_now, stamp, to_factory
+from modules.scheduling.assignment import AssignmentEngine
+from modules.scheduling.availability import AvailabilityIndex
+from modules.scheduling.capacity import CapacityLedger
+from modules.scheduling.network import critical_path, predecessors, topological
+from modules.scheduling.workcalendar import CalendarSet
+
+DEFAULT_DURATION_MINUTES = 60
+
+# Statuses the scheduler must not move
+FIXED_STATUSES = ("done", "in_progress")
+
+# Order priority rules for the scheduler
+PRIORITY_RULES = {
+    "fifo": "FIFO (дата створення)",
+    "edd": "Найраніша дата відвантаження",
+    "cr": "Критичне відношення",
+}
+
+
+def parse_ts(value) -> Optional[datetime]:
+    """ISO string / date / datetime -> naive factory wall-clock time, the clock of the work calendars."""
+    return to_factory(value)
+
+
+def format_ts(value: Optional[datetime]) -> Optional[str]:
+    """Factory time -> ISO string with the factory offset (core/clock.py)."""
+    return stamp(value)
+
+
+@dataclass
+class Operation:
+    id: str
+    order_id: str
+    section_id: Optional[str] = None
+    quantity: float = 0
+    norm_time_per_unit: float = 0
+    sort_order: int = 0
+    status: str = "not_started"
+    worker_id: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    predecessors: Optional[list] = None   # None: the previous operation by sort_order
+    completed_quantity: float = 0
+    catalog_id: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Operation":
+        return cls(
+            id=row["id"],
+            order_id=row["order_id"],
+            section_id=row.get("section_id"),
+            quantity=row.get("quantity") or 0,
+            norm_time_per_unit=row.get("norm_time_per_unit") or 0,
+            sort_order=row.get("sort_order") or 0,
+            status=row.get("status") or "not_started",
+            worker_id=row.get("assigned_worker_id"),
+            start=parse_ts(row.get("scheduled_start_at")),
+            end=parse_ts(row.get("scheduled_end_at")),
+            predecessors=row.get("predecessor_ids"),
+            completed_quantity=row.get("completed_quantity") or 0,
+            catalog_id=row.get("operation_catalog_id"),
+        )
+
+    @property
+    def minutes(self) -> float:
+        minutes = float(self.quantity) * float(self.norm_time_per_unit)
+        return minutes if minutes > 0 else DEFAULT_DURATION_MINUTES
+
+    @property
+    def remaining_minutes(self) -> float:
+        """Work left, by the quantity not yet completed."""
+        left = max(float(self.quantity) - float(self.completed_quantity), 0)
+        minutes = left * float(self.norm_time_per_unit)
+        return minutes if minutes > 0 else DEFAULT_DURATION_MINUTES
+
+    @property
+    def fixed(self) -> bool:
+        return self.status in FIXED_STATUSES
+
+
+@dataclass
+class Order:
+    id: str
+    order_number: str = ""
+    start: Optional[datetime] = None
+    shipping_date: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Order":
+        return cls(
+            id=row["id"],
+            order_number=row.get("order_number") or "",
+            start=parse_ts(row.get("start_date")),
+            shipping_date=parse_ts(row.get("shipping_date")),
+            created_at=parse_ts(row.get("created_at")),
+        )
+
+
+def due_at(order: Order) -> Optional[datetime]:
+    """Orders are due by the end of their shipping day."""
+    return order.shipping_date + timedelta(days=1) if order.shipping_date else None
+
+
+class Timeline:
+    """Sorted, non-overlapping bookings [start, end) of one worker or section."""
+
+    def __init__(self):
+        self._items = []   # (start, end, op_id), sorted by start
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, start: datetime, end: datetime, op_id: str):
+        insort(self._items, (start, end, op_id))
+
+    def remove(self, op_id: str):
+        self._items = [item for item in self._items if item[2] != op_id]
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        i = bisect_left(self._items, (start,))
+        if i > 0 and self._items[i - 1][1] > start:
+            return False
+        return i == len(self._items) or self._items[i][0] >= end
+
+    def busy_minutes(self) -> float:
+        return sum((end - start).total_seconds() / 60 for start, end, _ in self._items)
+
+
+@dataclass
+class Plan:
+    """Outcome of a scheduling run."""
+    operations: dict = field(default_factory=dict)     # op_id -> Operation (new times/worker)
+    previous: dict = field(default_factory=dict)       # op_id -> (start, end, worker_id) before the run
+    unassigned: list = field(default_factory=list)     # op ids that found no free qualified worker
+    order_end: dict = field(default_factory=dict)      # order_id -> end of its last operation
+    late: list = field(default_factory=list)           # orders finishing after their shipping date
+    network: dict = field(default_factory=dict)        # op_id -> network.Timing (slack, critical path)
+    cycles: dict = field(default_factory=dict)         # order_id -> op ids in a predecessor cycle
+
+    def changed(self) -> list:
+        """Operations whose times or worker differ from the loaded plan."""
+        return [
+            op for op_id, op in self.operations.items()
+            if (op.start, op.end, op.worker_id) != self.previous.get(op_id)
+        ]
+
+    def rows(self, only_changed: bool = True) -> list:
+        ops = self.changed() if only_changed else list(self.operations.values())
+        return [
+            {
+                "id": op.id,
+                "order_id": op.order_id,
+                "scheduled_start_at": format_ts(op.start),
+                "scheduled_end_at": format_ts(op.end),
+                "assigned_worker_id": op.worker_id,
+            }
+            for op in ops
+        ]
+
+
+class Scheduler:
+    def __init__(self, workers: list, sections: list, bookings: list = (), now: Optional[datetime] = None,
+                 calendars: Optional[CalendarSet] = None, finite: bool = False, catalog: Optional[list] = None):
+        """
+        workers:   rows with id, section_id, operation_types
+        sections:  rows with id, name, capacity_minutes
+        bookings:  Operations outside this run that hold worker time (and section capacity)
+        calendars: working time per section and worker absences (None: round the clock)
+        finite:    respect sections.capacity_minutes per day
+        catalog:   operations_catalog rows (id, operation_key, section) for skill matching
+        """
+        self.now = now or factory_now()
+        self.calendars = calendars
+        self.capacity = CapacityLedger(sections, calendars) if finite else None
+        self.workers = list(workers)
+        self.section_names = {s["id"]: s.get("name") for s in sections}
+        self.availability = AvailabilityIndex(w["id"] for w in self.workers)
+        self.assigner = AssignmentEngine(self.workers, sections, catalog)
+        self.section_timelines = {s["id"]: Timeline() for s in sections}
+        self._qualified = {}
+        for op in bookings:
+            self._book(op)
+        if calendars:
+            for worker_id, periods in calendars.absences.items():
+                for n, (start, end) in enumerate(periods):
+                    self.availability.book(worker_id, start, end, ("absence", n))
+
+    # --- Resources ---
+
+    def qualified_workers(self, section_id) -> list:
+        """Workers of the section first, then those listing it in operation_types."""
+        if section_id not in self._qualified:
+            name = self.section_names.get(section_id)
+            own = [w["id"] for w in self.workers if w.get("section_id") == section_id]
+            listed = [
+                w["id"] for w in self.workers
+                if w.get("section_id") != section_id and name and name in (w.get("operation_types") or [])
+            ]
+            self._qualified[section_id] = own + listed
+        return self._qualified[section_id]
+
+    def _book(self, op: Operation, placed: bool = False):
+        """Hold the operation's time; `placed` ops already took their capacity in place()."""
+        if op.start is None or op.end is None:
+            return
+        if self.capacity is not None and not placed:
+            self.capacity.reserve(op.section_id, op.start, op.end)
+        if op.worker_id in self.availability:
+            self.availability.book(op.worker_id, op.start, op.end, op.id)
+            self.assigner.book(op.worker_id, op)
+        if op.section_id in self.section_timelines:
+            self.section_timelines[op.section_id].add(op.start, op.end, op.id)
+
+    def span(self, section_id, start: datetime, minutes: float):
+        """(start, end) of `minutes` of work beginning at the first working moment from `start`."""
+        if self.calendars is None:
+            return start, start + timedelta(minutes=minutes)
+        calendar = self.calendars.for_section(section_id)
+        start = calendar.next_working(start)
+        return start, calendar.add_minutes(start, minutes)
+
+    def pick_worker(self, op: Operation, start: datetime, end: datetime, continuity=()) -> Optional[str]:
+        """
+        The current assignee when still qualified and free, otherwise the free
+        worker with the best skill / load / continuity score (assignment.py).
+        """
+        current = self.assigner.index.get(op.worker_id)
+        if current is not None and self.assigner.skills(op.section_id, op.catalog_id)[current] and \
+                self.availability.is_free(op.worker_id, start, end):
+            return op.worker_id
+        return self.assigner.best(op, start, end, self.availability, continuity)
+
+    # --- Scheduling ---
+
+    def order_sequence(self, orders: list, rule: str = "fifo", work: Optional[dict] = None, rush=()) -> list:
+        """
+        Orders in planning order:
+        fifo - creation time; edd - earliest shipping date;
+        cr   - critical ratio, time left until shipping / remaining work (smallest first).
+        Orders without a shipping date go after the dated ones under edd and cr.
+        Orders listed in `rush` go before all others, in the given order.
+        """
+        far = datetime.max
+        if rule == "edd":
+            key = lambda o: (o.shipping_date or far, o.created_at or far, o.order_number)
+        elif rule == "cr":
+            work = work or {}
+
+            def key(o):
+                if o.shipping_date is None:
+                    return (1, 0.0, o.created_at or far, o.order_number)
+                left = (due_at(o) - self.now).total_seconds() / 60
+                return (0, left / max(work.get(o.id, 0), 1.0), o.created_at or far, o.order_number)
+        elif rule == "fifo":
+            key = lambda o: (o.created_at or far, o.order_number)
+        else:
+            raise ValueError(f"Unknown priority rule: {rule}")
+        ordered = sorted(orders, key=key)
+        if rush:
+            rank = {order_id: n for n, order_id in enumerate(rush)}
+            ordered.sort(key=lambda o: rank.get(o.id, len(rank)))
+        return ordered
+
+    def schedule(self, orders: list, operations: list, assign_workers: bool = True, rule: str = "fifo",
+                 rush=()) -> Plan:
+        """Plan `operations` (all operations of `orders`) and return the Plan."""
+        plan = Plan()
+        by_order, work = {}, {}
+        for op in operations:
+            plan.previous[op.id] = (op.start, op.end, op.worker_id)
+            by_order.setdefault(op.order_id, []).append(op)
+            if not op.fixed:
+                work[op.order_id] = work.get(op.order_id, 0) + op.minutes
+
+        # Fixed operations hold their slots before anything is placed
+        for op in operations:
+            if op.fixed:
+                self._book(op)
+
+        for order in self.order_sequence(orders, rule, work, rush):
+            ops = sorted(by_order.get(order.id, []), key=lambda o: (o.sort_order, o.id))
+            self.schedule_order(order, ops, plan, assign_workers)
+            due = due_at(order)
+            if due is not None and plan.order_end[order.id] > due:
+                plan.late.append({
+                    "order_id": order.id,
+                    "order_number": order.order_number,
+                    "shipping_date": order.shipping_date.date(),
+                    "planned_end": plan.order_end[order.id],
+                    "delay_days": (plan.order_end[order.id] - due).total_seconds() / 86400,
+                })
+        return plan
+
+    def schedule_order(self, order: Order, ops: list, plan: Plan, assign_workers: bool = True):
+        origin = order.start or self.now
+        links = predecessors(ops)
+        ordered, cyclic = topological(ops, links)
+        if cyclic:
+            plan.cycles[order.id] = cyclic
+        plan.network.update(critical_path(ordered, links, {op.id: op.minutes for op in ops}))
+
+        ends = {}
+        for op in ordered:
+            ready = max([origin] + [ends[p] for p in links[op.id] if p in ends])
+            if op.fixed:
+                ends[op.id] = max(ready, op.end) if op.end is not None else ready
+                plan.operations[op.id] = op
+                continue
+
+            if self.capacity is not None:
+                start, end = self.capacity.place(op.section_id, ready, op.minutes)
+            else:
+                start, end = self.span(op.section_id, ready, op.minutes)
+            op.start, op.end = start, end
+            if assign_workers and op.section_id:
+                continuity = [plan.operations[p].worker_id for p in links[op.id] if p in plan.operations]
+                op.worker_id = self.pick_worker(op, start, end, continuity)
+                if op.worker_id is None:
+                    plan.unassigned.append(op.id)
+            self._book(op, placed=True)
+            plan.operations[op.id] = op
+            ends[op.id] = end
+        plan.order_end[order.id] = max(ends.values(), default=origin)
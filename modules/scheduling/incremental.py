@@ -0,0 +1,110 @@
+"""
+Incremental rescheduling after a single operation changed.
+
+Instead of replanning the order, the change is pushed forward along two kinds
+of edges only:
+- network successors of the operation (network.py), and
+- later operations on the same worker's timeline that now overlap it.
+An operation is only ever moved later (never pulled earlier), keeps its
+worker and its working-time duration, and operations that are done or in
+progress are never moved. The result is the set of operations whose times
+actually changed, with their previous times, so only those rows are written.
+"""
+from heapq import heappop, heappush
+
+from modules.scheduling.network import predecessors
+
+
+def _successors(operations: list) -> dict:
+    by_order = {}
+    for op in operations:
+        by_order.setdefault(op.order_id, []).append(op)
+    successors = {op.id: [] for op in operations}
+    for ops in by_order.values():
+        for op_id, preds in predecessors(ops).items():
+            for p in preds:
+                successors[p].append(op_id)
+    return successors
+
+
+def refresh(scheduler, op, ready=None):
+    """New (start, end) of an operation whose status or quantity changed."""
+    now = scheduler.now
+    if op.status == "done":
+        # Finished now: the actual end replaces the planned one
+        start = min(op.start, now) if op.start else now
+        return start, now
+    if op.status in ("paused", "in_progress"):
+        # The rest of the work continues from now at the earliest
+        start = op.start if op.start and op.start <= now else now
+        return start, scheduler.span(op.section_id, now, op.remaining_minutes)[1]
+    start = max(op.start or ready or now, ready or op.start or now)
+    return scheduler.span(op.section_id, start, op.minutes)
+
+
+def propagate(scheduler, operations: list, changed_id, recompute: bool = True) -> dict:
+    """
+    Apply the change of `changed_id` to `operations` (engine.Operation objects,
+    updated in place). Returns {op_id: (old_start, old_end)} of the operations
+    that moved.
+    """
+    by_id = {op.id: op for op in operations}
+    successors = _successors(operations)
+    by_worker = {}
+    for op in operations:
+        if op.worker_id is not None:
+            by_worker.setdefault(op.worker_id, []).append(op)
+
+    moved = {}
+
+    def move(op, start, end):
+        if (op.start, op.end) != (start, end):
+            moved.setdefault(op.id, (op.start, op.end))
+            op.start, op.end = start, end
+
+    changed = by_id[changed_id]
+    if recompute:
+        links = predecessors([o for o in operations if o.order_id == changed.order_id])
+        ready = max((by_id[p].end for p in links.get(changed.id, []) if by_id[p].end), default=None)
+        move(changed, *refresh(scheduler, changed, ready))
+
+    # Guard against predecessor cycles: an operation is pushed at most len(operations) times
+    pushes = {}
+    heap = [(changed.start, changed.id)] if changed.start else []
+    while heap:
+        _, op_id = heappop(heap)
+        op = by_id[op_id]
+        if op.start is None or op.end is None:
+            continue
+        followers = [by_id[s] for s in successors[op_id]]
+        followers += [
+            other for other in by_worker.get(op.worker_id, ())
+            if other is not op and other.start is not None and op.start <= other.start < op.end
+        ]
+        for follower in followers:
+            if follower.fixed or follower.start is None or follower.start >= op.end:
+                continue
+            pushes[follower.id] = pushes.get(follower.id, 0) + 1
+            if pushes[follower.id] > len(operations):
+                continue
+            move(follower, *scheduler.span(follower.section_id, op.end, follower.minutes))
+            heappush(heap, (follower.start, follower.id))
+    return moved
+
+
+def diff_rows(operations: dict, moved: dict) -> list:
+    """Rows for the UI: what moved and by how much."""
+    rows = []
+    for op_id, (old_start, old_end) in moved.items():
+        op = operations[op_id]
+        rows.append({
+            "id": op_id,
+            "order_id": op.order_id,
+            "worker_id": op.worker_id,
+            "old_start": old_start,
+            "old_end": old_end,
+            "new_start": op.start,
+            "new_end": op.end,
+            "shift_minutes": (op.end - old_end).total_seconds() / 60 if old_end and op.end else None,
+        })
+    return sorted(rows, key=lambda r: r["new_start"] or r["old_start"])
@@ -0,0 +1,99 @@
+"""
+Operation networks (DAG) of an order.
+
+order_operations.predecessor_ids lists the operations that must finish
+before an operation can start:
+- null (the default) keeps the old behaviour: the operation follows the
+  previous one by sort_order;
+- an empty list means it can start as soon as the order starts;
+- otherwise it waits for every listed operation of the same order.
+
+critical_path() is the classic forward/backward pass on durations: earliest
+and latest start/finish in minutes from the order start, slack = LS - ES,
+and the zero-slack operations form the critical path.
+"""
+from dataclasses import dataclass
+from heapq import heapify, heappop, heappush
+
+
+@dataclass
+class Timing:
+    es: float   # earliest start, minutes from the order start
+    ef: float
+    ls: float   # latest start that does not delay the order
+    lf: float
+
+    @property
+    def slack(self) -> float:
+        return self.ls - self.es
+
+    @property
+    def critical(self) -> bool:
+        return self.slack <= 1e-6
+
+
+def predecessors(ops: list) -> dict:
+    """op_id -> [predecessor op_ids] for the operations of one order."""
+    ordered = sorted(ops, key=lambda o: (o.sort_order, o.id))
+    ids = {op.id for op in ordered}
+    links, previous = {}, None
+    for op in ordered:
+        if op.predecessors is None:
+            links[op.id] = [previous] if previous is not None else []
+        else:
+            links[op.id] = [p for p in op.predecessors if p in ids and p != op.id]
+        previous = op.id
+    return links
+
+
+def topological(ops: list, links: dict):
+    """
+    (operations in dependency order, ids caught in a cycle). Ready operations
+    are taken by sort_order; a cycle is broken by appending its operations in
+    sort_order, ignoring the links between them.
+    """
+    by_id = {op.id: op for op in ops}
+    pending = {op_id: len(set(preds)) for op_id, preds in links.items()}
+    successors = {op_id: [] for op_id in links}
+    for op_id, preds in links.items():
+        for p in set(preds):
+            successors[p].append(op_id)
+
+    rank = lambda op_id: (by_id[op_id].sort_order, op_id)
+    ready = [rank(op_id) for op_id, n in pending.items() if n == 0]
+    heapify(ready)
+    result = []
+    while ready:
+        _, op_id = heappop(ready)
+        result.append(by_id[op_id])
+        for s in successors[op_id]:
+            pending[s] -= 1
+            if pending[s] == 0:
+                heappush(ready, rank(s))
+
+    placed = {op.id for op in result}
+    cyclic = sorted((op_id for op_id in links if op_id not in placed), key=rank)
+    return result + [by_id[op_id] for op_id in cyclic], cyclic
+
+
+def critical_path(ordered: list, links: dict, durations: dict) -> dict:
+    """op_id -> Timing, for `ordered` as returned by topological()."""
+    timings = {}
+    for op in ordered:
+        es = max((timings[p].ef for p in links.get(op.id, ()) if p in timings), default=0.0)
+        timings[op.id] = Timing(es, es + durations[op.id], 0.0, 0.0)
+
+    finish = max((t.ef for t in timings.values()), default=0.0)
+    successors = {op.id: [] for op in ordered}
+    for op_id, preds in links.items():
+        for p in preds:
+            if p in successors:
+                successors[p].append(op_id)
+    done = set()
+    for op in reversed(ordered):
+        t = timings[op.id]
+        # Successors caught in a cycle may not be done yet; they do not constrain
+        t.lf = min((timings[s].ls for s in successors[op.id] if s in done), default=finish)
+        t.ls = t.lf - durations[op.id]
+        done.add(op.id)
+    return timings
@@ -0,0 +1,245 @@
+"""
+What-if scheduling on an in-memory copy of the plan.
+
+PlanSnapshot reads orders, operations and resources once and keeps the
+operations column-wise in tuples, so it is never modified. A Scenario only
+records its edits (rushed orders, extra absences, changed operation fields)
+and builds fresh Operation objects from the snapshot when it runs; many
+scenarios can share one snapshot and nothing touches the database until a
+result is committed (SchedulingService.commit_scenario).
+
+A run replans every order of the snapshot and is compared against the live
+plan held by the snapshot: late orders, section utilization over the next
+days and the operations whose times or worker moved.
+"""
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from typing import Optional
+
+from core.clock import factory_now
+from modules.scheduling.engine import Operation, Plan, Scheduler, due_at, format_ts
+from modules.scheduling.workcalendar import CalendarSet
+
+OPERATION_FIELDS = tuple(f.name for f in fields(Operation))
+
+# Window for the utilization comparison
+UTILIZATION_DAYS = 7
+
+
+class PlanSnapshot:
+    def __init__(self, orders: list, operations: list, workers: list, sections: list,
+                 calendars: Optional[CalendarSet] = None, now: Optional[datetime] = None,
+                 catalog: Optional[list] = None):
+        self.orders = tuple(orders)
+        self.columns = {name: tuple(getattr(op, name) for op in operations) for name in OPERATION_FIELDS}
+        self.index = {op_id: i for i, op_id in enumerate(self.columns["id"])}
+        self.workers = tuple(workers)
+        self.sections = tuple(sections)
+        self.calendars = calendars
+        # operations_catalog rows: scenarios match skills like the live replan does
+        self.catalog = tuple(catalog or ())
+        self.taken_at = now or factory_now()
+
+    def __len__(self):
+        return len(self.index)
+
+    def operations(self, overrides: Optional[dict] = None) -> list:
+        """Fresh Operation objects, with {op_id: {field: value}} applied."""
+        overrides = overrides or {}
+        ops = []
+        for values in zip(*(self.columns[name] for name in OPERATION_FIELDS)):
+            op = Operation(*values)
+            for name, value in overrides.get(op.id, {}).items():
+                setattr(op, name, value)
+            ops.append(op)
+        return ops
+
+    def live(self, op_id):
+        """(start, end, worker_id) of an operation in the live plan."""
+        i = self.index[op_id]
+        return self.columns["start"][i], self.columns["end"][i], self.columns["worker_id"][i]
+
+    def late(self) -> list:
+        """Orders of the live plan that finish after their shipping day."""
+        return late_orders(self.orders, zip(self.columns["order_id"], self.columns["end"]))
+
+    def scenario(self, name: str = "") -> "Scenario":
+        return Scenario(self, name)
+
+
+def late_orders(orders, ends) -> list:
+    """Orders whose last operation ends after their shipping day; ends: (order_id, end) pairs."""
+    order_end = {}
+    for order_id, end in ends:
+        if end is not None and (order_id not in order_end or end > order_end[order_id]):
+            order_end[order_id] = end
+    late = []
+    for order in orders:
+        due = due_at(order)
+        if due is not None and order.id in order_end and order_end[order.id] > due:
+            late.append({
+                "order_id": order.id,
+                "order_number": order.order_number,
+                "planned_end": order_end[order.id],
+                "delay_days": (order_end[order.id] - due).total_seconds() / 86400,
+            })
+    return late
+
+
+def utilization(snapshot: PlanSnapshot, intervals, calendars: Optional[CalendarSet] = None,
+                days: int = UTILIZATION_DAYS) -> dict:
+    """
+    section_id -> booked working minutes / working minutes of the section's
+    workers (less their absences), from the snapshot time over `days` days.
+    intervals: (section_id, start, end) of the planned operations.
+    """
+    window_start = snapshot.taken_at
+    window_end = window_start + timedelta(days=days)
+
+    def working(section_id, start, end):
+        start, end = max(start, window_start), min(end, window_end)
+        if end <= start:
+            return 0.0
+        if calendars is None:
+            return (end - start).total_seconds() / 60
+        return calendars.for_section(section_id).working_minutes(start, end)
+
+    booked = {}
+    for section_id, start, end in intervals:
+        if section_id is None or start is None or end is None:
+            continue
+        booked[section_id] = booked.get(section_id, 0) + working(section_id, start, end)
+
+    absences = calendars.absences if calendars else {}
+    result = {}
+    for section in snapshot.sections:
+        sid = section["id"]
+        staff = [w["id"] for w in snapshot.workers if w.get("section_id") == sid]
+        shift = working(sid, window_start, window_end)
+        available = sum(
+            max(shift - sum(working(sid, a, b) for a, b in absences.get(worker_id, ())), 0)
+            for worker_id in staff
+        ) if staff else shift
+        result[sid] = booked.get(sid, 0) / available if available else 0.0
+    return result
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    plan: Plan
+    moved: list = field(default_factory=list)        # operations whose times or worker changed
+    late: list = field(default_factory=list)
+    live_late: list = field(default_factory=list)
+    utilization: list = field(default_factory=list)  # per section: live vs scenario
+
+    def summary(self) -> dict:
+        return {
+            "name": self.name,
+            "late_orders": len(self.late),
+            "live_late_orders": len(self.live_late),
+            "delay_days": sum(r["delay_days"] for r in self.late),
+            "live_delay_days": sum(r["delay_days"] for r in self.live_late),
+            "moved": len(self.moved),
+            "unassigned": len(self.plan.unassigned),
+        }
+
+    def rows(self) -> list:
+        """order_operations rows to write for this scenario."""
+        return [
+            {
+                "id": r["id"],
+                "order_id": r["order_id"],
+                "scheduled_start_at": format_ts(r["new_start"]),
+                "scheduled_end_at": format_ts(r["new_end"]),
+                "assigned_worker_id": r["new_worker_id"],
+            }
+            for r in self.moved
+        ]
+
+
+class Scenario:
+    """Edits on top of a snapshot; chainable: snapshot.scenario("x").rush(id).absent(w, a, b)."""
+
+    def __init__(self, snapshot: PlanSnapshot, name: str = ""):
+        self.snapshot = snapshot
+        self.name = name
+        self.rushed = []
+        self.absences = {}     # worker_id -> [(start, end)] on top of the loaded ones
+        self.overrides = {}    # op_id -> {field: value}
+
+    def rush(self, order_id) -> "Scenario":
+        """Plan the order before every other one."""
+        if order_id not in self.rushed:
+            self.rushed.append(order_id)
+        return self
+
+    def absent(self, worker_id, start: datetime, end: datetime) -> "Scenario":
+        self.absences.setdefault(worker_id, []).append((start, end))
+        return self
+
+    def set(self, op_id, **values) -> "Scenario":
+        """Change fields of one operation, e.g. quantity=..., worker_id=..."""
+        unknown = set(values) - set(OPERATION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown operation fields: {', '.join(sorted(unknown))}")
+        self.overrides.setdefault(op_id, {}).update(values)
+        return self
+
+    def _calendars(self) -> Optional[CalendarSet]:
+        base = self.snapshot.calendars
+        if not self.absences:
+            return base
+        if base is None:
+            raise ValueError("Absences need working calendars in the snapshot")
+        absences = {w: list(periods) for w, periods in base.absences.items()}
+        for worker_id, periods in self.absences.items():
+            absences.setdefault(worker_id, []).extend(periods)
+        return CalendarSet(base.default, base.sections, absences)
+
+    def run(self, assign_workers: bool = True, finite: bool = False, rule: str = "fifo") -> ScenarioResult:
+        snapshot = self.snapshot
+        order_ids = {o.id for o in snapshot.orders}
+        operations, bookings = [], []
+        for op in snapshot.operations(self.overrides):
+            (operations if op.order_id in order_ids else bookings).append(op)
+
+        calendars = self._calendars()
+        scheduler = Scheduler(snapshot.workers, snapshot.sections, bookings, now=snapshot.taken_at,
+                              calendars=calendars, finite=finite, catalog=list(snapshot.catalog))
+        plan = scheduler.schedule(list(snapshot.orders), operations, assign_workers=assign_workers,
+                                  rule=rule, rush=self.rushed)
+
+        moved = []
+        for op in operations:
+            start, end, worker_id = snapshot.live(op.id)
+            if (op.start, op.end, op.worker_id) != (start, end, worker_id):
+                moved.append({
+                    "id": op.id,
+                    "order_id": op.order_id,
+                    "old_start": start,
+                    "old_end": end,
+                    "old_worker_id": worker_id,
+                    "new_start": op.start,
+                    "new_end": op.end,
+                    "new_worker_id": op.worker_id,
+                    "shift_minutes": (op.end - end).total_seconds() / 60 if end and op.end else None,
+                })
+
+        live_load = utilization(snapshot, zip(snapshot.columns["section_id"], snapshot.columns["start"],
+                                              snapshot.columns["end"]), snapshot.calendars)
+        new_load = utilization(snapshot, ((op.section_id, op.start, op.end) for op in operations + bookings),
+                               calendars)
+        names = {s["id"]: s.get("name") for s in snapshot.sections}
+        load = [
+            {"section_id": sid, "section": names.get(sid), "live": live_load[sid], "scenario": new_load[sid]}
+            for sid in live_load
+        ]
+        return ScenarioResult(
+            name=self.name,
+            plan=plan,
+            moved=moved,
+            late=late_orders(snapshot.orders, ((op.order_id, op.end) for op in operations)),
+            live_late=snapshot.late(),
+            utilization=load,
+        )
@@ -0,0 +1,390 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import streamlit as st
+
+from core.bulk import BulkResult, chunked, write_batches
+from core.config import AppConfig
+from core.database import DatabaseService
+from modules.scheduling.engine import Operation, Order, Plan, Scheduler, format_ts, parse_ts
+from modules.scheduling.incremental import diff_rows, propagate
+from modules.scheduling.network import predecessors
+from modules.scheduling.sandbox import PlanSnapshot, ScenarioResult
+from modules.scheduling.workcalendar import CalendarSet, Shift, WorkCalendar, default_shifts
+
+ORDER_COLUMNS = "id, order_number, start_date, shipping_date, created_at"
+OPERATION_COLUMNS = (
+    "id, order_id, section_id, quantity, norm_time_per_unit, sort_order, status, "
+    "assigned_worker_id, scheduled_start_at, scheduled_end_at, predecessor_ids, completed_quantity, "
+    "operation_catalog_id"
+)
+
+
+@dataclass
+class ScheduleResult:
+    plan: Optional[Plan] = None
+    orders: int = 0
+    operations: int = 0
+    updated: int = 0
+    write: BulkResult = field(default_factory=BulkResult)
+
+    @property
+    def unassigned(self) -> list:
+        return self.plan.unassigned if self.plan else []
+
+    @property
+    def late(self) -> list:
+        """Orders that finish after their shipping date."""
+        return self.plan.late if self.plan else []
+
+    @property
+    def ok(self) -> bool:
+        return self.plan is not None and not self.write.errors
+
+
+@dataclass
+class RescheduleResult:
+    """Outcome of an incremental reschedule: the operations that moved."""
+    diff: list = field(default_factory=list)
+    failed: bool = False
+    write: BulkResult = field(default_factory=BulkResult)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.write.errors
+
+
+@dataclass
+class AssignResult:
+    """Outcome of a day-level worker assignment."""
+    assignment: dict = field(default_factory=dict)   # op_id -> worker_id (None: nobody fits)
+    updated: int = 0
+    failed: bool = False
+    write: BulkResult = field(default_factory=BulkResult)
+
+    @property
+    def unassigned(self) -> list:
+        return [op_id for op_id, worker_id in self.assignment.items() if worker_id is None]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.write.errors
+
+
+class SchedulingService:
+    """
+    Plans order_operations for many orders in one pass: four reads, an
+    in-memory Scheduler, then bulk upserts of the operations that changed.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or DatabaseService()
+
+    def load(self, order_ids=None):
+        """(orders, operations to plan, bookings of other orders, workers, sections, calendars)."""
+        order_filter = {"id": list(order_ids)} if order_ids is not None else None
+        orders = [Order.from_row(r) for r in self.db.orders.fetch_all(ORDER_COLUMNS, order_filter)]
+        ids = {o.id for o in orders}
+
+        operations, bookings = [], []
+        for op in self.load_operations():
+            (operations if op.order_id in ids else bookings).append(op)
+        return (orders, operations, bookings) + self.load_resources()
+
+    def load_operations(self) -> list:
+        return [Operation.from_row(r) for r in self.db.order_operations.fetch_all(OPERATION_COLUMNS)]
+
+    def load_resources(self):
+        """(workers, sections, calendars)"""
+        workers = self.db.workers.fetch_all("id, full_name, section_id, operation_types")
+        sections = self.db.sections.fetch_all("id, name, capacity_minutes")
+        return workers, sections, self.load_calendars()
+
+    def load_catalog(self) -> list:
+        """operations_catalog keys and sections, for skill matching."""
+        try:
+            return self.db.operations_catalog.fetch_all("id, operation_key, section")
+        except Exception:
+            return []
+
+    def load_calendars(self) -> CalendarSet:
+        """Shifts, holidays and absences (setup_work_calendar.sql); AppConfig shifts if not set up."""
+        try:
+            shift_rows = self.db.table("work_shifts").fetch_all("id, section_id, weekday, start_time, end_time, breaks")
+            holiday_rows = self.db.table("holidays").fetch_all("id, date, section_id")
+            absence_rows = self.db.table("worker_absences").fetch_all("id, worker_id, start_at, end_at")
+        except Exception:
+            # Calendar tables not created yet
+            shift_rows, holiday_rows, absence_rows = [], [], []
+
+        factory_shifts = [Shift.from_row(r) for r in shift_rows if not r.get("section_id")] or \
+            default_shifts(AppConfig.WORK_SHIFT, AppConfig.WORK_BREAKS, AppConfig.WORK_DAYS)
+        factory_holidays = [parse_ts(r["date"]).date() for r in holiday_rows if not r.get("section_id")]
+
+        section_shifts, section_holidays = {}, {}
+        for r in shift_rows:
+            if r.get("section_id"):
+                section_shifts.setdefault(r["section_id"], []).append(Shift.from_row(r))
+        for r in holiday_rows:
+            if r.get("section_id"):
+                section_holidays.setdefault(r["section_id"], []).append(parse_ts(r["date"]).date())
+
+        sections = {
+            section_id: WorkCalendar(
+                section_shifts.get(section_id, factory_shifts),
+                factory_holidays + section_holidays.get(section_id, []),
+            )
+            for section_id in set(section_shifts) | set(section_holidays)
+        }
+        absences = {}
+        for r in absence_rows:
+            absences.setdefault(r["worker_id"], []).append((parse_ts(r["start_at"]), parse_ts(r["end_at"])))
+        return CalendarSet(WorkCalendar(factory_shifts, factory_holidays), sections, absences)
+
+    def replan_all(self, assign_workers: bool = True, order_ids=None, dry_run: bool = False,
+                   progress=None, finite: bool = False, rule: str = "fifo") -> ScheduleResult:
+        """
+        Reschedule every order (or just `order_ids`). Operations of other orders
+        stay where they are and keep their workers busy. `finite` limits each
+        section to capacity_minutes per day; `rule` is one of PRIORITY_RULES.
+        With dry_run the plan is computed but nothing is written.
+        """
+        result = ScheduleResult()
+        try:
+            orders, operations, bookings, workers, sections, calendars = self.load(order_ids)
+            scheduler = Scheduler(workers, sections, bookings, calendars=calendars, finite=finite,
+                                  catalog=self.load_catalog())
+            plan = scheduler.schedule(orders, operations, assign_workers=assign_workers, rule=rule)
+        except Exception as e:
+            st.error(f"Scheduling failed: {e}")
+            return result
+
+        result.plan = plan
+        result.orders = len(orders)
+        result.operations = len(operations)
+        rows = plan.rows()
+        result.updated = len(rows)
+        if dry_run or not rows:
+            return result
+
+        result.write = write_batches(
+            lambda batch: self.db.order_operations.upsert(batch, on_conflict="id").execute(),
+            [(row["id"], row) for row in rows],
+            batch_size=AppConfig.IMPORT_BATCH_SIZE,
+            concurrency=AppConfig.IMPORT_CONCURRENCY,
+            key="id",
+            progress=progress,
+            retries=AppConfig.IMPORT_RETRIES,
+            backoff=AppConfig.IMPORT_RETRY_BACKOFF,
+        )
+        return result
+
+    def worker_slots(self, section_id, minutes: float, after=None, catalog_id=None) -> list:
+        """
+        Workers qualified for an operation of the section (catalog_id: its
+        operations_catalog row, matched like the scheduler does) with their
+        earliest free slot for `minutes` of work at or after `after`
+        (default now), earliest first, better skill first on ties:
+        [{"id", "full_name", "start", "end", "skill"}].
+        """
+        try:
+            workers, sections, calendars = self.load_resources()
+            # Every booked operation holds its worker, whatever the order
+            scheduler = Scheduler(workers, sections, self.load_operations(), calendars=calendars,
+                                  catalog=self.load_catalog())
+        except Exception as e:
+            st.error(f"Error loading worker availability: {e}")
+            return []
+        after = parse_ts(after) or scheduler.now
+        names = {w["id"]: w.get("full_name") for w in workers}
+        skills = scheduler.assigner.skills(section_id, catalog_id)
+        slots = []
+        for worker_id, skill in zip(scheduler.assigner.ids, skills.tolist()):
+            if not skill:
+                continue
+            start = scheduler.availability.slots(worker_id).earliest_fit(
+                after, lambda t: scheduler.span(section_id, t, minutes)
+            )
+            end = scheduler.span(section_id, start, minutes)[1] if start else None
+            slots.append({"id": worker_id, "full_name": names.get(worker_id), "start": start, "end": end,
+                          "skill": skill})
+        return sorted(slots, key=lambda s: (s["start"] or datetime.max, -s["skill"]))
+
+    def load_operations_of(self, column: str, values) -> dict:
+        """{id: row} of the operations whose `column` is one of `values`."""
+        if not values:
+            return {}
+        rows = self.db.order_operations.fetch_all(OPERATION_COLUMNS, {column: sorted(values)})
+        return {r["id"]: r for r in rows}
+
+    def reschedule_operation(self, op_id, recompute: bool = True, dry_run: bool = False,
+                             now=None) -> RescheduleResult:
+        """
+        Incremental update after operation `op_id` changed (status, quantity,
+        times or worker): its times are recomputed (unless `recompute` is
+        False, e.g. after a manual edit) and the shift is pushed to its network
+        successors and to the later operations of the same worker only.
+        Only rows whose times moved are written.
+        """
+        return self.reschedule_operations([op_id], recompute=recompute, dry_run=dry_run, now=now)
+
+    def reschedule_operations(self, op_ids, recompute: bool = True, dry_run: bool = False,
+                              now=None) -> RescheduleResult:
+        """
+        reschedule_operation() for several changed operations with one load and
+        one write. Only the operations of the orders and workers the shift can
+        reach are read: those of the changed operations, widened by the orders
+        and workers of whatever moved until nothing moves outside them.
+        """
+        result = RescheduleResult()
+        try:
+            workers, sections, calendars = self.load_resources()
+            scheduler = Scheduler(workers, sections, calendars=calendars, now=parse_ts(now))
+            rows = self.load_operations_of("id", set(op_ids))
+            changed = [op_id for op_id in dict.fromkeys(op_ids) if op_id in rows]
+            orders = {rows[i]["order_id"] for i in changed}
+            staff = {rows[i]["assigned_worker_id"] for i in changed if rows[i]["assigned_worker_id"]}
+            loaded_orders, loaded_staff = set(), set()
+            operations, moved = [], {}
+            while orders - loaded_orders or staff - loaded_staff:
+                rows.update(self.load_operations_of("order_id", orders - loaded_orders))
+                rows.update(self.load_operations_of("assigned_worker_id", staff - loaded_staff))
+                loaded_orders, loaded_staff = set(orders), set(staff)
+
+                operations, moved = [Operation.from_row(r) for r in rows.values()], {}
+                for op_id in changed:
+                    for moved_id, old in propagate(scheduler, operations, op_id, recompute=recompute).items():
+                        moved.setdefault(moved_id, old)
+                by_id = {op.id: op for op in operations}
+                orders |= {by_id[i].order_id for i in moved}
+                staff |= {by_id[i].worker_id for i in moved if by_id[i].worker_id}
+        except Exception as e:
+            st.error(f"Rescheduling failed: {e}")
+            result.failed = True
+            return result
+
+        by_id = {op.id: op for op in operations}
+        # A later change can put an operation back where it was
+        moved = {i: old for i, old in moved.items() if (by_id[i].start, by_id[i].end) != old}
+        result.diff = diff_rows(by_id, moved)
+        if dry_run or not moved:
+            return result
+
+        rows = [
+            {
+                "id": op_id,
+                "order_id": by_id[op_id].order_id,
+                "scheduled_start_at": format_ts(by_id[op_id].start),
+                "scheduled_end_at": format_ts(by_id[op_id].end),
+            }
+            for op_id in moved
+        ]
+        result.write = write_batches(
+            lambda batch: self.db.order_operations.upsert(batch, on_conflict="id").execute(),
+            [(row["id"], row) for row in rows],
+            batch_size=AppConfig.IMPORT_BATCH_SIZE,
+            concurrency=AppConfig.IMPORT_CONCURRENCY,
+            key="id",
+            retries=AppConfig.IMPORT_RETRIES,
+            backoff=AppConfig.IMPORT_RETRY_BACKOFF,
+        )
+        return result
+
+    def assign_day(self, day, method: str = "greedy", dry_run: bool = False) -> AssignResult:
+        """
+        Reassign workers for all open operations scheduled to start on `day`
+        in one solve (assignment.py; `method` is one of ASSIGN_METHODS). Times
+        do not change; only rows whose worker changed are written.
+        """
+        result = AssignResult()
+        day = parse_ts(day).date()
+        try:
+            workers, sections, calendars = self.load_resources()
+            operations = self.load_operations()
+            todays = [op for op in operations
+                      if not op.fixed and op.section_id and op.start is not None and op.start.date() == day]
+            ids = {op.id for op in todays}
+            others = [op for op in operations if op.id not in ids]
+            # Everything else keeps its worker busy (and counts in their load)
+            scheduler = Scheduler(workers, sections, others, calendars=calendars, catalog=self.load_catalog())
+            workers_of = {op.id: op.worker_id for op in operations}
+            by_order, links = {}, {}
+            for op in operations:
+                by_order.setdefault(op.order_id, []).append(op)
+            for order_id in {op.order_id for op in todays}:
+                links.update(predecessors(by_order[order_id]))
+            continuity = {op.id: [workers_of[p] for p in links[op.id] if workers_of.get(p)] for op in todays}
+            result.assignment = scheduler.assigner.solve(todays, scheduler.availability, method, continuity)
+        except Exception as e:
+            st.error(f"Assignment failed: {e}")
+            result.failed = True
+            return result
+
+        rows = [
+            {"id": op.id, "order_id": op.order_id, "assigned_worker_id": result.assignment.get(op.id)}
+            for op in todays if result.assignment.get(op.id) != op.worker_id
+        ]
+        result.updated = len(rows)
+        if dry_run or not rows:
+            return result
+        result.write = write_batches(
+            lambda batch: self.db.order_operations.upsert(batch, on_conflict="id").execute(),
+            [(row["id"], row) for row in rows],
+            batch_size=AppConfig.IMPORT_BATCH_SIZE,
+            concurrency=AppConfig.IMPORT_CONCURRENCY,
+            key="id",
+            retries=AppConfig.IMPORT_RETRIES,
+            backoff=AppConfig.IMPORT_RETRY_BACKOFF,
+        )
+        return result
+
+    def snapshot(self, now=None) -> Optional[PlanSnapshot]:
+        """In-memory copy of the current plan for what-if scenarios (sandbox.py)."""
+        try:
+            orders, operations, bookings, workers, sections, calendars = self.load()
+        except Exception as e:
+            st.error(f"Error loading the plan: {e}")
+            return None
+        return PlanSnapshot(orders, operations + bookings, workers, sections, calendars, now=parse_ts(now),
+                            catalog=self.load_catalog())
+
+    def commit_scenario(self, result: ScenarioResult, snapshot: PlanSnapshot) -> Optional[BulkResult]:
+        """
+        Write the operations a scenario moved, in one bulk upsert. Refused
+        (None) when any of them changed in the database since the snapshot.
+        """
+        rows = result.rows()
+        if not rows:
+            return BulkResult()
+        try:
+            current = []
+            # Keep the id list of each request short enough for a URL
+            for ids in chunked([r["id"] for r in rows], 200):
+                current += self.db.order_operations.fetch_all(
+                    "id, scheduled_start_at, scheduled_end_at, assigned_worker_id", {"id": ids}
+                )
+        except Exception as e:
+            st.error(f"Error checking the plan: {e}")
+            return None
+        stale = [
+            r["id"] for r in current
+            if (parse_ts(r.get("scheduled_start_at")), parse_ts(r.get("scheduled_end_at")),
+                r.get("assigned_worker_id")) != snapshot.live(r["id"])
+        ]
+        if stale or len(current) != len(rows):
+            st.error("План змінився після знімка, зробіть новий знімок.")
+            return None
+        return write_batches(
+            lambda batch: self.db.order_operations.upsert(batch, on_conflict="id").execute(),
+            [(row["id"], row) for row in rows],
+            batch_size=len(rows),
+            concurrency=1,
+            key="id",
+            retries=AppConfig.IMPORT_RETRIES,
+            backoff=AppConfig.IMPORT_RETRY_BACKOFF,
+        )
+
+    def schedule_order(self, order_id, assign_workers: bool = True) -> bool:
+        result = self.replan_all(assign_workers=assign_workers, order_ids=[order_id])
+        return result.ok and result.orders > 0
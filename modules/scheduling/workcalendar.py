@@ -0,0 +1,288 @@
+"""
+Working-time calendars.
+
+A WorkCalendar is the sorted list of working intervals of one section
+(shifts minus breaks and holidays), stored as numpy arrays of minutes since
+an origin together with the cumulative working minutes before each interval.
+"Add N working minutes to a timestamp" is then two binary searches instead
+of a walk over days:
+
+    position = worked(ts) + N
+    interval = searchsorted(cumulative_end, position)
+    result   = start[interval] + (position - cumulative_start[interval])
+
+add_minutes_many() does the same for whole arrays, so a year of calendar
+arithmetic for 100k operations stays in numpy. The interval arrays are
+generated from the weekly shift pattern for a horizon of days and are
+rebuilt over a wider range when a timestamp falls outside it.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+
+from core.clock import factory_today
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_HORIZON_DAYS = 730
+
+
+def parse_clock(value) -> int:
+    """'08:30' / '08:30:00' / time -> minutes after midnight."""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    parts = str(value).strip().split(":")
+    return int(parts[0]) * 60 + (int(parts[1]) if len(parts) > 1 else 0)
+
+
+def parse_span(value):
+    """'12:00-12:30' -> (720, 750)"""
+    start, end = str(value).split("-", 1)
+    return parse_clock(start), parse_clock(end)
+
+
+@dataclass
+class Shift:
+    """One working shift on an ISO weekday (1 = Monday); ends next day when end <= start."""
+    weekday: int
+    start: int                      # minutes after midnight
+    end: int
+    breaks: list = field(default_factory=list)   # [(start, end)] minutes after midnight
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Shift":
+        return cls(
+            weekday=int(row["weekday"]),
+            start=parse_clock(row["start_time"]),
+            end=parse_clock(row["end_time"]),
+            breaks=[parse_span(b) for b in (row.get("breaks") or [])],
+        )
+
+    def intervals(self, day_offset: int) -> list:
+        """Working intervals in minutes relative to midnight of day 0 of the horizon."""
+        base = day_offset * MINUTES_PER_DAY
+        end = self.end if self.end > self.start else self.end + MINUTES_PER_DAY
+        pieces, cursor = [], self.start
+        for b_start, b_end in sorted(self.breaks):
+            if b_start < self.start:
+                # Break after midnight of an overnight shift
+                b_start, b_end = b_start + MINUTES_PER_DAY, b_end + MINUTES_PER_DAY
+            if b_end <= cursor or b_start >= end:
+                continue
+            if b_start > cursor:
+                pieces.append((cursor, b_start))
+            cursor = max(cursor, b_end)
+        if cursor < end:
+            pieces.append((cursor, end))
+        return [(base + s, base + e) for s, e in pieces]
+
+
+def default_shifts(shift: str, breaks: str, days: str) -> list:
+    """Shifts from the AppConfig defaults: '08:00-17:00', '12:00-13:00', '1,2,3,4,5'."""
+    start, end = parse_span(shift)
+    spans = [parse_span(b) for b in str(breaks).split(",") if b.strip()]
+    return [Shift(int(d), start, end, spans) for d in str(days).split(",") if d.strip()]
+
+
+def _merge(intervals: list) -> list:
+    merged = []
+    for s, e in sorted(intervals):
+        if merged and s <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+        else:
+            merged.append((s, e))
+    return merged
+
+
+def _subtract(intervals: list, holes: list) -> list:
+    """Both sorted and merged."""
+    result, j = [], 0
+    for s, e in intervals:
+        while j < len(holes) and holes[j][1] <= s:
+            j += 1
+        k, cursor = j, s
+        while k < len(holes) and holes[k][0] < e:
+            if holes[k][0] > cursor:
+                result.append((cursor, holes[k][0]))
+            cursor = max(cursor, holes[k][1])
+            k += 1
+        if cursor < e:
+            result.append((cursor, e))
+    return result
+
+
+class WorkCalendar:
+    def __init__(self, shifts: Iterable[Shift], holidays: Iterable[date] = (),
+                 origin: Optional[date] = None, days: int = DEFAULT_HORIZON_DAYS):
+        self.shifts = list(shifts)
+        self.holidays = sorted(set(holidays))
+        self._build(origin or factory_today() - timedelta(days=30), days)
+
+    # --- Interval arrays ---
+
+    def _build(self, origin: date, days: int):
+        self.origin = origin
+        self.days = days
+        by_weekday = {}
+        for shift in self.shifts:
+            by_weekday.setdefault(shift.weekday, []).append(shift)
+
+        raw = []
+        # One day back so overnight shifts reaching into day 0 are included
+        for offset in range(-1, days):
+            weekday = (origin + timedelta(days=offset)).isoweekday()
+            for shift in by_weekday.get(weekday, ()):
+                raw.extend(shift.intervals(offset))
+        holes = [
+            ((d - origin).days * MINUTES_PER_DAY, ((d - origin).days + 1) * MINUTES_PER_DAY)
+            for d in self.holidays
+        ]
+        intervals = _subtract(_merge(raw), _merge(holes))
+
+        self.starts = np.array([s for s, _ in intervals], dtype=np.float64)
+        self.ends = np.array([e for _, e in intervals], dtype=np.float64)
+        lengths = self.ends - self.starts
+        self.cum_end = np.cumsum(lengths)
+        self.cum_start = self.cum_end - lengths
+        self._origin_dt = datetime.combine(origin, time())
+
+    def _cover(self, lo: datetime, hi: datetime):
+        """Rebuild the arrays if [lo, hi] is outside the horizon."""
+        first = self.origin
+        last = self.origin + timedelta(days=self.days)
+        if lo.date() >= first and hi.date() < last - timedelta(days=7):
+            return
+        origin = min(first, lo.date() - timedelta(days=7))
+        end = max(last, hi.date() + timedelta(days=self.days // 2 + 7))
+        self._build(origin, (end - origin).days)
+
+    def _to_minutes(self, ts: datetime) -> float:
+        return (ts - self._origin_dt).total_seconds() / 60
+
+    def _from_minutes(self, minutes: float) -> datetime:
+        return self._origin_dt + timedelta(minutes=float(minutes))
+
+    @property
+    def has_working_time(self) -> bool:
+        return len(self.starts) > 0
+
+    def _worked(self, m):
+        """Working minutes between the origin and minute(s) m."""
+        i = np.searchsorted(self.ends, m, side="right")
+        inside = np.minimum(i, len(self.starts) - 1)
+        partial = np.clip(m - self.starts[inside], 0, None)
+        return np.where(
+            i < len(self.starts),
+            self.cum_start[inside] + np.minimum(partial, self.ends[inside] - self.starts[inside]),
+            self.cum_end[-1],
+        )
+
+    def _position_to_minutes(self, position, resume: bool = False):
+        """
+        Minute at which working position(s) are reached; with `resume` the
+        first working minute at that position (after a break, not before it).
+        """
+        j = np.searchsorted(self.cum_end, position, side="right" if resume else "left")
+        j = np.minimum(j, len(self.starts) - 1)
+        return self.starts[j] + (position - self.cum_start[j])
+
+    # --- Public primitives ---
+
+    def next_working(self, ts: datetime) -> datetime:
+        """`ts` itself when inside a working interval, else the start of the next one."""
+        if not self.has_working_time:
+            return ts
+        self._cover(ts, ts)
+        m = self._to_minutes(ts)
+        i = int(np.searchsorted(self.ends, m, side="right"))
+        if i >= len(self.starts):
+            self._cover(ts, ts + timedelta(days=self.days))
+            return self.next_working(ts)
+        return ts if self.starts[i] <= m else self._from_minutes(self.starts[i])
+
+    def add_minutes(self, ts: datetime, minutes: float) -> datetime:
+        """Moment when `minutes` of working time starting at `ts` are used up."""
+        if minutes <= 0:
+            return ts
+        if not self.has_working_time:
+            return ts + timedelta(minutes=minutes)
+        self._cover(ts, ts + timedelta(minutes=minutes * 4 + MINUTES_PER_DAY))
+        position = float(self._worked(self._to_minutes(ts))) + minutes
+        if position > self.cum_end[-1]:
+            self._cover(ts, ts + timedelta(days=self.days * 2))
+            return self.add_minutes(ts, minutes)
+        return self._from_minutes(self._position_to_minutes(position))
+
+    def add_minutes_many(self, starts, minutes) -> np.ndarray:
+        """Vectorized add_minutes: datetime64 array of ends for arrays of starts and minutes."""
+        starts = np.asarray(starts, dtype="datetime64[ns]")
+        minutes = np.asarray(minutes, dtype=np.float64)
+        if len(starts) == 0:
+            return starts
+        if not self.has_working_time:
+            return starts + (minutes * 60e9).astype("timedelta64[ns]")
+        lo = datetime.fromisoformat(str(starts.min())[:26])
+        hi = datetime.fromisoformat(str(starts.max())[:26])
+        self._cover(lo, hi + timedelta(minutes=float(minutes.max()) * 4 + MINUTES_PER_DAY))
+
+        origin = np.datetime64(self._origin_dt, "ns")
+        m = (starts - origin) / np.timedelta64(1, "m")
+        position = self._worked(m) + minutes
+        if position.max() > self.cum_end[-1]:
+            self._cover(lo, hi + timedelta(days=self.days * 2))
+            return self.add_minutes_many(starts, minutes)
+        ends = np.where(minutes > 0, self._position_to_minutes(position), m)
+        return origin + (ends * 60e9).astype("timedelta64[ns]")
+
+    def chain_many(self, origins, before, minutes):
+        """
+        Vectorized back-to-back work: row i starts at the first working moment
+        once `before[i]` working minutes have passed since `origins[i]`, and
+        ends `minutes[i]` working minutes later (at its start when 0). Same
+        result as next_working() / add_minutes() applied one row at a time.
+        Returns (starts, ends) as datetime64 arrays.
+        """
+        origins = np.asarray(origins, dtype="datetime64[ns]")
+        before = np.asarray(before, dtype=np.float64)
+        minutes = np.asarray(minutes, dtype=np.float64)
+        if len(origins) == 0:
+            return origins, origins
+        if not self.has_working_time:
+            starts = origins + (before * 60e9).astype("timedelta64[ns]")
+            return starts, starts + (minutes * 60e9).astype("timedelta64[ns]")
+        lo = datetime.fromisoformat(str(origins.min())[:26])
+        hi = datetime.fromisoformat(str(origins.max())[:26])
+        total = float((before + minutes).max())
+        self._cover(lo, hi + timedelta(minutes=total * 4 + MINUTES_PER_DAY))
+
+        origin = np.datetime64(self._origin_dt, "ns")
+        position = self._worked((origins - origin) / np.timedelta64(1, "m")) + before
+        if (position + minutes).max() >= self.cum_end[-1]:
+            self._cover(lo, hi + timedelta(days=self.days * 2))
+            return self.chain_many(origins, before, minutes)
+        start = self._position_to_minutes(position, resume=True)
+        end = np.where(minutes > 0, self._position_to_minutes(position + minutes), start)
+        to_ts = lambda m: origin + (m * 60e9).astype("timedelta64[ns]")
+        return to_ts(start), to_ts(end)
+
+    def working_minutes(self, start: datetime, end: datetime) -> float:
+        """Working time between two moments."""
+        if end <= start:
+            return 0.0
+        if not self.has_working_time:
+            return (end - start).total_seconds() / 60
+        self._cover(start, end)
+        return float(self._worked(self._to_minutes(end)) - self._worked(self._to_minutes(start)))
+
+
+class CalendarSet:
+    """Calendars per section plus worker absences, as loaded by SchedulingService.load_calendars()."""
+
+    def __init__(self, default: WorkCalendar, sections: Optional[dict] = None, absences: Optional[dict] = None):
+        self.default = default
+        self.sections = sections or {}          # section_id -> WorkCalendar
+        self.absences = absences or {}          # worker_id -> [(start, end)]
+
+    def for_section(self, section_id) -> WorkCalendar:
+        return self.sections.get(section_id, self.default)
@@ -11,7 +11,7 @@ class SectionsService:
         """Fetch all sections with user details."""
         try:
             # Join with profiles
-            query = self.db.client.table(self.TABLE).select(
+            query = self.db.table(self.TABLE).select(
                 "*, created_by_user:created_by(email, full_name), updated_by_user:updated_by(email, full_name)"
             ).order("name")
             
@@ -35,7 +35,7 @@ class SectionsService:
     def get_operations_by_section(self, section_name):
         """Fetch operations for a specific section."""
         try:
-            res = self.db.client.table("operations_catalog").select("*").eq("section", section_name).order("operation_number").execute()
+            res = self.db.operations_catalog.select("*").eq("section", section_name).order("operation_number").execute()
             return pd.DataFrame(res.data)
         except Exception as e:
             # st.error(f"Error fetching section operations: {e}")
@@ -44,7 +44,7 @@ class SectionsService:
     def get_operation_types_source(self):
         """Fetch unique operation types (sections) from operations_catalog for the dropdown."""
         try:
-            res = self.db.client.table("operations_catalog").select("section").execute()
+            res = self.db.operations_catalog.select("section").execute()
             df = pd.DataFrame(res.data)
             if not df.empty and 'section' in df.columns:
                 return sorted(df['section'].dropna().unique().tolist())
@@ -59,7 +59,7 @@ class SectionsService:
                 data['created_by'] = user_id
                 data['updated_by'] = user_id
                 
-            self.db.client.table(self.TABLE).insert(data).execute()
+            self.db.table(self.TABLE).insert(data).execute()
             return True, None
         except Exception as e:
             return False, str(e)
@@ -70,14 +70,14 @@ class SectionsService:
                 data['updated_by'] = user_id
                 data['updated_at'] = "now()"
                 
-            self.db.client.table(self.TABLE).update(data).eq("id", section_id).execute()
+            self.db.table(self.TABLE).update(data).eq("id", section_id).execute()
             return True, None
         except Exception as e:
             return False, str(e)
 
     def delete_section(self, section_id):
         try:
-            self.db.client.table(self.TABLE).delete().eq("id", section_id).execute()
+            self.db.table(self.TABLE).delete().eq("id", section_id).execute()
             return True
         except Exception as e:
             st.error(f"Error deleting section: {e}")
@@ -116,7 +116,7 @@ class SectionsService:
                 if clean_row.get('name'):
                     # Insert (or Upsert if we had ID, but we likely don't)
                     # We'll try insert, if name unique constraint fails -> Error for now or could upsert on name
-                    self.db.client.table(self.TABLE).insert(clean_row).execute()
+                    self.db.table(self.TABLE).insert(clean_row).execute()
                     success += 1
             except Exception:
                 errors += 1
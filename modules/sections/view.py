@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from modules.sections.services import SectionsService
 from core.config import UserRole
+from core.services import get_service
 from zoneinfo import ZoneInfo
 
 # --- HELPER FUNCTIONS ---
@@ -20,7 +21,7 @@ def get_kyiv_time(dt_str):
 def view_section_operations(section_name):
     st.caption(f"Список операцій для дільниці: **{section_name}**")
     
-    service = SectionsService()
+    service = get_service(SectionsService)
     ops_df = service.get_operations_by_section(section_name)
     
     if ops_df.empty:
@@ -50,7 +51,7 @@ def view_section_operations(section_name):
 def render():
     st.header("🏭 Дільниці (Sections)")
     
-    service = SectionsService()
+    service = get_service(SectionsService)
     sections_df = service.get_all_sections()
     source_op_types = service.get_operation_types_source()
     
@@ -1,5 +1,9 @@
 import streamlit as st
-from core.config import ROLE_LABELS, UserRole
+import pandas as pd
+from core.config import AppConfig, ROLE_LABELS, UserRole
+from core.services import get_service
+from core.database import get_query_cache
+from core.instrumentation import get_query_monitor
 
 def render():
     st.header("⚙️ Налаштування")
@@ -28,7 +32,7 @@ def render():
         st.subheader("👥 Керування користувачами (Адмін)")
         
         from modules.workers.services import WorkerService
-        worker_service = WorkerService()
+        worker_service = get_service(WorkerService)
         workers = worker_service.get_all_workers()
         
         if workers:
@@ -74,3 +78,76 @@ def render():
                             st.rerun()
                         else:
                             st.info("Змін не виявлено.")
+
+        # --- Admin Section: Query Diagnostics ---
+        st.divider()
+        render_diagnostics()
+
+def render_diagnostics():
+    """Admin panel: DB call statistics collected by core/instrumentation.py."""
+    st.subheader("🩺 Діагностика запитів до БД (Адмін)")
+    
+    if not AppConfig.QUERY_STATS:
+        st.info("Збір статистики вимкнено (MES_QUERY_STATS=off).")
+        return
+    
+    monitor = get_query_monitor()
+    cache = get_query_cache()
+    
+    # Current rerun so far + cache efficiency
+    current = monitor.current_rerun()
+    c1, c2, c3, c4 = st.columns(4)
+    if current:
+        summary = current.summary()
+        c1.metric("Запитів (цей рендер)", summary["queries"])
+        c2.metric("Час БД (цей рендер)", f"{summary['db_ms']:.0f} мс")
+    if cache is not None:
+        total = cache.hits + cache.misses
+        c3.metric("Кеш: влучання", f"{(cache.hits / total * 100) if total else 0:.0f}%")
+        c4.metric("Кеш: записів", len(cache))
+    
+    tab_shapes, tab_pages, tab_reruns, tab_slow = st.tabs(
+        ["🔎 Типи запитів", "📄 Сторінки", "🔁 Рендери", f"🐢 Повільні (>{monitor.slow_ms:.0f} мс)"]
+    )
+    
+    with tab_shapes:
+        shapes = monitor.shape_report()
+        if shapes:
+            df = pd.DataFrame(shapes)
+            df["kb"] = (df["bytes"] / 1024).round(1)
+            st.dataframe(
+                df[["table", "action", "shape", "calls", "cached", "total_ms", "avg_ms", "max_ms", "rows", "kb"]],
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.info("Ще немає записаних запитів.")
+    
+    with tab_pages:
+        pages = monitor.page_report()
+        if pages:
+            st.dataframe(pd.DataFrame(pages), hide_index=True, use_container_width=True)
+        else:
+            st.info("Статистика з'явиться після кількох переходів між сторінками.")
+    
+    with tab_reruns:
+        if monitor.reruns:
+            st.dataframe(pd.DataFrame(list(monitor.reruns)[::-1]), hide_index=True, use_container_width=True)
+        else:
+            st.info("Немає завершених рендерів.")
+    
+    with tab_slow:
+        if monitor.slow:
+            st.dataframe(pd.DataFrame([r.__dict__ for r in list(monitor.slow)[::-1]]), hide_index=True, use_container_width=True)
+        else:
+            st.success("Повільних запитів не зафіксовано.")
+        if AppConfig.SLOW_QUERY_SINK == "file":
+            st.caption(f"Журнал: `{AppConfig.SLOW_QUERY_LOG}`")
+        elif AppConfig.SLOW_QUERY_SINK == "system_logs":
+            st.caption("Журнал: таблиця `system_logs` (action = slow_query)")
+    
+    if st.button("🧹 Скинути статистику"):
+        monitor.reset()
+        if cache is not None:
+            cache.hits = cache.misses = 0
+        st.rerun()
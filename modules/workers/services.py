@@ -1,17 +1,23 @@
-from core.database import DatabaseService
+from core.bulk import BulkResult, chunked, write_batches
+from core.config import AppConfig
+from core.database import DatabaseService, quote_value
+from core.ingest import with_progress
 import streamlit as st
 import pandas as pd
 
+# Names per lookup request (keeps the request URL short)
+NAME_LOOKUP_CHUNK = 100
+
 class WorkerService:
-    def __init__(self):
-        self.db = DatabaseService()
+    def __init__(self, db=None):
+        self.db = db or DatabaseService()
         self.TABLE = "workers"
 
     def get_all_workers(self):
         """Fetch all workers with creator details (Manual Join)."""
         try:
             # 1. Fetch all workers raw
-            query = self.db.client.table(self.TABLE).select("*").order("full_name")
+            query = self.db.table(self.TABLE).select("*").order("full_name")
             res = query.execute()
             workers_data = res.data
             
@@ -20,7 +26,7 @@ class WorkerService:
 
             # 2. Fetch Profiles for Name Lookup (Created By / Updated By)
             # We need to look up who created these workers. Creators are still in 'profiles'.
-            profiles_query = self.db.client.table("profiles").select("id, full_name, email").execute()
+            profiles_query = self.db.table("profiles").select("id, full_name, email").execute()
             profiles_data = profiles_query.data
             
             # Create Lookup Map (ID -> Name/Email)
@@ -49,7 +55,7 @@ class WorkerService:
     def get_operation_types(self):
         """Fetch unique sections from operations_catalog to serve as Operation Types."""
         try:
-            res = self.db.client.table("operations_catalog").select("section").execute()
+            res = self.db.operations_catalog.select("section").execute()
             df = pd.DataFrame(res.data)
             if not df.empty and 'section' in df.columns:
                 return sorted(df['section'].dropna().unique().tolist())
@@ -63,15 +69,53 @@ class WorkerService:
             if current_user_id:
                 data['updated_by'] = current_user_id
             
-            return self.db.client.table(self.TABLE).update(data).eq("id", worker_id).execute()
+            return self.db.table(self.TABLE).update(data).eq("id", worker_id).execute()
         except Exception as e:
             st.error(f"Error updating worker: {e}")
             return None
 
-    def import_workers(self, df, column_mapping, user_id=None):
+    def import_workers_from_batches(self, batches, column_mapping, user_id=None, progress=None, total=None):
+        """
+        Streaming import: `batches` is an iterable of DataFrames (core.ingest.iter_batches).
+        Returns (success, errors) summed over all batches.
+        """
+        success, errors = 0, 0
+        for batch in with_progress(batches, progress, total):
+            s, e = self.import_workers(batch, column_mapping, user_id=user_id)
+            success += s
+            errors += e
+        return success, errors
+
+    def find_workers_by_name(self, names):
+        """
+        Lower-cased full name -> worker id, for the given names only.
+        Names are matched case-insensitively with batched ilike lookups, so the
+        cost follows the file size, not the number of workers.
+        """
+        wanted = {}
+        for name in names:
+            if pd.notna(name) and str(name).strip():
+                wanted.setdefault(str(name).strip().lower(), str(name).strip())
+
+        name_map = {}
+        for chunk in chunked(list(wanted.values()), NAME_LOOKUP_CHUNK):
+            # No wildcards in the pattern: ilike is a case-insensitive equality here
+            patterns = [quote_value(name.replace("\\", "\\\\")) for name in chunk]
+            res = self.db.workers.select("id, full_name").or_(
+                ",".join(f"full_name.ilike.{p}" for p in patterns)
+            ).execute()
+            for w in res.data:
+                key = str(w.get("full_name") or "").strip().lower()
+                if key in wanted:
+                    name_map[key] = w["id"]
+        return name_map
+
+    def import_workers(self, df, column_mapping, user_id=None, name_map=None):
         """
         Import/Update workers from Excel into 'workers' table.
-        Match by FULL NAME.
+        Match by FULL NAME (`name_map`: see find_workers_by_name).
+        Returns (success, errors); rows are written in batches like the
+        operations import.
         """
         # 1. Separate Multi-Column Mappings
         multi_col_mappings = {}
@@ -84,7 +128,7 @@ class WorkerService:
                 single_col_mapping[k] = v
 
         # 2. Rename single columns
-        rename_map = {v: k for k, v in single_col_mapping.items() if v}
+        rename_map = {v: k for k, v in single_col_mapping.items() if v and v != "(Пропустити)"}
         df_mapped = df[list(rename_map.keys())].rename(columns=rename_map)
         
         # 3. Prepare data dict
@@ -92,17 +136,18 @@ class WorkerService:
         if not data:
             return 0, 0
             
-        success = 0
-        errors = 0
-        
-        # 4. Fetch existing workers for matching
-        all_workers = self.get_all_workers() # Now fetches from 'workers' table
-        name_map = {}
-        for w in all_workers:
-            nm = w.get('full_name')
-            if nm:
-                name_map[str(nm).strip().lower()] = w['id']
-        
+        # 4. Look up only the workers named in this file
+        if name_map is None:
+            names = df_mapped['full_name'] if 'full_name' in df_mapped.columns else []
+            name_map = self.find_workers_by_name(names)
+
+        # Excel row numbers travel with the records for error reports
+        if pd.api.types.is_integer_dtype(df.index):
+            rows = [int(i) + 2 for i in df.index]
+        else:
+            rows = list(range(2, len(data) + 2))
+
+        inserts, updates = {}, {}
         for i, row in enumerate(data):
             # Access original row for multi-col data
             original_row = df.iloc[i]
@@ -133,22 +178,36 @@ class WorkerService:
             if ops_list:
                 worker_data['operation_types'] = sorted(list(set(ops_list)))
 
-            # Perform DB Action
-            try:
-                if name_key and name_key in name_map:
-                    # UPDATE
-                    if user_id: worker_data['updated_by'] = user_id
-                    self.db.client.table(self.TABLE).update(worker_data).eq("id", name_map[name_key]).execute()
-                    success += 1
-                else:
-                    # INSERT
-                    if user_id: 
-                        worker_data['created_by'] = user_id
-                        worker_data['updated_by'] = user_id
-                    self.db.client.table(self.TABLE).insert(worker_data).execute()
-                    success += 1
-                    
-            except Exception:
-                errors += 1
-                
-        return success, errors
+            # Grouped by column set: a bulk write sets every column named in the batch
+            if name_key and name_key in name_map:
+                # UPDATE (upsert by id); a later row of the same worker replaces an earlier one
+                if user_id: worker_data['updated_by'] = user_id
+                worker_data['id'] = name_map[name_key]
+                updates.setdefault(tuple(sorted(worker_data)), {})[worker_data['id']] = (rows[i], worker_data)
+            else:
+                # INSERT
+                if user_id:
+                    worker_data['created_by'] = user_id
+                    worker_data['updated_by'] = user_id
+                inserts.setdefault(tuple(sorted(worker_data)), []).append((rows[i], worker_data))
+
+        # 5. Batched, parallel writes (core/bulk.py)
+        table = self.db.table(self.TABLE)
+        groups = [(lambda chunk: table.insert(chunk).execute(), items) for items in inserts.values()]
+        groups += [(lambda chunk: table.upsert(chunk, on_conflict="id").execute(), list(items.values()))
+                   for items in updates.values()]
+
+        result = BulkResult()
+        for send, items in groups:
+            result.merge(write_batches(
+                send,
+                items,
+                batch_size=AppConfig.IMPORT_BATCH_SIZE,
+                concurrency=AppConfig.IMPORT_CONCURRENCY,
+                key="full_name",
+                retries=AppConfig.IMPORT_RETRIES,
+                backoff=AppConfig.IMPORT_RETRY_BACKOFF,
+            ))
+        # Replaced rows were applied by the row that replaced them
+        replaced = len(data) - sum(len(items) for _, items in groups)
+        return result.success + replaced, result.failed
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 from modules.workers.services import WorkerService
 from core.config import UserRole, ROLE_LABELS
+from core.services import get_service
+from core import ingest
 from zoneinfo import ZoneInfo
 
 # --- HELPER FUNCTIONS ---
@@ -27,7 +29,7 @@ def render():
         st.warning("Доступ заборонено. Тільки адміністратори можуть керувати працівниками.")
         return
 
-    service = WorkerService()
+    service = get_service(WorkerService)
     
     # Fetch data
     workers = service.get_all_workers()
@@ -140,16 +142,15 @@ def render():
         st.markdown("### Імпорт/Оновлення працівників")
         st.info("ℹ️ Імпорт оновлює дані існуючих користувачів за **ПІБ (Full Name)**. Нові користувачі не створюються автоматично.")
         
-        uploaded_file = st.file_uploader("Завантажте файл", type=["xlsx", "xls"])
+        uploaded_file = st.file_uploader("Завантажте файл", type=["xlsx", "xls", "csv"])
         
         if uploaded_file:
             try:
-                xls = pd.ExcelFile(uploaded_file)
-                sheet_names = xls.sheet_names
-                selected_sheet = st.selectbox("Оберіть аркуш", sheet_names)
+                selected_sheet = st.selectbox("Оберіть аркуш", ingest.sheet_names(uploaded_file))
                 
-                df_raw = pd.read_excel(uploaded_file, sheet_name=selected_sheet)
-                st.write(df_raw.head())
+                # Header and first rows only; the import streams the file in batches
+                df_preview = ingest.read_preview(uploaded_file, selected_sheet, rows=5)
+                st.write(df_preview)
                 
                 st.divider()
                 st.write("#### Співставлення стовпців")
@@ -161,8 +162,8 @@ def render():
                     "comment": "Коментар"
                 }
                 
-                excel_headers = ["(Пропустити)"] + list(df_raw.columns)
-                excel_headers_clean = list(df_raw.columns) # For multiselect
+                excel_headers = ["(Пропустити)"] + list(df_preview.columns)
+                excel_headers_clean = list(df_preview.columns) # For multiselect
                 
                 mapping = {}
                 cols = st.columns(2)
@@ -180,9 +181,18 @@ def render():
                 )
                 
                 if st.button("🚀 Імпортувати"):
-                    with st.spinner("Обробка..."):
-                        current_user_id = st.session_state.user.id if st.session_state.get("user") else None
-                        s, e = service.import_workers(df_raw, mapping, user_id=current_user_id)
+                    current_user_id = st.session_state.user.id if st.session_state.get("user") else None
+                    progress_bar = st.progress(0.0, text="Обробка...")
+                    s, e = service.import_workers_from_batches(
+                        ingest.iter_batches(uploaded_file, selected_sheet),
+                        mapping,
+                        user_id=current_user_id,
+                        progress=lambda done, total: progress_bar.progress(
+                            min(done / total, 1.0) if total else 0.0, text=f"Оброблено рядків: {done}"
+                        ),
+                        total=ingest.estimate_rows(uploaded_file, selected_sheet)
+                    )
+                    progress_bar.empty()
                     if s > 0:
                         st.success(f"Оновлено {s} записів.")
                     if e > 0:
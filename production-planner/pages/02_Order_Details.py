@@ -173,6 +173,26 @@ def render_gantt_chart(df):
     )
     st.plotly_chart(fig_resources, use_container_width=True)
 
+def render_reschedule_diff():
+    """Operations moved by the last incremental reschedule (kept across st.rerun)."""
+    diff = st.session_state.pop("reschedule_diff", None)
+    if not diff:
+        return
+    st.info(f"🔄 Зсунуто операцій: {len(diff)}")
+    df = pd.DataFrame(diff)
+    st.dataframe(
+        df[["old_start", "new_start", "new_end", "shift_minutes"]],
+        column_config={
+            "old_start": st.column_config.DatetimeColumn("Було (початок)", format="DD.MM HH:mm"),
+            "new_start": st.column_config.DatetimeColumn("Стало (початок)", format="DD.MM HH:mm"),
+            "new_end": st.column_config.DatetimeColumn("Стало (кінець)", format="DD.MM HH:mm"),
+            "shift_minutes": st.column_config.NumberColumn("Зсув (хв)", format="%.0f"),
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
 def main():
     service = OrderService()
     
@@ -209,6 +229,7 @@ def main():
     i4.metric("Статус", "В роботі") # Placeholder for logic
 
     st.divider()
+    render_reschedule_diff()
 
     # --- Fetch Operations Data ---
     ops_data = service.get_order_operations(order_id)
@@ -262,6 +283,8 @@ def main():
         # Save Button
         if st.button("💾 Зберегти зміни маршруту"):
             changes_made = False
+            deleted = False
+            updated_ids = []
             
             # Progress bar for feedback
             prog = st.progress(0)
@@ -275,6 +298,7 @@ def main():
                 if row['Delete']:
                     service.delete_order_operation(op_id)
                     changes_made = True
+                    deleted = True
                 
                 # 2. Handle Updates (if not deleted)
                 elif original_row:
@@ -286,6 +310,7 @@ def main():
                         
                     if updates:
                         service.update_order_operation(op_id, updates)
+                        updated_ids.append(op_id)
                         changes_made = True
                 
                 prog.progress((idx + 1) / total)
@@ -293,7 +318,12 @@ def main():
             if changes_made:
                 # AUTO-RECALCULATE SCHEDULE
                 with st.spinner("🔄 Перерахунок графіку..."):
-                    service.auto_schedule_order(st.session_state.selected_order_id)
+                    if deleted:
+                        # Removed steps free time only a full replan of the order can reuse
+                        service.auto_schedule_order(st.session_state.selected_order_id)
+                    else:
+                        # Shift only the changed steps and what depends on them
+                        st.session_state.reschedule_diff = service.reschedule_operations(updated_ids).diff
                 
                 st.success("✅ Зміни успішно збережено та графік оновлено!")
                 st.rerun()
@@ -492,6 +522,9 @@ def main():
                             "scheduled_end_at": new_end
                         }
                         if service.update_order_operation(selected_row['id'], upd):
+                            # Keep the times entered by hand, push the dependent operations
+                            result = service.reschedule_operation(selected_row['id'], recompute=False)
+                            st.session_state.reschedule_diff = result.diff
                             st.success("Зміни збережено!")
                             st.rerun()
 
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from modules.orders.services import OrderService
+from core.services import get_service
 from ui.components import load_custom_css, render_task_card, render_status_badge
 
 st.set_page_config(page_title="My Tasks", page_icon="👷", layout="wide")
@@ -8,7 +9,7 @@ load_custom_css()
 
 st.title("👷 Операторський Пульт")
 
-order_service = OrderService()
+order_service = get_service(OrderService)
 
 # 1. Login / Select Worker
 workers = order_service.get_all_workers()
@@ -0,0 +1,22 @@
+-- ==========================================
+-- ⏱️ CYCLE-TIME SKETCHES ON DAILY FACTS
+-- ==========================================
+-- Run after setup_production_facts.sql. Every daily fact row carries a
+-- mergeable cycle-time sketch (modules/analytics/sketch.py) of its timed
+-- operations / steps; percentiles for any period or section merge these.
+
+BEGIN;
+
+alter table public.production_daily_facts add column if not exists cycle_sketch jsonb;
+
+-- Cycle times are actual_end_at - actual_start_at (stamped by
+-- OrderService.update_operation_status); setup_production_facts.sql adds these
+-- too, repeated for databases set up from its earlier version
+alter table public.order_operations add column if not exists actual_start_at timestamptz;
+alter table public.order_operations add column if not exists actual_end_at timestamptz;
+
+-- Existing rows have no sketch: drop the watermarks so the next
+-- FactStore.refresh() rebuilds all facts
+delete from public.analytics_watermarks where name like 'facts:%';
+
+COMMIT;
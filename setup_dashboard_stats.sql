@@ -0,0 +1,71 @@
+-- ==========================================
+-- 📊 DASHBOARD COUNTERS (one round trip)
+-- ==========================================
+-- The dashboard used to run three count(*) queries per rerun. The counters
+-- now live in a one-row materialized view that is refreshed in the
+-- background, and the app reads them with a single RPC:
+--   select public.get_dashboard_stats();
+
+BEGIN;
+
+-- 1. Index for the status counters
+create index if not exists idx_production_steps_status on public.production_steps(status);
+
+-- 2. SUMMARY (одна строка з лічильниками)
+create materialized view if not exists public.dashboard_summary as
+select
+    1 as id,
+    (select count(*) from public.orders) as total_orders,
+    (select count(*) from public.production_steps where status = 'in_progress') as active_steps,
+    (select count(*) from public.production_steps where status = 'done') as completed_steps,
+    now() as refreshed_at;
+
+-- Required by REFRESH ... CONCURRENTLY (readers are never blocked)
+create unique index if not exists dashboard_summary_id on public.dashboard_summary(id);
+
+-- Not exposed directly; read through get_dashboard_stats()
+revoke all on public.dashboard_summary from anon, authenticated;
+
+-- 3. READ
+create or replace function public.get_dashboard_stats()
+returns json
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select json_build_object(
+        'total_orders', total_orders,
+        'active_steps', active_steps,
+        'completed_steps', completed_steps,
+        'refreshed_at', refreshed_at
+    )
+    from public.dashboard_summary;
+$$;
+
+-- 4. REFRESH
+create or replace function public.refresh_dashboard_summary()
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    refresh materialized view concurrently public.dashboard_summary;
+end;
+$$;
+
+grant execute on function public.get_dashboard_stats() to anon, authenticated;
+grant execute on function public.refresh_dashboard_summary() to authenticated;
+
+COMMIT;
+
+-- 5. BACKGROUND REFRESH (every minute)
+-- Needs the pg_cron extension (Database -> Extensions -> pg_cron in Supabase).
+-- Without it, call select public.refresh_dashboard_summary(); from a scheduled job.
+create extension if not exists pg_cron;
+select cron.schedule(
+    'refresh-dashboard-summary',
+    '* * * * *',
+    $$ select public.refresh_dashboard_summary(); $$
+);
@@ -0,0 +1,18 @@
+-- ==========================================
+-- 🔀 OPERATION DEPENDENCIES (паралельні операції)
+-- ==========================================
+-- predecessor_ids lists the operations of the same order that must finish
+-- before this one starts (see modules/scheduling/network.py):
+--   null  -> follows the previous operation by sort_order (old behaviour)
+--   '{}'  -> starts with the order
+--   {a,b} -> starts after both a and b are finished
+
+BEGIN;
+
+alter table public.order_operations add column if not exists predecessor_ids uuid[];
+
+-- Successor lookups ("what waits for this operation")
+create index if not exists idx_order_operations_predecessors
+    on public.order_operations using gin (predecessor_ids);
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- ==========================================
+-- 🧵 OPERATIONS CATALOG: keyset pagination & search
+-- ==========================================
+-- The catalog screen pages with (sort column, id) cursors and filters with
+-- ilike on key/article/number/section. These indexes keep every page turn
+-- an index range scan instead of a full sort of the catalog.
+
+BEGIN;
+
+-- 1. One index per sort option of the list screen (column + id tiebreak).
+-- Null placement matches PostgREST defaults: asc NULLS LAST, desc NULLS FIRST.
+create index if not exists idx_ops_catalog_created on public.operations_catalog(created_at desc, id desc);
+create index if not exists idx_ops_catalog_updated on public.operations_catalog(updated_at desc, id desc);
+create index if not exists idx_ops_catalog_article on public.operations_catalog(article, id);
+create index if not exists idx_ops_catalog_section on public.operations_catalog(section, id);
+create index if not exists idx_ops_catalog_norm on public.operations_catalog(norm_time desc, id desc);
+
+-- 2. Substring search (ilike '%...%') via trigram indexes
+create extension if not exists pg_trgm;
+create index if not exists idx_ops_catalog_key_trgm on public.operations_catalog using gin (operation_key gin_trgm_ops);
+create index if not exists idx_ops_catalog_article_trgm on public.operations_catalog using gin (article gin_trgm_ops);
+create index if not exists idx_ops_catalog_number_trgm on public.operations_catalog using gin (operation_number gin_trgm_ops);
+create index if not exists idx_ops_catalog_section_trgm on public.operations_catalog using gin (section gin_trgm_ops);
+
+COMMIT;
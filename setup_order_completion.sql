@@ -0,0 +1,112 @@
+-- ==========================================
+-- ✅ ORDER COMPLETION TRACKING (OTD / lateness / lead time)
+-- ==========================================
+-- Run after setup_production_facts.sql and setup_cycle_time_sketches.sql
+-- (actual_end_at, fact tables, touch / deletion-log functions).
+-- orders.completed_at is set when the last operation of an order reaches
+-- 'done' and cleared if one is reopened or added. FactStore.refresh()
+-- (modules/analytics/facts.py) folds completed orders into the daily facts
+-- as source 'order'; the analytics KPIs read OTD %, lateness and lead time
+-- from there (modules/analytics/delivery.py).
+
+BEGIN;
+
+-- 1. COMPLETION TIMESTAMP
+alter table public.orders add column if not exists completed_at timestamptz;
+-- Normally added by setup_production_facts.sql; the trigger below needs it
+alter table public.order_operations add column if not exists actual_end_at timestamptz;
+
+-- An order is complete once it has operations and all are done, at the latest
+-- actual_end_at (now if one is missing); completed_at is kept while it stays complete
+create or replace function public.sync_order_completion()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    target uuid;
+    finished timestamptz;
+begin
+    for target in
+        select distinct id from unnest(array[
+            case when tg_op <> 'DELETE' then new.order_id end,
+            case when tg_op <> 'INSERT' then old.order_id end
+        ]) as t(id) where id is not null
+    loop
+        select case when count(*) > 0 and bool_and(op.status = 'done')
+                    then case when count(op.actual_end_at) = count(*) then max(op.actual_end_at)
+                              else clock_timestamp() end
+               end
+          into finished
+          from public.order_operations op
+         where op.order_id = target;
+
+        update public.orders
+           set completed_at = case when finished is null then null else coalesce(completed_at, finished) end
+         where id = target
+           and completed_at is distinct from
+               (case when finished is null then null else coalesce(completed_at, finished) end);
+    end loop;
+    return null;
+end;
+$$;
+
+drop trigger if exists order_operations_sync_completion on public.order_operations;
+create trigger order_operations_sync_completion
+    after insert or delete or update of status, order_id, actual_end_at on public.order_operations
+    for each row execute function public.sync_order_completion();
+
+-- Backfill orders that are already complete
+update public.orders o
+   set completed_at = (
+        select case when count(op.actual_end_at) = count(*) then max(op.actual_end_at) else now() end
+          from public.order_operations op where op.order_id = o.id)
+ where o.completed_at is null
+   and exists (select 1 from public.order_operations op where op.order_id = o.id)
+   and not exists (select 1 from public.order_operations op where op.order_id = o.id and op.status <> 'done');
+
+-- 2. CHANGE TRACKING for orders (the functions come from setup_production_facts.sql)
+alter table public.orders add column if not exists updated_at timestamptz default clock_timestamp();
+alter table public.orders alter column updated_at set default clock_timestamp();
+
+drop trigger if exists orders_touch_updated_at on public.orders;
+create trigger orders_touch_updated_at before update on public.orders
+    for each row execute function public.touch_updated_at();
+drop trigger if exists orders_log_deletion on public.orders;
+create trigger orders_log_deletion after delete on public.orders
+    for each row execute function public.log_row_deletion();
+
+create index if not exists idx_orders_updated on public.orders(updated_at);
+
+-- 3. OVERDUE OPEN ORDERS ("delays" KPI). Orders without operations are left
+-- out: the trigger can never complete them, so they would count forever
+create index if not exists idx_orders_open_shipping on public.orders(shipping_date) where completed_at is null;
+
+create or replace function public.count_overdue_orders(as_of date)
+returns integer
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+    select count(*)::integer
+      from public.orders o
+     where o.completed_at is null
+       and o.shipping_date < as_of
+       and exists (select 1 from public.order_operations op where op.order_id = o.id);
+$$;
+
+grant execute on function public.count_overdue_orders(date) to authenticated;
+
+-- 4. ORDER MEASURES on the fact tables
+alter table public.production_fact_sources add column if not exists due_orders integer default 0;
+alter table public.production_fact_sources add column if not exists late_orders integer default 0;
+alter table public.production_fact_sources add column if not exists lateness_days numeric default 0;
+alter table public.production_fact_sources add column if not exists tardiness_days numeric default 0;
+alter table public.production_daily_facts add column if not exists due_orders integer default 0;
+alter table public.production_daily_facts add column if not exists late_orders integer default 0;
+alter table public.production_daily_facts add column if not exists lateness_days numeric default 0;
+alter table public.production_daily_facts add column if not exists tardiness_days numeric default 0;
+
+COMMIT;
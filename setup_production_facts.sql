@@ -0,0 +1,143 @@
+-- ==========================================
+-- 📈 DAILY PRODUCTION FACTS (incremental analytics)
+-- ==========================================
+-- Analytics read pre-aggregated rows (day × section × worker, and step
+-- name for production_steps) instead of scanning order_operations /
+-- production_steps history on every dashboard open. The aggregation lives
+-- in modules/analytics/facts.py (FactStore.refresh): it re-reads only rows
+-- whose updated_at is past a stored watermark, plus logged deletions.
+-- This script adds the tables and the two triggers that make that possible.
+
+BEGIN;
+
+-- 1. CHANGE TRACKING: updated_at on every update, deletions logged
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    -- clock_timestamp(), not now(): the transaction start could be older than a
+    -- watermark another session has already stored
+    if new.updated_at is not distinct from old.updated_at then
+        new.updated_at := clock_timestamp();
+    end if;
+    return new;
+end;
+$$;
+
+create table if not exists public.row_deletions (
+    id uuid default uuid_generate_v4() primary key,
+    table_name text not null,
+    row_id uuid not null,
+    deleted_at timestamptz default clock_timestamp()
+);
+create index if not exists idx_row_deletions_deleted on public.row_deletions(deleted_at);
+
+create or replace function public.log_row_deletion()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into public.row_deletions (table_name, row_id) values (tg_table_name, old.id);
+    return old;
+end;
+$$;
+
+-- Actual start / finish, stamped by OrderService.update_operation_status (cycle times)
+alter table public.order_operations add column if not exists actual_start_at timestamptz;
+alter table public.order_operations add column if not exists actual_end_at timestamptz;
+
+alter table public.order_operations add column if not exists updated_at timestamptz default clock_timestamp();
+alter table public.production_steps add column if not exists updated_at timestamptz default clock_timestamp();
+alter table public.order_operations alter column updated_at set default clock_timestamp();
+alter table public.production_steps alter column updated_at set default clock_timestamp();
+
+drop trigger if exists order_operations_touch_updated_at on public.order_operations;
+create trigger order_operations_touch_updated_at before update on public.order_operations
+    for each row execute function public.touch_updated_at();
+drop trigger if exists production_steps_touch_updated_at on public.production_steps;
+create trigger production_steps_touch_updated_at before update on public.production_steps
+    for each row execute function public.touch_updated_at();
+
+drop trigger if exists order_operations_log_deletion on public.order_operations;
+create trigger order_operations_log_deletion after delete on public.order_operations
+    for each row execute function public.log_row_deletion();
+drop trigger if exists production_steps_log_deletion on public.production_steps;
+create trigger production_steps_log_deletion after delete on public.production_steps
+    for each row execute function public.log_row_deletion();
+
+create index if not exists idx_order_operations_updated on public.order_operations(updated_at);
+create index if not exists idx_production_steps_updated on public.production_steps(updated_at);
+
+-- 2. CONTRIBUTIONS (one or two rows per source row: plan / done / step)
+create table if not exists public.production_fact_sources (
+    id text primary key,                 -- '<row id>:plan' | ':done' | ':step'
+    row_id uuid not null,
+    key text not null,
+    source text not null,                -- 'operation' | 'step'
+    day date,
+    section_id uuid,
+    worker_id uuid,
+    step_name text,
+    scheduled_minutes numeric default 0,
+    planned_quantity integer default 0,
+    operations integer default 0,
+    completed_quantity integer default 0,
+    done_operations integer default 0,
+    actual_minutes numeric default 0,
+    timed_operations integer default 0
+);
+create index if not exists idx_fact_sources_row on public.production_fact_sources(row_id);
+create index if not exists idx_fact_sources_key on public.production_fact_sources(key);
+
+-- 3. FACTS (contributions summed per key)
+create table if not exists public.production_daily_facts (
+    id uuid default uuid_generate_v4() primary key,
+    key text not null unique,            -- source|day|section_id|worker_id|step_name
+    source text not null,
+    day date,
+    section_id uuid,
+    worker_id uuid,
+    step_name text,
+    scheduled_minutes numeric default 0,
+    planned_quantity integer default 0,
+    operations integer default 0,
+    completed_quantity integer default 0,
+    done_operations integer default 0,
+    actual_minutes numeric default 0,
+    timed_operations integer default 0
+);
+create index if not exists idx_daily_facts_source_day on public.production_daily_facts(source, day);
+
+-- 4. WATERMARKS (last updated_at / deleted_at folded into the facts)
+create table if not exists public.analytics_watermarks (
+    id uuid default uuid_generate_v4() primary key,
+    name text not null unique,
+    value timestamptz,
+    updated_at timestamptz default now()
+);
+
+-- 5. RLS (the refresh runs with the signed-in user's session)
+alter table public.row_deletions enable row level security;
+alter table public.production_fact_sources enable row level security;
+alter table public.production_daily_facts enable row level security;
+alter table public.analytics_watermarks enable row level security;
+
+drop policy if exists "Deletion log for authenticated" on public.row_deletions;
+create policy "Deletion log for authenticated" on public.row_deletions for all
+using (auth.role() = 'authenticated');
+drop policy if exists "Fact sources for authenticated" on public.production_fact_sources;
+create policy "Fact sources for authenticated" on public.production_fact_sources for all
+using (auth.role() = 'authenticated');
+drop policy if exists "Facts viewable by everyone" on public.production_daily_facts;
+create policy "Facts viewable by everyone" on public.production_daily_facts for select using (true);
+drop policy if exists "Facts writable by authenticated" on public.production_daily_facts;
+create policy "Facts writable by authenticated" on public.production_daily_facts for all
+using (auth.role() = 'authenticated');
+drop policy if exists "Watermarks for authenticated" on public.analytics_watermarks;
+create policy "Watermarks for authenticated" on public.analytics_watermarks for all
+using (auth.role() = 'authenticated');
+
+COMMIT;
@@ -0,0 +1,69 @@
+-- ==========================================
+-- 🗓️ WORKING CALENDAR (зміни, перерви, свята, відсутності)
+-- ==========================================
+-- Read by SchedulingService.load_calendars() (modules/scheduling). Shift
+-- times and holiday dates are wall-clock times in the factory time zone
+-- (MES_FACTORY_TZ, core/clock.py). Operation end times are computed in
+-- working minutes: outside shifts, during breaks and on holidays nothing
+-- is produced. Sections without their own shifts use the
+-- factory shifts (section_id is null); without any rows at all the app
+-- falls back to MES_WORK_SHIFT / MES_WORK_BREAKS / MES_WORK_DAYS.
+
+BEGIN;
+
+-- 1. SHIFTS (weekday: 1 = Monday ... 7 = Sunday; end_time <= start_time runs past midnight)
+create table if not exists public.work_shifts (
+    id uuid default uuid_generate_v4() primary key,
+    section_id uuid references public.sections(id) on delete cascade,
+    weekday smallint not null check (weekday between 1 and 7),
+    start_time time not null,
+    end_time time not null,
+    breaks text[] default '{}',          -- e.g. {'12:00-12:30','15:00-15:10'}
+    created_at timestamptz default now()
+);
+create index if not exists idx_work_shifts_section on public.work_shifts(section_id);
+
+-- 2. HOLIDAYS (section_id null = whole factory)
+create table if not exists public.holidays (
+    id uuid default uuid_generate_v4() primary key,
+    date date not null,
+    section_id uuid references public.sections(id) on delete cascade,
+    name text
+);
+create index if not exists idx_holidays_date on public.holidays(date);
+
+-- 3. WORKER ABSENCES (vacation, sick leave)
+create table if not exists public.worker_absences (
+    id uuid default uuid_generate_v4() primary key,
+    worker_id uuid references public.workers(id) on delete cascade not null,
+    start_at timestamptz not null,
+    end_at timestamptz not null,
+    reason text,
+    check (end_at > start_at)
+);
+create index if not exists idx_worker_absences_worker on public.worker_absences(worker_id, start_at);
+
+-- 4. RLS
+alter table public.work_shifts enable row level security;
+alter table public.holidays enable row level security;
+alter table public.worker_absences enable row level security;
+
+drop policy if exists "Shifts viewable by everyone" on public.work_shifts;
+create policy "Shifts viewable by everyone" on public.work_shifts for select using (true);
+drop policy if exists "Shifts manageable by Admin/Manager" on public.work_shifts;
+create policy "Shifts manageable by Admin/Manager" on public.work_shifts for all
+using (exists (select 1 from public.profiles where id = auth.uid() and role in ('admin', 'manager')));
+
+drop policy if exists "Holidays viewable by everyone" on public.holidays;
+create policy "Holidays viewable by everyone" on public.holidays for select using (true);
+drop policy if exists "Holidays manageable by Admin/Manager" on public.holidays;
+create policy "Holidays manageable by Admin/Manager" on public.holidays for all
+using (exists (select 1 from public.profiles where id = auth.uid() and role in ('admin', 'manager')));
+
+drop policy if exists "Absences viewable by everyone" on public.worker_absences;
+create policy "Absences viewable by everyone" on public.worker_absences for select using (true);
+drop policy if exists "Absences manageable by Admin/Manager" on public.worker_absences;
+create policy "Absences manageable by Admin/Manager" on public.worker_absences for all
+using (exists (select 1 from public.profiles where id = auth.uid() and role in ('admin', 'manager')));
+
+COMMIT;
@@ -0,0 +1,131 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.scheduling import assignment
+from modules.scheduling.assignment import AssignmentEngine, min_cost_matching
+from modules.scheduling.availability import AvailabilityIndex
+from modules.scheduling.engine import Operation
+from modules.scheduling.services import SchedulingService
+
+MONDAY = datetime(2024, 3, 4)
+
+
+def op(op_id, section, hour, minutes=60, catalog_id=None, order_id="o"):
+    start = MONDAY.replace(hour=hour)
+    return Operation(op_id, order_id, section, quantity=minutes, norm_time_per_unit=1,
+                     start=start, end=start + timedelta(minutes=minutes), catalog_id=catalog_id)
+
+
+def test_numpy_hungarian_is_optimal(monkeypatch):
+    monkeypatch.setattr(assignment, "linear_sum_assignment", None)
+    rng = np.random.default_rng(3)
+    for rows, cols in [(3, 3), (3, 5), (5, 3), (4, 6)]:
+        cost = rng.integers(0, 20, size=(rows, cols)).astype(float)
+        pairs = min_cost_matching(cost)
+        assert len(pairs) == min(rows, cols)
+        if rows <= cols:
+            best = min(sum(cost[r, c] for r, c in enumerate(p)) for p in itertools.permutations(range(cols), rows))
+        else:
+            best = min(sum(cost[r, c] for c, r in enumerate(p)) for p in itertools.permutations(range(rows), cols))
+        assert sum(cost[r, c] for r, c in pairs) == best
+
+
+def test_skill_load_and_continuity():
+    sections = [{"id": "sew", "name": "Пошив"}, {"id": "cut", "name": "Крій"}]
+    catalog = [{"id": "collar", "operation_key": "collar", "section": "Пошив"}]
+    workers = [
+        {"id": "w1", "section_id": "sew"},
+        {"id": "w2", "section_id": "sew"},
+        {"id": "w3", "section_id": "cut", "operation_types": ["collar"]},
+        {"id": "w4", "section_id": "cut", "operation_types": ["Пошив"]},
+    ]
+    engine = AssignmentEngine(workers, sections, catalog)
+    assert list(engine.skills("sew", "collar")) == [2, 2, 3, 1]
+    assert list(engine.skills("cut")) == [0, 0, 2, 2]
+
+    # Six back-to-back hours of plain sewing are spread over the section, not piled on w1
+    ops = [op(f"s{h}", "sew", h) for h in range(8, 14)]
+    result = engine.solve(ops, AvailabilityIndex(engine.ids))
+    assert sorted(result.values()) == ["w1", "w1", "w1", "w2", "w2", "w2"]
+
+    engine = AssignmentEngine(workers, sections, catalog)
+    assert engine.solve([op("c", "sew", 8, catalog_id="collar")], AvailabilityIndex(engine.ids)) == {"c": "w3"}
+    # With equal skill the worker of the previous step keeps the order
+    result = engine.solve([op("n", "sew", 9)], AvailabilityIndex(engine.ids), continuity={"n": ["w2"]})
+    assert result == {"n": "w2"}
+
+
+def test_matching_beats_greedy():
+    sections = [{"id": "sew", "name": "Пошив"}, {"id": "cut", "name": "Крій"}]
+    workers = [{"id": "w1", "section_id": "sew", "operation_types": ["Крій"]}, {"id": "w2", "section_id": "sew"}]
+    ops = [op("a", "sew", 8), op("b", "cut", 8, minutes=30)]
+    # Greedy gives the first operation to the cheaper w1, so nobody is left for cutting
+    greedy = AssignmentEngine(workers, sections).solve(ops, AvailabilityIndex(["w1", "w2"]))
+    assert greedy == {"a": "w1", "b": None}
+    matched = AssignmentEngine(workers, sections).solve(ops, AvailabilityIndex(["w1", "w2"]), method="matching")
+    assert matched == {"a": "w2", "b": "w1"}
+
+
+def test_day_of_operations_in_under_a_second():
+    rng = random.Random(5)
+    sections = [{"id": f"s{i}", "name": f"S{i}"} for i in range(10)]
+    workers = [{"id": f"w{i}", "section_id": f"s{i % 10}", "operation_types": [f"S{(i + 3) % 10}"]}
+               for i in range(200)]
+    ops = []
+    for n in range(2000):
+        start = MONDAY.replace(hour=8) + timedelta(minutes=rng.randrange(0, 8 * 60))
+        minutes = rng.randrange(10, 60)
+        ops.append(Operation(f"op{n}", f"o{n // 4}", f"s{rng.randrange(10)}", quantity=minutes,
+                             norm_time_per_unit=1, start=start, end=start + timedelta(minutes=minutes)))
+
+    for method in ("greedy", "matching"):
+        engine = AssignmentEngine(workers, sections)
+        started = time.perf_counter()
+        result = engine.solve(ops, AvailabilityIndex(engine.ids), method=method)
+        assert time.perf_counter() - started < 1.0, method
+        # Nobody works two operations at once
+        by_worker = {}
+        for o in ops:
+            if result[o.id]:
+                by_worker.setdefault(result[o.id], []).append((o.start, o.end))
+        for spans in by_worker.values():
+            spans.sort()
+            assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+        assert sum(1 for w in result.values() if w) > 1500
+
+
+def test_assign_day_writes_changed_workers():
+    db = DatabaseService(backend=SQLiteBackend())
+    sec = db.sections.insert({"name": "Пошив"}).execute().data[0]["id"]
+    w1, w2 = db.workers.insert([
+        {"full_name": "A", "section_id": sec}, {"full_name": "B", "section_id": sec},
+    ]).execute().data
+    order = db.orders.insert({"order_number": "D-1", "start_date": "2024-03-04"}).execute().data[0]
+    db.order_operations.insert([
+        {"order_id": order["id"], "section_id": sec, "quantity": 60, "norm_time_per_unit": 1,
+         "predecessor_ids": [], "assigned_worker_id": w1["id"],
+         "scheduled_start_at": f"2024-03-04T{h:02d}:00:00", "scheduled_end_at": f"2024-03-04T{h + 1:02d}:00:00"}
+        for h in (8, 9, 10, 11)
+    ]).execute()
+
+    result = SchedulingService(db).assign_day("2024-03-04")
+    assert result.ok and len(result.assignment) == 4
+    workers = [r["assigned_worker_id"] for r in db.order_operations.find("assigned_worker_id")]
+    assert sorted(workers) == sorted([w1["id"], w1["id"], w2["id"], w2["id"]])
+    assert result.updated == 2
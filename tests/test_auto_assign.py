@@ -12,51 +12,44 @@ sys.modules["streamlit"] = MagicMock()
 
 from modules.orders.services import OrderService
 from core.database import DatabaseService
+from core.local_db import SQLiteBackend
 
 def test_auto_assignment():
-    print("--- Starting Auto-Assignment Test ---")
-    service = OrderService()
-    db = DatabaseService()
-    
-    # 1. Setup Data
-    # Get a section
-    sections = service.get_sections()
-    if not sections:
-        print("SKIP: No sections found.")
-        return
-    section = sections[0]
-    print(f"Using Section: {section['name']}")
-    
-    # Get a worker for this section
-    workers = service.fetch_section_workers(section['name'])
-    if not workers:
-        print("SKIP: No workers for section.")
-        return
+    service = OrderService(db=DatabaseService(backend=SQLiteBackend()))
+    db = service.db
+
+    # 1. Setup Data: one section, two workers
+    db.sections.insert({"name": "Пошив"}).execute()
+    section = service.get_sections()[0]
+    db.workers.insert([
+        {"full_name": "Worker 1", "section_id": section['id']},
+        {"full_name": "Worker 2", "operation_types": [section['name']]},
+    ]).execute()
+
+    start_t = datetime.datetime(2024, 3, 4, 8, 0)  # Monday, start of the default shift
+    workers = service.get_worker_slots(section['id'], 60, start_t)
+    assert len(workers) == 2
     worker = workers[0]
-    print(f"Using Worker: {worker['full_name']} (ID: {worker['id']})")
-    
-    # Create 2 Orders
+
+    # Create 2 Orders starting at the same time
     o1 = service.create_order({
-        "order_number": f"TEST-A-{datetime.datetime.now().timestamp()}",
+        "order_number": "TEST-A",
         "customer_name": "Test Client",
         "product_name": "Product A",
         "quantity": 10,
-        "start_date": datetime.datetime.now().isoformat()
+        "start_date": start_t.date().isoformat()
     })
     o2 = service.create_order({
-        "order_number": f"TEST-B-{datetime.datetime.now().timestamp()}",
+        "order_number": "TEST-B",
         "customer_name": "Test Client",
         "product_name": "Product B",
         "quantity": 10,
-        "start_date": datetime.datetime.now().isoformat()
+        "start_date": start_t.date().isoformat()
     })
-    
-    print(f"Created Orders: {o1.data[0]['id']}, {o2.data[0]['id']}")
     oid1 = o1.data[0]['id']
     oid2 = o2.data[0]['id']
-    
+
     # Add Ops
-    # Op 1 for Order 1
     op1 = service.create_order_operation({
         "order_id": oid1,
         "section_id": section['id'],
@@ -65,9 +58,7 @@ def test_auto_assignment():
         "norm_time_per_unit": 6, # 60 mins total
         "sort_order": 1
     })
-    
-    # Op 2 for Order 2 (Same time ideally)
-    op2 = service.create_order_operation({
+    service.create_order_operation({
         "order_id": oid2,
         "section_id": section['id'],
         "operation_name": "Op 2",
@@ -75,44 +66,28 @@ def test_auto_assignment():
         "norm_time_per_unit": 6, # 60 mins total
         "sort_order": 1
     })
-    
+
     # 2. Schedule Order 1 and Assign Worker Manually
-    print("Scheduling Order 1...")
-    service.auto_schedule_order(oid1, assign_workers=False)
-    # Manually assign worker to Op 1
-    op1_id = op1.data[0]['id']
-    start_t = datetime.datetime.now()
+    assert service.auto_schedule_order(oid1, assign_workers=False)
     end_t = start_t + datetime.timedelta(minutes=60)
-    
-    service.update_order_operation(op1_id, {
+    service.update_order_operation(op1.data[0]['id'], {
         "assigned_worker_id": worker['id'],
         "scheduled_start_at": start_t.isoformat(),
         "scheduled_end_at": end_t.isoformat()
     })
-    print(f"Assigned Worker {worker['id']} to Order 1 ({start_t} - {end_t})")
-    
-    # 3. Auto-Schedule Order 2
-    # Ensure Order 2 starts at same time
-    service.update_order(oid2, {"start_date": start_t.isoformat()})
-    
-    print("Auto-scheduling Order 2 with worker assignment...")
-    service.auto_schedule_order(oid2, assign_workers=True)
-    
-    # 4. Check Result
+
+    # The manual form now sees the worker busy until the end of Op 1
+    slots = {w['id']: w['start'] for w in service.get_worker_slots(section['id'], 60, start_t)}
+    assert slots[worker['id']] == end_t
+    assert min(slots.values()) == start_t
+
+    # 3. Auto-Schedule Order 2 into the same slot
+    assert service.auto_schedule_order(oid2, assign_workers=True)
+
+    # 4. Check Result: the busy worker was not double-booked
     op2_data = service.get_order_operations(oid2)[0]
-    assigned_id = op2_data.get('assigned_worker_id')
-    
-    print(f"Order 2 Worker Assigned: {assigned_id}")
-    
-    if assigned_id == worker['id']:
-        print("FAIL: Worker was double-booked!")
-    else:
-        print("SUCCESS: Worker was NOT double-booked (or unassigned).")
-        
-    # Cleanup
-    service.delete_order(oid1)
-    service.delete_order(oid2)
-    print("Cleanup done.")
+    assert op2_data['scheduled_start_at'].startswith(start_t.isoformat())
+    assert op2_data.get('assigned_worker_id') not in (None, worker['id'])
 
 if __name__ == "__main__":
     test_auto_assignment()
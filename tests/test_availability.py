@@ -0,0 +1,64 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+from datetime import datetime, timedelta
+
+from modules.scheduling.availability import AvailabilityIndex, FreeSlots
+
+T0 = datetime(2024, 3, 4, 8, 0)
+
+
+def at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+
+def test_free_slots_book_release_and_earliest():
+    slots = FreeSlots()
+    slots.book(at(0), at(60), "a")
+    slots.book(at(90), at(120), "b")
+
+    assert not slots.is_free(at(30), at(45))
+    assert slots.is_free(at(60), at(90))
+    assert not slots.is_free(at(60), at(91))
+    assert slots.earliest(at(0), 30) == at(60)
+    assert slots.earliest(at(0), 31) == at(120)
+    assert slots.earliest(at(100), 10) == at(120)
+
+    # Overlapping bookings: releasing one keeps the other's time busy
+    slots.book(at(30), at(100), "c")
+    slots.release("c")
+    assert slots.earliest(at(0), 30) == at(60)
+    slots.release("a")
+    assert slots.earliest(at(0), 90) == at(0)
+    assert slots.is_free(at(0), at(90))
+    assert not slots.is_free(at(0), at(91))
+    slots.release("b")
+    assert slots.slots() == [(datetime.min, datetime.max)]
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(7)
+    index = AvailabilityIndex(["w1", "w2", "w3"])
+    booked = {"w1": [], "w2": [], "w3": []}
+
+    def brute_free(worker, start, end):
+        return all(end <= s or start >= e for s, e in booked[worker])
+
+    for n in range(300):
+        start = at(rng.randrange(0, 5000))
+        minutes = rng.randrange(10, 120)
+        # Earliest slot among all workers, then book it (the scheduler's usage)
+        slot_start, worker = index.earliest_slot(["w1", "w2", "w3"], start, minutes)
+        end = slot_start + timedelta(minutes=minutes)
+        assert brute_free(worker, slot_start, end)
+        index.book(worker, slot_start, end, n)
+        booked[worker].append((slot_start, end))
+
+        probe = at(rng.randrange(0, 5000))
+        for w in booked:
+            assert index.is_free(w, probe, probe + timedelta(minutes=30)) == \
+                brute_free(w, probe, probe + timedelta(minutes=30))
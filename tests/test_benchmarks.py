@@ -0,0 +1,40 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import json
+
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from benchmarks.generate import ShopFloorSpec, generate
+from benchmarks.run import main
+
+
+def test_generator_is_deterministic():
+    spec = ShopFloorSpec(orders=20, workers=6, sections=3, seed=7)
+    first, second = DatabaseService(backend=SQLiteBackend()), DatabaseService(backend=SQLiteBackend())
+    counts = generate(first, spec)
+    assert counts == generate(second, spec)
+    assert counts["orders"] == 20 and 60 <= counts["order_operations"] <= 120
+    rows = lambda db: sorted((r["id"], r["quantity"]) for r in db.order_operations.find("id, quantity"))
+    assert rows(first) == rows(second)
+
+
+def test_report_is_one_json_line(tmp_path):
+    out = tmp_path / "results.jsonl"
+    report = main(["--orders", "15", "--workers", "5", "--sections", "3", "--out", str(out)])
+
+    line = json.loads(out.read_text(encoding="utf-8").splitlines()[-1])
+    assert line["spec"]["orders"] == 15
+    cases = {r["case"]: r for r in line["results"]}
+    assert {"generate", "replan_all", "assign_day_matching", "planning_data"} <= set(cases)
+    replan = cases["replan_all"]
+    assert replan["db_calls"] > 0 and replan["wall_s"] >= 0 and replan["peak_mb"] > 0
+    assert replan["makespan_h"] > 0 and 0 < replan["utilization"] <= 1
+    assert cases["planning_data"]["rows_out"] == report["results"][0]["rows"]["order_operations"]
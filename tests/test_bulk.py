@@ -0,0 +1,112 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import threading
+import time
+import pandas as pd
+from core.bulk import write_batches, is_transient
+from core.database import DatabaseService, DatabaseError
+from core.local_db import SQLiteBackend
+from modules.operations.services import OperationsService
+
+
+class ServerError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def test_transient_errors_are_retried():
+    attempts = []
+
+    def send(records):
+        attempts.append(len(records))
+        if len(attempts) < 3:
+            raise ServerError("connection reset")
+
+    result = write_batches(send, [(i, {"k": i}) for i in range(4)], batch_size=4, retries=3, backoff=0)
+    assert (result.success, result.failed) == (4, 0)
+    assert attempts == [4, 4, 4]
+
+
+def test_exhausted_retries_fail_the_whole_chunk():
+    def send(records):
+        if records[0]["k"] >= 5:
+            raise ServerError("timeout")
+
+    result = write_batches(send, [(i, {"k": i}) for i in range(10)], batch_size=5, retries=1, backoff=0, key="k")
+    assert result.success == 5
+    assert result.failed_keys == [5, 6, 7, 8, 9]
+
+
+def test_data_errors_are_bisected_not_retried():
+    calls = []
+
+    def send(records):
+        calls.append(len(records))
+        if any(r["k"] == 3 for r in records):
+            raise ServerError("duplicate key value", code="23505")
+
+    assert not is_transient(ServerError("x", code="23505"))
+    result = write_batches(send, [(i, {"k": i}) for i in range(8)], batch_size=8, retries=3, backoff=0, key="k")
+    assert (result.success, result.failed_keys) == (7, [3])
+    assert calls == [8, 4, 2, 2, 1, 1, 4]
+
+
+def test_in_flight_chunks_are_bounded():
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0, "pulled": 0}
+
+    def items():
+        for i in range(40):
+            state["pulled"] += 1
+            yield i, {"k": i}
+
+    def send(records):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.01)
+        with lock:
+            state["now"] -= 1
+
+    result = write_batches(send, items(), batch_size=4, concurrency=3)
+    assert result.success == 40
+    assert 1 < state["peak"] <= 3
+
+
+class FlakyBackend(SQLiteBackend):
+    """First insert of every chunk times out."""
+
+    def __init__(self):
+        super().__init__()
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    def execute(self, query):
+        if query.action == "insert" and query.table == "operations_catalog":
+            first = query.payload[0]["operation_key"]
+            with self.lock:
+                if first not in self.seen:
+                    self.seen.add(first)
+                    raise ServerError("upstream timeout")
+        return super().execute(query)
+
+
+def test_parallel_import_exact_counts(monkeypatch):
+    monkeypatch.setattr("core.config.AppConfig.IMPORT_RETRY_BACKOFF", 0)
+    service = OperationsService(db=DatabaseService(backend=FlakyBackend()))
+    df = pd.DataFrame({"Key": [f"K-{i}" for i in range(250)] + ["K-7"], "Norm": 1.0})
+    result = service.import_operations(df, {"operation_key": "Key", "norm_time": "Norm"},
+                                       batch_size=50, concurrency=4)
+    # Every chunk needed a retry; the repeated key fails on the unique constraint
+    assert (result.success, result.failed) == (250, 1)
+    assert result.errors[0]["row"] == 252 and result.errors[0]["key"] == "K-7"
+    assert service.count_operations() == 250
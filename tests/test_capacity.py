@@ -0,0 +1,103 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.scheduling.engine import Operation, Order, Scheduler
+from modules.scheduling.services import SchedulingService
+from modules.scheduling.workcalendar import CalendarSet, WorkCalendar, default_shifts
+
+MONDAY = datetime(2024, 3, 4)
+
+
+def calendars():
+    return CalendarSet(WorkCalendar(default_shifts("08:00-17:00", "12:00-13:00", "1,2,3,4,5"), origin=date(2024, 1, 1)))
+
+
+def seed(db, capacity):
+    sec = db.sections.insert({"name": "Пошив", "capacity_minutes": capacity}).execute().data[0]["id"]
+    orders = db.orders.insert([
+        {"order_number": "LATE-SHIP", "start_date": "2024-03-04", "shipping_date": "2024-03-20"},
+        {"order_number": "EARLY-SHIP", "start_date": "2024-03-04", "shipping_date": "2024-03-04"},
+    ]).execute().data
+    db.order_operations.insert([
+        {"order_id": o["id"], "section_id": sec, "quantity": 480, "norm_time_per_unit": 1} for o in orders
+    ]).execute()
+    return {o["order_number"]: o["id"] for o in orders}
+
+
+def starts(db):
+    return {r["order_id"]: r["scheduled_start_at"] for r in db.order_operations.find("order_id, scheduled_start_at")}
+
+
+def test_finite_capacity_pushes_overload_to_next_day():
+    db = DatabaseService(backend=SQLiteBackend())
+    ids = seed(db, capacity=480)
+    service = SchedulingService(db)
+
+    service.replan_all(assign_workers=False)
+    assert {s[:10] for s in starts(db).values()} == {"2024-03-04"}
+
+    result = service.replan_all(assign_workers=False, finite=True, rule="edd")
+    planned = starts(db)
+    # Earliest shipping date goes first and gets Monday's capacity
+    assert planned[ids["EARLY-SHIP"]].startswith("2024-03-04T08:00")
+    assert planned[ids["LATE-SHIP"]].startswith("2024-03-05T08:00")
+    # Shipping on Monday is still met (the order ends at 17:00); nothing is late
+    assert result.late == []
+
+    db.sections.update({"capacity_minutes": 240}).neq("id", "").execute()
+    result = service.replan_all(assign_workers=False, finite=True, rule="fifo")
+    late = {row["order_number"] for row in result.late}
+    assert "EARLY-SHIP" in late and "LATE-SHIP" not in late
+
+
+def test_priority_rules():
+    now = MONDAY
+    orders = [
+        Order("a", "A", created_at=now - timedelta(days=3), shipping_date=now + timedelta(days=10)),
+        Order("b", "B", created_at=now - timedelta(days=2), shipping_date=now + timedelta(days=5)),
+        Order("c", "C", created_at=now - timedelta(days=1), shipping_date=now + timedelta(days=9)),
+        Order("d", "D", created_at=now - timedelta(days=4)),
+    ]
+    scheduler = Scheduler([], [], now=now)
+    assert [o.id for o in scheduler.order_sequence(orders, "fifo")] == ["d", "a", "b", "c"]
+    assert [o.id for o in scheduler.order_sequence(orders, "edd")] == ["b", "c", "a", "d"]
+    # C has far more work left per day of slack than B
+    work = {"a": 60, "b": 60, "c": 60 * 24 * 8}
+    assert [o.id for o in scheduler.order_sequence(orders, "cr", work)] == ["c", "b", "a", "d"]
+
+
+def test_month_of_orders_in_seconds():
+    rng = random.Random(1)
+    sections = [{"id": f"s{i}", "name": f"S{i}", "capacity_minutes": 480 * 6} for i in range(8)]
+    workers = [{"id": f"w{i}", "section_id": f"s{i % 8}"} for i in range(60)]
+    orders, operations = [], []
+    for n in range(3000):
+        created = MONDAY + timedelta(minutes=rng.randrange(0, 30 * 24 * 60))
+        orders.append(Order(f"o{n}", f"O-{n}", start=created, created_at=created,
+                            shipping_date=created + timedelta(days=rng.randrange(3, 20))))
+        for k in range(rng.randrange(2, 6)):
+            operations.append(Operation(f"o{n}-{k}", f"o{n}", f"s{rng.randrange(8)}",
+                                        quantity=rng.randrange(5, 50), norm_time_per_unit=1, sort_order=k))
+
+    started = time.perf_counter()
+    scheduler = Scheduler(workers, sections, calendars=calendars(), finite=True, now=MONDAY)
+    plan = scheduler.schedule(orders, operations, rule="edd")
+    elapsed = time.perf_counter() - started
+
+    assert len(plan.operations) == len(operations)
+    assert elapsed < 10
+    # No section day holds more work than its capacity
+    assert max(scheduler.capacity.used.values()) <= 480 * 6 + 1e-6
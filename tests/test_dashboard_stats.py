@@ -0,0 +1,58 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from core.database import DatabaseService, QueryCache, DatabaseError
+from core.local_db import SQLiteBackend
+from modules.dashboard.services import DashboardService
+
+
+class CountingBackend(SQLiteBackend):
+    def __init__(self, rpc=True):
+        super().__init__()
+        self.rpc_enabled = rpc
+        self.queries = []
+
+    def execute(self, query):
+        self.queries.append(query)
+        if query.action == "rpc" and not self.rpc_enabled:
+            raise DatabaseError("function not found")
+        return super().execute(query)
+
+
+def make_service(rpc=True):
+    backend = CountingBackend(rpc=rpc)
+    db = DatabaseService(backend=backend, cache=QueryCache())
+    db.orders.insert([{"order_number": "A-1"}, {"order_number": "A-2"}]).execute()
+    step = db.production_steps.select("id").limit(1).execute().data[0]
+    db.production_steps.update({"status": "in_progress"}).eq("id", step["id"]).execute()
+    backend.queries.clear()
+    return DashboardService(db=db), backend
+
+
+def test_stats_in_one_round_trip():
+    service, backend = make_service()
+    stats = service.get_stats()
+    assert (stats["total_orders"], stats["active_steps"], stats["completed_steps"]) == (2, 1, 0)
+    assert [q.action for q in backend.queries] == ["rpc"]
+
+    # Cached until orders/production_steps change
+    service.get_stats()
+    assert len(backend.queries) == 1
+    service.db.orders.insert({"order_number": "A-3"}).execute()
+    assert service.get_stats()["total_orders"] == 3
+
+
+def test_fallback_uses_head_counts():
+    service, backend = make_service(rpc=False)
+    stats = service.get_stats()
+    assert (stats["total_orders"], stats["active_steps"], stats["completed_steps"]) == (2, 1, 0)
+    counts = [q for q in backend.queries if q.action == "select"]
+    assert len(counts) == 3
+    assert all(q.head and q.count == "exact" for q in counts)
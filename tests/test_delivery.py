@@ -0,0 +1,71 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from datetime import date
+
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.analytics.services import AnalyticsService
+
+
+def add_order(db, number, shipping_date, ends):
+    """Order created 2024-03-01 with one operation per entry of `ends` (None = not done)."""
+    order = db.orders.insert({
+        "order_number": number, "shipping_date": shipping_date, "created_at": "2024-03-01T08:00:00",
+    }).execute().data[0]["id"]
+    ops = db.order_operations.insert([{"order_id": order} for _ in ends]).execute().data
+    for op, end in zip(ops, ends):
+        if end:
+            db.order_operations.update({"status": "done", "actual_end_at": end}).eq("id", op["id"]).execute()
+    return order, [op["id"] for op in ops]
+
+
+def test_order_completion_follows_last_operation():
+    db = DatabaseService(backend=SQLiteBackend())
+    order, ops = add_order(db, "A", "2024-03-10", ["2024-03-05T10:00:00", None])
+    assert db.orders.get(order, "completed_at")["completed_at"] is None
+
+    db.order_operations.update({"status": "done", "actual_end_at": "2024-03-08T12:00:00"}).eq("id", ops[1]).execute()
+    assert db.orders.get(order, "completed_at")["completed_at"] == "2024-03-08T12:00:00"
+
+    # Reopening an operation (or adding one) makes the order open again
+    db.order_operations.update({"status": "in_progress"}).eq("id", ops[0]).execute()
+    assert db.orders.get(order, "completed_at")["completed_at"] is None
+
+
+def test_delivery_kpis_from_order_facts():
+    db = DatabaseService(backend=SQLiteBackend())
+    add_order(db, "on-time", "2024-03-10", ["2024-03-05T10:00:00", "2024-03-09T10:00:00"])
+    add_order(db, "late", "2024-03-05", ["2024-03-09T08:00:00"])
+    add_order(db, "no-date", None, ["2024-03-03T08:00:00"])
+    add_order(db, "open", "2024-03-02", ["2024-03-04T08:00:00", None])
+    # No operations: never completes, so it is not counted as a delay
+    add_order(db, "empty", "2024-03-02", [])
+
+    service = AnalyticsService(db=db)
+    service.refresh_facts()
+    kpis = service.calculate_kpis(date(2024, 3, 1), date(2024, 3, 31))
+    assert (kpis["total"], kpis["completed"], kpis["due"], kpis["late"], kpis["delays"]) == (5, 3, 2, 1, 1)
+    assert kpis["otd"] == 50.0
+    # On time: 1 day early; late: 4 days late
+    assert kpis["avg_lateness_days"] == 1.5 and kpis["avg_tardiness_days"] == 4.0
+    # Lead times 2, 8 and 8 days from 2024-03-01 08:00
+    assert kpis["lead_time_p50_days"] == 8.0 and kpis["lead_time_mean_days"] == 6.0
+
+    # Finishing the open order late is folded in by the next incremental refresh
+    open_op = db.order_operations.find("id", {"status": "not_started"})[0]["id"]
+    db.order_operations.update({"status": "done", "actual_end_at": "2024-03-12T08:00:00"}).eq("id", open_op).execute()
+    service.refresh_facts()
+    kpis = service.calculate_kpis(date(2024, 3, 1), date(2024, 3, 31))
+    assert (kpis["completed"], kpis["late"], kpis["otd"], kpis["delays"]) == (4, 2, 33.3, 0)
+
+    trend = service.get_delivery_trend(date(2024, 3, 1), date(2024, 3, 31))
+    assert trend[["completed", "due"]].sum().tolist() == [4, 3]
+    assert service.calculate_kpis(date(2024, 4, 1))["otd"] is None
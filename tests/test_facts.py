@@ -0,0 +1,110 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+
+from core.database import DatabaseService
+from core.instrumentation import QueryMonitor
+from core.local_db import SQLiteBackend
+from modules.analytics.facts import FACTS_TABLE, LOCK, FactStore, aggregate, contributions
+from modules.analytics.services import AnalyticsService
+
+
+def make_service():
+    monitor = QueryMonitor(slow_sink="off")
+    db = DatabaseService(backend=SQLiteBackend(), monitor=monitor)
+    sec = db.sections.insert({"name": "Пошив"}).execute().data[0]["id"]
+    order = db.orders.insert({"order_number": "F-1"}).execute().data[0]["id"]
+    ops = db.order_operations.insert([
+        {"order_id": order, "section_id": sec, "assigned_worker_id": "w1", "quantity": 10,
+         "norm_time_per_unit": 6, "scheduled_start_at": f"2024-03-0{d}T09:00:00"}
+        for d in (4, 4, 5)
+    ]).execute().data
+    service = AnalyticsService(db=db)
+    # No re-read window, so an unchanged refresh reads nothing (see test_late_commits_are_not_skipped)
+    service.facts.overlap = timedelta(0)
+    return service, monitor, sec, order, [o["id"] for o in ops]
+
+
+def full_rebuild(db):
+    ops = db.order_operations.fetch_all("*")
+    steps = db.production_steps.fetch_all("*")
+    orders = db.orders.fetch_all("*")
+    facts = pd.DataFrame(aggregate(contributions(ops, steps, orders)))
+    return facts.set_index("key").sort_index()
+
+
+def stored(db):
+    rows = db.table(FACTS_TABLE).fetch_all("*")
+    return pd.DataFrame(rows).drop(columns=["id"]).set_index("key").sort_index()
+
+
+def test_incremental_refresh_matches_full_rebuild():
+    service, monitor, sec, order, ops = make_service()
+    db = service.db
+    assert service.refresh_facts().changed > 0
+
+    # Nothing changed: lock, watermarks, the four change queries, unlock
+    monitor.reset()
+    assert service.refresh_facts().changed == 0
+    assert sum(v["calls"] for v in monitor.by_shape.values()) == 7
+
+    # Move one operation to another day, finish another, complete a step, delete the order later
+    db.order_operations.update({"scheduled_start_at": "2024-03-06T09:00:00"}).eq("id", ops[0]).execute()
+    db.order_operations.update({
+        "status": "done", "completed_quantity": 10,
+        "actual_start_at": "2024-03-04T09:00:00", "actual_end_at": "2024-03-04T10:30:00",
+    }).eq("id", ops[1]).execute()
+    step = db.production_steps.find("id", {"order_id": order, "step_name": "cutting"})[0]["id"]
+    db.production_steps.update({
+        "status": "done", "assigned_worker_id": "p1",
+        "started_at": "2024-03-04T08:00:00", "completed_at": "2024-03-04T12:00:00",
+    }).eq("id", step).execute()
+
+    result = service.refresh_facts()
+    assert result.changed == 3
+    pd.testing.assert_frame_equal(stored(db)[full_rebuild(db).columns], full_rebuild(db), check_dtype=False)
+
+    matrix = service.get_section_utilization(date(2024, 3, 4), num_days=3)
+    assert list(matrix["scheduled_minutes"]) == [60, 60, 60]
+    bottlenecks = service.get_bottlenecks(date(2024, 3, 1), date(2024, 3, 31))
+    assert bottlenecks[["Step", "Avg Duration (Hours)", "P90 (Hours)"]].to_dict("records") == [
+        {"Step": "cutting", "Avg Duration (Hours)": 4.0, "P90 (Hours)": 4.0}
+    ]
+    assert service.get_worker_performance()["Completed Tasks"].tolist() == [1]
+    assert service.get_bottlenecks(date(2024, 4, 1)).empty
+
+    # Deleting the order cascades to its operations and steps; their facts go too
+    db.orders.delete().eq("id", order).execute()
+    service.refresh_facts()
+    assert db.table(FACTS_TABLE).fetch_all("id") == []
+    assert service.get_section_utilization(date(2024, 3, 4), num_days=3)["scheduled_minutes"].sum() == 0
+
+
+def test_late_commits_are_not_skipped():
+    service, monitor, sec, order, ops = make_service()
+    db = service.db
+    store = FactStore(db, overlap=timedelta(minutes=1))
+    store.refresh()
+    mark = db.table("analytics_watermarks").find("value", {"name": "facts:order_operations"})[0]["value"]
+
+    # A transaction that committed after the refresh read, stamped before the watermark
+    earlier = (datetime.fromisoformat(mark) - timedelta(seconds=5)).isoformat()
+    db.order_operations.update({"quantity": 20, "updated_at": earlier}).eq("id", ops[2]).execute()
+    assert store.refresh().changed >= 1
+    assert service.get_section_utilization(date(2024, 3, 5), num_days=1)["scheduled_minutes"].tolist() == [120]
+    pd.testing.assert_frame_equal(stored(db)[full_rebuild(db).columns], full_rebuild(db), check_dtype=False)
+
+    # While another session holds the lease, a refresh skips instead of writing
+    lease = (datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat()
+    db.table("analytics_watermarks").update({"value": lease}).eq("name", LOCK).execute()
+    assert store.refresh().skipped
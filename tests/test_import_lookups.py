@@ -0,0 +1,104 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import pandas as pd
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.operations.services import OperationsService, KEY_LOOKUP_CHUNK
+from modules.workers.services import WorkerService
+
+
+class RecordingBackend(SQLiteBackend):
+    def __init__(self):
+        super().__init__()
+        self.selects = []
+        self.writes = []
+
+    def execute(self, query):
+        result = super().execute(query)
+        if query.action == "select":
+            self.selects.append((query, len(result.data or [])))
+        else:
+            self.writes.append(query)
+        return result
+
+
+def test_operation_keys_looked_up_per_file_not_per_catalog():
+    backend = RecordingBackend()
+    service = OperationsService(db=DatabaseService(backend=backend))
+    service.db.operations_catalog.insert([{"operation_key": f"K-{i}"} for i in range(1000)]).execute()
+    backend.selects.clear()
+
+    keys = [f"K-{i}" for i in range(995, 995 + KEY_LOOKUP_CHUNK + 10)]
+    df = pd.DataFrame({"Key": keys})
+    result = service.import_operations(df, {"operation_key": "Key"})
+
+    assert (result.success, result.skipped) == (len(keys) - 5, 5)
+    lookups = [(q, rows) for q, rows in backend.selects if q.table == "operations_catalog"]
+    assert len(lookups) == 2
+    assert all(q.filters[0][:2] == ("operation_key", "in") for q, _ in lookups)
+    assert sum(rows for _, rows in lookups) == 5
+
+
+def test_operation_keys_normalized_for_lookup_and_insert():
+    service = OperationsService(db=DatabaseService(backend=SQLiteBackend()))
+    service.db.operations_catalog.insert({"operation_key": "A"}).execute()
+
+    df = pd.DataFrame({"Key": [" A ", "B", " B", "B ", "  ", None]})
+    assert service.analyze_import([df], {"operation_key": "Key"})["duplicates"] == 1
+    result = service.import_operations(df, {"operation_key": "Key"})
+
+    # " B" and "B " are the same key as "B": the unique constraint rejects them
+    assert (result.success, result.skipped, result.failed) == (1, 3, 2)
+    keys = sorted(r["operation_key"] for r in service.db.operations_catalog.find("operation_key"))
+    assert keys == ["A", "B"]
+
+    result = service.import_operations(pd.DataFrame({"Key": [" C", "C "]}), {"operation_key": "Key"},
+                                       update_existing=True)
+    assert (result.success, result.skipped) == (1, 1)
+    assert service.db.operations_catalog.count({"operation_key": "C"}) == 1
+
+
+def test_worker_names_matched_case_insensitively():
+    backend = RecordingBackend()
+    service = WorkerService(db=DatabaseService(backend=backend))
+    service.db.workers.insert([
+        {"full_name": "Іваненко Олена"}, {"full_name": "Smith, John"},
+        {"full_name": "a_b"}, {"full_name": "Back\\slash"},
+    ] + [{"full_name": f"Worker {i}"} for i in range(300)]).execute()
+    backend.selects.clear()
+
+    name_map = service.find_workers_by_name(["іваненко олена", " SMITH, JOHN ", "aXb", "back\\SLASH", None, "Новий"])
+    assert set(name_map) == {"іваненко олена", "smith, john", "back\\slash"}
+    assert len(backend.selects) == 1 and backend.selects[0][1] == 3
+
+    df = pd.DataFrame({"ПІБ": ["ІВАНЕНКО ОЛЕНА", "Новий Працівник"], "Посада": ["Швачка", "Крійник"]})
+    s, e = service.import_workers(df, {"full_name": "ПІБ", "position": "Посада"})
+    assert (s, e) == (2, 0)
+    # Existing worker updated in place, the unknown one inserted
+    updated = service.db.workers.select("id, position").eq("id", name_map["іваненко олена"]).single().execute().data
+    assert updated["position"] == "Швачка"
+    assert service.db.workers.count() == 305
+
+
+def test_worker_import_writes_in_batches():
+    backend = RecordingBackend()
+    service = WorkerService(db=DatabaseService(backend=backend))
+    existing = service.db.workers.insert({"full_name": "Old", "position": "-"}).execute().data[0]["id"]
+    backend.writes.clear()
+
+    df = pd.DataFrame({"ПІБ": ["old", "New 1", "New 2", "OLD"], "Посада": ["A", "B", "C", "D"]})
+    s, e = service.import_workers(df, {"full_name": "ПІБ", "position": "Посада"})
+
+    assert (s, e) == (4, 0)
+    # One insert for the new workers, one upsert for the existing one (last row wins)
+    assert sorted(q.action for q in backend.writes) == ["insert", "upsert"]
+    assert service.db.workers.get(existing, "position")["position"] == "D"
+    assert service.db.workers.count() == 3
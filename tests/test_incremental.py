@@ -0,0 +1,133 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from datetime import datetime
+
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.scheduling.engine import Operation, Scheduler, parse_ts
+from modules.scheduling.incremental import propagate
+from modules.scheduling.services import SchedulingService
+
+MONDAY = datetime(2024, 3, 4)
+
+
+def at(hour, minute=0):
+    return MONDAY.replace(hour=hour, minute=minute)
+
+
+def op(op_id, order_id, worker, start, end, sort_order=0, status="not_started", preds=None, minutes=60):
+    return Operation(op_id, order_id, quantity=minutes, norm_time_per_unit=1, sort_order=sort_order,
+                     status=status, worker_id=worker, start=start, end=end, predecessors=preds)
+
+
+def test_shift_reaches_successors_and_worker_timeline_only():
+    ops = [
+        # Order A: a1 -> a2 (different workers)
+        op("a1", "A", "w1", at(8), at(9), sort_order=1),
+        op("a2", "A", "w2", at(9), at(10), sort_order=2),
+        # w1's next job in another order, and an unrelated one of w3
+        op("b1", "B", "w1", at(9), at(10), preds=[]),
+        op("c1", "C", "w3", at(9), at(10), preds=[]),
+        # Already running on w2: never moved
+        op("d1", "D", "w2", at(10), at(11), status="in_progress", preds=[]),
+    ]
+    ops[0].quantity = 90    # a1 now takes 90 minutes
+    moved = propagate(Scheduler([], [], now=MONDAY), ops, "a1")
+
+    by_id = {o.id: o for o in ops}
+    assert set(moved) == {"a1", "a2", "b1"}
+    assert by_id["a1"].end == at(9, 30)
+    assert (by_id["a2"].start, by_id["a2"].end) == (at(9, 30), at(10, 30))
+    assert by_id["b1"].start == at(9, 30)
+    assert moved["a2"] == (at(9), at(10))
+    assert by_id["c1"].start == at(9) and by_id["d1"].start == at(10)
+
+
+def test_reschedule_writes_only_moved_rows():
+    db = DatabaseService(backend=SQLiteBackend())
+    sec = db.sections.insert({"name": "Пошив"}).execute().data[0]["id"]
+    worker = db.workers.insert({"full_name": "Sewer", "section_id": sec}).execute().data[0]["id"]
+    order = db.orders.insert({"order_number": "I-1", "start_date": "2024-03-04"}).execute().data[0]
+    db.order_operations.insert([
+        {"order_id": order["id"], "section_id": sec, "operation_name": name, "quantity": 60,
+         "norm_time_per_unit": 1, "sort_order": n}
+        for n, name in enumerate(["cut", "sew", "pack"], start=1)
+    ]).execute()
+    service = SchedulingService(db)
+    service.replan_all()
+    rows = {r["operation_name"]: r for r in db.order_operations.find("*")}
+    assert parse_ts(rows["pack"]["scheduled_start_at"]) == at(10)
+
+    # Sewing finished at 11:30 instead of 10:00
+    db.order_operations.update({"status": "done"}).eq("id", rows["cut"]["id"]).execute()
+    db.order_operations.update({"status": "done", "completed_quantity": 60}).eq("id", rows["sew"]["id"]).execute()
+    result = service.reschedule_operation(rows["sew"]["id"], now=at(11, 30))
+
+    assert result.ok
+    assert [r["id"] for r in result.diff] == [rows["sew"]["id"], rows["pack"]["id"]]
+    pack = result.diff[1]
+    # 11:30-12:00, lunch, then the other 30 minutes
+    assert (pack["new_start"], pack["new_end"], pack["shift_minutes"]) == (at(11, 30), at(13, 30), 150)
+    after = {r["operation_name"]: r for r in db.order_operations.find("*")}
+    assert parse_ts(after["pack"]["scheduled_end_at"]) == at(13, 30)
+    assert after["cut"]["scheduled_start_at"] == rows["cut"]["scheduled_start_at"]
+    assert after["pack"]["assigned_worker_id"] == worker
+
+
+def test_batch_reschedule_reads_only_reachable_operations():
+    db = DatabaseService(backend=SQLiteBackend())
+    sec = db.sections.insert({"name": "Пошив"}).execute().data[0]["id"]
+    w1, w2 = (db.workers.insert({"full_name": n, "section_id": sec}).execute().data[0]["id"] for n in ("A", "B"))
+    a, b = (db.orders.insert({"order_number": n, "start_date": "2024-03-04"}).execute().data[0]["id"]
+            for n in ("B-1", "B-2"))
+    db.order_operations.insert([
+        {"order_id": order, "section_id": sec, "operation_name": name, "quantity": 60, "norm_time_per_unit": 1,
+         "sort_order": n, "assigned_worker_id": worker,
+         "scheduled_start_at": at(8 + n).isoformat(), "scheduled_end_at": at(9 + n).isoformat()}
+        for order, worker in ((a, w1), (b, w2))
+        for n, name in enumerate(["cut", "sew"])
+    ]).execute()
+    ops = {(r["order_id"], r["operation_name"]): r["id"] for r in db.order_operations.find("*")}
+    db.order_operations.update({"quantity": 90}).eq("id", ops[(a, "cut")]).execute()
+    db.order_operations.update({"quantity": 120}).eq("id", ops[(a, "sew")]).execute()
+
+    service = SchedulingService(db)
+    reads = []
+    fetch_all = db.order_operations.fetch_all
+    db.order_operations.fetch_all = lambda columns="*", filters=None, **kw: \
+        reads.append(filters) or fetch_all(columns, filters, **kw)
+    result = service.reschedule_operations([ops[(a, "cut")], ops[(a, "sew")]], now=MONDAY)
+
+    assert result.ok
+    assert {r["id"] for r in result.diff} == {ops[(a, "cut")], ops[(a, "sew")]}
+    assert all(filters for filters in reads)
+    assert not any(b in (filters.get("order_id") or ()) for filters in reads)
+    after = {r["id"]: r for r in db.order_operations.find("*")}
+    assert parse_ts(after[ops[(a, "sew")]]["scheduled_start_at"]) == at(9, 30)
+    assert parse_ts(after[ops[(b, "cut")]]["scheduled_start_at"]) == at(8)
+
+
+def test_status_change_reschedules_only_when_timing_changes():
+    from modules.orders.services import OrderService
+
+    db = DatabaseService(backend=SQLiteBackend())
+    order = db.orders.insert({"order_number": "S-1"}).execute().data[0]["id"]
+    op_id = db.order_operations.insert({"order_id": order, "status": "in_progress"}).execute().data[0]["id"]
+    service = OrderService(db)
+    service.reschedule_operation = MagicMock()
+
+    service.update_operation_status(op_id, "paused")
+    service.update_operation_status(op_id, "paused")
+    service.reschedule_operation.assert_not_called()
+    service.update_operation_status(op_id, "done", reschedule=False)
+    service.reschedule_operation.assert_not_called()
+    service.update_operation_status(op_id, "in_progress")
+    service.reschedule_operation.assert_called_once_with(op_id)
@@ -0,0 +1,89 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import io
+import pandas as pd
+from openpyxl import Workbook
+from core import ingest
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.operations.services import OperationsService
+from modules.orders.impex import ImpexService
+
+
+def xlsx_file(rows, name="ops.xlsx"):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Ops"
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.name = name
+    buf.seek(0)
+    return buf
+
+
+def test_xlsx_batches_match_read_excel():
+    rows = [["Key", "Norm", "Key"]] + [[f"K-{i}", i * 0.5, f"dup-{i}"] for i in range(7)]
+    rows.insert(4, [None, None, None])   # blank line inside the data
+    f = xlsx_file(rows)
+
+    assert ingest.sheet_names(f) == ["Ops"]
+    batches = list(ingest.iter_batches(f, "Ops", rows=3))
+    assert [len(b) for b in batches] == [3, 3, 1]
+    streamed = pd.concat(batches)
+
+    expected = pd.read_excel(ingest._rewind(f), sheet_name="Ops").dropna(how="all")
+    assert list(streamed.columns) == list(expected.columns) == ["Key", "Norm", "Key.1"]
+    assert list(streamed.index) == list(expected.index)
+    assert streamed["Norm"].tolist() == expected["Norm"].tolist()
+    assert ingest.read_preview(f, "Ops", rows=2)["Key"].tolist() == ["K-0", "K-1"]
+
+
+def test_csv_chunks_with_semicolons():
+    f = io.BytesIO("\ufeffНомер;Виріб;К-сть\n".encode("utf-8") + "".join(f"N-{i};Jacket;{i}\n" for i in range(5)).encode("utf-8"))
+    f.name = "orders.csv"
+    batches = list(ingest.iter_batches(f, rows=2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert list(batches[0].columns) == ["Номер", "Виріб", "К-сть"]
+    assert list(batches[2].index) == [4]
+
+
+def test_streamed_operations_import_with_progress():
+    service = OperationsService(db=DatabaseService(backend=SQLiteBackend()))
+    service.db.operations_catalog.insert({"operation_key": "K-1", "norm_time": 1}).execute()
+    rows = [["Ключ", "Норма"]] + [[f"K-{i}", i] for i in range(12)] + [[None, "  "]]
+    f = xlsx_file(rows)
+    mapping = {"operation_key": "Ключ", "norm_time": "Норма"}
+
+    stats = service.analyze_import(ingest.iter_batches(f, rows=5), mapping)
+    assert stats == {"total": 13, "empty": 1, "new": 11, "duplicates": 1}
+
+    calls = []
+    result = service.import_operations_from_batches(
+        ingest.iter_batches(f, rows=5), mapping,
+        progress=lambda done, total: calls.append(done), total=stats["total"],
+    )
+    assert (result.success, result.skipped, result.failed) == (11, 1, 0)
+    assert calls == [5, 10, 13]
+    assert service.count_operations() == 12
+
+
+def test_streamed_orders_keep_excel_row_numbers():
+    impex = ImpexService(db=DatabaseService(backend=SQLiteBackend()))
+    rows = [["Номер", "Виріб"]] + [[f"N-{i}", "Jacket"] for i in range(6)]
+    rows[5][1] = None    # Excel row 6
+    result = impex.import_orders_from_batches(
+        ingest.iter_batches(xlsx_file(rows, "orders.xlsx"), rows=4),
+        {"order_number": "Номер", "product_name": "Виріб"},
+    )
+    assert result.success == 5
+    assert [e["row"] for e in result.errors] == [6]
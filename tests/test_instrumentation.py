@@ -0,0 +1,85 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import json
+from core.database import DatabaseService, QueryCache
+from core.local_db import SQLiteBackend
+from core.instrumentation import QueryMonitor, filter_shape
+
+
+def make_db(monitor, cache=None):
+    db = DatabaseService(backend=SQLiteBackend(), cache=cache, monitor=monitor)
+    db.sections.insert([{"name": "Cutting"}, {"name": "Sewing"}]).execute()
+    return db
+
+
+def test_records_shape_rows_and_bytes(tmp_path):
+    monitor = QueryMonitor(slow_ms=10_000, slow_log_path=str(tmp_path / "slow.jsonl"))
+    db = make_db(monitor)
+    q = db.sections.select("id, name").eq("name", "Cutting").or_("name.eq.A,capacity_minutes.gt.5") \
+        .order("name", desc=True).limit(5)
+    assert filter_shape(q.query) == "eq:name,or(eq:name,gt:capacity_minutes)|order:name desc|limit"
+    q.execute()
+
+    rec = monitor.recent[-1]
+    assert (rec.table, rec.action, rec.rows) == ("sections", "select", 1)
+    assert rec.payload_bytes > 0 and rec.duration_ms >= 0
+    assert ("sections", "insert", "") in monitor.by_shape
+
+
+def test_per_rerun_aggregation_and_cache_flag(tmp_path):
+    monitor = QueryMonitor(slow_ms=10_000, slow_log_path=str(tmp_path / "slow.jsonl"))
+    db = make_db(monitor, cache=QueryCache())
+
+    monitor.begin_rerun()
+    monitor.set_page("dashboard")
+    db.sections.select("*").execute()
+    db.sections.select("*").execute()
+    assert monitor.current_rerun().queries == 2
+    assert monitor.current_rerun().cached == 1
+
+    monitor.begin_rerun()
+    assert monitor.reruns[-1]["page"] == "dashboard"
+    assert monitor.page_report()[0]["queries"] == 2
+
+
+def test_slow_queries_go_to_file(tmp_path):
+    log = tmp_path / "slow.jsonl"
+    monitor = QueryMonitor(slow_ms=0, slow_log_path=str(log))
+    db = make_db(monitor)
+    db.sections.select("name").execute()
+    lines = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    assert lines[-1]["table"] == "sections"
+    assert len(monitor.slow) == len(lines)
+
+
+def test_slow_queries_go_to_system_logs():
+    backend = SQLiteBackend()
+    monitor = QueryMonitor(slow_ms=0, slow_sink="system_logs", backend=backend)
+    db = DatabaseService(backend=backend, monitor=monitor)
+    db.sections.select("name").execute()
+    logs = db.table("system_logs").select("action, entity_table, details").execute().data
+    assert logs[0]["action"] == "slow_query"
+    assert logs[0]["details"]["table"] == "sections"
+
+
+def test_idle_sessions_are_dropped(tmp_path, monkeypatch):
+    monitor = QueryMonitor(slow_ms=10_000, slow_log_path=str(tmp_path / "slow.jsonl"), idle_seconds=60)
+    db = make_db(monitor)
+    monkeypatch.setattr("core.instrumentation._context_key", lambda: "gone")
+    monitor.begin_rerun(page="orders")
+    db.sections.select("*").execute()
+    monitor._current["gone"].last_seen -= 120
+
+    monkeypatch.setattr("core.instrumentation._context_key", lambda: "live")
+    monitor.begin_rerun(page="dashboard")
+    assert set(monitor._current) == {"live"}
+    # The dropped session's run still counts
+    assert monitor.reruns[-1]["page"] == "orders"
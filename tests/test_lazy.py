@@ -0,0 +1,70 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import pytest
+
+from core.lazy import DataScope
+from core.services import SESSION, ServiceRegistry
+from modules.dashboard import view as dashboard_view
+
+
+def test_loaders_run_once_and_only_when_asked():
+    calls = []
+
+    def loader(name, value):
+        def load(*deps):
+            calls.append(name)
+            return value + sum(deps)
+        return load
+
+    data = DataScope()
+    data.provide("a", loader("a", 1))
+    data.provide("b", loader("b", 10), "a")
+    data.provide("c", loader("c", 100), "a")
+    data.provide("unused", loader("unused", 0))
+
+    assert data.get("b") == 11 and data["c"] == 101 and data.get("b") == 11
+    assert calls == ["a", "b", "c"] and data.loaded == ["a", "b", "c"]
+
+    # Dropping a value drops its dependents too
+    data.invalidate("a")
+    assert not data.is_loaded("b") and not data.is_loaded("c")
+    data.get("c")
+    assert calls[-2:] == ["a", "c"]
+
+    data.provide("x", loader("x", 0), "y")
+    data.provide("y", loader("y", 0), "x")
+    with pytest.raises(RuntimeError):
+        data.get("x")
+
+
+def test_scope_is_per_session_and_cleared_on_rerun():
+    registry = ServiceRegistry(session_state={})
+    registry.register(DataScope, scope=SESSION)
+    data = registry.get(DataScope)
+    data.provide("n", lambda: object())
+    first = data.get("n")
+    assert data.get("n") is first
+    registry.begin_rerun()
+    assert not data.loaded and data.get("n") is not first
+
+
+def test_dashboard_sections_do_not_load_the_plan():
+    service = MagicMock()
+    data = DataScope()
+    dashboard_view.declare_data(data, service)
+
+    data.get("section_metrics")
+    assert data.loaded == ["facts", "section_week", "section_metrics"]
+    service.get_planning_data.assert_not_called()
+    service.refresh_facts.assert_called_once()
+
+    data.get("worker_load")
+    service.get_planning_data.assert_called_once()
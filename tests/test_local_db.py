@@ -0,0 +1,109 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import pytest
+from core.database import DatabaseService, DatabaseError
+from core.local_db import SQLiteBackend, DEFAULT_STEPS
+
+
+@pytest.fixture
+def db():
+    return DatabaseService(backend=SQLiteBackend())
+
+
+@pytest.fixture
+def seeded(db):
+    sections = db.sections.insert([
+        {"name": "Cutting", "capacity_minutes": 480},
+        {"name": "Sewing", "capacity_minutes": 960},
+    ]).execute().data
+    db.workers.insert([
+        {"full_name": "Anna", "section_id": sections[0]["id"]},
+        {"full_name": "Borys", "operation_types": ["Cutting", "Sewing"]},
+        {"full_name": "Vira", "operation_types": ["Sewing"]},
+    ]).execute()
+    order = db.orders.insert({"order_number": "A-1", "product_name": "Jacket", "quantity": 10}).execute().data[0]
+    db.order_operations.insert([
+        {"order_id": order["id"], "section_id": sections[i % 2]["id"], "operation_name": f"Op {i}",
+         "quantity": 10, "norm_time_per_unit": 1.5, "sort_order": i}
+        for i in range(4)
+    ]).execute()
+    return db, order, sections
+
+
+def test_filters_order_limit(seeded):
+    db, order, sections = seeded
+
+    rows = db.order_operations.select("sort_order").eq("order_id", order["id"]) \
+        .order("sort_order", desc=True).limit(2).execute().data
+    assert [r["sort_order"] for r in rows] == [3, 2]
+
+    rows = db.order_operations.select("sort_order").in_("sort_order", [0, 2]).order("sort_order").execute().data
+    assert [r["sort_order"] for r in rows] == [0, 2]
+
+    rows = db.order_operations.select("sort_order").order("sort_order").range(1, 2).execute().data
+    assert [r["sort_order"] for r in rows] == [1, 2]
+
+    res = db.order_operations.select("*", count="exact").gte("sort_order", 1).limit(1).execute()
+    assert res.count == 3 and len(res.data) == 1
+
+
+def test_or_and_array_contains(seeded):
+    db, _, sections = seeded
+    or_filter = f"section_id.eq.{sections[1]['id']},operation_types.cs.{{Sewing}}"
+    names = {w["full_name"] for w in db.workers.select("full_name").or_(or_filter).execute().data}
+    assert names == {"Borys", "Vira"}
+
+    names = {w["full_name"] for w in db.workers.select("full_name").ilike("full_name", "%OR%").execute().data}
+    assert names == {"Borys"}
+
+
+def test_embeds_and_generated_column(seeded):
+    db, order, _ = seeded
+    ops = db.order_operations.select("*, sections(name), orders(order_number)") \
+        .eq("order_id", order["id"]).order("sort_order").execute().data
+    assert ops[0]["sections"] == {"name": "Cutting"}
+    assert ops[1]["orders"] == {"order_number": "A-1"}
+    assert ops[0]["total_estimated_time"] == 15
+
+    nested = db.orders.select("num:order_number, order_operations(sort_order)").execute().data
+    assert nested[0]["num"] == "A-1"
+    assert len(nested[0]["order_operations"]) == 4
+
+
+def test_writes_triggers_and_cascade(seeded):
+    db, order, _ = seeded
+    # Default steps trigger
+    assert db.production_steps.count({"order_id": order["id"]}) == len(DEFAULT_STEPS)
+
+    res = db.orders.upsert([
+        {"order_number": "A-1", "product_name": "Coat"},
+        {"order_number": "A-2", "product_name": "Shirt"},
+    ], on_conflict="order_number").execute()
+    assert len(res.data) == 2
+    assert db.orders.get(order["id"])["product_name"] == "Coat"
+    assert db.orders.get(order["id"])["quantity"] == 10
+    assert db.production_steps.count() == 2 * len(DEFAULT_STEPS)
+
+    updated = db.order_operations.update({"status": "done"}).eq("sort_order", 0).execute().data
+    assert len(updated) == 1 and updated[0]["status"] == "done"
+
+    db.orders.delete().eq("id", order["id"]).execute()
+    assert db.order_operations.count() == 0
+
+
+def test_postgrest_errors(seeded):
+    db, _, _ = seeded
+    with pytest.raises(DatabaseError):
+        db.orders.select("missing_column").execute()
+    with pytest.raises(DatabaseError):
+        db.order_operations.select("*").single().execute()
+    with pytest.raises(DatabaseError):
+        db.orders.insert({"order_number": "A-1", "product_name": "Dup"}).execute()
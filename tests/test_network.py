@@ -0,0 +1,94 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from datetime import datetime
+
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.analytics.services import AnalyticsService
+from modules.scheduling.engine import Operation, Order, Scheduler, parse_ts
+from modules.scheduling.network import critical_path, predecessors, topological
+from modules.scheduling.services import SchedulingService
+
+
+def op(op_id, sort_order, minutes, preds=None):
+    return Operation(op_id, "o", quantity=minutes, norm_time_per_unit=1, sort_order=sort_order, predecessors=preds)
+
+
+def test_links_default_to_sort_order_chain():
+    ops = [op("b", 2, 10), op("a", 1, 10), op("c", 3, 10, preds=[])]
+    assert predecessors(ops) == {"a": [], "b": ["a"], "c": []}
+
+
+def test_critical_path_and_slack():
+    # cut_front (120) and cut_back (60) in parallel, then sew (90), then pack (30)
+    ops = [
+        op("cut_front", 1, 120, preds=[]),
+        op("cut_back", 2, 60, preds=[]),
+        op("sew", 3, 90, preds=["cut_front", "cut_back"]),
+        op("pack", 4, 30),
+    ]
+    links = predecessors(ops)
+    ordered, cyclic = topological(ops, links)
+    assert cyclic == []
+    assert [o.id for o in ordered] == ["cut_front", "cut_back", "sew", "pack"]
+
+    timings = critical_path(ordered, links, {o.id: o.minutes for o in ops})
+    assert timings["sew"].es == 120 and timings["pack"].ef == 240
+    assert timings["cut_back"].slack == 60
+    assert [o.id for o in ordered if timings[o.id].critical] == ["cut_front", "sew", "pack"]
+
+
+def test_cycles_are_broken_not_fatal():
+    ops = [op("a", 1, 10, preds=["b"]), op("b", 2, 10, preds=["a"]), op("c", 3, 10, preds=[])]
+    ordered, cyclic = topological(ops, predecessors(ops))
+    assert [o.id for o in ordered] == ["c", "a", "b"]
+    assert cyclic == ["a", "b"]
+
+    plan = Scheduler([], [], now=datetime(2024, 3, 4)).schedule([Order("o", "O")], ops)
+    assert plan.cycles == {"o": ["a", "b"]}
+    assert len(plan.operations) == 3
+
+
+def test_parallel_operations_shorten_lead_time():
+    db = DatabaseService(backend=SQLiteBackend())
+    cut, sew = db.sections.insert([{"name": "Крій"}, {"name": "Пошив"}]).execute().data
+    db.workers.insert([
+        {"full_name": "Cutter 1", "section_id": cut["id"]},
+        {"full_name": "Cutter 2", "section_id": cut["id"]},
+        {"full_name": "Sewer", "section_id": sew["id"]},
+    ]).execute()
+    order = db.orders.insert({"order_number": "P-1", "start_date": "2024-03-04"}).execute().data[0]
+    front, back = db.order_operations.insert([
+        {"order_id": order["id"], "section_id": cut["id"], "operation_name": "front",
+         "quantity": 120, "norm_time_per_unit": 1, "sort_order": 1, "predecessor_ids": []},
+        {"order_id": order["id"], "section_id": cut["id"], "operation_name": "back",
+         "quantity": 60, "norm_time_per_unit": 1, "sort_order": 2, "predecessor_ids": []},
+    ]).execute().data
+    db.order_operations.insert({
+        "order_id": order["id"], "section_id": sew["id"], "operation_name": "sew",
+        "quantity": 90, "norm_time_per_unit": 1, "sort_order": 3,
+        "predecessor_ids": [front["id"], back["id"]],
+    }).execute()
+
+    result = SchedulingService(db).replan_all()
+    rows = {r["operation_name"]: r for r in db.order_operations.find("*")}
+    assert parse_ts(rows["front"]["scheduled_start_at"]) == datetime(2024, 3, 4, 8)
+    assert parse_ts(rows["back"]["scheduled_start_at"]) == datetime(2024, 3, 4, 8)
+    assert rows["front"]["assigned_worker_id"] != rows["back"]["assigned_worker_id"]
+    # Sewing waits for the longer cut only: 08:00 + 120 min, then 90 min (no break before 12:00)
+    assert parse_ts(rows["sew"]["scheduled_start_at"]) == datetime(2024, 3, 4, 10)
+    assert result.plan.order_end[order["id"]] == datetime(2024, 3, 4, 11, 30)
+    assert result.plan.network[back["id"]].slack == 60
+
+    db.order_operations.update({"planned_date": "2024-03-04"}).eq("order_id", order["id"]).execute()
+    plan = AnalyticsService(db=db).get_planning_data().set_index("operation_name")
+    assert plan.loc["sew", "start_time"] == datetime(2024, 3, 4, 11)
+    assert list(plan.loc[["front", "back", "sew"], "critical"]) == [True, False, True]
@@ -0,0 +1,79 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import pytest
+from core.database import DatabaseService, QueryCache
+from core.local_db import SQLiteBackend
+from modules.operations.services import OperationsService, SORT_OPTIONS
+
+
+@pytest.fixture
+def service():
+    db = DatabaseService(backend=SQLiteBackend(), cache=QueryCache())
+    db.table("profiles").insert({"id": "u1", "email": "a@mes.ua", "full_name": "Admin"}).execute()
+    rows = []
+    for i in range(57):
+        rows.append({
+            "operation_key": f"K-{i:03d}",
+            # Ties, nulls and PostgREST-reserved characters in sort values
+            "article": None if i % 7 == 0 else f"ART,{i % 5}",
+            "section": ["Cutting", "Sewing", None][i % 3],
+            "norm_time": None if i % 11 == 0 else round(i % 4 * 1.5, 2),
+            "created_at": f"2024-01-0{1 + i % 3}T10:00:00",
+            "created_by": "u1" if i % 2 else None,
+        })
+    db.table("operations_catalog").insert(rows).execute()
+    return OperationsService(db=db)
+
+
+def walk(service, sort_by, page_size, search=None):
+    pages, cursor = [], None
+    while True:
+        df, cursor = service.get_operations_page(search=search, sort_by=sort_by, page_size=page_size, after=cursor)
+        if df.empty:
+            break
+        pages.append(df)
+        if cursor is None:
+            break
+    return pages
+
+
+def expected_keys(service, sort_by, search=None):
+    column, desc = SORT_OPTIONS[sort_by]
+    rows = service.db.table("operations_catalog").select("*").execute().data
+    if search:
+        rows = [r for r in rows if any(search.lower() in str(r.get(c) or "").lower()
+                                       for c in ("operation_key", "article", "operation_number", "section"))]
+    present = sorted((r for r in rows if r[column] is not None),
+                     key=lambda r: (r[column], r["id"]), reverse=desc)
+    missing = sorted((r for r in rows if r[column] is None), key=lambda r: r["id"], reverse=desc)
+    ordered = missing + present if desc else present + missing
+    return [r["operation_key"] for r in ordered]
+
+
+@pytest.mark.parametrize("sort_by", list(SORT_OPTIONS))
+def test_keyset_pages_cover_every_row_once(service, sort_by):
+    pages = walk(service, sort_by, page_size=10)
+    keys = [k for df in pages for k in df["operation_key"]]
+    assert keys == expected_keys(service, sort_by)
+    assert [len(df) for df in pages] == [10, 10, 10, 10, 10, 7]
+
+
+def test_search_and_count(service):
+    assert service.count_operations() == 57
+    assert service.count_operations("art,3") == len(expected_keys(service, "article_asc", "art,3"))
+    pages = walk(service, "article_asc", page_size=4, search="art,3")
+    assert [k for df in pages for k in df["operation_key"]] == expected_keys(service, "article_asc", "art,3")
+
+
+def test_page_is_projected_and_users_formatted(service):
+    df, _ = service.get_operations_page(sort_by="created_at_asc", page_size=5)
+    assert "created_by" not in df.columns and "created_by_user" not in df.columns
+    assert set(df["created_by_fmt"]) <= {"Admin (a@mes.ua)", "-"}
@@ -0,0 +1,91 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import numpy as np
+import pandas as pd
+import pytest
+from core.database import DatabaseService, DatabaseError
+from core.local_db import SQLiteBackend
+from modules.orders.impex import ImpexService
+
+MAPPING = {
+    "order_number": "Номер", "product_name": "Виріб", "quantity": "К-сть",
+    "shipping_date": "Відвантаження", "comment": "Коментар", "article": "(Пропустити)",
+}
+
+
+class RecordingBackend(SQLiteBackend):
+    """Rejects any batch containing order 'BAD', like a server-side check constraint."""
+
+    def __init__(self):
+        super().__init__()
+        self.upserts = 0
+
+    def execute(self, query):
+        if query.action == "upsert":
+            self.upserts += 1
+            rows = query.payload if isinstance(query.payload, list) else [query.payload]
+            if any(r.get("order_number") == "BAD" for r in rows):
+                raise DatabaseError("violates check constraint")
+        return super().execute(query)
+
+
+@pytest.fixture
+def impex():
+    return ImpexService(db=DatabaseService(backend=RecordingBackend()))
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["Номер", "Виріб", "К-сть", "Відвантаження", "Коментар"])
+
+
+def test_vectorized_cleaning(impex):
+    df = frame([
+        [1001.0, " Jacket ", "5", "2024-03-01", None],
+        [1002.0, "Coat", None, "not a date", "  "],
+        [np.nan, "Skirt", 3, None, None],
+    ])
+    records, rejected = impex.clean_orders(df.rename(columns={v: k for k, v in MAPPING.items()}))
+    assert [r for r, _ in records] == [2, 3]
+    assert records[0][1] == {"order_number": "1001", "product_name": "Jacket", "quantity": 5, "shipping_date": "2024-03-01"}
+    assert records[1][1] == {"order_number": "1002", "product_name": "Coat", "quantity": 1}
+    assert rejected.errors[0]["row"] == 4
+
+
+def test_batched_upsert_with_row_errors(impex):
+    rows = [[f"N-{i}", "Jacket", i + 1, None, None] for i in range(25)]
+    rows[7][0] = "BAD"
+    rows[12][0] = "N-3"          # duplicate of Excel row 5
+    result = impex.import_orders_from_df(frame(rows), MAPPING, batch_size=10, concurrency=3)
+
+    assert result.success == 23
+    errors = {e["row"]: e for e in result.errors}
+    assert set(errors) == {9, 5}
+    assert errors[9]["key"] == "BAD"
+    assert "row 14" in errors[5]["error"]
+    assert len(impex.db.orders.select("id").execute().data) == 23
+    # 3 batches, the failing one bisected down to the bad row
+    assert impex.db.backend.upserts < 15
+
+
+def test_empty_cells_keep_existing_values(impex):
+    impex.import_orders_from_df(frame([["A-1", "Jacket", 2, "2024-05-01", "rush"]]), MAPPING)
+    result = impex.import_orders_from_df(frame([["A-1", "Jacket", 4, None, None], ["A-2", "Coat", 1, None, "new"]]), MAPPING)
+    assert result.success == 2 and result.failed == 0
+    order = impex.db.orders.select("*").eq("order_number", "A-1").single().execute().data
+    assert (order["quantity"], order["comment"], order["shipping_date"]) == (4, "rush", "2024-05-01")
+
+
+def test_progress_reports_all_rows(impex):
+    calls = []
+    rows = [[f"P-{i}", "Jacket", 1, None, "x" if i % 2 else None] for i in range(9)]
+    impex.import_orders_from_df(frame(rows), MAPPING, batch_size=2, progress=lambda d, t: calls.append((d, t)))
+    assert calls[-1] == (9, 9)
+    assert all(t == 9 for _, t in calls)
@@ -0,0 +1,42 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import pandas as pd
+
+from benchmarks.projection import calendars, compare, frame, legacy_projection
+from modules.analytics.projection import project_schedule
+
+
+def test_vectorized_projection_matches_reference():
+    df = frame(600, seed=4, parallel_share=0.2)
+    # Same answer as the old row-by-row loop
+    assert compare(project_schedule(df, calendars()), legacy_projection(df, calendars()))["max_end_diff_s"] == 0.0
+
+    # Missing durations count as zero minutes (the old loop failed on them)
+    df.loc[df.index[::37], "total_estimated_time"] = None
+    fast = project_schedule(df, calendars())
+    slow = project_schedule(df, calendars(), vectorized=False)
+    assert list(fast["id"]) == list(slow["id"])
+    assert compare(fast, slow) == {
+        "max_start_diff_s": 0.0, "max_end_diff_s": 0.0, "max_slack_diff": 0.0, "critical_mismatches": 0,
+    }
+    assert fast["start_time"].notna().all()
+
+
+def test_chain_follows_calendar():
+    df = pd.DataFrame([
+        {"id": "a", "order_id": "o", "planned_date": "2024-03-08", "sort_order": 1, "total_estimated_time": 120},
+        {"id": "b", "order_id": "o", "planned_date": "2024-03-08", "sort_order": 2, "total_estimated_time": 420},
+    ])
+    out = project_schedule(df, calendars())
+    # Friday 09:00-11:00; then 11:00-12:00, 13:00-17:00 and Monday 08:00-10:00
+    assert list(out["start_time"]) == [pd.Timestamp("2024-03-08 09:00"), pd.Timestamp("2024-03-08 11:00")]
+    assert list(out["end_time"]) == [pd.Timestamp("2024-03-08 11:00"), pd.Timestamp("2024-03-11 10:00")]
+    assert out["critical"].all()
@@ -0,0 +1,93 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import time
+from core.database import DatabaseService, QueryCache
+from core.local_db import SQLiteBackend
+
+
+class CountingBackend(SQLiteBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def execute(self, query):
+        self.calls += 1
+        return super().execute(query)
+
+
+def make_db(**cache_kwargs):
+    backend = CountingBackend()
+    db = DatabaseService(backend=backend, cache=QueryCache(**cache_kwargs))
+    section = db.sections.insert({"name": "Cutting"}).execute().data[0]
+    order = db.orders.insert({"order_number": "A-1", "product_name": "Jacket"}).execute().data[0]
+    db.order_operations.insert({"order_id": order["id"], "section_id": section["id"], "quantity": 1}).execute()
+    return db, backend, section, order
+
+
+def test_repeated_reads_hit_cache():
+    db, backend, _, _ = make_db()
+    backend.calls = 0
+    first = db.workers.select("id, full_name").execute().data
+    second = db.workers.select("id, full_name").execute().data
+    assert first == second
+    assert backend.calls == 1
+    # Different query shape is a different entry
+    db.workers.select("id").execute()
+    assert backend.calls == 2
+
+
+def test_rpc_parameters_are_part_of_the_key():
+    db, backend, _, order = make_db()
+    db.orders.update({"shipping_date": "2024-03-04"}).eq("id", order["id"]).execute()
+    backend.calls = 0
+    assert db.rpc("count_overdue_orders", {"as_of": "2024-03-01"}).data == 0
+    assert db.rpc("count_overdue_orders", {"as_of": "2024-03-10"}).data == 1
+    assert db.rpc("count_overdue_orders", {"as_of": "2024-03-01"}).data == 0
+    assert backend.calls == 2
+
+
+def test_writes_invalidate_table_and_embeds():
+    db, backend, section, _ = make_db()
+    ops = db.order_operations.select("*, sections(name)").execute().data
+    assert ops[0]["sections"] == {"name": "Cutting"}
+
+    db.sections.update({"name": "Laser"}).eq("id", section["id"]).execute()
+    ops = db.order_operations.select("*, sections(name)").execute().data
+    assert ops[0]["sections"] == {"name": "Laser"}
+
+
+def test_cascading_writes_invalidate_children():
+    db, backend, _, order = make_db()
+    assert len(db.order_operations.select("id").execute().data) == 1
+    db.orders.delete().eq("id", order["id"]).execute()
+    assert db.order_operations.select("id").execute().data == []
+
+
+def test_ttl_and_lru():
+    db, backend, _, _ = make_db(ttl=0.05, max_entries=2)
+    backend.calls = 0
+    db.workers.select("id").execute()
+    time.sleep(0.06)
+    db.workers.select("id").execute()
+    assert backend.calls == 2
+
+    db.orders.select("id").execute()
+    db.sections.select("id").execute()
+    assert len(db.cache) == 2
+    db.workers.select("id").execute()  # evicted
+    assert backend.calls == 5
+
+
+def test_cached_rows_are_copies():
+    db, _, _, _ = make_db()
+    rows = db.orders.select("*").execute().data
+    rows[0]["workers"] = "mutated"
+    assert "workers" not in db.orders.select("*").execute().data[0]
@@ -0,0 +1,92 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from datetime import datetime
+
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.scheduling.engine import parse_ts
+from modules.scheduling.services import SchedulingService
+
+MONDAY = datetime(2024, 3, 4)
+
+
+def seed(db):
+    sec = db.sections.insert({"name": "Пошив", "capacity_minutes": 240}).execute().data[0]["id"]
+    worker = db.workers.insert({"full_name": "Sewer", "section_id": sec}).execute().data[0]["id"]
+    orders = db.orders.insert([
+        {"order_number": "A", "start_date": "2024-03-04", "shipping_date": "2024-03-05",
+         "created_at": "2024-03-01T00:00:00"},
+        {"order_number": "B", "start_date": "2024-03-04", "shipping_date": "2024-03-04",
+         "created_at": "2024-03-02T00:00:00"},
+    ]).execute().data
+    db.order_operations.insert([
+        {"order_id": o["id"], "section_id": sec, "quantity": 240, "norm_time_per_unit": 1} for o in orders
+    ]).execute()
+    return worker, {o["order_number"]: o["id"] for o in orders}
+
+
+def starts(db):
+    return {r["order_id"]: parse_ts(r["scheduled_start_at"]) for r in db.order_operations.find("*")}
+
+
+def test_scenarios_leave_live_plan_untouched_until_commit():
+    db = DatabaseService(backend=SQLiteBackend())
+    worker, ids = seed(db)
+    service = SchedulingService(db)
+    service.replan_all(finite=True)
+    live = starts(db)
+    # Half a day of sewing per day: A on Monday, B (due Monday) on Tuesday
+    assert (live[ids["A"]], live[ids["B"]]) == (MONDAY.replace(hour=8), MONDAY.replace(day=5, hour=8))
+
+    snapshot = service.snapshot(now=MONDAY)
+    rush = snapshot.scenario("rush B").rush(ids["B"]).run(finite=True)
+    sick = snapshot.scenario("sick").absent(worker, MONDAY, MONDAY.replace(day=5)).run(finite=True)
+    assert starts(db) == live
+
+    # Rushing B swaps the days and nothing ships late any more
+    assert {r["order_id"]: r["new_start"] for r in rush.moved} == {
+        ids["B"]: MONDAY.replace(hour=8), ids["A"]: MONDAY.replace(day=5, hour=8),
+    }
+    assert [r["order_number"] for r in rush.live_late] == ["B"]
+    assert rush.late == []
+    # Nobody else can sew on Monday: A loses its worker, the week gets tighter
+    assert sick.plan.unassigned == [r["id"] for r in db.order_operations.find("id", {"order_id": ids["A"]})]
+    assert sick.utilization[0]["live"] == 480 / 2400
+    assert sick.utilization[0]["scenario"] == 480 / 1920
+
+    # Written with the factory offset, like Plan.rows()
+    assert all(datetime.fromisoformat(r["scheduled_start_at"]).tzinfo for r in rush.rows())
+    written = service.commit_scenario(rush, snapshot)
+    assert written.success == 2 and not written.errors
+    assert starts(db)[ids["B"]] == MONDAY.replace(hour=8)
+    # The live plan moved on: the old snapshot can no longer be committed
+    assert service.commit_scenario(sick, snapshot) is None
+
+
+def test_scenarios_and_worker_slots_match_skills_by_catalog_key():
+    db = DatabaseService(backend=SQLiteBackend())
+    sew, cut = [r["id"] for r in db.sections.insert([{"name": "Пошив"}, {"name": "Крій"}]).execute().data]
+    collar = db.operations_catalog.insert({"operation_key": "collar", "section": "Пошив"}).execute().data[0]["id"]
+    # Only a cutter who lists the catalog key can do the operation
+    worker = db.workers.insert({"full_name": "Collar", "section_id": cut, "operation_types": ["collar"]}) \
+        .execute().data[0]["id"]
+    order = db.orders.insert({"order_number": "C", "start_date": "2024-03-04"}).execute().data[0]["id"]
+    db.order_operations.insert({"order_id": order, "section_id": sew, "operation_catalog_id": collar,
+                                "quantity": 60, "norm_time_per_unit": 1}).execute()
+
+    service = SchedulingService(db)
+    result = service.snapshot(now=MONDAY).scenario("plan").run()
+    assert [r["new_worker_id"] for r in result.moved] == [worker]
+    service.replan_all()
+    assert db.order_operations.find("assigned_worker_id")[0]["assigned_worker_id"] == worker
+
+    assert [w["id"] for w in service.worker_slots(sew, 60, MONDAY, catalog_id=collar)] == [worker]
+    assert service.worker_slots(sew, 60, MONDAY) == []
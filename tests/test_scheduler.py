@@ -0,0 +1,124 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from datetime import datetime
+
+import pytest
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.orders.services import OrderService
+from modules.scheduling.engine import parse_ts
+from modules.scheduling.services import SchedulingService
+
+
+class CountingBackend(SQLiteBackend):
+    def __init__(self):
+        super().__init__()
+        self.actions = []
+
+    def execute(self, query):
+        self.actions.append((query.table, query.action))
+        return super().execute(query)
+
+
+@pytest.fixture
+def db():
+    return DatabaseService(backend=CountingBackend())
+
+
+def seed(db, orders=2, ops_per_order=3):
+    sew = db.sections.insert({"name": "Пошив"}).execute().data[0]["id"]
+    db.workers.insert([
+        {"full_name": "A", "section_id": sew},
+        {"full_name": "B", "operation_types": ["Пошив"]},
+    ]).execute()
+    order_ids = []
+    for i in range(orders):
+        order = db.orders.insert({
+            "order_number": f"O-{i}", "start_date": "2024-03-04",
+        }).execute().data[0]
+        order_ids.append(order["id"])
+        db.order_operations.insert([
+            {"order_id": order["id"], "section_id": sew, "quantity": 10,
+             "norm_time_per_unit": 6, "sort_order": n}
+            for n in range(ops_per_order)
+        ]).execute()
+    return order_ids
+
+
+def plan_rows(db):
+    return db.order_operations.find(
+        "order_id, sort_order, scheduled_start_at, scheduled_end_at, assigned_worker_id"
+    )
+
+
+def test_replan_all_is_sequential_and_never_double_books(db):
+    seed(db, orders=3)
+    db.backend.actions.clear()
+
+    result = SchedulingService(db).replan_all()
+
+    assert (result.orders, result.operations, result.updated) == (3, 9, 9)
+    # One read per table, writes batched instead of an update per operation
+    writes = [a for a in db.backend.actions if a[1] != "select"]
+    assert writes == [("order_operations", "upsert")]
+
+    rows = plan_rows(db)
+    by_order = {}
+    for row in rows:
+        by_order.setdefault(row["order_id"], []).append(row)
+    for ops in by_order.values():
+        ops.sort(key=lambda r: r["sort_order"])
+        # Monday 2024-03-04, first working minute of the default shift
+        assert parse_ts(ops[0]["scheduled_start_at"]) == datetime(2024, 3, 4, 8)
+        for prev, nxt in zip(ops, ops[1:]):
+            assert prev["scheduled_end_at"] == nxt["scheduled_start_at"]
+
+    # Two qualified workers, three orders in parallel: the third one has nobody free
+    busy = {}
+    for row in rows:
+        if row["assigned_worker_id"]:
+            span = (parse_ts(row["scheduled_start_at"]), parse_ts(row["scheduled_end_at"]))
+            for other in busy.get(row["assigned_worker_id"], []):
+                assert span[1] <= other[0] or span[0] >= other[1]
+            busy.setdefault(row["assigned_worker_id"], []).append(span)
+    assert len(result.unassigned) == 3
+
+
+def test_second_run_writes_nothing_and_done_ops_stay(db):
+    order_id = seed(db, orders=1)[0]
+    service = SchedulingService(db)
+    service.replan_all()
+
+    first = db.order_operations.find("id", {"order_id": order_id}, order="sort_order")[0]["id"]
+    db.order_operations.update({"status": "done", "scheduled_start_at": "2024-03-01T08:00:00",
+                                "scheduled_end_at": "2024-03-05T08:00:00"}).eq("id", first).execute()
+
+    result = service.replan_all()
+    assert result.updated == 2
+    rows = db.order_operations.find("id, scheduled_start_at", {"order_id": order_id}, order="sort_order")
+    assert parse_ts(rows[0]["scheduled_start_at"]) == datetime(2024, 3, 1, 8)
+    # The rest of the route continues after the finished operation
+    assert parse_ts(rows[1]["scheduled_start_at"]) == datetime(2024, 3, 5, 8)
+
+    assert service.replan_all().updated == 0
+
+
+def test_single_order_respects_other_orders_bookings(db):
+    first, second = seed(db, orders=2)
+    service = OrderService(db=db)
+    assert service.auto_schedule_order(first)
+    assert service.auto_schedule_order(second)
+
+    rows = plan_rows(db)
+    workers = {(r["order_id"], r["sort_order"]): r["assigned_worker_id"] for r in rows}
+    # Same slots, so the second order gets the other worker
+    assert workers[(first, 0)] != workers[(second, 0)]
+    assert not service.auto_schedule_order("00000000-0000-0000-0000-000000000000")
@@ -0,0 +1,75 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from datetime import date
+
+from core.database import DatabaseService
+from core.instrumentation import QueryMonitor
+from core.local_db import SQLiteBackend
+from modules.analytics.services import AnalyticsService
+
+MONDAY = date(2024, 3, 4)
+
+
+def make_db():
+    monitor = QueryMonitor(slow_sink="off")
+    db = DatabaseService(backend=SQLiteBackend(), monitor=monitor)
+    cut, sew, pack = db.sections.insert([
+        {"name": "Крій", "capacity_minutes": 480},
+        {"name": "Пошив", "capacity_minutes": 960},
+        {"name": "Пакування", "capacity_minutes": 0},
+    ]).execute().data
+    db.order_operations.insert([
+        {"section_id": cut["id"], "quantity": 10, "norm_time_per_unit": 12, "assigned_worker_id": "w1",
+         "scheduled_start_at": "2024-03-04T08:00:00"},
+        {"section_id": cut["id"], "quantity": 2, "norm_time_per_unit": 60, "assigned_worker_id": "w2",
+         "scheduled_start_at": "2024-03-04T23:59:59"},
+        {"section_id": cut["id"], "quantity": 5, "norm_time_per_unit": 10, "assigned_worker_id": "w1",
+         "scheduled_start_at": "2024-03-06T10:00:00"},
+        {"section_id": sew["id"], "quantity": 48, "norm_time_per_unit": 10,
+         "scheduled_start_at": "2024-03-10T09:00:00"},
+        # Outside the window
+        {"section_id": sew["id"], "quantity": 1, "norm_time_per_unit": 60,
+         "scheduled_start_at": "2024-03-11T00:00:00"},
+        {"section_id": pack["id"], "quantity": 1, "norm_time_per_unit": 30,
+         "scheduled_start_at": "2024-03-05T12:00:00"},
+    ]).execute()
+    return db, monitor, (cut["id"], sew["id"], pack["id"])
+
+
+def test_one_matrix_for_cards_and_trends():
+    db, monitor, (cut, sew, pack) = make_db()
+    service = AnalyticsService(db=db)
+    service.refresh_facts()
+
+    monitor.reset()
+    matrix = service.get_section_utilization(MONDAY, num_days=7)
+    assert sum(v["calls"] for v in monitor.by_shape.values()) == 2
+    assert len(matrix) == 3 * 7
+
+    monitor.reset()
+    cards = service.get_section_metrics_summary(MONDAY, matrix=matrix)
+    trends = {s: service.get_section_weekly_trend(s, matrix=matrix) for s in (cut, sew, pack)}
+    assert not monitor.by_shape
+
+    assert [c["section_name"] for c in cards] == ["Крій", "Пакування", "Пошив"]
+    assert (cards[0]["scheduled_minutes"], cards[0]["utilization_percent"]) == (240, 50.0)
+    assert (cards[0]["num_operations"], cards[0]["num_workers"]) == (2, 2)
+    assert cards[2]["num_operations"] == 0
+
+    assert list(trends[cut]["date"]) == [date(2024, 3, 4 + i) for i in range(7)]
+    assert list(trends[cut]["scheduled_minutes"]) == [240, 0, 50, 0, 0, 0, 0]
+    assert list(trends[sew]["utilization_percent"]) == [0, 0, 0, 0, 0, 0, 50.0]
+    # Zero capacity reports 0% instead of dividing by zero
+    assert list(trends[pack]["scheduled_minutes"])[1] == 30
+    assert list(trends[pack]["utilization_percent"]) == [0] * 7
+
+    # The standalone calls give the same numbers
+    assert service.get_section_metrics_summary(MONDAY) == cards
@@ -0,0 +1,58 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from core.services import ServiceRegistry, SESSION
+
+
+class TrackedService:
+    created = 0
+
+    def __init__(self):
+        TrackedService.created += 1
+        self.events = []
+
+    def on_start(self):
+        self.events.append("start")
+
+    def on_rerun(self):
+        self.events.append("rerun")
+
+    def close(self):
+        self.events.append("close")
+
+
+def test_process_scope_builds_once():
+    TrackedService.created = 0
+    registry = ServiceRegistry(session_state={})
+    first = registry.get(TrackedService)
+    assert registry.get(TrackedService) is first
+    assert TrackedService.created == 1
+    assert first.events == ["start"]
+
+
+def test_session_scope_per_session():
+    registry = ServiceRegistry(session_state={})
+    registry.register("tracked", TrackedService, scope=SESSION)
+    first = registry.get("tracked")
+    assert registry.get("tracked") is first
+
+    other_session = ServiceRegistry(session_state={})
+    other_session.register("tracked", TrackedService, scope=SESSION)
+    assert other_session.get("tracked") is not first
+
+
+def test_rerun_and_reset_hooks():
+    registry = ServiceRegistry(session_state={})
+    service = registry.get(TrackedService)
+    registry.begin_rerun()
+    registry.begin_rerun()
+    registry.reset(TrackedService)
+    assert service.events == ["start", "rerun", "rerun", "close"]
+    assert registry.get(TrackedService) is not service
@@ -0,0 +1,96 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.analytics.services import AnalyticsService
+from modules.analytics.sketch import RELATIVE_ACCURACY, QuantileSketch
+from modules.orders.services import OrderService
+
+
+def test_merged_daily_sketches_match_one_pass():
+    rng = np.random.default_rng(7)
+    days = [rng.lognormal(4, 1.2, size=rng.integers(50, 500)) for _ in range(30)]
+    days[3][:10] = 0.0
+    values = np.concatenate(days)
+
+    stored = [QuantileSketch().add(d).to_dict() for d in days]
+    merged = QuantileSketch.merged(stored)
+    single = QuantileSketch().add(values)
+    assert merged.buckets == single.buckets and merged.count == len(values)
+    assert abs(merged.mean - values.mean()) < 1e-6
+
+    for q in (0.5, 0.9, 0.99):
+        exact = np.quantile(values, q, method="lower")
+        assert abs(merged.quantile(q) - exact) <= RELATIVE_ACCURACY * exact + 1e-9
+    assert merged.quantile(0.0) == 0.0
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_cycle_time_stats_per_section():
+    db = DatabaseService(backend=SQLiteBackend())
+    cut, sew = [r["id"] for r in db.sections.insert([{"name": "Крій"}, {"name": "Пошив"}]).execute().data]
+    order = db.orders.insert({"order_number": "C-1"}).execute().data[0]["id"]
+    monday = datetime(2024, 3, 4, 8)
+    rows = []
+    for day in range(5):
+        for minutes in (30, 60, 90, 120):
+            start = monday + timedelta(days=day)
+            rows.append({"order_id": order, "section_id": cut, "status": "done", "quantity": 10, "completed_quantity": 10,
+                         "actual_start_at": start.isoformat(),
+                         "actual_end_at": (start + timedelta(minutes=minutes)).isoformat()})
+    rows.append({"order_id": order, "section_id": sew, "status": "in_progress", "quantity": 5,
+                 "actual_start_at": monday.isoformat()})
+    db.order_operations.insert(rows).execute()
+
+    service = AnalyticsService(db=db)
+    service.refresh_facts()
+    stats = service.get_cycle_time_stats(date(2024, 3, 4), date(2024, 3, 8)).set_index("section_name")
+
+    cutting = stats.loc["Крій"]
+    assert cutting["timed"] == 20 and cutting["mean"] == 75
+    assert abs(cutting["p50"] - 60) <= 0.6 and abs(cutting["p99"] - 120) <= 1.2
+    # 200 pieces over five 8-hour days (default calendar 08:00-17:00 with a lunch hour)
+    assert cutting["throughput_qty_per_hour"] == 200 / 40
+    assert cutting["avg_wip"] == 1500 / 2400
+    assert stats.loc["Пошив", "wip_now"] == 1 and np.isnan(stats.loc["Пошив", "timed"])
+
+
+def test_status_updates_stamp_actual_times():
+    db = DatabaseService(backend=SQLiteBackend())
+    sec = db.sections.insert({"name": "Крій"}).execute().data[0]["id"]
+    order = db.orders.insert({"order_number": "S-1"}).execute().data[0]["id"]
+    op = db.order_operations.insert({"order_id": order, "section_id": sec, "quantity": 4}).execute().data[0]["id"]
+    orders = OrderService(db=db)
+    actuals = lambda: db.order_operations.get(op, "actual_start_at, actual_end_at")
+
+    orders.update_operation_status(op, "in_progress")
+    started = actuals()["actual_start_at"]
+    assert started and actuals()["actual_end_at"] is None
+
+    # Pausing and resuming keeps the first start
+    orders.update_operation_status(op, "paused")
+    orders.update_operation_status(op, "in_progress")
+    assert actuals()["actual_start_at"] == started
+
+    orders.update_operation_status(op, "done", quantity_done=4)
+    assert actuals()["actual_end_at"] >= started
+
+    service = AnalyticsService(db=db)
+    service.refresh_facts()
+    assert service.get_cycle_time_stats().set_index("section_name").loc["Крій", "timed"] == 1
+
+    # Reopening clears the finish
+    orders.update_operation_status(op, "in_progress")
+    assert actuals() == {"actual_start_at": started, "actual_end_at": None}
@@ -0,0 +1,104 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Mock Streamlit
+from unittest.mock import MagicMock
+sys.modules["streamlit"] = MagicMock()
+
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from core.database import DatabaseService
+from core.local_db import SQLiteBackend
+from modules.analytics.services import AnalyticsService
+from modules.scheduling.engine import format_ts, parse_ts
+from modules.scheduling.services import SchedulingService
+from modules.scheduling.workcalendar import Shift, WorkCalendar, default_shifts
+
+WEEKDAYS = default_shifts("08:00-17:00", "12:00-13:00", "1,2,3,4,5")
+
+
+def test_add_minutes_skips_breaks_nights_weekends_and_holidays():
+    cal = WorkCalendar(WEEKDAYS, holidays=[date(2024, 3, 8)], origin=date(2024, 1, 1))
+
+    assert cal.add_minutes(datetime(2024, 3, 4, 7, 0), 60) == datetime(2024, 3, 4, 9, 0)
+    assert cal.add_minutes(datetime(2024, 3, 4, 11, 30), 60) == datetime(2024, 3, 4, 13, 30)
+    assert cal.add_minutes(datetime(2024, 3, 4, 16, 30), 60) == datetime(2024, 3, 5, 8, 30)
+    # Thursday evening -> Friday is a holiday -> Monday
+    assert cal.add_minutes(datetime(2024, 3, 7, 16, 30), 60) == datetime(2024, 3, 11, 8, 30)
+    assert cal.next_working(datetime(2024, 3, 9, 10)) == datetime(2024, 3, 11, 8)
+    # Four working days of 8 hours in the holiday week
+    assert cal.working_minutes(datetime(2024, 3, 4), datetime(2024, 3, 11)) == 4 * 480
+    # Outside the precomputed horizon the arrays are rebuilt
+    assert cal.add_minutes(datetime(2030, 3, 4, 8), 60) == datetime(2030, 3, 4, 9)
+
+    night = WorkCalendar([Shift(d, 22 * 60, 6 * 60, [(120, 150)]) for d in range(1, 8)], origin=date(2024, 1, 1))
+    # 22:00-02:00, break, 02:30-06:00, then the next night
+    assert night.add_minutes(datetime(2024, 3, 4, 23), 480) == datetime(2024, 3, 5, 23, 30)
+
+
+def test_vectorized_matches_scalar_and_is_fast():
+    cal = WorkCalendar(WEEKDAYS, origin=date(2024, 1, 1), days=400)
+    rng = np.random.default_rng(3)
+    n = 100_000
+    starts = np.datetime64("2024-01-01T00:00") + rng.integers(0, 365 * 24 * 60, n).astype("timedelta64[m]")
+    minutes = rng.integers(1, 2000, n).astype(float)
+
+    started = time.perf_counter()
+    ends = cal.add_minutes_many(starts, minutes)
+    elapsed = time.perf_counter() - started
+    assert elapsed < 1.0
+
+    for i in rng.integers(0, n, 200):
+        start = datetime.fromisoformat(str(starts[i])[:19])
+        assert np.datetime64(cal.add_minutes(start, minutes[i]), "ns") == ends[i]
+
+
+def test_section_shifts_and_absences_drive_the_schedule():
+    db = DatabaseService(backend=SQLiteBackend())
+    sec = db.sections.insert({"name": "Крій"}).execute().data[0]["id"]
+    first, second = db.workers.insert([
+        {"full_name": "A", "section_id": sec}, {"full_name": "B", "section_id": sec},
+    ]).execute().data
+    # The cutting section works 06:00-14:00 without a break
+    db.table("work_shifts").insert([
+        {"section_id": sec, "weekday": d, "start_time": "06:00", "end_time": "14:00"} for d in range(1, 6)
+    ]).execute()
+    db.table("worker_absences").insert({
+        "worker_id": first["id"], "start_at": "2024-03-04T00:00:00", "end_at": "2024-03-09T00:00:00",
+    }).execute()
+    order = db.orders.insert({"order_number": "C-1", "start_date": "2024-03-04"}).execute().data[0]
+    db.order_operations.insert({
+        "order_id": order["id"], "section_id": sec, "quantity": 10, "norm_time_per_unit": 60,
+    }).execute()
+
+    SchedulingService(db).replan_all()
+    op = db.order_operations.find("scheduled_start_at, scheduled_end_at, assigned_worker_id")[0]
+    assert op["scheduled_start_at"].startswith("2024-03-04T06:00")
+    # 600 minutes: 480 on Monday, 120 on Tuesday morning
+    assert op["scheduled_end_at"].startswith("2024-03-05T08:00")
+    assert op["assigned_worker_id"] == second["id"]
+
+    db.order_operations.update({"planned_date": "2024-03-04"}).eq("order_id", order["id"]).execute()
+    plan = AnalyticsService(db=db).get_planning_data()
+    assert plan.loc[0, "start_time"] == datetime(2024, 3, 4, 9)
+    assert plan.loc[0, "end_time"] == datetime(2024, 3, 5, 11)
+
+
+def test_stored_utc_times_are_read_in_factory_time():
+    # Supabase returns timestamptz in UTC; shifts are Europe/Kyiv wall-clock times (UTC+2 in March)
+    start = parse_ts("2024-03-04T06:00:00+00:00")
+    assert start == datetime(2024, 3, 4, 8, 0)
+    # PostgREST forms Python 3.9's fromisoformat rejects
+    assert parse_ts("2024-03-04T06:00:00.12+00") == datetime(2024, 3, 4, 8, 0, 0, 120000)
+    assert parse_ts("2024-03-04T06:00:00Z") == start
+    cal = WorkCalendar(WEEKDAYS, origin=date(2024, 1, 1))
+    assert cal.next_working(start) == start
+    assert format_ts(cal.add_minutes(start, 60)) == "2024-03-04T09:00:00+02:00"
+    # Naive values (date columns, the SQLite stand-in) are factory time already
+    assert parse_ts("2024-07-01T08:00:00") == datetime(2024, 7, 1, 8, 0)
+    assert format_ts(datetime(2024, 7, 1, 8, 0)) == "2024-07-01T08:00:00+03:00"